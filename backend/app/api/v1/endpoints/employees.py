@@ -1,7 +1,7 @@
 # hr_software/app/api/v1/endpoints/employees.py
 
 from fastapi import (
-    APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response
+    APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response, Request
 )
 from fastapi.responses import FileResponse
 from sqlmodel import Session
@@ -11,52 +11,39 @@ import json
 import pydantic
 from datetime import date, datetime  # Ensure datetime is imported
 
-from app.crud import crud_employee, crud_user, crud_workflow  # Added crud_workflow
+from app.crud import crud_employee, crud_user, crud_org
 from app.schemas.employee import (
     EmployeeProfileCreate, EmployeeProfileRead, EmployeeProfileUpdate,
-    EmployeeProfileReadWithUser,
+    EmployeeProfileReadWithUser, EmployeeSearchResult,
     DepartmentCreate, DepartmentRead, DepartmentUpdate,
     EmployeeDocumentCreate, EmployeeDocumentRead,
+    DocumentUploadSessionCreate, DocumentUploadSessionRead, DocumentSignedUrl, EmployeeDocumentSearchResult,
     OnboardingCompletionRequest, OffboardingInitiationRequest
 )
 from app.models.user import User
-from app.models.enums import UserRole, EmploymentStatus, DocumentType  # Using enums.py
+from app.models.enums import UserRole, EmploymentStatus, DocumentType, DocumentProcessingStatus, StorageTier  # Using enums.py
 from app.models.employee import EmployeeProfile, Department, EmployeeDocument
 from app.core.db import get_db
+from app.core.config import settings
 from app.api import deps
+from app.services.directory_service import EmployeeDirectoryService
+from app.services.org_tree_service import is_in_reporting_line
+from app.services.search_service import employee_search_index
+from app.services.document_storage import document_store, DocumentTooLargeError
+from app.services.document_serving import build_document_response, sign_document_url, verify_document_signature
+from app.services.document_pipeline import document_pipeline
 
 router = APIRouter()
 
 
 # --- Helper function to build EmployeeProfileReadWithUser ---
 def _build_employee_profile_read_with_user(db: Session, profile_orm: EmployeeProfile) -> EmployeeProfileReadWithUser:
-    user_model_instance = profile_orm.user
-    manager_email_str: Optional[str] = None
-
-    if profile_orm.manager_id:
-        manager_profile_temp = crud_employee.get_employee_profile(db, profile_orm.manager_id)
-        if manager_profile_temp and manager_profile_temp.user:
-            manager_email_str = manager_profile_temp.user.email
-
-    validated_documents_list: List[EmployeeDocumentRead] = []
-    if profile_orm.documents:
-        for doc_orm_instance in profile_orm.documents:
-            validated_documents_list.append(EmployeeDocumentRead.model_validate(doc_orm_instance.model_dump()))
-
-    if not user_model_instance:
+    profile_read = EmployeeDirectoryService(db).get_profile(profile_orm.id)
+    if not profile_read:
         # This should be a rare case if data integrity is maintained
         raise HTTPException(status_code=500,
                             detail=f"Data integrity issue: User not found for EmployeeProfile ID {profile_orm.id}")
-
-    return EmployeeProfileReadWithUser(
-        **profile_orm.model_dump(),
-        user_email=user_model_instance.email,
-        user_first_name=user_model_instance.first_name,
-        user_last_name=user_model_instance.last_name,
-        user_role=user_model_instance.role.value,
-        manager_email=manager_email_str,
-        documents=validated_documents_list
-    )
+    return profile_read
 
 
 # --- Department Endpoints ( 그대로 유지 ) ---
@@ -99,17 +86,8 @@ def create_employee_profile_api(*, db: Session = Depends(get_db), profile_in: Em
     if not user:
         raise HTTPException(status_code=404, detail=f"User with ID {profile_in.user_id} not found.")
     try:
+        # Publishes EmploymentStatusChanged; the triggered workflow is assigned in the background
         profile_orm = crud_employee.create_employee_profile(db=db, employee_in=profile_in)
-
-        # --- Auto-assign workflow on profile creation if status triggers it ---
-        if profile_orm and profile_orm.employment_status:
-            template_to_assign = crud_workflow.get_workflow_template_by_trigger_status(db,
-                                                                                       profile_orm.employment_status)
-            if template_to_assign:
-                crud_workflow.assign_workflow_to_employee(db, profile_orm.id, template_to_assign.id)
-                print(
-                    f"Auto-assigned workflow '{template_to_assign.name}' to employee {profile_orm.id} for status {profile_orm.employment_status.value}")
-        # --- End auto-assign ---
         return _build_employee_profile_read_with_user(db, profile_orm)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -120,19 +98,53 @@ def read_employee_profiles_api(
         db: Session = Depends(get_db),
         skip: int = Query(0, ge=0),
         limit: int = Query(default=100, ge=1, le=200),
+        include_documents: bool = Query(True, description="Batch-load each employee's documents"),
+        include_workflows: bool = Query(False, description="Batch-load a summary of each employee's workflows"),
+        all_levels: bool = Query(False, description="For managers: include indirect reports, not only direct ones"),
         current_user: User = Depends(deps.allow_admin_or_manager)
 ):
-    profiles_orm_list: List[EmployeeProfile] = []
+    directory = EmployeeDirectoryService(db)
     if current_user.role == UserRole.MANAGER:
         if not current_user.employee_profile:
             raise HTTPException(status_code=403, detail="Manager does not have an associated employee profile.")
-        profiles_orm_list = crud_employee.get_employee_profiles(db, skip=skip, limit=limit,
-                                                                manager_id=current_user.employee_profile.id)
+        return directory.get_profiles_page(skip=skip, limit=limit, manager_id=current_user.employee_profile.id,
+                                           include_indirect_reports=all_levels,
+                                           include_documents=include_documents,
+                                           include_workflows=include_workflows)
     elif current_user.role == UserRole.ADMIN:
-        profiles_orm_list = crud_employee.get_employee_profiles(db, skip=skip, limit=limit)
+        return directory.get_profiles_page(skip=skip, limit=limit, include_documents=include_documents,
+                                           include_workflows=include_workflows)
     else:
         raise HTTPException(status_code=403, detail="User role not authorized.")
-    return [_build_employee_profile_read_with_user(db, p) for p in profiles_orm_list]
+
+
+# Declared before /{employee_id} so "search" is not parsed as an id
+@router.get("/search", response_model=List[EmployeeSearchResult])
+def search_employees_api(
+        q: str = Query(..., min_length=1, max_length=100, description="Name, email, job title or department; prefixes and typos match"),
+        limit: int = Query(default=20, ge=1, le=100),
+        employment_status: Optional[EmploymentStatus] = Query(None),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(deps.allow_admin_or_manager)
+):
+    visible_ids = None
+    if current_user.role == UserRole.MANAGER:
+        if not current_user.employee_profile:
+            raise HTTPException(status_code=403, detail="Manager does not have an associated employee profile.")
+        # Managers only find people in their reporting line (direct or indirect)
+        visible_ids = set(crud_org.get_subordinate_ids(db, current_user.employee_profile.id))
+    employee_search_index.ensure_loaded(db)
+    results = employee_search_index.search(q, limit=limit, employment_status=employment_status, visible_ids=visible_ids)
+    return [
+        EmployeeSearchResult(
+            id=employee.id, user_id=employee.user_id, user_email=employee.user_email,
+            user_first_name=employee.user_first_name, user_last_name=employee.user_last_name,
+            job_title=employee.job_title, department_id=employee.department_id,
+            department_name=employee.department_name, employment_status=employee.employment_status,
+            score=score,
+        )
+        for employee, score in results
+    ]
 
 
 @router.get("/{employee_id}", response_model=EmployeeProfileReadWithUser)
@@ -144,13 +156,45 @@ def read_employee_profile_api(employee_id: int, db: Session = Depends(get_db),
     # ... (Authorization logic from previous full code) ...
     is_own_profile = (current_user.employee_profile and current_user.employee_profile.id == employee_id)
     is_manager_of_employee = (current_user.role == UserRole.MANAGER and
-                              current_user.employee_profile and
-                              db_employee_orm.manager_id == current_user.employee_profile.id)
+                              is_in_reporting_line(db, current_user.employee_profile, employee_id))
     if not (current_user.role == UserRole.ADMIN or is_own_profile or is_manager_of_employee):
         raise HTTPException(status_code=403, detail="Not authorized to view this profile")
     return _build_employee_profile_read_with_user(db, db_employee_orm)
 
 
+@router.get("/{employee_id}/reports", response_model=List[EmployeeProfileReadWithUser])
+def read_employee_reports_api(
+        employee_id: int,
+        all_levels: bool = Query(True, description="Include indirect reports at every level below the employee"),
+        include_documents: bool = Query(False),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(deps.allow_admin_or_manager)
+):
+    if not crud_employee.get_employee_profile(db, employee_id=employee_id):
+        raise HTTPException(status_code=404, detail="Employee profile not found")
+    is_self_or_above = (current_user.employee_profile and
+                        (current_user.employee_profile.id == employee_id or
+                         is_in_reporting_line(db, current_user.employee_profile, employee_id)))
+    if not (current_user.role == UserRole.ADMIN or is_self_or_above):
+        raise HTTPException(status_code=403, detail="Not authorized to view this team")
+    report_ids = crud_org.get_subordinate_ids(db, employee_id, max_depth=None if all_levels else 1)
+    return EmployeeDirectoryService(db).get_profiles(report_ids, include_documents=include_documents)
+
+
+@router.get("/{employee_id}/chain-of-command", response_model=List[EmployeeProfileReadWithUser])
+def read_chain_of_command_api(employee_id: int, db: Session = Depends(get_db),
+                              current_user: User = Depends(deps.allow_all_authenticated)):
+    if not crud_employee.get_employee_profile(db, employee_id=employee_id):
+        raise HTTPException(status_code=404, detail="Employee profile not found")
+    is_own_profile = (current_user.employee_profile and current_user.employee_profile.id == employee_id)
+    if not (current_user.role == UserRole.ADMIN or is_own_profile or
+            is_in_reporting_line(db, current_user.employee_profile, employee_id)):
+        raise HTTPException(status_code=403, detail="Not authorized to view this profile")
+    # Nearest manager first, up to the top of the organisation
+    return EmployeeDirectoryService(db).get_profiles(crud_org.get_chain_of_command(db, employee_id),
+                                                     include_documents=False)
+
+
 @router.put("/{employee_id}", response_model=EmployeeProfileReadWithUser)
 def update_employee_profile_api(
         employee_id: int,
@@ -163,8 +207,6 @@ def update_employee_profile_api(
     if db_employee_orm is None:
         raise HTTPException(status_code=404, detail="Employee profile not found")
 
-    old_status = db_employee_orm.employment_status  # Store old status
-
     # ... (Authorization logic from previous full code) ...
     """is_manager_of_employee = (current_user.role == UserRole.MANAGER and
                               current_user.employee_profile and
@@ -172,21 +214,12 @@ def update_employee_profile_api(
     if not (current_user.role == UserRole.ADMIN or is_manager_of_employee):
         raise HTTPException(status_code=403, detail="Not authorized to update this profile")"""
 
-    updated_profile_orm = crud_employee.update_employee_profile(db=db, db_employee=db_employee_orm,
-                                                                employee_in=profile_in)
-
-    new_status = updated_profile_orm.employment_status
-    if old_status != new_status:
-        template_to_assign = crud_workflow.get_workflow_template_by_trigger_status(db, new_status)
-        if template_to_assign:
-            assigned = crud_workflow.assign_workflow_to_employee(db, updated_profile_orm.id, template_to_assign.id)
-            if assigned:
-                print(
-                    f"Auto-assigned workflow '{template_to_assign.name}' to employee {updated_profile_orm.id} due to status change from {old_status.value} to {new_status.value}")
-            else:
-                print(
-                    f"Failed or duplicate auto-assign workflow for {updated_profile_orm.id} and status {new_status.value}")
-
+    try:
+        updated_profile_orm = crud_employee.update_employee_profile(db=db, db_employee=db_employee_orm,
+                                                                    employee_in=profile_in)
+    except ValueError as e:  # e.g. the new manager reports to this employee
+        raise HTTPException(status_code=400, detail=str(e))
+    # A status change is published by crud_employee and its workflow assigned in the background
     return _build_employee_profile_read_with_user(db, updated_profile_orm)
 
 
@@ -275,20 +308,35 @@ async def upload_employee_document_api(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Malformed JSON string for document metadata.")
 
+    max_bytes = settings.MAX_DOCUMENT_UPLOAD_BYTES
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"File exceeds the maximum upload size of {max_bytes} bytes.")
+    try:
+        # Written and hashed in worker threads, so the event loop is not blocked by disk I/O
+        staged = await document_store.save_stream(document_store.iter_upload(file), max_bytes)
+    except DocumentTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except OSError as ioe:
+        print(f"SERVER_ERROR: Failed to save document to disk: {ioe}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail="Could not save document due to a server storage issue.")
+    finally:
+        await file.close()
+
     try:
         document = crud_employee.create_employee_document(
             db=db,
             employee_id=employee_id,  # This is EmployeeProfile.id of the target
             doc_meta_data=doc_meta_data,
-            file_to_upload=file
+            file_name=file.filename,
+            staged=staged,
+            content_type=file.content_type
         )
+        document_pipeline.enqueue(document.id)  # Thumbnails, text and virus scan happen after the response
         return document
     except ValueError as ve:  # e.g., from CRUD if employee_id was somehow re-validated and not found
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
-    except IOError as ioe:
-        print(f"SERVER_ERROR: Failed to save document to disk: {ioe}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail="Could not save document due to a server storage issue.")
     except Exception as e:
         # Log the full error for debugging
         import traceback
@@ -297,32 +345,185 @@ async def upload_employee_document_api(
                             detail="An unexpected error occurred while uploading the document.")
 
 
+# --- Resumable (chunked) document uploads ---
+# 1. POST /{employee_id}/documents/uploads with the metadata and total size
+# 2. PUT /documents/uploads/{upload_id}?offset=N with raw bytes, repeated; GET the session to find where to resume
+# 3. POST /documents/uploads/{upload_id}/complete to turn it into an EmployeeDocument
+def _get_own_upload_session(db: Session, upload_id: str, current_user: User):
+    upload_session = crud_employee.get_upload_session(db, upload_id=upload_id)
+    if not upload_session:
+        raise HTTPException(status_code=404, detail="Upload not found or expired.")
+    if upload_session.created_by_user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to use this upload.")
+    return upload_session
+
+
+@router.post("/{employee_id}/documents/uploads", response_model=DocumentUploadSessionRead,
+             status_code=status.HTTP_201_CREATED)
+def create_document_upload_session_api(employee_id: int, session_in: DocumentUploadSessionCreate,
+                                       db: Session = Depends(get_db),
+                                       current_user: User = Depends(deps.allow_all_authenticated)):
+    # Same access rule as the single-request upload above
+    if not crud_employee.get_employee_profile(db, employee_id=employee_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target employee profile not found")
+    if session_in.total_size <= 0 or session_in.total_size > settings.MAX_DOCUMENT_UPLOAD_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"total_size must be between 1 and {settings.MAX_DOCUMENT_UPLOAD_BYTES} bytes.")
+    return crud_employee.create_upload_session(db, employee_id=employee_id, created_by_user_id=current_user.id,
+                                               session_in=session_in)
+
+
+@router.get("/documents/uploads/{upload_id}", response_model=DocumentUploadSessionRead)
+def read_document_upload_session_api(upload_id: str, db: Session = Depends(get_db),
+                                     current_user: User = Depends(deps.allow_all_authenticated)):
+    return _get_own_upload_session(db, upload_id, current_user)
+
+
+@router.put("/documents/uploads/{upload_id}", response_model=DocumentUploadSessionRead)
+async def upload_document_chunk_api(upload_id: str, request: Request,
+                                    offset: int = Query(..., ge=0, description="Byte offset of this chunk"),
+                                    db: Session = Depends(get_db),
+                                    current_user: User = Depends(deps.allow_all_authenticated)):
+    upload_session = _get_own_upload_session(db, upload_id, current_user)
+    if offset != upload_session.received_bytes:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Expected a chunk at offset {upload_session.received_bytes}.")
+    try:
+        # The request body is streamed straight to the partial file
+        received = await document_store.append_partial(upload_id, offset, request.stream(), upload_session.total_size)
+    except DocumentTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return crud_employee.update_upload_session_progress(db, upload_session, received)
+
+
+@router.post("/documents/uploads/{upload_id}/complete", response_model=EmployeeDocumentRead)
+async def complete_document_upload_api(upload_id: str, db: Session = Depends(get_db),
+                                       current_user: User = Depends(deps.allow_all_authenticated)):
+    upload_session = _get_own_upload_session(db, upload_id, current_user)
+    if upload_session.received_bytes != upload_session.total_size:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Upload incomplete: {upload_session.received_bytes} of {upload_session.total_size} bytes received.")
+    staged = await document_store.complete_partial(upload_id)
+    doc_meta_data = EmployeeDocumentCreate(document_type=upload_session.document_type,
+                                           description=upload_session.description)
+    try:
+        document = crud_employee.create_employee_document(
+            db=db, employee_id=upload_session.employee_id, doc_meta_data=doc_meta_data,
+            file_name=upload_session.file_name, staged=staged, content_type=upload_session.content_type
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    crud_employee.delete_upload_session(db, upload_session)
+    document_pipeline.enqueue(document.id)
+    return document
+
+
+@router.delete("/documents/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_document_upload_api(upload_id: str, db: Session = Depends(get_db),
+                              current_user: User = Depends(deps.allow_all_authenticated)):
+    crud_employee.delete_upload_session(db, _get_own_upload_session(db, upload_id, current_user))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/{employee_id}/documents/", response_model=List[EmployeeDocumentRead])
 def list_employee_documents_api(employee_id: int, db: Session = Depends(get_db),
                                 current_user: User = Depends(deps.allow_all_authenticated)):
     db_employee_orm = crud_employee.get_employee_profile(db, employee_id=employee_id)
     if not db_employee_orm: raise HTTPException(status_code=404, detail="Employee not found")
     is_own = (current_user.employee_profile and current_user.employee_profile.id == employee_id)
-    is_manager = (
-                current_user.role == UserRole.MANAGER and current_user.employee_profile and db_employee_orm.manager_id == current_user.employee_profile.id)
+    is_manager = (current_user.role == UserRole.MANAGER and
+                  is_in_reporting_line(db, current_user.employee_profile, employee_id))
     if not (current_user.role == UserRole.ADMIN or is_own or is_manager):
         raise HTTPException(status_code=403, detail="Not authorized.")
     return crud_employee.get_employee_documents(db, employee_id=employee_id)
 
 
-@router.get("/documents/{document_id}/download", response_class=FileResponse)
-async def download_employee_document_api(document_id: int, db: Session = Depends(get_db),
-                                         current_user: User = Depends(deps.allow_all_authenticated)):
-    doc = crud_employee.get_employee_document(db, document_id=document_id)
+def _get_viewable_document(db: Session, document_id: int, current_user: User) -> EmployeeDocument:
+    doc, viewer_depth = crud_employee.get_document_for_viewer(db, document_id, viewer_user_id=current_user.id)
     if not doc: raise HTTPException(status_code=404, detail="Document not found")
-    emp = crud_employee.get_employee_profile(db, employee_id=doc.employee_id)
-    is_own = (current_user.employee_profile and current_user.employee_profile.id == doc.employee_id)
-    is_manager = (
-                current_user.role == UserRole.MANAGER and current_user.employee_profile and emp and emp.manager_id == current_user.employee_profile.id)
+    is_own = viewer_depth == 0
+    is_manager = current_user.role == UserRole.MANAGER and viewer_depth is not None and viewer_depth > 0
     if not (current_user.role == UserRole.ADMIN or is_own or is_manager):
         raise HTTPException(status_code=403, detail="Not authorized.")
-    if not os.path.exists(doc.file_path): raise HTTPException(status_code=404, detail="File not found on server.")
-    return FileResponse(path=doc.file_path, filename=doc.file_name, media_type='application/octet-stream')
+    return doc
+
+
+@router.get("/documents/search", response_model=List[EmployeeDocumentSearchResult])
+def search_employee_documents_api(
+        q: str = Query(..., min_length=2, max_length=200, description="Words to look for inside processed documents"),
+        limit: int = Query(default=20, ge=1, le=100),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(deps.allow_all_authenticated)
+):
+    viewer_employee_id = None
+    if current_user.role != UserRole.ADMIN:
+        if not current_user.employee_profile:
+            raise HTTPException(status_code=403, detail="User does not have an associated employee profile.")
+        viewer_employee_id = current_user.employee_profile.id
+    # Managers search their reporting line, employees only their own documents
+    results = crud_employee.search_employee_documents(
+        db, q, limit=limit, viewer_employee_id=viewer_employee_id,
+        include_reports=current_user.role == UserRole.MANAGER
+    )
+    return [EmployeeDocumentSearchResult(document=document.model_dump(), snippet=snippet) for document, snippet in results]
+
+
+@router.get("/documents/{document_id}/thumbnails/{page}", response_class=FileResponse)
+def read_document_thumbnail_api(document_id: int, page: int, db: Session = Depends(get_db),
+                                current_user: User = Depends(deps.allow_all_authenticated)):
+    doc = _get_viewable_document(db, document_id, current_user)
+    if not doc.content_hash or not 1 <= page <= doc.thumbnail_count:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    path = document_store.thumbnail_path(doc.content_hash, page)
+    if not os.path.isfile(path): raise HTTPException(status_code=404, detail="Thumbnail not found")
+    # Previews belong to the content hash, so they never change once written
+    return FileResponse(path=path, media_type="image/png", headers={"Cache-Control": "private, max-age=86400"})
+
+
+@router.post("/documents/{document_id}/reprocess", response_model=EmployeeDocumentRead,
+             dependencies=[Depends(deps.allow_admin_only)])
+def reprocess_employee_document_api(document_id: int, db: Session = Depends(get_db)):
+    doc = crud_employee.get_employee_document(db, document_id=document_id)
+    if not doc: raise HTTPException(status_code=404, detail="Document not found")
+    doc.processing_status = DocumentProcessingStatus.PENDING
+    db.add(doc)
+    db.commit()
+    db.refresh(doc)
+    document_pipeline.enqueue(doc.id, reuse_results=False)  # e.g. after the scanner's signatures were updated
+    return doc
+
+
+def _document_response(request: Request, db: Session, doc: EmployeeDocument) -> Response:
+    # Cold-tier documents are read from their pack archive
+    archived = crud_employee.get_archived_blob(db, doc.content_hash) if doc.storage_tier == StorageTier.COLD else None
+    return build_document_response(request, doc, archived=archived)
+
+
+@router.get("/documents/{document_id}/download", response_class=FileResponse)
+def download_employee_document_api(document_id: int, request: Request, db: Session = Depends(get_db),
+                                   current_user: User = Depends(deps.allow_all_authenticated)):
+    # Supports If-None-Match (304) and Range (206); see document_serving.build_document_response
+    return _document_response(request, db, _get_viewable_document(db, document_id, current_user))
+
+
+@router.get("/documents/{document_id}/signed-url", response_model=DocumentSignedUrl)
+def create_document_signed_url_api(document_id: int, request: Request, db: Session = Depends(get_db),
+                                   current_user: User = Depends(deps.allow_all_authenticated)):
+    doc = _get_viewable_document(db, document_id, current_user)
+    query, expires = sign_document_url(doc.id)
+    url = f"{request.url_for('download_signed_employee_document_api', document_id=doc.id)}?{query}"
+    return DocumentSignedUrl(url=url, expires_at=datetime.utcfromtimestamp(expires))
+
+
+@router.get("/documents/signed/{document_id}", response_class=FileResponse)
+def download_signed_employee_document_api(document_id: int, request: Request, expires: int, signature: str,
+                                          db: Session = Depends(get_db)):
+    # No Authorization header: the signature was issued by /signed-url after the usual access check
+    if not verify_document_signature(document_id, expires, signature):
+        raise HTTPException(status_code=403, detail="Link is invalid or has expired.")
+    doc = crud_employee.get_employee_document(db, document_id=document_id)
+    if not doc: raise HTTPException(status_code=404, detail="Document not found")
+    return _document_response(request, db, doc)
 
 
 @router.delete("/documents/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -330,9 +531,8 @@ async def delete_employee_document_api(document_id: int, db: Session = Depends(g
                                        current_user: User = Depends(deps.allow_admin_or_manager)):
     doc = crud_employee.get_employee_document(db, document_id=document_id)
     if not doc: raise HTTPException(status_code=404, detail="Document not found")
-    emp = crud_employee.get_employee_profile(db, employee_id=doc.employee_id)
-    is_manager = (
-                current_user.role == UserRole.MANAGER and current_user.employee_profile and emp and emp.manager_id == current_user.employee_profile.id)
+    is_manager = (current_user.role == UserRole.MANAGER and
+                  is_in_reporting_line(db, current_user.employee_profile, doc.employee_id))
     if not (current_user.role == UserRole.ADMIN or is_manager):
         raise HTTPException(status_code=403, detail="Not authorized.")
     if not crud_employee.delete_employee_document(db, document_id=document_id):
@@ -351,20 +551,13 @@ async def complete_onboarding_api(request: OnboardingCompletionRequest, db: Sess
     # TODO: Authorization: Ensure current_user (manager/admin) can complete onboarding for this employee
 
     if employee_orm.employment_status == EmploymentStatus.ONBOARDING:
-        old_status = employee_orm.employment_status
         new_status = EmploymentStatus.ACTIVE
         hire_date_to_set = employee_orm.hire_date if employee_orm.hire_date else date.today()
 
-        updated_profile_orm = crud_employee.update_employee_profile(
+        # The ACTIVE status change triggers workflow assignment in the background
+        crud_employee.update_employee_profile(
             db, employee_orm, EmployeeProfileUpdate(employment_status=new_status, hire_date=hire_date_to_set)
         )
-
-        if old_status != new_status:  # Trigger workflow assignment
-            template_to_assign = crud_workflow.get_workflow_template_by_trigger_status(db, new_status)
-            if template_to_assign:
-                assigned = crud_workflow.assign_workflow_to_employee(db, updated_profile_orm.id, template_to_assign.id)
-                if assigned: print(f"Auto-assigned workflow '{template_to_assign.name}' for status {new_status.value}")
-
         return {"message": f"Onboarding completed. Status set to {new_status.value}."}
     elif employee_orm.employment_status == EmploymentStatus.ACTIVE:
         return {"message": f"Employee {employee_orm.id} is already ACTIVE."}
@@ -415,13 +608,8 @@ async def initiate_offboarding_api(request: OffboardingInitiationRequest, db: Se
         return {"message": "No changes to apply for offboarding."}
 
     update_schema = EmployeeProfileUpdate(**filtered_update_data)
+    # A status change triggers workflow assignment in the background
     updated_profile_orm = crud_employee.update_employee_profile(db, employee_orm, update_schema)
 
-    if old_status != new_status and new_status is not None:  # Trigger workflow assignment
-        template_to_assign = crud_workflow.get_workflow_template_by_trigger_status(db, new_status)
-        if template_to_assign:
-            assigned = crud_workflow.assign_workflow_to_employee(db, updated_profile_orm.id, template_to_assign.id)
-            if assigned: print(f"Auto-assigned workflow '{template_to_assign.name}' for status {new_status.value}")
-
     return {
         "message": f"Offboarding process updated/initiated for employee {employee_orm.id}. Status: {updated_profile_orm.employment_status.value}"}
\ No newline at end of file
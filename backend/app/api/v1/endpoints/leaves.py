@@ -20,6 +20,7 @@ from app.schemas.leave import (
 )
 from app.crud import crud_leave, crud_employee, crud_user  # CRUD operations
 from app.services.leave_service import LeaveCalculationService  # Business logic
+from app.services.org_tree_service import is_in_reporting_line
 
 router = APIRouter()
 
@@ -163,7 +164,7 @@ def read_employee_leave_balances_api(
         raise HTTPException(status_code=404, detail="Employee profile not found")
 
     if current_user.role == UserRole.MANAGER:
-        if not current_user.employee_profile or employee_profile.manager_id != current_user.employee_profile.id:
+        if not is_in_reporting_line(db, current_user.employee_profile, employee_profile.id):
             raise HTTPException(status_code=403, detail="Not authorized to view this employee's balances")
 
     target_year = year if year is not None else datetime.utcnow().year
@@ -7,14 +7,22 @@ from app.api import deps
 from app.models.user import User, UserRole
 from app.models.employee import EmployeeProfile
 from app.models.performance import GoalStatus, AppraisalCycleStatus  # Import enums
+from app.models.enums import ReviewStatus
 from app.schemas.performance import (
     GoalCreate, GoalRead, GoalUpdate,
     AppraisalCycleCreate, AppraisalCycleRead, AppraisalCycleUpdate,
-    PerformanceReviewCreatePayload, PerformanceReviewRead,
-    SelfEvaluationSubmit, ManagerFeedbackSubmit
+    PerformanceReviewCreatePayload, PerformanceReviewInitiationResult, PerformanceReviewRead,
+    PerformanceReviewPage,
+    SelfEvaluationSubmit, ManagerFeedbackSubmit,
+    EmployeeGoalScorecard, TeamGoalScorecard, CycleGoalScorecard,
+    ReviewStatusUpdate, ReviewBulkTransitionRequest, ReviewBulkTransitionResult
 )
 from app.crud import crud_performance, crud_employee  # crud_employee needed to get manager info
 from app.crud.crud_user import get_user  # To get names
+from app.services.org_tree_service import is_in_reporting_line
+from app.services.performance_review_read_service import PerformanceReviewReadService
+from app.services.event_bus import domain_events, PerformanceReviewsChanged
+from app.services.goal_scores import GoalScorecardService
 
 router = APIRouter()
 
@@ -33,8 +41,8 @@ def create_employee_goal_api(
 
     # Authorization: Admin can set for anyone. Manager for their direct reports.
     if current_user.role == UserRole.MANAGER:
-        if not current_user.employee_profile or emp_profile.manager_id != current_user.employee_profile.id:
-            raise HTTPException(status_code=403, detail="Manager can only set goals for their direct reports.")
+        if not is_in_reporting_line(db, current_user.employee_profile, emp_profile.id):
+            raise HTTPException(status_code=403, detail="Manager can only set goals for employees in their reporting line.")
 
     if goal_in.appraisal_cycle_id:
         cycle = crud_performance.get_appraisal_cycle(db, goal_in.appraisal_cycle_id)
@@ -72,8 +80,8 @@ def get_employee_goals_api(
         raise HTTPException(status_code=404, detail="Employee profile not found.")
 
     if current_user.role == UserRole.MANAGER:
-        if not current_user.employee_profile or emp_profile.manager_id != current_user.employee_profile.id:
-            raise HTTPException(status_code=403, detail="Manager can only view goals of their direct reports.")
+        if not is_in_reporting_line(db, current_user.employee_profile, emp_profile.id):
+            raise HTTPException(status_code=403, detail="Manager can only view goals of employees in their reporting line.")
 
     return crud_performance.get_goals_by_employee(db, employee_id, cycle_id)
 
@@ -104,11 +112,8 @@ def update_goal_api(
     # Authorization
     is_own_goal = current_user.employee_profile and db_goal.employee_id == current_user.employee_profile.id
 
-    emp_profile_of_goal_owner = crud_employee.get_employee_profile(db, db_goal.employee_id)
     is_manager_of_goal_owner = (current_user.role == UserRole.MANAGER and
-                                current_user.employee_profile and
-                                emp_profile_of_goal_owner and
-                                emp_profile_of_goal_owner.manager_id == current_user.employee_profile.id)
+                                is_in_reporting_line(db, current_user.employee_profile, db_goal.employee_id))
 
     if not (is_own_goal or is_manager_of_goal_owner or current_user.role == UserRole.ADMIN):
         raise HTTPException(status_code=403, detail="Not authorized to update this goal.")
@@ -119,6 +124,48 @@ def update_goal_api(
     return crud_performance.update_goal(db, db_goal, goal_in)
 
 
+# --- Goal Scorecard Endpoints ---
+@router.get("/scorecards/employee/{employee_id}", response_model=EmployeeGoalScorecard)
+def get_employee_goal_scorecard_api(
+        employee_id: int,
+        cycle_id: int = Query(...),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(deps.allow_all_authenticated)
+):
+    """The employee's weighted goal score in a cycle, and that of everyone reporting to them."""
+    own_profile = current_user.employee_profile
+    if current_user.role != UserRole.ADMIN and not (own_profile and own_profile.id == employee_id):
+        if current_user.role != UserRole.MANAGER or not is_in_reporting_line(db, own_profile, employee_id):
+            raise HTTPException(status_code=403, detail="Not authorized to view this employee's scorecard.")
+    return GoalScorecardService(db).employee_scorecard(employee_id, cycle_id)
+
+
+@router.get("/scorecards/team", response_model=TeamGoalScorecard)
+def get_team_goal_scorecard_api(
+        cycle_id: int = Query(...),
+        manager_id: Optional[int] = Query(None, description="Defaults to the current user's own team"),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(deps.allow_admin_or_manager)
+):
+    own_profile = current_user.employee_profile
+    if manager_id is None:
+        if not own_profile:
+            raise HTTPException(status_code=400, detail="Give manager_id; you have no employee profile.")
+        manager_id = own_profile.id
+    elif current_user.role == UserRole.MANAGER and manager_id != (own_profile.id if own_profile else None):
+        if not is_in_reporting_line(db, own_profile, manager_id):
+            raise HTTPException(status_code=403, detail="Manager can only view teams in their reporting line.")
+    return GoalScorecardService(db).team_scorecard(manager_id, cycle_id)
+
+
+@router.get("/scorecards/cycle/{cycle_id}", response_model=CycleGoalScorecard,
+            dependencies=[Depends(deps.allow_admin_only)])
+def get_cycle_goal_scorecard_api(cycle_id: int, db: Session = Depends(get_db)):
+    if not crud_performance.get_appraisal_cycle(db, cycle_id):
+        raise HTTPException(status_code=404, detail="Appraisal cycle not found.")
+    return GoalScorecardService(db).cycle_scorecard(cycle_id)
+
+
 # --- AppraisalCycle Endpoints (Admin only) ---
 @router.post("/cycles/", response_model=AppraisalCycleRead, dependencies=[Depends(deps.allow_admin_only)])
 def create_appraisal_cycle_api(cycle_in: AppraisalCycleCreate, db: Session = Depends(get_db)):
@@ -155,13 +202,14 @@ def update_appraisal_cycle_api(cycle_id: int, cycle_in: AppraisalCycleUpdate, db
 
 
 # --- PerformanceReview Endpoints ---
-@router.post("/cycles/{cycle_id}/initiate-reviews", status_code=status.HTTP_201_CREATED,
-             dependencies=[Depends(deps.allow_admin_only)])
+@router.post("/cycles/{cycle_id}/initiate-reviews", response_model=PerformanceReviewInitiationResult,
+             status_code=status.HTTP_201_CREATED, dependencies=[Depends(deps.allow_admin_only)])
 def initiate_performance_reviews_api(
         cycle_id: int,
         payload: PerformanceReviewCreatePayload,
         db: Session = Depends(get_db)
 ):
+    """Creates the cycle's missing reviews for a list of employees, a department, a subtree or everyone."""
     cycle = crud_performance.get_appraisal_cycle(db, cycle_id)
     if not cycle:
         raise HTTPException(status_code=404, detail="Appraisal cycle not found.")
@@ -169,22 +217,21 @@ def initiate_performance_reviews_api(
         raise HTTPException(status_code=400,
                             detail=f"Cannot initiate reviews for cycle with status {cycle.status.value}.")
 
-    created_reviews_count = 0
-    for emp_id in payload.employee_ids:
-        emp_profile = crud_employee.get_employee_profile(db, emp_id)
-        if not emp_profile or not emp_profile.manager_id:
-            print(f"Skipping review for employee {emp_id}: profile or manager not found.")
-            continue
-
-        # Check if manager exists
-        manager_profile = crud_employee.get_employee_profile(db, emp_profile.manager_id)
-        if not manager_profile:
-            print(f"Skipping review for employee {emp_id}: manager profile (ID: {emp_profile.manager_id}) not found.")
-            continue
-
-        crud_performance.create_performance_review_entry(db, cycle_id, emp_id, emp_profile.manager_id)
-        created_reviews_count += 1
-    return {"message": f"Initiated {created_reviews_count} performance reviews for cycle '{cycle.name}'."}
+    matched, created, skipped = crud_performance.initiate_performance_reviews(
+        db, cycle_id, employee_ids=payload.employee_ids, department_id=payload.department_id,
+        manager_id=payload.manager_id, active_only=payload.all_active or payload.employee_ids is None,
+    )
+    db.commit()
+    if created:
+        domain_events.publish(PerformanceReviewsChanged(appraisal_cycle_id=cycle_id))
+    skipped_text = ", ".join(f"{count} {reason.replace('_', ' ')}" for reason, count in skipped.items() if count)
+    message = f"Initiated {created} performance reviews for cycle '{cycle.name}'."
+    if skipped_text:
+        message += f" Skipped: {skipped_text}."
+    print(message)
+    return PerformanceReviewInitiationResult(
+        appraisal_cycle_id=cycle_id, matched=matched, created=created, skipped=skipped, message=message
+    )
 
 
 @router.get("/reviews/my/cycle/{cycle_id}", response_model=PerformanceReviewRead)
@@ -195,20 +242,10 @@ def get_my_performance_review_api(
 ):
     if not current_user.employee_profile:
         raise HTTPException(status_code=404, detail="Employee profile not found for current user.")
-    review = crud_performance.get_performance_review_for_employee_cycle(db, current_user.employee_profile.id, cycle_id)
+    review = PerformanceReviewReadService(db).get_review_for_employee_cycle(current_user.employee_profile.id, cycle_id)
     if not review:
         raise HTTPException(status_code=404, detail="Performance review not found for you in this cycle.")
-
-    # Populate names for readability
-    cycle = review.appraisal_cycle
-    emp_user = review.employee.user
-    manager_user = review.manager.user
-    return PerformanceReviewRead(
-        **review.model_dump(),
-        employee_name=f"{emp_user.first_name} {emp_user.last_name}" if emp_user else "N/A",
-        manager_name=f"{manager_user.first_name} {manager_user.last_name}" if manager_user else "N/A",
-        appraisal_cycle_name=cycle.name if cycle else "N/A"
-    )
+    return review
 
 
 @router.put("/reviews/{review_id}/self-evaluation", response_model=PerformanceReviewRead)
@@ -223,48 +260,53 @@ def submit_my_self_evaluation_api(
         raise HTTPException(status_code=404, detail="Performance review not found.")
     if not current_user.employee_profile or review.employee_id != current_user.employee_profile.id:
         raise HTTPException(status_code=403, detail="Not authorized to submit self-evaluation for this review.")
-    if review.review_status != "pending_self_evaluation":  # Or other allowed statuses
+    if review.review_status != ReviewStatus.PENDING_SELF_EVALUATION:
         raise HTTPException(status_code=400,
-                            detail=f"Cannot submit self-evaluation when review status is {review.review_status}")
+                            detail=f"Cannot submit self-evaluation when review status is {review.review_status.value}")
 
     updated_review = crud_performance.submit_self_evaluation(
         db, review, evaluation_in.self_evaluation_text, evaluation_in.self_evaluation_rating
     )
-    # Populate names
-    cycle = updated_review.appraisal_cycle
-    emp_user = updated_review.employee.user
-    manager_user = updated_review.manager.user
-    return PerformanceReviewRead(
-        **updated_review.model_dump(),
-        employee_name=f"{emp_user.first_name} {emp_user.last_name}" if emp_user else "N/A",
-        manager_name=f"{manager_user.first_name} {manager_user.last_name}" if manager_user else "N/A",
-        appraisal_cycle_name=cycle.name if cycle else "N/A"
-    )
+    return PerformanceReviewReadService(db).get_review(updated_review.id)
 
 
-@router.get("/reviews/team/cycle/{cycle_id}", response_model=List[PerformanceReviewRead],
+@router.get("/reviews/team/cycle/{cycle_id}", response_model=PerformanceReviewPage,
             dependencies=[Depends(deps.allow_manager_only)])
 def get_team_performance_reviews_api(  # Manager views reviews of their team
         cycle_id: int,
+        after_employee_id: Optional[int] = Query(None, description="next_cursor of the previous page"),
+        limit: int = Query(100, ge=1, le=500),
         db: Session = Depends(get_db),
         current_user: User = Depends(deps.allow_manager_only)
 ):
     if not current_user.employee_profile:
         raise HTTPException(status_code=403, detail="Manager profile not found.")
 
-    reviews = crud_performance.get_reviews_for_manager_cycle(db, current_user.employee_profile.id, cycle_id)
-    response = []
-    for r in reviews:
-        cycle = r.appraisal_cycle
-        emp_user = r.employee.user
-        manager_user = r.manager.user  # Should be current_user
-        response.append(PerformanceReviewRead(
-            **r.model_dump(),
-            employee_name=f"{emp_user.first_name} {emp_user.last_name}" if emp_user else "N/A",
-            manager_name=f"{manager_user.first_name} {manager_user.last_name}" if manager_user else "N/A",
-            appraisal_cycle_name=cycle.name if cycle else "N/A"
-        ))
-    return response
+    items = PerformanceReviewReadService(db).list_manager_reviews(
+        current_user.employee_profile.id, cycle_id, after_employee_id, limit + 1
+    )
+    next_cursor = items[limit - 1].employee_id if len(items) > limit else None
+    return PerformanceReviewPage(items=items[:limit], next_cursor=next_cursor)
+
+
+@router.get("/reviews/cycle/{cycle_id}", response_model=PerformanceReviewPage,
+            dependencies=[Depends(deps.allow_admin_only)])
+def get_cycle_performance_reviews_api(  # HR views every review of a cycle
+        cycle_id: int,
+        review_status: Optional[ReviewStatus] = Query(None),
+        department_id: Optional[int] = Query(None),
+        after_employee_id: Optional[int] = Query(None, description="next_cursor of the previous page"),
+        limit: int = Query(100, ge=1, le=500),
+        db: Session = Depends(get_db)
+):
+    """One projection query per page; keyset pagination on employee_id keeps late pages as cheap as the first."""
+    if not crud_performance.get_appraisal_cycle(db, cycle_id):
+        raise HTTPException(status_code=404, detail="Appraisal cycle not found.")
+    items = PerformanceReviewReadService(db).list_cycle_reviews(
+        cycle_id, review_status, department_id, after_employee_id, limit + 1
+    )
+    next_cursor = items[limit - 1].employee_id if len(items) > limit else None
+    return PerformanceReviewPage(items=items[:limit], next_cursor=next_cursor)
 
 
 @router.put("/reviews/{review_id}/manager-feedback", response_model=PerformanceReviewRead,
@@ -280,20 +322,50 @@ def submit_manager_feedback_api(
         raise HTTPException(status_code=404, detail="Performance review not found.")
     if not current_user.employee_profile or review.manager_id != current_user.employee_profile.id:
         raise HTTPException(status_code=403, detail="Not authorized to submit manager feedback for this review.")
-    if review.review_status != "pending_manager_feedback":  # Or other allowed statuses
+    if review.review_status != ReviewStatus.PENDING_MANAGER_FEEDBACK:
         raise HTTPException(status_code=400,
-                            detail=f"Cannot submit manager feedback when review status is {review.review_status}")
+                            detail=f"Cannot submit manager feedback when review status is {review.review_status.value}")
 
     updated_review = crud_performance.submit_manager_feedback(
         db, review, feedback_in.manager_feedback_text, feedback_in.manager_rating
     )
-    # Populate names
-    cycle = updated_review.appraisal_cycle
-    emp_user = updated_review.employee.user
-    manager_user = updated_review.manager.user
-    return PerformanceReviewRead(
-        **updated_review.model_dump(),
-        employee_name=f"{emp_user.first_name} {emp_user.last_name}" if emp_user else "N/A",
-        manager_name=f"{manager_user.first_name} {manager_user.last_name}" if manager_user else "N/A",
-        appraisal_cycle_name=cycle.name if cycle else "N/A"
-    )
\ No newline at end of file
+    return PerformanceReviewReadService(db).get_review(updated_review.id)
+
+
+@router.put("/reviews/{review_id}/status", response_model=PerformanceReviewRead,
+            dependencies=[Depends(deps.allow_admin_only)])
+def update_review_status_api(review_id: int, status_in: ReviewStatusUpdate, db: Session = Depends(get_db)):
+    review = crud_performance.get_performance_review(db, review_id)
+    if not review:
+        raise HTTPException(status_code=404, detail="Performance review not found.")
+    try:
+        crud_performance.update_review_status(db, review, status_in.review_status)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PerformanceReviewReadService(db).get_review(review_id)
+
+
+@router.post("/cycles/{cycle_id}/reviews/transition", response_model=ReviewBulkTransitionResult,
+             dependencies=[Depends(deps.allow_admin_only)])
+def transition_cycle_reviews_api(
+        cycle_id: int,
+        request: ReviewBulkTransitionRequest,
+        db: Session = Depends(get_db)
+):
+    """Moves every eligible review of the cycle (optionally of some employees or a department) in one UPDATE."""
+    cycle = crud_performance.get_appraisal_cycle(db, cycle_id)
+    if not cycle:
+        raise HTTPException(status_code=404, detail="Appraisal cycle not found.")
+    moved = crud_performance.transition_reviews(
+        db, cycle_id, request.to_status, from_statuses=request.from_statuses,
+        employee_ids=request.employee_ids, department_id=request.department_id,
+    )
+    db.commit()
+    if moved:
+        domain_events.publish(PerformanceReviewsChanged(appraisal_cycle_id=cycle_id))
+    counts = crud_performance.get_review_status_counts(db, cycle_id, request.employee_ids, request.department_id)
+    print(f"Moved {moved} reviews of cycle '{cycle.name}' to {request.to_status.value}.")
+    return ReviewBulkTransitionResult(
+        appraisal_cycle_id=cycle_id, to_status=request.to_status, moved=moved,
+        by_status={status.value: count for status, count in sorted(counts.items(), key=lambda item: item[0].value)},
+    )
@@ -1,22 +1,64 @@
 # hr_software/app/api/v1/endpoints/reports.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from sqlmodel import Session, select, func, and_, or_  # Ensure func is imported
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select, func  # Ensure func is imported
 from typing import List, Dict, Any, Optional
 from datetime import date, timedelta, datetime
+from itertools import chain
 from pydantic import BaseModel
 
 from app.core.db import get_db
 from app.api import deps
 from app.models.user import User
-from app.models.enums import UserRole, EmploymentStatus, LeaveRequestStatus, LeaveTypeName, PayrollRunStatus
-from app.models.employee import EmployeeProfile, Department
-from app.models.leave import LeaveRequest, LeaveType
-from app.models.payroll import Payslip, PayrollRun
+from app.models.enums import (
+    UserRole, LeaveTypeName, PayrollRunStatus, AppraisalCycleStatus
+)
+from app.models.employee import Department, EmploymentHistory
+from app.models.leave import LeaveType
+from app.models.payroll import PayrollRun
+from app.models.performance import AppraisalCycle
+from app.models.reporting import LeaveMonthFact, SalaryExpenseSummary
+from app.models.workflow import WorkflowType
+from app.schemas.report import ReportSpec, ReportEntityInfo
+from app.services.document_serving import etag_matches, DOCUMENT_CACHE_CONTROL
+from app.services.headcount_service import HeadcountService, HEADCOUNT_DIMENSIONS, HEADCOUNT_TABLES
+from app.services.performance_analytics import PerformanceAnalyticsService, GROUP_BY_DEPARTMENT, GROUP_BY_MANAGER
+from app.services.report_builder import ReportBuilder, REPORT_FORMATS, report_catalog
+from app.services.report_cache import report_cache
+from app.services.reporting_tables import ReportingTables, LEAVE_FACTS, SALARY_SUMMARY
+from app.services.workflow_analytics import WorkflowAnalyticsService
+from app.services.workforce_history import WorkforceReportService, INTERVALS as TREND_INTERVALS
 
 router = APIRouter()
 
 
+# --- Cached responses ---
+WORKFORCE_TABLES = (EmploymentHistory.__tablename__,)  # Snapshots are derived from the history alone
+LEAVE_FACT_TABLES = (LeaveMonthFact.__tablename__, LeaveType.__tablename__, Department.__tablename__)
+# Not ReportRefreshState: every refresh stamps it, rebuilt or not, which would drop these reports each interval;
+# a cached report keeps the refreshed-at header it was computed with until its rows change or it expires
+SALARY_SUMMARY_TABLES = (SalaryExpenseSummary.__tablename__, PayrollRun.__tablename__, Department.__tablename__)
+
+
+def _cached_report(request: Request, endpoint: str, params: Dict[str, Any], tables, response_model, compute,
+                   db: Optional[Session] = None, summary: Optional[str] = None) -> Response:
+    """
+    Serves the report from the report cache, computing it on a miss, with an ETag so clients
+    revalidate with If-None-Match and get a 304 while none of the tables it reads changed.
+    """
+    report = report_cache.get_or_compute(
+        endpoint, params, tuple(tables), response_model, compute,
+        headers=(lambda: _staleness_headers(ReportingTables(db).ensure_refreshed(summary))) if summary else None,
+    )
+    headers = {**report.headers, "ETag": report.etag, "Cache-Control": DOCUMENT_CACHE_CONTROL}
+    if "X-Report-Refreshed-At" in headers:
+        headers.update(_staleness_headers(datetime.fromisoformat(headers["X-Report-Refreshed-At"].rstrip("Z"))))
+    if etag_matches(request.headers.get("if-none-match"), report.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=report.body, media_type="application/json", headers=headers)
+
+
 # --- Headcount Reports ---
 class HeadcountByDepartment(BaseModel):
     department_id: Optional[int] = None
@@ -24,42 +66,83 @@ class HeadcountByDepartment(BaseModel):
     headcount: int
 
 
+class HeadcountGroup(BaseModel):
+    key: Optional[Any] = None  # Department / manager id, status, job title or hire year; None for unassigned
+    label: str
+    headcount: int
+
+
+class HeadcountReport(BaseModel):
+    group_by: str
+    as_of: date
+    total: int
+    groups: List[HeadcountGroup]
+
+
 @router.get("/headcount/active", response_model=Dict[str, Any], dependencies=[Depends(deps.allow_admin_or_manager)])
-def get_active_headcount_report(db: Session = Depends(get_db)):
-    # --- CORRECTED ---
-    total_active_query = select(func.count(EmployeeProfile.id)).where(
-        EmployeeProfile.employment_status == EmploymentStatus.ACTIVE
-    )
-    # db.exec() for a query like select(func.count()) often returns the scalar directly
-    # or a ScalarResult that can be treated as the value if there's one result.
-    # The most robust way to get a single scalar or None:
-    total_active = db.scalar(total_active_query) or 0
-    # --- END CORRECTED ---
-
-    departments = db.exec(select(Department)).all()
-    by_department_list: List[HeadcountByDepartment] = []
-    for dept in departments:
-        # --- CORRECTED ---
-        count_query = select(func.count(EmployeeProfile.id)).where(
-            EmployeeProfile.department_id == dept.id,
-            EmployeeProfile.employment_status == EmploymentStatus.ACTIVE
-        )
-        count = db.scalar(count_query) or 0
-        # --- END CORRECTED ---
-        by_department_list.append(
-            HeadcountByDepartment(department_id=dept.id, department_name=dept.name, headcount=count))
-
-    # --- CORRECTED ---
-    no_dept_count_query = select(func.count(EmployeeProfile.id)).where(
-        EmployeeProfile.department_id == None,
-        EmployeeProfile.employment_status == EmploymentStatus.ACTIVE
-    )
-    no_dept_count = db.scalar(no_dept_count_query) or 0
-    # --- END CORRECTED ---
-    if no_dept_count > 0:
-        by_department_list.append(HeadcountByDepartment(department_name="Unassigned", headcount=no_dept_count))
+def get_active_headcount_report(request: Request, db: Session = Depends(get_db)):
+    def compute():
+        report = HeadcountService(db).report("department")
+        by_department_list = [
+            HeadcountByDepartment(department_id=group["key"], department_name=group["label"], headcount=group["headcount"])
+            for group in report["groups"]
+        ]
+        return {"total_active_headcount": report["total"], "by_department": by_department_list}
+
+    return _cached_report(request, "headcount/active", {}, HEADCOUNT_TABLES, Dict[str, Any], compute)
+
+
+@router.get("/headcount", response_model=HeadcountReport, dependencies=[Depends(deps.allow_admin_or_manager)])
+def get_headcount_report(
+        request: Request,
+        group_by: str = Query("department", pattern=f"^({'|'.join(HEADCOUNT_DIMENSIONS)})$"),
+        as_of: Optional[date] = Query(None, description="Point-in-time headcount; today's active employees if omitted"),
+        department_id: Optional[int] = Query(None),
+        manager_id: Optional[int] = Query(None, description="Only people reporting to this manager; for "
+                                                               "group_by=manager, the root of the breakdown"),
+        db: Session = Depends(get_db)
+):
+    """
+    Headcount by department, status, job title, manager subtree or hire year, in one grouped query.
+    With as_of, the department and hire year breakdowns are read from the daily headcount snapshots.
+    """
+    def compute():
+        try:
+            return HeadcountService(db).report(group_by, as_of, department_id, manager_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    return {"total_active_headcount": total_active, "by_department": by_department_list}
+    params = {"group_by": group_by, "as_of": as_of, "department_id": department_id, "manager_id": manager_id}
+    return _cached_report(request, "headcount", params, HEADCOUNT_TABLES, HeadcountReport, compute)
+
+
+class HeadcountTrendPoint(BaseModel):
+    period_end: date
+    headcount: int
+    hires: int
+    separations: int
+
+
+class HeadcountTrend(BaseModel):
+    interval: str
+    points: List[HeadcountTrendPoint]
+
+
+@router.get("/headcount/trend", response_model=HeadcountTrend, dependencies=[Depends(deps.allow_admin_or_manager)])
+def get_headcount_trend(
+        request: Request,
+        start_date: date = Query(..., examples=["2023-01-01"]),
+        end_date: date = Query(..., examples=["2023-12-31"]),
+        interval: str = Query("month", pattern=f"^({'|'.join(TREND_INTERVALS)})$"),
+        department_id: Optional[int] = Query(None),
+        db: Session = Depends(get_db)
+):
+    """Headcount at the end of every day, week or month of the period, from the daily headcount snapshots."""
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date must not be after end date.")
+    params = {"start_date": start_date, "end_date": end_date, "interval": interval, "department_id": department_id}
+    return _cached_report(request, "headcount/trend", params, WORKFORCE_TABLES, HeadcountTrend,
+                          lambda: WorkforceReportService(db).trend(start_date, end_date, interval, department_id))
 
 
 # --- Attrition Report ---
@@ -68,14 +151,17 @@ class AttritionReport(BaseModel):
     period_end: date
     starting_headcount: int
     ending_headcount: int
+    hires: int = 0
     separations: int
     attrition_rate_percentage: float
 
 
 @router.get("/attrition", response_model=AttritionReport, dependencies=[Depends(deps.allow_admin_only)])
 def get_attrition_report(
+        request: Request,
         start_date_str: str = Query(..., description="Start date in YYYY-MM-DD format", examples=["2023-01-01"]),
         end_date_str: str = Query(..., description="End date in YYYY-MM-DD format", examples=["2023-12-31"]),
+        department_id: Optional[int] = Query(None),
         db: Session = Depends(get_db)
 ):
     try:
@@ -87,102 +173,206 @@ def get_attrition_report(
     if period_start >= period_end:
         raise HTTPException(status_code=400, detail="Start date must be before end date.")
 
-    # --- CORRECTED for all scalar queries ---
-    starting_headcount_query = (
-        select(func.count(EmployeeProfile.id))
-        .where(EmployeeProfile.hire_date < period_start)
-        .where(or_(EmployeeProfile.resignation_date == None, EmployeeProfile.resignation_date >= period_start))
-        .where(or_(EmployeeProfile.termination_date == None, EmployeeProfile.termination_date >= period_start))
-    )
-    starting_headcount = db.scalar(starting_headcount_query) or 0
-
-    separations_query = (
-        select(func.count(EmployeeProfile.id))
-        .where(
-            or_(
-                and_(EmployeeProfile.resignation_date != None, EmployeeProfile.resignation_date >= period_start,
-                     EmployeeProfile.resignation_date <= period_end),
-                and_(EmployeeProfile.termination_date != None, EmployeeProfile.termination_date >= period_start,
-                     EmployeeProfile.termination_date <= period_end)
-            )
-        )
-    )
-    separations = db.scalar(separations_query) or 0
+    # Headcounts and separations come from the daily snapshots of the employment history, so
+    # transfers and rehires are seen and the period is a range read instead of table scans
+    params = {"start_date": period_start, "end_date": period_end, "department_id": department_id}
+    return _cached_report(request, "attrition", params, WORKFORCE_TABLES, AttritionReport,
+                          lambda: WorkforceReportService(db).attrition(period_start, period_end, department_id))
 
-    ending_headcount_query = (
-        select(func.count(EmployeeProfile.id))
-        .where(EmployeeProfile.hire_date <= period_end)
-        .where(or_(EmployeeProfile.resignation_date == None, EmployeeProfile.resignation_date > period_end))
-        .where(or_(EmployeeProfile.termination_date == None, EmployeeProfile.termination_date > period_end))
-    )
-    ending_headcount = db.scalar(ending_headcount_query) or 0
-    # --- END CORRECTED ---
-
-    avg_headcount = (starting_headcount + ending_headcount) / 2.0 if (
-                                                                                 starting_headcount + ending_headcount) > 0 else 1.0
-    attrition_rate = (float(separations) / avg_headcount) * 100.0 if avg_headcount > 0 else 0.0
-
-    return AttritionReport(
-        period_start=period_start,
-        period_end=period_end,
-        starting_headcount=starting_headcount,
-        ending_headcount=ending_headcount,
-        separations=separations,
-        attrition_rate_percentage=round(attrition_rate, 2)
-    )
 
+class CohortRetention(BaseModel):
+    hire_year: int
+    hired: int
+    retained: int
+    retention_rate_percentage: Optional[float] = None  # None when nobody was hired that year
 
-# --- Leave Trends (This part was likely correct as it deals with .all() which returns Rows) ---
+
+class RetentionReport(BaseModel):
+    as_of: date
+    cohorts: List[CohortRetention]
+
+
+@router.get("/retention", response_model=RetentionReport, dependencies=[Depends(deps.allow_admin_only)])
+def get_retention_report(
+        request: Request,
+        from_year: int = Query(..., ge=1900, le=2999),
+        to_year: int = Query(..., ge=1900, le=2999),
+        as_of: Optional[date] = Query(None, description="Defaults to today"),
+        department_id: Optional[int] = Query(None),
+        db: Session = Depends(get_db)
+):
+    """Per hire-year cohort, how many employees joined and how many of them are still employed."""
+    if from_year > to_year:
+        raise HTTPException(status_code=400, detail="from_year must not be after to_year.")
+    params = {"from_year": from_year, "to_year": to_year, "as_of": as_of or date.today(), "department_id": department_id}
+    return _cached_report(request, "retention", params, WORKFORCE_TABLES, RetentionReport,
+                          lambda: WorkforceReportService(db).retention(from_year, to_year, as_of, department_id))
+
+
+# --- Summary table freshness ---
+def _staleness_headers(refreshed_at: datetime) -> Dict[str, str]:
+    """Tells clients how old the summary table behind the response is."""
+    return {
+        "X-Report-Refreshed-At": refreshed_at.isoformat() + "Z",
+        "X-Report-Staleness-Seconds": str(max(0, int((datetime.utcnow() - refreshed_at).total_seconds()))),
+    }
+
+
+def _parse_month_range(start_date_str: Optional[str], end_date_str: Optional[str]):
+    try:
+        start = date.fromisoformat(start_date_str) if start_date_str else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid start_date format.")
+    try:
+        end = date.fromisoformat(end_date_str) if end_date_str else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid end_date format.")
+    return (date(start.year, start.month, 1) if start else None), (date(end.year, end.month, 1) if end else None)
+
+
+# --- Leave Trends ---
 class LeaveTrendItem(BaseModel):
     leave_type_id: int
     leave_type_name: str
-    total_days_approved: float
-    number_of_requests: int
+    total_days_approved: float  # Working days of approved leave falling in the period
+    number_of_requests: int  # Approved requests with at least part of their leave in the period
+
+
+class MonthlyLeaveTrendItem(LeaveTrendItem):
+    year: int
+    month: int
+
+
+class DepartmentLeaveTrendItem(MonthlyLeaveTrendItem):
+    department_id: Optional[int] = None
+    department_name: str
+
+
+def _leave_fact_query(*columns, start_month: Optional[date], end_month: Optional[date],
+                      department_id: Optional[int], leave_type_id: Optional[int]):
+    query = select(*columns).join(LeaveType, LeaveMonthFact.leave_type_id == LeaveType.id)
+    if start_month:
+        query = query.where(LeaveMonthFact.month >= start_month)
+    if end_month:
+        query = query.where(LeaveMonthFact.month <= end_month)
+    if department_id is not None:
+        query = query.where(LeaveMonthFact.department_id == department_id)
+    if leave_type_id is not None:
+        query = query.where(LeaveMonthFact.leave_type_id == leave_type_id)
+    return query
+
+
+def _leave_type_name(leave_type_name) -> str:
+    return leave_type_name.value if leave_type_name else "Unknown"
 
 
 @router.get("/leave-trends", response_model=List[LeaveTrendItem], dependencies=[Depends(deps.allow_admin_or_manager)])
 def get_leave_trends(
+        request: Request,
         start_date_str: Optional[str] = Query(None, description="Start date YYYY-MM-DD"),
         end_date_str: Optional[str] = Query(None, description="End date YYYY-MM-DD"),
+        department_id: Optional[int] = Query(None),
+        leave_type_id: Optional[int] = Query(None),
         db: Session = Depends(get_db)
 ):
-    query = (
-        select(
-            LeaveRequest.leave_type_id,
-            LeaveType.name.label("leave_type_name_enum"),
-            func.sum(LeaveRequest.number_of_days).label("total_days"),
-            func.count(LeaveRequest.id).label("request_count")
-        )
-        .join(LeaveType, LeaveRequest.leave_type_id == LeaveType.id)
-        .where(LeaveRequest.status == LeaveRequestStatus.APPROVED)
-    )
-
-    if start_date_str:
-        try:
-            s_date = date.fromisoformat(start_date_str); query = query.where(LeaveRequest.start_date >= s_date)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid start_date format.")
-    if end_date_str:
-        try:
-            e_date = date.fromisoformat(end_date_str); query = query.where(LeaveRequest.end_date <= e_date)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid end_date format.")
-
-    query = query.group_by(LeaveRequest.leave_type_id, LeaveType.name).order_by(
-        func.sum(LeaveRequest.number_of_days).desc())
-
-    results = db.exec(query).all()
-    return [
-        LeaveTrendItem(
-            leave_type_id=row.leave_type_id,
-            leave_type_name=row.leave_type_name_enum.value if row.leave_type_name_enum else "Unknown",
-            total_days_approved=float(row.total_days or 0.0),
-            number_of_requests=int(row.request_count or 0)
-        ) for row in results
-    ]
-
-
-# --- Salary and Expense Reports (This part was likely correct) ---
+    """
+    Approved leave per type over the months of the period. Requests are split into their working days
+    per month when approved, so leave crossing the period boundary counts with the part inside it.
+    """
+    start_month, end_month = _parse_month_range(start_date_str, end_date_str)
+
+    def compute():
+        ReportingTables(db).ensure_refreshed(LEAVE_FACTS)
+        query = _leave_fact_query(
+            LeaveMonthFact.leave_type_id, LeaveType.name, func.sum(LeaveMonthFact.days),
+            func.count(LeaveMonthFact.leave_request_id.distinct()), start_month=start_month, end_month=end_month,
+            department_id=department_id, leave_type_id=leave_type_id,
+        ).group_by(LeaveMonthFact.leave_type_id, LeaveType.name).order_by(func.sum(LeaveMonthFact.days).desc())
+        return [
+            LeaveTrendItem(
+                leave_type_id=type_id, leave_type_name=_leave_type_name(leave_type_name),
+                total_days_approved=round(float(days or 0.0), 2), number_of_requests=int(requests or 0)
+            ) for type_id, leave_type_name, days, requests in db.exec(query).all()
+        ]
+
+    params = {"start_month": start_month, "end_month": end_month, "department_id": department_id,
+              "leave_type_id": leave_type_id}
+    return _cached_report(request, "leave-trends", params, LEAVE_FACT_TABLES, List[LeaveTrendItem], compute)
+
+
+@router.get("/leave-trends/monthly", response_model=List[MonthlyLeaveTrendItem],
+            dependencies=[Depends(deps.allow_admin_or_manager)])
+def get_monthly_leave_trends(
+        request: Request,
+        start_date_str: Optional[str] = Query(None, description="Start date YYYY-MM-DD"),
+        end_date_str: Optional[str] = Query(None, description="End date YYYY-MM-DD"),
+        department_id: Optional[int] = Query(None),
+        leave_type_id: Optional[int] = Query(None),
+        db: Session = Depends(get_db)
+):
+    start_month, end_month = _parse_month_range(start_date_str, end_date_str)
+
+    def compute():
+        ReportingTables(db).ensure_refreshed(LEAVE_FACTS)
+        query = _leave_fact_query(
+            LeaveMonthFact.month, LeaveMonthFact.leave_type_id, LeaveType.name, func.sum(LeaveMonthFact.days),
+            func.count(LeaveMonthFact.leave_request_id), start_month=start_month, end_month=end_month,
+            department_id=department_id, leave_type_id=leave_type_id,
+        ).group_by(LeaveMonthFact.month, LeaveMonthFact.leave_type_id, LeaveType.name) \
+            .order_by(LeaveMonthFact.month, LeaveMonthFact.leave_type_id)
+        return [
+            MonthlyLeaveTrendItem(
+                year=month.year, month=month.month, leave_type_id=type_id,
+                leave_type_name=_leave_type_name(leave_type_name),
+                total_days_approved=round(float(days or 0.0), 2), number_of_requests=int(requests or 0)
+            ) for month, type_id, leave_type_name, days, requests in db.exec(query).all()
+        ]
+
+    params = {"start_month": start_month, "end_month": end_month, "department_id": department_id,
+              "leave_type_id": leave_type_id}
+    return _cached_report(request, "leave-trends/monthly", params, LEAVE_FACT_TABLES, List[MonthlyLeaveTrendItem],
+                          compute)
+
+
+@router.get("/leave-trends/monthly/departments", response_model=List[DepartmentLeaveTrendItem],
+            dependencies=[Depends(deps.allow_admin_or_manager)])
+def get_monthly_department_leave_trends(
+        request: Request,
+        start_date_str: Optional[str] = Query(None, description="Start date YYYY-MM-DD"),
+        end_date_str: Optional[str] = Query(None, description="End date YYYY-MM-DD"),
+        department_id: Optional[int] = Query(None, description="0 for employees without a department"),
+        leave_type_id: Optional[int] = Query(None),
+        db: Session = Depends(get_db)
+):
+    """Approved leave per month, department (the employee's when the leave was approved) and type."""
+    start_month, end_month = _parse_month_range(start_date_str, end_date_str)
+
+    def compute():
+        ReportingTables(db).ensure_refreshed(LEAVE_FACTS)
+        query = _leave_fact_query(
+            LeaveMonthFact.month, LeaveMonthFact.department_id, Department.name, LeaveMonthFact.leave_type_id,
+            LeaveType.name, func.sum(LeaveMonthFact.days), func.count(LeaveMonthFact.leave_request_id),
+            start_month=start_month, end_month=end_month, department_id=department_id, leave_type_id=leave_type_id,
+        ).outerjoin(Department, Department.id == LeaveMonthFact.department_id).group_by(
+            LeaveMonthFact.month, LeaveMonthFact.department_id, Department.name, LeaveMonthFact.leave_type_id,
+            LeaveType.name,
+        ).order_by(LeaveMonthFact.month, LeaveMonthFact.department_id, LeaveMonthFact.leave_type_id)
+        return [
+            DepartmentLeaveTrendItem(
+                year=month.year, month=month.month, department_id=dept_id or None,
+                department_name=department_name or "Unassigned", leave_type_id=type_id,
+                leave_type_name=_leave_type_name(leave_type_name),
+                total_days_approved=round(float(days or 0.0), 2), number_of_requests=int(requests or 0)
+            ) for month, dept_id, department_name, type_id, leave_type_name, days, requests in db.exec(query).all()
+        ]
+
+    params = {"start_month": start_month, "end_month": end_month, "department_id": department_id,
+              "leave_type_id": leave_type_id}
+    return _cached_report(request, "leave-trends/monthly/departments", params, LEAVE_FACT_TABLES,
+                          List[DepartmentLeaveTrendItem], compute)
+
+
+# --- Salary and Expense Reports ---
 class MonthlySalaryExpense(BaseModel):
     year: int
     month: int
@@ -191,36 +381,238 @@ class MonthlySalaryExpense(BaseModel):
     employee_count: int
 
 
+class DepartmentSalaryExpense(BaseModel):
+    department_id: Optional[int] = None
+    department_name: str
+    employee_count: int
+    total_gross_salary: float
+    total_deductions: float
+    total_net_salary: float
+
+
+PAID_RUN_STATUSES = [PayrollRunStatus.PAID, PayrollRunStatus.PROCESSED]
+
+
 @router.get("/salary-expense/monthly", response_model=List[MonthlySalaryExpense],
             dependencies=[Depends(deps.allow_admin_only)])
 def get_monthly_salary_expense_report(
+        request: Request,
         limit_months: int = Query(12, description="Number of past months to report on", ge=1, le=60),
         db: Session = Depends(get_db)
 ):
-    query = (
-        select(
-            PayrollRun.year, PayrollRun.month,
-            func.sum(Payslip.net_salary).label("total_net"),
-            func.sum(Payslip.gross_earnings).label("total_gross"),
-            func.count(Payslip.id).label("emp_count")
+    def compute():
+        query = (
+            select(
+                PayrollRun.year, PayrollRun.month,
+                func.sum(SalaryExpenseSummary.net_salary), func.sum(SalaryExpenseSummary.gross_earnings),
+                func.sum(SalaryExpenseSummary.payslips)
+            )
+            .join(SalaryExpenseSummary, PayrollRun.id == SalaryExpenseSummary.payroll_run_id)
+            .where(PayrollRun.status.in_(PAID_RUN_STATUSES))
+            .group_by(PayrollRun.year, PayrollRun.month)
+            .order_by(PayrollRun.year.desc(), PayrollRun.month.desc())
+            .limit(limit_months)
         )
-        .join(Payslip, PayrollRun.id == Payslip.payroll_run_id)
-        .where(PayrollRun.status.in_([PayrollRunStatus.PAID, PayrollRunStatus.PROCESSED]))
-        .group_by(PayrollRun.year, PayrollRun.month)
-        .order_by(PayrollRun.year.desc(), PayrollRun.month.desc())
-        .limit(limit_months)
-    )
-    results = db.exec(query).all()
-    return [
-        MonthlySalaryExpense(
-            year=row.year, month=row.month,
-            total_net_salary_paid=round(float(row.total_net or 0.0), 2),
-            total_gross_salary=round(float(row.total_gross or 0.0), 2),
-            employee_count=int(row.emp_count or 0)
-        ) for row in results
-    ]
+        return [
+            MonthlySalaryExpense(
+                year=year, month=month,
+                total_net_salary_paid=round(float(net or 0.0), 2),
+                total_gross_salary=round(float(gross or 0.0), 2),
+                employee_count=int(payslips or 0)
+            ) for year, month, net, gross, payslips in db.exec(query).all()
+        ]
+
+    return _cached_report(request, "salary-expense/monthly", {"limit_months": limit_months}, SALARY_SUMMARY_TABLES,
+                          List[MonthlySalaryExpense], compute, db=db, summary=SALARY_SUMMARY)
+
+
+@router.get("/salary-expense/runs/{payroll_run_id}", response_model=List[DepartmentSalaryExpense],
+            dependencies=[Depends(deps.allow_admin_only)])
+def get_payroll_run_salary_expense_report(payroll_run_id: int, request: Request, db: Session = Depends(get_db)):
+    """Salary expense of one payroll run per department, whatever the run's status."""
+    def compute():
+        if not db.get(PayrollRun, payroll_run_id):
+            raise HTTPException(status_code=404, detail="Payroll run not found.")
+        rows = db.exec(
+            select(SalaryExpenseSummary, Department.name)
+            .outerjoin(Department, Department.id == SalaryExpenseSummary.department_id)
+            .where(SalaryExpenseSummary.payroll_run_id == payroll_run_id)
+            .order_by(SalaryExpenseSummary.net_salary.desc())
+        ).all()
+        return [
+            DepartmentSalaryExpense(
+                department_id=summary.department_id or None, department_name=department_name or "Unassigned",
+                employee_count=summary.payslips, total_gross_salary=round(summary.gross_earnings, 2),
+                total_deductions=round(summary.total_deductions, 2), total_net_salary=round(summary.net_salary, 2)
+            ) for summary, department_name in rows
+        ]
+
+    return _cached_report(request, "salary-expense/runs", {"payroll_run_id": payroll_run_id}, SALARY_SUMMARY_TABLES,
+                          List[DepartmentSalaryExpense], compute, db=db, summary=SALARY_SUMMARY)
+
+
+# --- Workflow Cycle Times ---
+class WorkflowStepCycleTime(BaseModel):
+    step_template_id: int
+    step_name: str
+    step_order: int
+    completed: int
+    p50_hours: Optional[float] = None
+    p90_hours: Optional[float] = None
+    mean_hours: Optional[float] = None
+
+
+class WorkflowCycleTimeReport(BaseModel):
+    workflow_template_id: int
+    workflow_template_name: str
+    workflow_type: WorkflowType
+    completed: int  # Workflows completed in the period
+    p50_hours: Optional[float] = None  # Assignment to completion
+    p90_hours: Optional[float] = None
+    mean_hours: Optional[float] = None
+    steps: List[WorkflowStepCycleTime]  # Each step timed from the previous completion in its workflow
+
+
+def _cycle_time_period_start(months: int) -> date:
+    today = date.today()
+    month_index = today.year * 12 + today.month - 1 - (months - 1)
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+@router.get("/workflows", response_model=List[WorkflowCycleTimeReport], dependencies=[Depends(deps.allow_admin_only)])
+def get_workflow_cycle_time_report(
+        months: int = Query(6, ge=1, le=120, description="Calendar months to include, the current one included"),
+        db: Session = Depends(get_db)
+):
+    """Median and 90th percentile time-to-complete per workflow template and step, to spot onboarding bottlenecks."""
+    return WorkflowAnalyticsService(db).template_reports(_cycle_time_period_start(months))
+
+
+@router.get("/workflows/{template_id}", response_model=WorkflowCycleTimeReport,
+            dependencies=[Depends(deps.allow_admin_only)])
+def get_workflow_template_cycle_time_report(
+        template_id: int,
+        months: int = Query(6, ge=1, le=120),
+        db: Session = Depends(get_db)
+):
+    reports = WorkflowAnalyticsService(db).template_reports(_cycle_time_period_start(months), template_id)
+    if not reports:
+        raise HTTPException(status_code=404, detail="No completed steps recorded for this workflow template.")
+    return reports[0]
+
+
+# --- Performance Calibration Reports ---
+class RatingHistogramBucket(BaseModel):
+    rating: float  # Manager rating rounded to the nearest half point
+    count: int
+
+
+class RatingCalibration(BaseModel):
+    reviews: int
+    by_status: Dict[str, int]
+    rating_histogram: List[RatingHistogramBucket]
+    manager_rated: int
+    mean_manager_rating: Optional[float] = None
+    self_rated: int
+    mean_self_rating: Optional[float] = None
+    compared: int  # Reviews with both a self and a manager rating
+    mean_rating_delta: Optional[float] = None  # Manager minus self rating
+    mean_abs_rating_delta: Optional[float] = None
+
+
+class GoalCompletion(BaseModel):
+    goals: int
+    by_status: Dict[str, int]
+    completion_rate: Optional[float] = None  # Completed / goals not cancelled
+    weighted_completion_rate: Optional[float] = None  # Same, weighted by goal weightage
+
+
+class RatingCalibrationGroup(RatingCalibration):
+    group_id: Optional[int] = None  # Department or manager id; None for unassigned
+    group_name: str
+
+
+class GoalCompletionGroup(GoalCompletion):
+    group_id: Optional[int] = None
+    group_name: str
+
+
+class PerformanceCycleReport(BaseModel):
+    appraisal_cycle_id: int
+    appraisal_cycle_name: str
+    status: AppraisalCycleStatus
+    computed_at: datetime
+    ratings: RatingCalibration
+    goals: GoalCompletion
+    ratings_by_department: List[RatingCalibrationGroup]
+    goals_by_department: List[GoalCompletionGroup]
+
+
+def _get_cycle_or_404(db: Session, cycle_id: int) -> AppraisalCycle:
+    cycle = db.get(AppraisalCycle, cycle_id)
+    if not cycle:
+        raise HTTPException(status_code=404, detail="Appraisal cycle not found.")
+    return cycle
+
+
+@router.get("/performance/{cycle_id}", response_model=PerformanceCycleReport,
+            dependencies=[Depends(deps.allow_admin_only)])
+def get_performance_cycle_report(cycle_id: int, db: Session = Depends(get_db)):
+    """Rating distribution, self vs manager deltas and goal completion of a cycle, for calibration meetings."""
+    return PerformanceAnalyticsService(db).cycle_report(_get_cycle_or_404(db, cycle_id))
+
+
+@router.get("/performance/{cycle_id}/ratings", response_model=List[RatingCalibrationGroup],
+            dependencies=[Depends(deps.allow_admin_only)])
+def get_performance_rating_calibration(
+        cycle_id: int,
+        group_by: str = Query(GROUP_BY_DEPARTMENT, pattern=f"^({GROUP_BY_DEPARTMENT}|{GROUP_BY_MANAGER})$"),
+        db: Session = Depends(get_db)
+):
+    return PerformanceAnalyticsService(db).rating_groups(_get_cycle_or_404(db, cycle_id), group_by)
+
+
+@router.get("/performance/{cycle_id}/goals", response_model=List[GoalCompletionGroup],
+            dependencies=[Depends(deps.allow_admin_only)])
+def get_performance_goal_completion(
+        cycle_id: int,
+        group_by: str = Query(GROUP_BY_DEPARTMENT, pattern=f"^({GROUP_BY_DEPARTMENT}|{GROUP_BY_MANAGER})$"),
+        db: Session = Depends(get_db)
+):
+    return PerformanceAnalyticsService(db).goal_groups(_get_cycle_or_404(db, cycle_id), group_by)
+
+
+# --- Custom Report Builder ---
+@router.get("/custom-report/catalog", response_model=List[ReportEntityInfo], dependencies=[Depends(deps.allow_admin_only)])
+def get_custom_report_catalog():
+    """Entities, with the dimensions (also usable as filters) and measures a custom report can pick from."""
+    return report_catalog()
 
 
 @router.get("/custom-report", dependencies=[Depends(deps.allow_admin_only)])
-async def get_custom_report_placeholder():
-    return {"message": "Custom report builder endpoint (not yet implemented)."}
\ No newline at end of file
+def get_custom_report_moved():
+    """The placeholder GET is gone: reports are run by POSTing a ReportSpec to the same path."""
+    raise HTTPException(
+        status_code=405, headers={"Allow": "POST"},
+        detail="Run custom reports with POST /reports/custom-report and a report spec body; "
+               "GET /reports/custom-report/catalog lists the entities, dimensions and measures.",
+    )
+
+
+@router.post("/custom-report", dependencies=[Depends(deps.allow_admin_only)])
+def run_custom_report(
+        spec: ReportSpec,
+        report_format: str = Query("jsonl", alias="format", pattern=f"^({'|'.join(REPORT_FORMATS)})$"),
+):
+    """Runs an ad-hoc report as one query and streams the rows as JSON lines or CSV."""
+    builder = ReportBuilder()
+    try:
+        plan, params = builder.compile(spec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type = "text/csv" if report_format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{spec.entity}-report.{report_format}"',
+               "X-Report-Plan": plan.key[:16]}
+    body = builder.stream(plan, params, report_format)
+    first_chunk = next(body)  # Runs the query now: a failing report is an error status, not a truncated 200
+    return StreamingResponse(chain([first_chunk], body), media_type=media_type, headers=headers)
\ No newline at end of file
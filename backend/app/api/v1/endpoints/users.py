@@ -1,16 +1,20 @@
 # hr_software/app/api/v1/endpoints/users.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlmodel import Session
-from typing import List, Any  # Added List
+from typing import List, Any, Optional  # Added List
 
-from app.crud import crud_user, crud_employee, crud_workflow  # Added crud_workflow
+from app.crud import crud_user, crud_employee
 from app.schemas.user import UserCreate, UserRead
 from app.schemas.employee import EmployeeProfileCreate  # To create profile along with user
+from app.schemas.employee_import import EmployeeImportResult
 from app.models.user import User  # User ORM model
 from app.models.enums import UserRole, EmploymentStatus  # Import Enums
 from app.core.db import get_db
 from app.api import deps
+from app.services.employee_import_service import EmployeeImportService, read_import_rows
 
 router = APIRouter()
 
@@ -46,28 +50,37 @@ def create_user_and_profile(
         )
         try:
             employee_profile_orm = crud_employee.create_employee_profile(db=db, employee_in=profile_in_data)
+            # The status-triggered workflow is assigned in the background (see workflow_trigger_service)
             print(
                 f"Employee profile created for user: {created_user_orm.email} with status {employee_profile_orm.employment_status.value}")
 
-            # --- Auto-assign workflow on initial profile creation ---
-            if employee_profile_orm and employee_profile_orm.employment_status:
-                template_to_assign = crud_workflow.get_workflow_template_by_trigger_status(db,
-                                                                                           employee_profile_orm.employment_status)
-                if template_to_assign:
-                    assigned = crud_workflow.assign_workflow_to_employee(db, employee_profile_orm.id,
-                                                                         template_to_assign.id)
-                    if assigned:
-                        print(
-                            f"Auto-assigned workflow '{template_to_assign.name}' to new employee {employee_profile_orm.id} for status {employee_profile_orm.employment_status.value}")
-                    else:
-                        print(
-                            f"Failed to auto-assign workflow for {employee_profile_orm.id} and status {employee_profile_orm.employment_status.value}")
-            # --- End auto-assign ---
-
         except ValueError as e:
             # If profile creation fails (e.g., already exists, though less likely for a new user)
             # Consider if the user record should be rolled back or if this is just a warning
             print(f"Warning: Could not create employee profile for {created_user_orm.email}: {e}")
             # For now, we let the user be created, profile might need manual creation/linking.
 
-    return created_user_orm
\ No newline at end of file
+    return created_user_orm
+
+
+@router.post("/import", response_model=EmployeeImportResult, dependencies=[Depends(deps.allow_admin_only)])
+def import_users_and_profiles(
+        *,
+        db: Session = Depends(get_db),
+        file: UploadFile = File(..., description="CSV or XLSX with a header row (email, first_name, last_name, ...)"),
+        default_password: Optional[str] = Form(None, description="Temporary password for rows without one"),
+        dry_run: bool = Form(False, description="Validate and report without writing anything"),
+):
+    """
+    Bulk version of POST /users/: creates the users, their employee profiles and manager links,
+    and auto-assigns workflows for every valid row. Invalid rows are skipped and reported per row.
+    """
+    filename = file.filename or ""
+    if not filename.lower().endswith((".csv", ".xlsx")):
+        raise HTTPException(status_code=400, detail="Upload a .csv or .xlsx file.")
+    try:
+        return EmployeeImportService(db).import_rows(
+            read_import_rows(file.file, filename), default_password=default_password, dry_run=dry_run
+        )
+    except (ValueError, csv.Error) as e:  # Unreadable file (bad encoding, malformed CSV, missing openpyxl)
+        raise HTTPException(status_code=400, detail=f"Could not read the import file: {e}")
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     # Database
@@ -14,6 +15,43 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "HR Management Software"
     
+    # Documents
+    MAX_DOCUMENT_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    DOCUMENT_UPLOAD_SESSION_TTL_HOURS: int = 24  # Unfinished resumable uploads are discarded after this
+    DOCUMENT_SIGNED_URL_TTL_SECONDS: int = 300  # Lifetime of links from /employees/documents/{id}/signed-url
+    # Set to an nginx `internal` location aliased to the upload directory (e.g. "/protected-documents/")
+    # to let nginx send document files with sendfile instead of streaming them through the app
+    DOCUMENT_ACCEL_REDIRECT_PREFIX: Optional[str] = None
+    # Background document processing (thumbnails, text extraction, virus scan)
+    DOCUMENT_PIPELINE_WORKERS: int = 2  # Documents processed at the same time
+    DOCUMENT_PIPELINE_USE_PROCESSES: bool = True  # Extract in worker processes rather than in the API process
+    DOCUMENT_SCANNER: Optional[str] = None  # "package.module:function" taking a file path; None accepts every file
+    # Cold tier: documents of employees separated this long ago are packed into compressed archives
+    DOCUMENT_COLD_TIER_AFTER_DAYS: int = 180
+    DOCUMENT_ARCHIVE_PACK_MAX_BYTES: int = 1024 * 1024 * 1024  # A new pack file is started past this size
+
+    # Workflows
+    WORKFLOW_AUTO_ASSIGN_IN_BACKGROUND: bool = True  # False assigns triggered workflows inside the request
+    WORKFLOW_AUTO_ASSIGN_BATCH_SIZE: int = 500  # Status changes assigned together at most
+    WORKFLOW_AUTO_ASSIGN_BATCH_WAIT_SECONDS: float = 0.2  # How long a batch waits for more status changes
+    WORKFLOW_AUTO_ASSIGN_RESUME_HOURS: int = 24  # Status changes this recent get their missed workflows at startup
+    WORKFLOW_SLA_AT_RISK_DAYS: int = 3  # Open workflows due within this many days are reported as at risk
+    WORKFLOW_SLA_SCAN_INTERVAL_SECONDS: int = 300  # 0 disables the in-process scan (use scripts/scan_workflow_sla.py)
+
+    # Performance
+    PERFORMANCE_ANALYTICS_ACTIVE_CYCLE_TTL_SECONDS: int = 60
+    PERFORMANCE_ANALYTICS_CLOSED_CYCLE_TTL_SECONDS: int = 900  # Bounds how long other workers' edits take to show
+
+    # Reports
+    HEADCOUNT_CACHE_TTL_SECONDS: int = 30  # Headcount breakdowns are served from memory for this long
+    REPORT_REFRESH_INTERVAL_SECONDS: int = 300  # 0 disables the in-process summary refresh (use scripts/refresh_reports.py)
+    REPORT_BUILDER_PLAN_CACHE_SIZE: int = 256  # Compiled custom report shapes kept in memory
+    REPORT_BUILDER_STREAM_BATCH_ROWS: int = 2000  # Rows fetched from the cursor and sent per chunk
+    REPORT_CACHE_TTL_SECONDS: int = 900  # Upper bound on a cached report's age; writes to its tables invalidate it sooner
+    REPORT_CACHE_IN_PROCESS_TTL_SECONDS: int = 30  # Without Redis, other workers' and scripts' writes only show up after this
+    REPORT_CACHE_MAX_ENTRIES: int = 512  # In-process LRU size
+    REPORT_CACHE_REDIS_URL: Optional[str] = None  # e.g. redis://localhost:6379/2 to share the cache between workers
+
     # CORS
     BACKEND_CORS_ORIGINS: list[str] = [
         "http://localhost:3000",
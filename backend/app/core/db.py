@@ -27,6 +27,12 @@ def create_db_and_tables():
     from app.models.employee import Department  # noqa: F401
     from app.models.employee import EmployeeProfile  # noqa: F401
     from app.models.employee import EmployeeDocument  # noqa: F401
+    from app.models.employee import EmployeeHierarchy  # noqa: F401
+    from app.models.employee import DocumentUploadSession  # noqa: F401
+    from app.models.employee import EmployeeDocumentText  # noqa: F401
+    from app.models.employee import ArchivedBlob  # noqa: F401
+    from app.models.employee import EmploymentHistory  # noqa: F401
+    from app.models.employee import HeadcountSnapshot  # noqa: F401
 
     # --- Workflow Module ---
     from app.models.workflow import WorkflowTemplate  # noqa: F401
@@ -50,6 +56,12 @@ def create_db_and_tables():
     from app.models.performance import Goal  # noqa: F401
     from app.models.performance import AppraisalCycle  # noqa: F401
     from app.models.performance import PerformanceReview  # noqa: F401
+    from app.models.performance import GoalScoreRollup  # noqa: F401
+
+    # --- Reporting ---
+    from app.models.reporting import LeaveMonthFact  # noqa: F401
+    from app.models.reporting import SalaryExpenseSummary  # noqa: F401
+    from app.models.reporting import ReportRefreshState  # noqa: F401
 
     print("Creating all database tables via SQLModel.metadata.create_all()...")
     SQLModel.metadata.create_all(engine)
@@ -0,0 +1,9 @@
+# hr_software/app/core/locks.py
+# PostgreSQL advisory lock ids, kept together so no two locks share a number. Single-key locks take the
+# id itself; keyed locks use it as the first of two int4 keys.
+
+SLA_SCAN_LOCK_KEY = 7_381_001  # Only one process rebuilds the workflow SLA table at a time
+SNAPSHOT_LOCK_KEY = 7_381_002  # Only one process builds headcount snapshots at a time
+REFRESH_LOCK_KEY = 7_381_003  # Only one process refreshes the reporting tables at a time
+RESUME_LOCK_KEY = 7_381_004  # API workers starting together resume workflow auto-assignment one at a time
+BLOB_LOCK_CLASS = 7_381_005  # Per blob, second key from its content hash (see crud_employee.lock_blob)
@@ -1,7 +1,8 @@
 # hr_software/app/core/security.py
 
+from concurrent.futures import Executor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import List, Optional
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -29,6 +30,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def get_password_hashes(passwords: List[str], executor: Optional[Executor] = None) -> List[str]:
+    """
+    Hashes many passwords, preserving order. bcrypt is deliberately CPU-bound, so bulk callers
+    pass a ProcessPoolExecutor to spread the work over all cores.
+    """
+    if executor is None or len(passwords) < 2:
+        return [get_password_hash(password) for password in passwords]
+    return list(executor.map(get_password_hash, passwords, chunksize=8))
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Creates a JWT access token."""
     to_encode = data.copy()
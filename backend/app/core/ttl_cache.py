@@ -0,0 +1,46 @@
+# hr_software/app/core/ttl_cache.py
+# Process-local caches whose entries expire, for data other API workers may change: each worker only
+# hears about its own writes, so the TTL bounds how long another worker's change takes to show.
+import threading
+import time
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Thread-safe key -> value map; an entry is ignored once it is ttl_seconds old."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[V, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, ttl_seconds: Optional[float] = None) -> Optional[V]:
+        """The value stored under key, unless older than ttl_seconds (default: the cache's TTL)."""
+        entry = self._entries.get(key)
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if entry is None or time.monotonic() - entry[1] >= ttl_seconds:
+            return None
+        return entry[0]
+
+    def put(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+
+    def get_or_load(self, key: Hashable, load: Callable[[], V], ttl_seconds: Optional[float] = None) -> V:
+        """The cached value, or load()'s result, stored first. Concurrent misses may both load."""
+        value = self.get(key, ttl_seconds)
+        if value is None:
+            value = load()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, match: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Drops the entries whose key match() accepts; every entry without match."""
+        with self._lock:
+            if match is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
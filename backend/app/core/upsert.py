@@ -0,0 +1,72 @@
+# hr_software/app/core/upsert.py
+# Dialect-aware INSERT ... ON CONFLICT helpers for the counter tables and bulk inserts. PostgreSQL and
+# SQLite get a single statement; other databases fall back to portable UPDATE / INSERT statements.
+from typing import List, Sequence
+
+from sqlalchemy import exists, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+ON_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _on_conflict_insert(db: Session, model):
+    """The dialect's INSERT supporting ON CONFLICT, or None when the database has none."""
+    dialect_insert = ON_CONFLICT_INSERTS.get(db.get_bind().dialect.name)
+    return dialect_insert(model) if dialect_insert else None
+
+
+def _add_to_existing(db: Session, model, row: dict, key_columns: Sequence[str], added_columns: Sequence[str]) -> bool:
+    result = db.exec(
+        update(model)
+        .where(*[getattr(model, name) == row[name] for name in key_columns])
+        .values({name: getattr(model, name) + row[name] for name in added_columns})
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def upsert_adding(db: Session, model, rows: List[dict], key_columns: Sequence[str],
+                  added_columns: Sequence[str]) -> None:
+    """
+    Inserts the rows, or adds their added_columns to the stored values of the row with the same key,
+    in place so concurrent writers never overwrite each other. On databases without ON CONFLICT each
+    row is an UPDATE, then an INSERT in a savepoint when no row matched, retried as the UPDATE if a
+    concurrent insert won. Caller commits.
+    """
+    if not rows:
+        return
+    statement = _on_conflict_insert(db, model)
+    if statement is not None:
+        db.exec(statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={name: getattr(model, name) + getattr(statement.excluded, name) for name in added_columns},
+        ), params=rows)
+        return
+    for row in rows:
+        if _add_to_existing(db, model, row, key_columns, added_columns):
+            continue
+        try:
+            with db.begin_nested():
+                db.exec(insert(model).values(**row))
+        except IntegrityError:
+            _add_to_existing(db, model, row, key_columns, added_columns)
+
+
+def insert_from_select_ignoring_duplicates(db: Session, model, columns: Sequence[str], candidates,
+                                           key_columns: Sequence[str]) -> int:
+    """
+    INSERT ... SELECT of the candidate rows whose key is not taken yet (ON CONFLICT DO NOTHING, or a
+    NOT EXISTS on other databases, where a concurrent insert of the same key raises instead). Caller
+    commits. Returns the rows inserted.
+    """
+    statement = _on_conflict_insert(db, model)
+    if statement is not None:
+        return db.exec(statement.from_select(list(columns), candidates)
+                       .on_conflict_do_nothing(index_elements=list(key_columns))).rowcount
+    candidate_columns = dict(zip(columns, candidates.selected_columns))
+    new_rows = candidates.where(~exists().where(
+        *[getattr(model, name) == candidate_columns[name] for name in key_columns]
+    ))
+    return db.exec(insert(model).from_select(list(columns), new_rows)).rowcount
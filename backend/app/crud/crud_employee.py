@@ -1,23 +1,29 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import uuid
 
-from sqlmodel import Session, select, col
+from sqlmodel import Session, select, col, func, delete, update, insert, literal_column, case, and_, or_
 from typing import List, Optional
 import os # For file operations
-from fastapi import UploadFile
-import shutil # For saving files
 
-from app.models.employee import EmployeeProfile, Department, EmployeeDocument
+from app.models.employee import (
+    EmployeeProfile, Department, EmployeeDocument, EmployeeDocumentText, EmployeeHierarchy, DocumentUploadSession,
+    ArchivedBlob
+)
+from app.models.enums import DocumentProcessingStatus, EmploymentStatus, StorageTier
 from app.models.user import User
 from app.schemas.employee import (
     EmployeeProfileCreate, EmployeeProfileUpdate,
     DepartmentCreate, DepartmentUpdate,
-    EmployeeDocumentCreate # EmployeeDocumentRead is not directly used in CRUD creation
+    EmployeeDocumentCreate, # EmployeeDocumentRead is not directly used in CRUD creation
+    DocumentUploadSessionCreate
 )
 from app.core.config import settings # If you have an UPLOAD_DIRECTORY setting
-
-# UPLOAD_DIRECTORY = "uploads/employee_documents" # Define this or get from settings
-UPLOAD_DIRECTORY = os.path.join("uploads", "employee_documents") # Define this or get from settings
-os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
+from app.core.locks import BLOB_LOCK_CLASS
+from app.crud import crud_org
+from app.services.search_service import employee_search_index
+from app.services.event_bus import domain_events, EmploymentStatusChanged
+from app.services.document_storage import StagedBlob, StoredBlob, ArchiveLocation, document_store
+from app.services.workforce_history import employment_state, record_employment_change, record_employee_removed
 
 
 # --- Department CRUD (from previous code, ensure it's here) ---
@@ -46,6 +52,8 @@ def update_department(db: Session, db_department: Department, department_in: Dep
     db.add(db_department)
     db.commit()
     db.refresh(db_department)
+    if "name" in department_data:
+        employee_search_index.refresh_department(db, db_department.id)
     return db_department
 
 def delete_department(db: Session, department_id: int) -> Department | None:
@@ -64,14 +72,32 @@ def get_employee_profile_by_user_id(db: Session, user_id: int) -> EmployeeProfil
     statement = select(EmployeeProfile).where(EmployeeProfile.user_id == user_id)
     return db.exec(statement).first()
 
-def get_employee_profiles(db: Session, skip: int = 0, limit: int = 100, manager_id: Optional[int] = None) -> List[EmployeeProfile]:
+def get_employee_profiles(db: Session, skip: int = 0, limit: int = 100, manager_id: Optional[int] = None,
+                          include_indirect_reports: bool = False) -> List[EmployeeProfile]:
     statement = select(EmployeeProfile)
-    if manager_id:
-        # This gets direct reports. For all subordinates, you'd need a recursive query or CTE.
+    if manager_id and include_indirect_reports:
+        # Everyone under the manager at any depth, via the EmployeeHierarchy closure table
+        statement = statement.join(EmployeeHierarchy, EmployeeHierarchy.descendant_id == EmployeeProfile.id).where(
+            EmployeeHierarchy.ancestor_id == manager_id, EmployeeHierarchy.depth > 0
+        )
+    elif manager_id:
+        # Direct reports only
         statement = statement.where(EmployeeProfile.manager_id == manager_id)
     statement = statement.offset(skip).limit(limit)
     return db.exec(statement).all()
 
+def get_employee_ids(db: Session, employee_ids: Optional[List[int]] = None, department_id: Optional[int] = None,
+                     employment_status: Optional[EmploymentStatus] = None) -> List[int]:
+    """Ids of the employees matching every given filter, in one query."""
+    statement = select(EmployeeProfile.id)
+    if employee_ids is not None:
+        statement = statement.where(col(EmployeeProfile.id).in_(employee_ids))
+    if department_id is not None:
+        statement = statement.where(EmployeeProfile.department_id == department_id)
+    if employment_status is not None:
+        statement = statement.where(EmployeeProfile.employment_status == employment_status)
+    return db.exec(statement.order_by(EmployeeProfile.id)).all()
+
 def create_employee_profile(db: Session, employee_in: EmployeeProfileCreate) -> EmployeeProfile:
     user = db.get(User, employee_in.user_id)
     if not user:
@@ -82,34 +108,54 @@ def create_employee_profile(db: Session, employee_in: EmployeeProfileCreate) ->
 
     db_employee = EmployeeProfile.model_validate(employee_in)
     db.add(db_employee)
+    db.flush()  # Assigns db_employee.id for the hierarchy rows
+    crud_org.add_employee_node(db, db_employee.id, db_employee.manager_id)
+    record_employment_change(db, db_employee, None)
     db.commit()
     db.refresh(db_employee)
+    employee_search_index.refresh_employees(db, [db_employee.id])
+    if db_employee.employment_status:
+        domain_events.publish(EmploymentStatusChanged(employee_id=db_employee.id, old_status=None,
+                                                      new_status=db_employee.employment_status))
     return db_employee
 
 def update_employee_profile(
     db: Session, db_employee: EmployeeProfile, employee_in: EmployeeProfileUpdate
 ) -> EmployeeProfile:
     employee_data = employee_in.model_dump(exclude_unset=True)
+    old_status = db_employee.employment_status
+    old_state = employment_state(db_employee)
+    manager_changed = "manager_id" in employee_data and employee_data["manager_id"] != db_employee.manager_id
+    if manager_changed:
+        # Raises ValueError if the new manager reports to this employee
+        crud_org.move_employee_subtree(db, db_employee.id, employee_data["manager_id"])
     for key, value in employee_data.items():
         setattr(db_employee, key, value)
     db.add(db_employee)
+    record_employment_change(db, db_employee, old_state)
     db.commit()
     db.refresh(db_employee)
+    employee_search_index.refresh_employees(db, [db_employee.id])
+    if db_employee.employment_status and db_employee.employment_status != old_status:
+        domain_events.publish(EmploymentStatusChanged(employee_id=db_employee.id, old_status=old_status,
+                                                      new_status=db_employee.employment_status))
     return db_employee
 
 def delete_employee_profile(db: Session, employee_id: int) -> EmployeeProfile | None:
     employee = db.get(EmployeeProfile, employee_id)
     if employee:
-        # Delete associated documents from filesystem
-        for doc in employee.documents:
-            try:
-                if os.path.exists(doc.file_path):
-                    os.remove(doc.file_path)
-            except Exception as e:
-                print(f"Error deleting file {doc.file_path}: {e}")
-            # db.delete(doc) # Documents will be cascade deleted if relationship is set up for it
+        documents = list(employee.documents)
+        _delete_document_texts(db, [doc.id for doc in documents])
+        for doc in documents:
+            db.delete(doc)
+        crud_org.remove_employee_node(db, employee.id)
+        record_employee_removed(db, employee)
         db.delete(employee)
         db.commit()
+        # Files are removed only after the rows are gone; shared blobs stay while other documents use them
+        for doc in documents:
+            _release_document_file(db, doc)
+        employee_search_index.remove_employee(employee_id)
     return employee
 
 # --- EmployeeDocument CRUD ---
@@ -117,52 +163,45 @@ def create_employee_document(
     db: Session,
     employee_id: int,
     doc_meta_data: EmployeeDocumentCreate, # Use the Pydantic schema for metadata
-    file_to_upload: UploadFile # The actual file object from FastAPI
+    file_name: Optional[str],
+    staged: StagedBlob, # Content hashed into a temp file, promoted here
+    content_type: Optional[str] = None
 ) -> EmployeeDocument:
     """
-    Saves an uploaded file to the filesystem and its metadata to the database.
+    Moves the content into the blob store and saves the document's metadata in one transaction.
+    If the row cannot be created, a blob written only for it is removed again.
     """
-    employee_profile = get_employee_profile(db, employee_id=employee_id)
-    if not employee_profile:
-        raise ValueError(f"Employee profile with id {employee_id} not found.")
-
-    # Sanitize original filename and create a unique name for storage
-    # to prevent path traversal and overwrites.
-    original_filename = file_to_upload.filename if file_to_upload.filename else "untitled"
-    # Basic sanitization: replace spaces, remove leading/trailing dots/slashes, limit length
-    safe_original_filename = "".join(c if c.isalnum() or c in ['.', '_', '-'] else '_' for c in original_filename)
-    safe_original_filename = safe_original_filename[:100] # Limit length
-
-    timestamp_str = str(int(datetime.utcnow().timestamp()))
-    # Example: 1_1678886400_passport_scan.pdf
-    unique_disk_filename = f"{employee_id}_{timestamp_str}_{safe_original_filename}"
-    file_path_on_disk = os.path.join(UPLOAD_DIRECTORY, unique_disk_filename)
-
+    blob = None
     try:
-        # Save the uploaded file to the UPLOAD_DIRECTORY
-        with open(file_path_on_disk, "wb") as buffer: # Use 'wb' for binary write
-            shutil.copyfileobj(file_to_upload.file, buffer)
-    except IOError as e:
-        # Log the error, clean up partial file if necessary
-        print(f"ERROR: File I/O error while saving document: {e}")
-        # if os.path.exists(file_path_on_disk):
-        #     os.remove(file_path_on_disk) # Attempt cleanup
-        raise IOError(f"Could not save uploaded file to disk. Server error.") # Re-raise or raise custom
-    finally:
-        file_to_upload.file.close() # Important to close the temp file
-
-    # Create the database record for the document
-    db_document_entry = EmployeeDocument(
-        employee_id=employee_id,
-        document_type=doc_meta_data.document_type, # From Pydantic schema
-        description=doc_meta_data.description,     # From Pydantic schema
-        file_name=original_filename,               # Store the original filename for user reference
-        file_path=file_path_on_disk,               # Store the path to the file on server's disk
-        # upload_date is set by default_factory in the model
-    )
+        employee_profile = get_employee_profile(db, employee_id=employee_id)
+        if not employee_profile:
+            raise ValueError(f"Employee profile with id {employee_id} not found.")
 
-    db.add(db_document_entry)
-    db.commit()
+        blob = store_blob(db, staged)
+        db_document_entry = EmployeeDocument(
+            employee_id=employee_id,
+            document_type=doc_meta_data.document_type, # From Pydantic schema
+            description=doc_meta_data.description,     # From Pydantic schema
+            file_name=(file_name or "untitled")[:255], # Store the original filename for user reference
+            file_path=blob.path,                       # Shared content-addressed blob
+            content_hash=blob.content_hash,
+            file_size=blob.size,
+            content_type=content_type,
+            # upload_date is set by default_factory in the model
+        )
+        db.add(db_document_entry)
+        db.commit()
+    except Exception:
+        db.rollback()
+        if blob is None:
+            document_store.discard(staged)
+        elif not blob.deduplicated:
+            release_blob_if_unreferenced(db, blob.content_hash)
+        raise
+    if not blob.deduplicated and get_archived_blob(db, blob.content_hash):
+        # The same content was uploaded again after being archived, so it is hot once more
+        mark_blobs_hot(db, [blob.content_hash])
+        db.commit()
     db.refresh(db_document_entry)
     return db_document_entry
 
@@ -170,18 +209,275 @@ def create_employee_document(
 def get_employee_document(db: Session, document_id: int) -> EmployeeDocument | None:
     return db.get(EmployeeDocument, document_id)
 
+def get_document_for_viewer(db: Session, document_id: int, viewer_user_id: int) -> tuple[EmployeeDocument | None, Optional[int]]:
+    """
+    Loads a document together with how far the viewer sits above its owner in the org chart,
+    in one query: 0 means the viewer owns it, n > 0 that it belongs to someone n levels below
+    them, None that the viewer is outside the owner's reporting line.
+    """
+    viewer_depth = (
+        select(func.min(EmployeeHierarchy.depth))
+        .join(EmployeeProfile, EmployeeProfile.id == EmployeeHierarchy.ancestor_id)
+        .where(EmployeeProfile.user_id == viewer_user_id,
+               EmployeeHierarchy.descendant_id == EmployeeDocument.employee_id)
+        .correlate(EmployeeDocument)
+        .scalar_subquery()
+    )
+    row = db.exec(select(EmployeeDocument, viewer_depth).where(EmployeeDocument.id == document_id)).first()
+    return (row[0], row[1]) if row else (None, None)
+
 def get_employee_documents(db: Session, employee_id: int) -> List[EmployeeDocument]:
     statement = select(EmployeeDocument).where(EmployeeDocument.employee_id == employee_id)
     return db.exec(statement).all()
 
+def lock_blob(db: Session, content_hash: str) -> None:
+    """
+    Holds a lock on one blob until the transaction ends, so promoting an upload onto an existing
+    blob and inserting its document cannot interleave with deleting that blob as unreferenced.
+    Only PostgreSQL needs it; SQLite runs one writing transaction at a time.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.exec(select(func.pg_advisory_xact_lock(BLOB_LOCK_CLASS, int(content_hash[:8], 16) - 2 ** 31))).one()
+
+def store_blob(db: Session, staged: StagedBlob) -> StoredBlob:
+    """Promotes staged content into the blob store under the blob's lock. Caller inserts the referencing row and commits."""
+    lock_blob(db, staged.content_hash)
+    return document_store.promote(staged)
+
+def release_blob_if_unreferenced(db: Session, content_hash: str) -> bool:
+    """Deletes a blob once no EmployeeDocument refers to it. Returns True if it was deleted."""
+    lock_blob(db, content_hash)
+    references = db.exec(
+        select(func.count()).select_from(EmployeeDocument).where(EmployeeDocument.content_hash == content_hash)
+    ).one()
+    if references:
+        db.commit()  # Releases the lock
+        return False
+    db.exec(delete(ArchivedBlob).where(ArchivedBlob.content_hash == content_hash))  # Pack space is reclaimed by compaction
+    document_store.delete_blob(content_hash)  # Still under the lock; an upload waiting on it writes the blob anew
+    db.commit()
+    return True
+
+def _release_document_file(db: Session, document: EmployeeDocument) -> None:
+    if document.content_hash:
+        release_blob_if_unreferenced(db, document.content_hash)
+        return
+    # Documents uploaded before the blob store have a file of their own
+    try:
+        if os.path.exists(document.file_path):
+            os.remove(document.file_path)
+    except Exception as e:
+        print(f"Error deleting file {document.file_path}: {e}")
+
 def delete_employee_document(db: Session, document_id: int) -> EmployeeDocument | None:
     document = db.get(EmployeeDocument, document_id)
     if document:
-        try:
-            if os.path.exists(document.file_path):
-                os.remove(document.file_path)
-        except Exception as e:
-            print(f"Error deleting file {document.file_path}: {e}")
+        _delete_document_texts(db, [document_id])
         db.delete(document)
         db.commit()
-    return document
\ No newline at end of file
+        _release_document_file(db, document)
+    return document
+
+
+# --- Document processing results (written by the document pipeline) ---
+TEXT_SEARCH_CONFIG = "english"  # Must match the expression of ix_employeedocumenttext_content_tsv
+
+def get_documents_pending_processing(db: Session) -> List[int]:
+    statement = select(EmployeeDocument.id).where(col(EmployeeDocument.processing_status).in_(
+        [DocumentProcessingStatus.PENDING, DocumentProcessingStatus.PROCESSING]
+    )).order_by(EmployeeDocument.id)
+    return db.exec(statement).all()
+
+def get_processed_document_with_hash(db: Session, content_hash: str, exclude_document_id: int) -> EmployeeDocument | None:
+    """Another document with the same content that was already processed, whose results can be copied."""
+    statement = select(EmployeeDocument).where(
+        EmployeeDocument.content_hash == content_hash,
+        EmployeeDocument.id != exclude_document_id,
+        col(EmployeeDocument.processing_status).in_(
+            [DocumentProcessingStatus.COMPLETED, DocumentProcessingStatus.QUARANTINED]
+        ),
+    ).limit(1)
+    return db.exec(statement).first()
+
+def get_document_text(db: Session, document_id: int) -> str | None:
+    text_row = db.get(EmployeeDocumentText, document_id)
+    return text_row.content if text_row else None
+
+def set_document_text(db: Session, document_id: int, content: Optional[str]) -> None:
+    """Stages the extracted text of a document (None or empty removes it); the caller commits."""
+    _delete_document_texts(db, [document_id])
+    if content:
+        db.add(EmployeeDocumentText(document_id=document_id, content=content))
+
+def _delete_document_texts(db: Session, document_ids: List[int]) -> None:
+    if document_ids:
+        db.exec(delete(EmployeeDocumentText).where(col(EmployeeDocumentText.document_id).in_(document_ids)))
+
+def search_employee_documents(
+    db: Session, query: str, limit: int = 20, viewer_employee_id: Optional[int] = None, include_reports: bool = True
+) -> List[tuple[EmployeeDocument, Optional[str]]]:
+    """
+    Full-text search over extracted document text, best match first, as (document, snippet) pairs.
+    viewer_employee_id limits results to that employee's documents and, with include_reports,
+    to those of everyone in their reporting line; None searches every document (admins).
+    Uses the GIN-indexed tsvector on PostgreSQL and a plain substring match elsewhere.
+    """
+    conditions = [EmployeeDocument.processing_status == DocumentProcessingStatus.COMPLETED]
+    if viewer_employee_id is not None:
+        visible = select(EmployeeHierarchy.descendant_id).where(EmployeeHierarchy.ancestor_id == viewer_employee_id)
+        if not include_reports:
+            visible = visible.where(EmployeeHierarchy.depth == 0)
+        conditions.append(col(EmployeeDocument.employee_id).in_(visible))
+
+    if db.get_bind().dialect.name == "postgresql":
+        config = literal_column(f"'{TEXT_SEARCH_CONFIG}'")
+        document_vector = func.to_tsvector(config, EmployeeDocumentText.content)
+        ts_query = func.websearch_to_tsquery(config, query)
+        snippet = func.ts_headline(config, EmployeeDocumentText.content, ts_query,
+                                   "MaxFragments=1, MaxWords=25, MinWords=10")
+        statement = (
+            select(EmployeeDocument, snippet)
+            .join(EmployeeDocumentText, EmployeeDocumentText.document_id == EmployeeDocument.id)
+            .where(*conditions, document_vector.op("@@")(ts_query))
+            .order_by(func.ts_rank(document_vector, ts_query).desc(), col(EmployeeDocument.id).desc())
+            .limit(limit)
+        )
+        return [(document, headline) for document, headline in db.exec(statement).all()]
+
+    statement = (
+        select(EmployeeDocument, EmployeeDocumentText.content)
+        .join(EmployeeDocumentText, EmployeeDocumentText.document_id == EmployeeDocument.id)
+        .where(*conditions, col(EmployeeDocumentText.content).icontains(query))
+        .order_by(col(EmployeeDocument.id).desc())
+        .limit(limit)
+    )
+    results = []
+    for document, content in db.exec(statement).all():
+        position = content.lower().find(query.lower())
+        results.append((document, content[max(0, position - 80):position + len(query) + 80].strip()))
+    return results
+
+
+# --- Storage tiers (used by DocumentTieringService) ---
+SEPARATED_STATUSES = [EmploymentStatus.RESIGNED, EmploymentStatus.TERMINATED]
+
+def _separated_before(cutoff: datetime):
+    """Owner resigned or was terminated before cutoff; without any separation date the upload date counts."""
+    separation_date = func.coalesce(
+        EmployeeProfile.last_working_day, EmployeeProfile.termination_date, EmployeeProfile.resignation_date
+    )
+    return and_(
+        col(EmployeeProfile.employment_status).in_(SEPARATED_STATUSES),
+        or_(
+            and_(separation_date.is_not(None), separation_date <= cutoff.date()),
+            and_(separation_date.is_(None), EmployeeDocument.upload_date <= cutoff),
+        ),
+    )
+
+def get_archivable_blob_hashes(db: Session, cutoff: datetime) -> List[str]:
+    """Hot blobs whose every document belongs to an employee separated before cutoff."""
+    statement = (
+        select(EmployeeDocument.content_hash)
+        .join(EmployeeProfile, EmployeeProfile.id == EmployeeDocument.employee_id)
+        .where(col(EmployeeDocument.content_hash).is_not(None), EmployeeDocument.storage_tier == StorageTier.HOT)
+        .group_by(EmployeeDocument.content_hash)
+        # A blob shared with a current employee's document stays hot
+        .having(func.sum(case((_separated_before(cutoff), 0), else_=1)) == 0)
+        .order_by(EmployeeDocument.content_hash)
+    )
+    return db.exec(statement).all()
+
+def get_unstored_documents_of_separated(db: Session, cutoff: datetime) -> List[EmployeeDocument]:
+    """Documents saved as loose files before the blob store existed, owned by employees separated before cutoff."""
+    statement = (
+        select(EmployeeDocument)
+        .join(EmployeeProfile, EmployeeProfile.id == EmployeeDocument.employee_id)
+        .where(col(EmployeeDocument.content_hash).is_(None), _separated_before(cutoff))
+    )
+    return db.exec(statement).all()
+
+def get_archived_blob(db: Session, content_hash: str) -> ArchivedBlob | None:
+    return db.get(ArchivedBlob, content_hash)
+
+def get_archived_blobs_in_pack(db: Session, pack_name: str) -> List[ArchivedBlob]:
+    return db.exec(select(ArchivedBlob).where(ArchivedBlob.pack_name == pack_name)).all()
+
+def get_pack_live_bytes(db: Session) -> dict[str, int]:
+    """Bytes per pack file still referenced by ArchivedBlob rows."""
+    statement = select(ArchivedBlob.pack_name, func.sum(ArchivedBlob.stored_size)).group_by(ArchivedBlob.pack_name)
+    return {pack_name: int(live_bytes) for pack_name, live_bytes in db.exec(statement).all()}
+
+def get_cold_blob_hashes_of_employee(db: Session, employee_id: int) -> List[str]:
+    statement = select(EmployeeDocument.content_hash).distinct().where(
+        EmployeeDocument.employee_id == employee_id, EmployeeDocument.storage_tier == StorageTier.COLD
+    )
+    return db.exec(statement).all()
+
+def mark_blobs_archived(db: Session, locations: List[ArchiveLocation]) -> int:
+    """Records pack locations (new or moved) and flags the documents COLD. The caller commits. Returns documents flagged."""
+    if not locations:
+        return 0
+    hashes = [location.content_hash for location in locations]
+    db.exec(delete(ArchivedBlob).where(col(ArchivedBlob.content_hash).in_(hashes)))
+    db.exec(insert(ArchivedBlob), params=[
+        {"content_hash": location.content_hash, "pack_name": location.pack_name, "offset": location.offset,
+         "stored_size": location.stored_size, "size": location.size, "compression": location.compression,
+         "archived_at": datetime.utcnow()}
+        for location in locations
+    ])
+    result = db.exec(
+        update(EmployeeDocument).where(col(EmployeeDocument.content_hash).in_(hashes)).values(storage_tier=StorageTier.COLD)
+    )
+    return result.rowcount
+
+def mark_blobs_hot(db: Session, content_hashes: List[str]) -> None:
+    """Flags the documents HOT again and forgets their pack locations. The caller commits."""
+    if not content_hashes:
+        return
+    db.exec(
+        update(EmployeeDocument).where(col(EmployeeDocument.content_hash).in_(content_hashes)).values(storage_tier=StorageTier.HOT)
+    )
+    db.exec(delete(ArchivedBlob).where(col(ArchivedBlob.content_hash).in_(content_hashes)))
+
+
+# --- Resumable DocumentUploadSession CRUD ---
+def create_upload_session(
+    db: Session, employee_id: int, created_by_user_id: int, session_in: DocumentUploadSessionCreate
+) -> DocumentUploadSession:
+    delete_expired_upload_sessions(db)
+    upload_session = DocumentUploadSession(
+        id=uuid.uuid4().hex,
+        employee_id=employee_id,
+        created_by_user_id=created_by_user_id,
+        document_type=session_in.document_type,
+        description=session_in.description,
+        file_name=session_in.file_name[:255],
+        content_type=session_in.content_type,
+        total_size=session_in.total_size,
+    )
+    db.add(upload_session)
+    db.commit()
+    db.refresh(upload_session)
+    return upload_session
+
+def get_upload_session(db: Session, upload_id: str) -> DocumentUploadSession | None:
+    return db.get(DocumentUploadSession, upload_id)
+
+def update_upload_session_progress(db: Session, upload_session: DocumentUploadSession, received_bytes: int) -> DocumentUploadSession:
+    upload_session.received_bytes = received_bytes
+    db.add(upload_session)
+    db.commit()
+    db.refresh(upload_session)
+    return upload_session
+
+def delete_upload_session(db: Session, upload_session: DocumentUploadSession) -> None:
+    db.delete(upload_session)
+    db.commit()
+    document_store.discard_partial(upload_session.id)
+
+def delete_expired_upload_sessions(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=settings.DOCUMENT_UPLOAD_SESSION_TTL_HOURS)
+    expired = db.exec(select(DocumentUploadSession).where(DocumentUploadSession.created_at < cutoff)).all()
+    for upload_session in expired:
+        delete_upload_session(db, upload_session)
+    return len(expired)
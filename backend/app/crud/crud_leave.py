@@ -11,6 +11,7 @@ from app.models.user import User  # For type hinting completed_by_user_id contex
 
 # Import Enums (used for type hints and default values in some cases)
 from app.models.enums import LeaveTypeName, LeaveRequestStatus, EmployeeWorkflowStatus
+from app.services.leave_analytics import record_leave_request, rebuild_leave_facts
 
 # Import Schemas (primarily for what the API layer might pass if creating directly from schema,
 # but for create_leave_request, we're now taking individual args)
@@ -191,6 +192,9 @@ def create_leave_request(
         # manager_remarks, approved_or_rejected_by_id, approved_or_rejected_on are for later updates
     )
     db.add(db_leave_request_orm_instance)
+    if status == LeaveRequestStatus.APPROVED:  # Leave types without approval are approved on creation
+        db.flush()
+        record_leave_request(db, db_leave_request_orm_instance)
     db.commit()
     db.refresh(db_leave_request_orm_instance)
     return db_leave_request_orm_instance
@@ -215,6 +219,7 @@ def update_leave_request_status(
     db_leave_request_orm.approved_or_rejected_on = datetime.utcnow()  # Timestamp of the action
 
     db.add(db_leave_request_orm)
+    record_leave_request(db, db_leave_request_orm)  # Split into month facts when approved, dropped otherwise
     db.commit()
     db.refresh(db_leave_request_orm)
     return db_leave_request_orm
@@ -241,6 +246,7 @@ def create_holiday(db: Session, holiday_in: HolidayCreate) -> Holiday:
     # holiday_in is a Pydantic schema
     db_holiday = Holiday.model_validate(holiday_in)
     db.add(db_holiday)
+    rebuild_leave_facts(db, [db_holiday.date])  # Approved leave over that day is split again
     db.commit()
     db.refresh(db_holiday)
     return db_holiday
@@ -248,9 +254,12 @@ def create_holiday(db: Session, holiday_in: HolidayCreate) -> Holiday:
 
 def update_holiday(db: Session, db_holiday: Holiday, holiday_in_data: dict) -> Holiday:
     # holiday_in_data is a dictionary from schema.model_dump(exclude_unset=True)
+    old_date = db_holiday.date
     for key, value in holiday_in_data.items():
         setattr(db_holiday, key, value)
     db.add(db_holiday)
+    db.flush()
+    rebuild_leave_facts(db, [old_date, db_holiday.date])
     db.commit()
     db.refresh(db_holiday)
     return db_holiday
@@ -260,5 +269,7 @@ def delete_holiday(db: Session, holiday_id: int) -> Holiday | None:
     holiday = db.get(Holiday, holiday_id)
     if holiday:
         db.delete(holiday)
+        db.flush()
+        rebuild_leave_facts(db, [holiday.date])
         db.commit()
     return holiday
\ No newline at end of file
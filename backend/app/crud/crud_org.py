@@ -0,0 +1,183 @@
+# hr_software/app/crud/crud_org.py
+# Closure-table maintenance and queries for the reporting hierarchy (EmployeeProfile.manager_id).
+
+from sqlmodel import Session, select, delete, insert, func
+from sqlalchemy import literal, true, exists, Integer
+from sqlalchemy.orm import aliased
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.models.employee import EmployeeProfile, EmployeeHierarchy
+
+
+# --- Maintenance ---
+def add_employee_node(db: Session, employee_id: int, manager_id: Optional[int]) -> None:
+    """Adds the closure rows for a newly created profile. Caller commits."""
+    db.exec(insert(EmployeeHierarchy).values(ancestor_id=employee_id, descendant_id=employee_id, depth=0))
+    if manager_id:
+        db.exec(
+            insert(EmployeeHierarchy).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(EmployeeHierarchy.ancestor_id, literal(employee_id), EmployeeHierarchy.depth + 1)
+                .where(EmployeeHierarchy.descendant_id == manager_id)
+            )
+        )
+
+
+def add_employee_nodes(db: Session, manager_by_employee: Dict[int, Optional[int]]) -> int:
+    """
+    Bulk version of add_employee_node for many new profiles at once (e.g. an import), where
+    managers may be existing employees or other new profiles in the same batch. The new
+    managers must not form a cycle. Paths are computed in memory from one lookup of the
+    existing managers' ancestors and written with a single executemany. Caller commits.
+    """
+    existing_manager_ids = {
+        manager_id for manager_id in manager_by_employee.values()
+        if manager_id is not None and manager_id not in manager_by_employee
+    }
+    paths_by_node: Dict[int, List[Tuple[int, int]]] = defaultdict(list)  # node -> [(ancestor_id, depth)]
+    if existing_manager_ids:
+        rows = db.exec(
+            select(EmployeeHierarchy.ancestor_id, EmployeeHierarchy.descendant_id, EmployeeHierarchy.depth)
+            .where(EmployeeHierarchy.descendant_id.in_(existing_manager_ids))
+        ).all()
+        for ancestor_id, descendant_id, depth in rows:
+            paths_by_node[descendant_id].append((ancestor_id, depth))
+
+    resolved = set()
+    for employee_id in manager_by_employee:
+        chain = []
+        current = employee_id
+        while current in manager_by_employee and current not in resolved:
+            chain.append(current)
+            current = manager_by_employee[current]
+        above = paths_by_node[current] if current is not None else []
+        for node in reversed(chain):
+            above = [(node, 0)] + [(ancestor_id, depth + 1) for ancestor_id, depth in above]
+            paths_by_node[node] = above
+            resolved.add(node)
+
+    values = [
+        {"ancestor_id": ancestor_id, "descendant_id": employee_id, "depth": depth}
+        for employee_id in manager_by_employee
+        for ancestor_id, depth in paths_by_node[employee_id]
+    ]
+    if values:
+        db.exec(insert(EmployeeHierarchy), params=values)
+    return len(values)
+
+
+def move_employee_subtree(db: Session, employee_id: int, new_manager_id: Optional[int]) -> None:
+    """
+    Re-parents an employee (and everyone under them) below new_manager_id. Caller commits.
+    Raises ValueError if the move would create a cycle.
+    """
+    if new_manager_id is not None and is_ancestor(db, employee_id, new_manager_id, include_self=True):
+        raise ValueError(f"Employee {new_manager_id} reports to employee {employee_id}; cannot make them their manager.")
+
+    subtree_ids = select(EmployeeHierarchy.descendant_id).where(EmployeeHierarchy.ancestor_id == employee_id)
+    outside_ancestor_ids = select(EmployeeHierarchy.ancestor_id).where(
+        EmployeeHierarchy.descendant_id == employee_id, EmployeeHierarchy.depth > 0
+    )
+    # Detach the subtree from its old ancestors (paths inside the subtree stay untouched)
+    db.exec(
+        delete(EmployeeHierarchy)
+        .where(EmployeeHierarchy.descendant_id.in_(subtree_ids))
+        .where(EmployeeHierarchy.ancestor_id.in_(outside_ancestor_ids))
+    )
+    if new_manager_id is None:
+        return
+
+    # Attach: every ancestor of the new manager (incl. the manager) x every node of the subtree
+    above = aliased(EmployeeHierarchy)
+    below = aliased(EmployeeHierarchy)
+    db.exec(
+        insert(EmployeeHierarchy).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            .select_from(above)
+            .join(below, true())  # deliberate cross join
+            .where(above.descendant_id == new_manager_id)
+            .where(below.ancestor_id == employee_id)
+        )
+    )
+
+
+def remove_employee_node(db: Session, employee_id: int) -> None:
+    """Removes every closure row that references the profile. Caller commits."""
+    db.exec(
+        delete(EmployeeHierarchy).where(
+            (EmployeeHierarchy.ancestor_id == employee_id) | (EmployeeHierarchy.descendant_id == employee_id)
+        )
+    )
+
+
+def rebuild_hierarchy(db: Session) -> int:
+    """
+    Recomputes the whole closure table from EmployeeProfile.manager_id with a recursive CTE.
+    Used to backfill existing data; returns the number of closure rows written.
+    """
+    paths = (
+        select(
+            EmployeeProfile.id.label("ancestor_id"),
+            EmployeeProfile.id.label("descendant_id"),
+            literal(0, Integer).label("depth"),
+        )
+        .cte("paths", recursive=True)
+    )
+    child = aliased(EmployeeProfile)
+    paths = paths.union_all(
+        select(paths.c.ancestor_id, child.id, paths.c.depth + 1)
+        .join(child, child.manager_id == paths.c.descendant_id)
+    )
+    db.exec(delete(EmployeeHierarchy))
+    db.exec(
+        insert(EmployeeHierarchy).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(paths.c.ancestor_id, paths.c.descendant_id, paths.c.depth)
+        )
+    )
+    db.commit()
+    return db.scalar(select(func.count()).select_from(EmployeeHierarchy)) or 0
+
+
+def ensure_hierarchy_built(db: Session) -> None:
+    """Backfills the closure table on startup if it is empty but profiles already exist."""
+    has_nodes = db.exec(select(EmployeeHierarchy.ancestor_id).limit(1)).first() is not None
+    has_profiles = db.exec(select(EmployeeProfile.id).limit(1)).first() is not None
+    if has_profiles and not has_nodes:
+        written = rebuild_hierarchy(db)
+        print(f"Employee hierarchy rebuilt: {written} closure rows.")
+
+
+# --- Queries ---
+def get_subordinate_ids(db: Session, manager_id: int, max_depth: Optional[int] = None) -> List[int]:
+    """All employees reporting (directly or indirectly) to manager_id, nearest levels first."""
+    statement = select(EmployeeHierarchy.descendant_id).where(
+        EmployeeHierarchy.ancestor_id == manager_id, EmployeeHierarchy.depth > 0
+    )
+    if max_depth is not None:
+        statement = statement.where(EmployeeHierarchy.depth <= max_depth)
+    statement = statement.order_by(EmployeeHierarchy.depth, EmployeeHierarchy.descendant_id)
+    return db.exec(statement).all()
+
+
+def get_chain_of_command(db: Session, employee_id: int) -> List[int]:
+    """Manager ids above employee_id, from the direct manager up to the top of the tree."""
+    statement = (
+        select(EmployeeHierarchy.ancestor_id)
+        .where(EmployeeHierarchy.descendant_id == employee_id, EmployeeHierarchy.depth > 0)
+        .order_by(EmployeeHierarchy.depth)
+    )
+    return db.exec(statement).all()
+
+
+def is_ancestor(db: Session, ancestor_id: int, descendant_id: int, include_self: bool = False) -> bool:
+    # EXISTS on the (ancestor_id, descendant_id) primary key: one index probe
+    pair = exists().where(
+        EmployeeHierarchy.ancestor_id == ancestor_id,
+        EmployeeHierarchy.descendant_id == descendant_id,
+    )
+    if not include_self:
+        pair = pair.where(EmployeeHierarchy.depth > 0)
+    return db.exec(select(pair)).one()
@@ -1,9 +1,15 @@
-from sqlmodel import Session, select, and_
-from typing import List, Optional
+from sqlmodel import Session, select, and_, func, case, exists, update
+from sqlalchemy import literal
+from sqlalchemy.orm import aliased
+from typing import Dict, List, Optional, Tuple
 from datetime import date, datetime
 
+from app.core.upsert import insert_from_select_ignoring_duplicates
 from app.models.performance import Goal, GoalStatus, AppraisalCycle, AppraisalCycleStatus, PerformanceReview
-from app.models.employee import EmployeeProfile # For joins/filters
+from app.models.employee import EmployeeProfile, EmployeeHierarchy # For joins/filters
+from app.models.enums import EmploymentStatus, ReviewStatus
+from app.services.event_bus import domain_events, PerformanceReviewsChanged, GoalsChanged
+from app.services.goal_scores import record_goal_change
 
 from app.schemas.performance import (
     GoalCreate, GoalUpdate,
@@ -39,24 +45,37 @@ def create_goal(db: Session, goal_in: GoalCreate, employee_id: int) -> Goal:
     # goal_in might not have employee_id if it's part of URL path
     db_goal = Goal.model_validate(goal_in, update={"employee_id": employee_id})
     db.add(db_goal)
+    record_goal_change(db, employee_id, None, (db_goal.appraisal_cycle_id, db_goal.status, db_goal.weightage))
     db.commit()
     db.refresh(db_goal)
+    domain_events.publish(GoalsChanged(appraisal_cycle_id=db_goal.appraisal_cycle_id))
     return db_goal
 
 def update_goal(db: Session, db_goal: Goal, goal_in: GoalUpdate) -> Goal:
+    # Re-read under a row lock held until commit, so the rollup delta is taken from the state this update
+    # replaces and the update applies to that state, not to a copy loaded before a concurrent change
+    db_goal = db.get(Goal, db_goal.id, with_for_update=True, populate_existing=True)
+    old_state = (db_goal.appraisal_cycle_id, db_goal.status, db_goal.weightage)
+    old_cycle_id = old_state[0]
     update_data = goal_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_goal, key, value)
     db.add(db_goal)
+    record_goal_change(db, db_goal.employee_id, old_state,
+                       (db_goal.appraisal_cycle_id, db_goal.status, db_goal.weightage))
     db.commit()
     db.refresh(db_goal)
+    for cycle_id in {old_cycle_id, db_goal.appraisal_cycle_id}:
+        domain_events.publish(GoalsChanged(appraisal_cycle_id=cycle_id))
     return db_goal
 
 def delete_goal(db: Session, goal_id: int) -> Goal | None:
-    goal = db.get(Goal, goal_id)
+    goal = db.get(Goal, goal_id, with_for_update=True, populate_existing=True)
     if goal:
         db.delete(goal)
+        record_goal_change(db, goal.employee_id, (goal.appraisal_cycle_id, goal.status, goal.weightage), None)
         db.commit()
+        domain_events.publish(GoalsChanged(appraisal_cycle_id=goal.appraisal_cycle_id))
     return goal
 
 # --- AppraisalCycle CRUD ---
@@ -121,37 +140,192 @@ def create_performance_review_entry(db: Session, cycle_id: int, employee_id: int
         appraisal_cycle_id=cycle_id,
         employee_id=employee_id,
         manager_id=manager_id,
-        review_status="pending_self_evaluation" # Initial status
+        review_status=ReviewStatus.PENDING_SELF_EVALUATION # Initial status
     )
     db.add(db_review)
     db.commit()
     db.refresh(db_review)
+    domain_events.publish(PerformanceReviewsChanged(appraisal_cycle_id=cycle_id))
     return db_review
 
 def submit_self_evaluation(db: Session, db_review: PerformanceReview, self_eval_text: Optional[str], self_eval_rating: Optional[float]) -> PerformanceReview:
     db_review.self_evaluation_text = self_eval_text
     db_review.self_evaluation_rating = self_eval_rating
     db_review.self_evaluation_submitted_on = datetime.utcnow()
-    db_review.review_status = "pending_manager_feedback" # Next step
+    db_review.review_status = ReviewStatus.PENDING_MANAGER_FEEDBACK # Next step
     db.add(db_review)
     db.commit()
     db.refresh(db_review)
+    domain_events.publish(PerformanceReviewsChanged(appraisal_cycle_id=db_review.appraisal_cycle_id))
     return db_review
 
 def submit_manager_feedback(db: Session, db_review: PerformanceReview, manager_feedback_text: Optional[str], manager_rating: Optional[float]) -> PerformanceReview:
     db_review.manager_feedback_text = manager_feedback_text
     db_review.manager_rating = manager_rating
     db_review.manager_feedback_submitted_on = datetime.utcnow()
-    db_review.review_status = "pending_discussion" # Or "completed" if no discussion phase
+    db_review.review_status = ReviewStatus.PENDING_DISCUSSION # Or COMPLETED if no discussion phase
     db.add(db_review)
     db.commit()
     db.refresh(db_review)
+    domain_events.publish(PerformanceReviewsChanged(appraisal_cycle_id=db_review.appraisal_cycle_id))
     return db_review
 
-def update_review_status(db: Session, db_review: PerformanceReview, new_status: str) -> PerformanceReview:
-    # Add validation for allowed status transitions
-    db_review.review_status = new_status
-    db.add(db_review)
+# --- Review status transitions ---
+# Target status -> statuses a review may move to it from
+REVIEW_STATUS_TRANSITIONS = {
+    ReviewStatus.PENDING_SELF_EVALUATION: (ReviewStatus.PENDING_MANAGER_FEEDBACK, ReviewStatus.CANCELLED),
+    ReviewStatus.PENDING_MANAGER_FEEDBACK: (ReviewStatus.PENDING_SELF_EVALUATION, ReviewStatus.PENDING_DISCUSSION),
+    ReviewStatus.PENDING_DISCUSSION: (ReviewStatus.PENDING_MANAGER_FEEDBACK, ReviewStatus.COMPLETED),
+    ReviewStatus.COMPLETED: (ReviewStatus.PENDING_DISCUSSION,),
+    ReviewStatus.CANCELLED: (ReviewStatus.PENDING_SELF_EVALUATION, ReviewStatus.PENDING_MANAGER_FEEDBACK,
+                             ReviewStatus.PENDING_DISCUSSION),
+}
+# Extra conditions a review must meet to enter a status: no discussion before the manager's feedback
+REVIEW_STATUS_GUARDS = {
+    ReviewStatus.PENDING_DISCUSSION: PerformanceReview.manager_feedback_submitted_on.is_not(None),
+    ReviewStatus.COMPLETED: PerformanceReview.manager_feedback_submitted_on.is_not(None),
+}
+
+
+def transition_reviews(
+        db: Session,
+        cycle_id: int,
+        to_status: ReviewStatus,
+        from_statuses: Optional[List[ReviewStatus]] = None,
+        employee_ids: Optional[List[int]] = None,
+        department_id: Optional[int] = None,
+        review_id: Optional[int] = None,
+) -> int:
+    """
+    Moves every matching review of a cycle that may enter to_status with one conditional UPDATE: the
+    allowed source statuses and guards are part of its WHERE clause, so reviews that are not eligible,
+    including ones changed concurrently, are simply left alone. from_statuses narrows the allowed
+    sources. Caller commits and publishes PerformanceReviewsChanged. Returns the number of reviews moved.
+    """
+    sources = [status for status in REVIEW_STATUS_TRANSITIONS[to_status]
+               if from_statuses is None or status in from_statuses]
+    if not sources:
+        return 0
+    statement = update(PerformanceReview).where(
+        PerformanceReview.appraisal_cycle_id == cycle_id, PerformanceReview.review_status.in_(sources)
+    )
+    if to_status in REVIEW_STATUS_GUARDS:
+        statement = statement.where(REVIEW_STATUS_GUARDS[to_status])
+    if employee_ids is not None:
+        statement = statement.where(PerformanceReview.employee_id.in_(employee_ids))
+    if department_id is not None:
+        statement = statement.where(PerformanceReview.employee_id.in_(
+            select(EmployeeProfile.id).where(EmployeeProfile.department_id == department_id)
+        ))
+    if review_id is not None:
+        statement = statement.where(PerformanceReview.id == review_id)
+    statement = statement.values(review_status=to_status).execution_options(synchronize_session=False)
+    return db.exec(statement).rowcount
+
+
+def get_review_status_counts(db: Session, cycle_id: int, employee_ids: Optional[List[int]] = None,
+                             department_id: Optional[int] = None) -> Dict[ReviewStatus, int]:
+    statement = select(PerformanceReview.review_status, func.count()).where(PerformanceReview.appraisal_cycle_id == cycle_id)
+    if employee_ids is not None:
+        statement = statement.where(PerformanceReview.employee_id.in_(employee_ids))
+    if department_id is not None:
+        statement = statement.join(EmployeeProfile, EmployeeProfile.id == PerformanceReview.employee_id).where(
+            EmployeeProfile.department_id == department_id
+        )
+    return dict(db.exec(statement.group_by(PerformanceReview.review_status)).all())
+
+
+def update_review_status(db: Session, db_review: PerformanceReview, new_status: ReviewStatus) -> PerformanceReview:
+    """Raises ValueError if the review may not move to new_status (same rules as the bulk transition)."""
+    if not transition_reviews(db, db_review.appraisal_cycle_id, new_status, review_id=db_review.id):
+        db.rollback()
+        raise ValueError(f"A review in status {db_review.review_status.value} cannot move to {new_status.value}.")
     db.commit()
     db.refresh(db_review)
-    return db_review
\ No newline at end of file
+    domain_events.publish(PerformanceReviewsChanged(appraisal_cycle_id=db_review.appraisal_cycle_id))
+    return db_review
+
+
+# --- Bulk review initiation ---
+REVIEW_SKIP_REASONS = ("not_found", "excluded", "not_active", "no_manager", "already_exists")
+
+
+def _review_candidates(statement, employee_ids: Optional[List[int]], department_id: Optional[int],
+                       manager_id: Optional[int]):
+    if employee_ids is not None:
+        statement = statement.where(EmployeeProfile.id.in_(employee_ids))
+    if department_id is not None:
+        statement = statement.where(EmployeeProfile.department_id == department_id)
+    if manager_id is not None:
+        statement = statement.where(EmployeeProfile.id.in_(
+            select(EmployeeHierarchy.descendant_id).where(
+                EmployeeHierarchy.ancestor_id == manager_id, EmployeeHierarchy.depth > 0
+            )
+        ))
+    return statement
+
+
+def initiate_performance_reviews(
+        db: Session,
+        cycle_id: int,
+        employee_ids: Optional[List[int]] = None,
+        department_id: Optional[int] = None,
+        manager_id: Optional[int] = None,
+        active_only: Optional[bool] = None,
+) -> Tuple[int, int, Dict[str, int]]:
+    """
+    Creates the missing reviews of a cycle for every employee matching all given filters (no filter:
+    the whole organisation) in two statements: a grouped SELECT that classifies the candidates and one
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING on (appraisal_cycle_id, employee_id), so concurrent
+    initiations never create duplicates. Listed employees that exist but fall outside the department /
+    subtree filters are reported as excluded, ids without a profile as not_found. Unless active_only
+    says otherwise, explicitly listed employees are taken whatever their employment status while
+    department, subtree and organisation scopes only include active employees.
+    Reviews go to the employee's current manager. Caller commits.
+    Returns (matched, created, skipped per reason).
+    """
+    manager = aliased(EmployeeProfile)
+    if active_only is None:
+        active_only = employee_ids is None
+    eligible = [manager.id.is_not(None)]
+    if active_only:
+        eligible.append(EmployeeProfile.employment_status == EmploymentStatus.ACTIVE)
+
+    # The candidates are classified in a subquery so the CASE is grouped by its label, not re-rendered
+    whens = [(EmployeeProfile.employment_status != EmploymentStatus.ACTIVE, "not_active")] if active_only else []
+    whens += [
+        (manager.id.is_(None), "no_manager"),
+        (exists().where(PerformanceReview.appraisal_cycle_id == cycle_id,
+                        PerformanceReview.employee_id == EmployeeProfile.id), "already_exists"),
+    ]
+    reason = case(*whens, else_="eligible").label("reason")
+    classified = _review_candidates(
+        select(reason).select_from(EmployeeProfile).outerjoin(manager, manager.id == EmployeeProfile.manager_id),
+        employee_ids, department_id, manager_id,
+    ).subquery()
+    counts = dict(db.exec(select(classified.c.reason, func.count()).group_by(classified.c.reason)).all())
+
+    created = insert_from_select_ignoring_duplicates(
+        db, PerformanceReview, ["appraisal_cycle_id", "employee_id", "manager_id", "review_status"],
+        _review_candidates(
+            select(literal(cycle_id), EmployeeProfile.id, EmployeeProfile.manager_id,
+                   literal(ReviewStatus.PENDING_SELF_EVALUATION, PerformanceReview.__table__.c.review_status.type))
+            .join(manager, manager.id == EmployeeProfile.manager_id)
+            .where(*eligible),
+            employee_ids, department_id, manager_id,
+        ),
+        key_columns=["appraisal_cycle_id", "employee_id"],
+    )
+
+    matched = sum(counts.values())
+    skipped = {skip_reason: counts.get(skip_reason, 0) for skip_reason in REVIEW_SKIP_REASONS}
+    if employee_ids is not None:
+        listed = set(employee_ids)
+        existing = matched
+        if department_id is not None or manager_id is not None:
+            existing = db.exec(select(func.count(EmployeeProfile.id)).where(EmployeeProfile.id.in_(listed))).one()
+        skipped["not_found"] = len(listed) - existing
+        skipped["excluded"] = existing - matched
+    # Reviews created by a concurrent initiation between the two statements
+    skipped["already_exists"] += counts.get("eligible", 0) - created
+    return matched, created, skipped
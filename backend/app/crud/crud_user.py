@@ -4,6 +4,7 @@ from sqlmodel import Session, select
 from app.models.user import User, UserRole  # UserRole might be needed for updates if role is updatable
 from app.schemas.user import UserCreate, UserUpdate  # Ensure UserUpdate is imported if you plan to use it
 from app.core.security import get_password_hash, verify_password
+from app.services.search_service import employee_search_index
 
 
 def get_user(db: Session, user_id: int) -> User | None:  # <--- ENSURE THIS FUNCTION IS PRESENT
@@ -75,4 +76,6 @@ def update_user(db: Session, db_user: User, user_in: UserUpdate) -> User:
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    if user_data.keys() & {"email", "first_name", "last_name"}:
+        employee_search_index.refresh_user(db, db_user.id)
     return db_user
\ No newline at end of file
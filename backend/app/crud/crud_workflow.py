@@ -1,20 +1,25 @@
 # hr_software/app/crud/crud_workflow.py
-from sqlmodel import Session, select, and_
+from sqlmodel import Session, select, and_, insert, update, delete, func, case
+from sqlalchemy import literal, tuple_, cast
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from app.models.workflow import (
     WorkflowTemplate, WorkflowStepTemplate,
-    EmployeeWorkflow, EmployeeWorkflowStep,
+    EmployeeWorkflow, EmployeeWorkflowStep, WorkflowSlaItem,
     # Enums are now in models.enums, but CRUDs use the model types
 )
-from app.models.enums import EmploymentStatus, EmployeeWorkflowStatus, EmployeeWorkflowStepStatus, WorkflowType
+from app.models.enums import (
+    EmploymentStatus, EmployeeWorkflowStatus, EmployeeWorkflowStepStatus, WorkflowType, WorkflowSlaStatus
+)
 from app.models.employee import EmployeeProfile
 from app.schemas.workflow import (  # Schemas for creating templates
     WorkflowTemplateCreate,
     WorkflowStepTemplateCreate,
 )
 from app.models.user import User  # For completed_by_user_id in steps
+from app.services.event_bus import domain_events, WorkflowTemplatesChanged
+from app.services.workflow_analytics import record_cycle_times, record_step_reopened, WHOLE_WORKFLOW
 
 
 # --- WorkflowTemplate CRUD ---
@@ -36,26 +41,41 @@ def get_workflow_templates(db: Session, workflow_type: Optional[WorkflowType] =
 def get_workflow_template_by_trigger_status(db: Session, status: EmploymentStatus) -> WorkflowTemplate | None:
     """
     Finds an active workflow template that should be auto-assigned when an employee's
-    status changes TO the given 'status'.
+    status changes TO the given 'status'. The template endpoints allow only one; for rows saved
+    before that check, the oldest wins, as in WorkflowTriggerCache.
     """
     statement = select(WorkflowTemplate).where(
         WorkflowTemplate.auto_assign_on_status == status,
         WorkflowTemplate.is_active == True
-    )
+    ).order_by(WorkflowTemplate.id)
     return db.exec(statement).first()
 
 
+def get_other_trigger_template(db: Session, status: EmploymentStatus,
+                               template_id: Optional[int] = None) -> WorkflowTemplate | None:
+    """An active template other than template_id that is already auto-assigned on the given status."""
+    statement = select(WorkflowTemplate).where(
+        WorkflowTemplate.auto_assign_on_status == status,
+        WorkflowTemplate.is_active == True
+    )
+    if template_id is not None:
+        statement = statement.where(WorkflowTemplate.id != template_id)
+    return db.exec(statement.order_by(WorkflowTemplate.id)).first()
+
+
 def create_workflow_template(db: Session, template_in: WorkflowTemplateCreate) -> WorkflowTemplate:
+    """Creates the template and all of its steps in one transaction: one INSERT each for the template and the steps."""
     template_data = template_in.model_dump(exclude={"steps"})
     db_template = WorkflowTemplate.model_validate(template_data)
     db.add(db_template)
+    db.flush()  # Assigns db_template.id for the steps
+    if template_in.steps:
+        db.exec(insert(WorkflowStepTemplate), params=[
+            {**step_in.model_dump(), "workflow_template_id": db_template.id} for step_in in template_in.steps
+        ])
     db.commit()
     db.refresh(db_template)
-
-    for step_in in template_in.steps:
-        create_workflow_step_template(db, step_in, db_template.id)
-
-    db.refresh(db_template)
+    domain_events.publish(WorkflowTemplatesChanged(template_id=db_template.id))
     return db_template
 
 
@@ -68,6 +88,7 @@ def update_workflow_template(db: Session, db_template: WorkflowTemplate,
     db.add(db_template)
     db.commit()
     db.refresh(db_template)
+    domain_events.publish(WorkflowTemplatesChanged(template_id=db_template.id))
     return db_template
 
 
@@ -90,6 +111,9 @@ def update_workflow_step_template(db: Session, db_step: WorkflowStepTemplate,
     for key, value in step_in.items():
         setattr(db_step, key, value)
     db.add(db_step)
+    if "is_mandatory" in step_in:
+        recount_workflow_progress(db, select(EmployeeWorkflowStep.employee_workflow_id)
+                                  .where(EmployeeWorkflowStep.step_template_id == db_step.id))
     db.commit()
     db.refresh(db_step)
     return db_step
@@ -139,26 +163,68 @@ def assign_workflow_to_employee(db: Session, employee_id: int, template_id: int)
             f"Workflow '{template.name}' (Template ID: {template_id}) is already assigned and active (Status: {existing_assignment.status.value}) for employee {employee_id}.")
         return existing_assignment
 
-    emp_workflow = EmployeeWorkflow(
-        employee_id=employee_id,
-        workflow_template_id=template_id,
-        status=EmployeeWorkflowStatus.PENDING
-    )
-    db.add(emp_workflow)
+    # The instance and all of its steps are written in one transaction
+    workflow_ids = _insert_employee_workflows(db, [employee_id], template_id)
     db.commit()
-    db.refresh(emp_workflow)
+    emp_workflow = db.get(EmployeeWorkflow, workflow_ids[0])
     print(f"Assigned new workflow '{template.name}' (Instance ID: {emp_workflow.id}) to employee {employee_id}.")
+    return emp_workflow
+
 
-    for step_template in template.steps:  # Ensure template.steps are loaded
-        emp_step = EmployeeWorkflowStep(
-            employee_workflow_id=emp_workflow.id,
-            step_template_id=step_template.id,
-            status=EmployeeWorkflowStepStatus.PENDING
+def get_employees_with_active_workflow(db: Session, employee_ids: List[int], template_id: int) -> set[int]:
+    return set(db.exec(
+        select(EmployeeWorkflow.employee_id).where(
+            EmployeeWorkflow.employee_id.in_(employee_ids),
+            EmployeeWorkflow.workflow_template_id == template_id,
+            EmployeeWorkflow.status.in_([EmployeeWorkflowStatus.PENDING, EmployeeWorkflowStatus.IN_PROGRESS])
         )
-        db.add(emp_step)
-    db.commit()
-    db.refresh(emp_workflow)  # To get the steps loaded via relationship if accessed immediately
-    return emp_workflow
+    ).all())
+
+
+def assign_workflow_to_employees(db: Session, employee_ids: List[int], template_id: int) -> List[int]:
+    """
+    Set-based assignment of one template to many employees: one multi-row INSERT ... RETURNING for
+    the workflow instances and one INSERT ... SELECT for all of their steps. Employees that already
+    have an active instance of the template are skipped. Returns the new EmployeeWorkflow ids.
+    Caller commits.
+    """
+    if not employee_ids:
+        return []
+    already_assigned = get_employees_with_active_workflow(db, employee_ids, template_id)
+    return _insert_employee_workflows(
+        db, [employee_id for employee_id in dict.fromkeys(employee_ids) if employee_id not in already_assigned],
+        template_id
+    )
+
+
+def _insert_employee_workflows(db: Session, employee_ids: List[int], template_id: int) -> List[int]:
+    if not employee_ids:
+        return []
+    assigned_on = datetime.utcnow()
+    template = db.get(WorkflowTemplate, template_id)
+    due_date = assigned_on + timedelta(days=template.due_in_days) if template.due_in_days is not None else None
+    mandatory_steps = db.exec(
+        select(func.count()).select_from(WorkflowStepTemplate).where(
+            WorkflowStepTemplate.workflow_template_id == template_id, WorkflowStepTemplate.is_mandatory == True
+        )
+    ).one()
+    values = [
+        {"employee_id": employee_id, "workflow_template_id": template_id, "assigned_on": assigned_on,
+         "status": EmployeeWorkflowStatus.PENDING, "due_date": due_date, "mandatory_steps_total": mandatory_steps}
+        for employee_id in employee_ids
+    ]
+    workflow_ids = db.exec(insert(EmployeeWorkflow).returning(EmployeeWorkflow.id), params=values).scalars().all()
+
+    pending_step_status = literal(EmployeeWorkflowStepStatus.PENDING, EmployeeWorkflowStep.__table__.c.status.type)
+    db.exec(
+        insert(EmployeeWorkflowStep).from_select(
+            ["employee_workflow_id", "step_template_id", "status"],
+            select(EmployeeWorkflow.id, WorkflowStepTemplate.id, pending_step_status)
+            .join(WorkflowStepTemplate, WorkflowStepTemplate.workflow_template_id == EmployeeWorkflow.workflow_template_id)
+            .where(EmployeeWorkflow.id.in_(workflow_ids))
+        )
+    )
+    return list(workflow_ids)
 
 
 # --- EmployeeWorkflowStep CRUD ---
@@ -173,63 +239,179 @@ def update_employee_workflow_step(
         notes: Optional[str],
         completed_by_user_id: int
 ) -> EmployeeWorkflowStep | None:
-    emp_step = db.get(EmployeeWorkflowStep, emp_step_id)
-    if not emp_step:
+    """
+    Updates one step and, in the same transaction, its workflow's progress counters and status.
+    The step row is locked while its old status is read and the counters are changed relative
+    to their current value, so concurrent updates of sibling steps cannot lose counts.
+    Completions also feed the cycle-time histograms of workflow_analytics; marking a completed step
+    completed again keeps its first completion, and reopening one takes its sample out again, so every
+    completed step is counted once.
+    """
+    row = db.exec(
+        select(EmployeeWorkflowStep, WorkflowStepTemplate.is_mandatory, EmployeeWorkflow.workflow_template_id,
+               EmployeeWorkflow.status, EmployeeWorkflow.assigned_on, EmployeeWorkflow.last_step_completed_at)
+        .join(WorkflowStepTemplate, WorkflowStepTemplate.id == EmployeeWorkflowStep.step_template_id)
+        .join(EmployeeWorkflow, EmployeeWorkflow.id == EmployeeWorkflowStep.employee_workflow_id)
+        .where(EmployeeWorkflowStep.id == emp_step_id)
+        .with_for_update(of=EmployeeWorkflowStep)
+        .execution_options(populate_existing=True)
+    ).first()
+    if not row:
         return None
+    emp_step, is_mandatory, template_id, old_workflow_status, assigned_on, last_step_completed_at = row
+    old_status = emp_step.status
+    now = datetime.utcnow()
+    was_completed = old_status == EmployeeWorkflowStepStatus.COMPLETED
+    if was_completed and new_status != EmployeeWorkflowStepStatus.COMPLETED and emp_step.completed_on:
+        record_step_reopened(db, template_id, emp_step, assigned_on)
 
     emp_step.status = new_status
     emp_step.notes = notes
     if new_status == EmployeeWorkflowStepStatus.COMPLETED:
-        emp_step.completed_on = datetime.utcnow()
-        emp_step.completed_by_user_id = completed_by_user_id
+        if not was_completed:
+            emp_step.completed_on = now
+            emp_step.completed_by_user_id = completed_by_user_id
     else:
         emp_step.completed_on = None
         emp_step.completed_by_user_id = None
 
     db.add(emp_step)
+    db.flush()
+    step_completed = new_status == EmployeeWorkflowStepStatus.COMPLETED and old_status != new_status
+    new_workflow_status = _apply_step_progress(db, emp_step.employee_workflow_id, old_status, new_status,
+                                               is_mandatory, completed_at=now if step_completed else None)
+
+    samples = []
+    if step_completed:
+        samples.append((emp_step.step_template_id, (now - (last_step_completed_at or assigned_on)).total_seconds()))
+    if new_workflow_status == EmployeeWorkflowStatus.COMPLETED and old_workflow_status != new_workflow_status:
+        samples.append((WHOLE_WORKFLOW, (now - assigned_on).total_seconds()))
+    record_cycle_times(db, template_id, [(step_id, max(0.0, seconds)) for step_id, seconds in samples], now)
     db.commit()
     db.refresh(emp_step)
-
-    _check_and_update_parent_workflow_status(db, emp_step.employee_workflow_id)
     return emp_step
 
 
-def _check_and_update_parent_workflow_status(db: Session, employee_workflow_id: int):
-    emp_workflow = db.get(EmployeeWorkflow, employee_workflow_id)
-    if not emp_workflow or emp_workflow.status == EmployeeWorkflowStatus.COMPLETED:
-        return
+def _apply_step_progress(db: Session, employee_workflow_id: int, old_status: EmployeeWorkflowStepStatus,
+                         new_status: EmployeeWorkflowStepStatus, is_mandatory: bool,
+                         completed_at: Optional[datetime] = None) -> Optional[EmployeeWorkflowStatus]:
+    """
+    Moves the parent workflow's counters by the step's change and derives its new status in the
+    same UPDATE: COMPLETED once every mandatory step is completed, IN_PROGRESS once a step has
+    left PENDING. A COMPLETED workflow stays completed. Returns the new status.
+    """
+    completed_delta = int(is_mandatory) * (int(new_status == EmployeeWorkflowStepStatus.COMPLETED)
+                                           - int(old_status == EmployeeWorkflowStepStatus.COMPLETED))
+    started_delta = (int(new_status != EmployeeWorkflowStepStatus.PENDING)
+                     - int(old_status != EmployeeWorkflowStepStatus.PENDING))
+    completed = EmployeeWorkflow.mandatory_steps_completed + completed_delta
+    started = EmployeeWorkflow.steps_started + started_delta
+    status_type = EmployeeWorkflow.__table__.c.status.type
+    new_parent_status = case(
+        (EmployeeWorkflow.status == EmployeeWorkflowStatus.COMPLETED, EmployeeWorkflow.status),
+        (completed >= EmployeeWorkflow.mandatory_steps_total, literal(EmployeeWorkflowStatus.COMPLETED, status_type)),
+        (and_(EmployeeWorkflow.status == EmployeeWorkflowStatus.PENDING, started > 0),
+         literal(EmployeeWorkflowStatus.IN_PROGRESS, status_type)),
+        else_=EmployeeWorkflow.status,
+    )
+    values = {"mandatory_steps_completed": completed, "steps_started": started, "status": new_parent_status}
+    if completed_at:
+        values["last_step_completed_at"] = completed_at
+    result = db.exec(
+        update(EmployeeWorkflow)
+        .where(EmployeeWorkflow.id == employee_workflow_id)
+        .values(**values)
+        .returning(EmployeeWorkflow.status, EmployeeWorkflow.mandatory_steps_completed,
+                   EmployeeWorkflow.mandatory_steps_total)
+    ).first()
+    if result and completed_delta > 0 and result.mandatory_steps_completed == result.mandatory_steps_total:
+        print(f"All mandatory steps for EmployeeWorkflow ID {employee_workflow_id} completed.")
+    return result.status if result else None
 
-    all_mandatory_completed = True
-    if not emp_workflow.steps:  # Ensure steps are loaded or handle if empty
-        db.refresh(emp_workflow, with_for_update=True)  # Attempt to reload with steps
 
-    for step_instance in emp_workflow.steps:
-        # Ensure step_template is loaded. If using lazy loading, it should auto-load.
-        # If selectinload was used when emp_workflow was fetched, it's already there.
-        step_template = step_instance.step_template
-        if not step_template:  # Defensive: reload if not loaded
-            db.refresh(step_instance, with_for_update=True)  # Reload step_instance to get step_template
-            step_template = step_instance.step_template
+def recount_workflow_progress(db: Session, employee_workflow_ids=None) -> int:
+    """
+    Recomputes the progress counters from the steps in one UPDATE: used to backfill existing
+    workflows and when a step template's is_mandatory flag changes. employee_workflow_ids may be
+    a list or a SELECT of ids; None recounts every workflow. Statuses are left as they are.
+    Caller commits. Returns the number of workflows recounted.
+    """
+    def count_steps(*conditions):
+        return (
+            select(func.count()).select_from(EmployeeWorkflowStep)
+            .join(WorkflowStepTemplate, WorkflowStepTemplate.id == EmployeeWorkflowStep.step_template_id)
+            .where(EmployeeWorkflowStep.employee_workflow_id == EmployeeWorkflow.id, *conditions)
+            .scalar_subquery()
+        )
 
-        if step_template and step_template.is_mandatory:
-            if step_instance.status != EmployeeWorkflowStepStatus.COMPLETED:
-                all_mandatory_completed = False
-                break
+    statement = update(EmployeeWorkflow).values(
+        mandatory_steps_total=count_steps(WorkflowStepTemplate.is_mandatory == True),
+        mandatory_steps_completed=count_steps(WorkflowStepTemplate.is_mandatory == True,
+                                              EmployeeWorkflowStep.status == EmployeeWorkflowStepStatus.COMPLETED),
+        steps_started=count_steps(EmployeeWorkflowStep.status != EmployeeWorkflowStepStatus.PENDING),
+    )
+    if employee_workflow_ids is not None:
+        statement = statement.where(EmployeeWorkflow.id.in_(employee_workflow_ids))
+    return db.exec(statement.execution_options(synchronize_session=False)).rowcount
 
-    current_parent_status = emp_workflow.status
-    new_parent_status = current_parent_status
 
-    if all_mandatory_completed:
-        new_parent_status = EmployeeWorkflowStatus.COMPLETED
-        # emp_workflow.completed_on = datetime.utcnow() # Consider adding this field
-        print(f"All mandatory steps for EmployeeWorkflow ID {employee_workflow_id} completed.")
-    elif current_parent_status == EmployeeWorkflowStatus.PENDING and any(
-            s.status != EmployeeWorkflowStepStatus.PENDING for s in emp_workflow.steps):
-        new_parent_status = EmployeeWorkflowStatus.IN_PROGRESS
-        print(f"EmployeeWorkflow ID {employee_workflow_id} moved to IN_PROGRESS.")
-
-    if new_parent_status != current_parent_status:
-        emp_workflow.status = new_parent_status
-        db.add(emp_workflow)
-        db.commit()
-        print(f"EmployeeWorkflow ID {employee_workflow_id} status updated to {new_parent_status.value}.")
\ No newline at end of file
+# --- Workflow SLA ---
+OPEN_WORKFLOW_STATUSES = [EmployeeWorkflowStatus.PENDING, EmployeeWorkflowStatus.IN_PROGRESS]
+
+
+def replace_workflow_sla_items(db: Session, now: datetime, at_risk_until: datetime) -> None:
+    """
+    Rebuilds WorkflowSlaItem from the open workflows due before at_risk_until with one DELETE and
+    one INSERT ... SELECT. The SELECT matches the partial index ix_employeeworkflow_open_due_date,
+    so it reads only open workflows in the due-date range. Caller commits.
+    """
+    sla_type = WorkflowSlaItem.__table__.c.sla_status.type
+    sla_status = cast(case(
+        (EmployeeWorkflow.due_date < now, literal(WorkflowSlaStatus.OVERDUE, sla_type)),
+        else_=literal(WorkflowSlaStatus.AT_RISK, sla_type),
+    ), sla_type)  # PostgreSQL types a CASE over parameters as text
+    rows = (
+        select(
+            EmployeeWorkflow.id, EmployeeWorkflow.employee_id, User.first_name + " " + User.last_name, User.email,
+            EmployeeWorkflow.workflow_template_id, WorkflowTemplate.name, WorkflowTemplate.workflow_type,
+            EmployeeWorkflow.status, EmployeeWorkflow.due_date, sla_status,
+            EmployeeWorkflow.mandatory_steps_total - EmployeeWorkflow.mandatory_steps_completed,
+            literal(now, WorkflowSlaItem.__table__.c.scanned_at.type),
+        )
+        .join(WorkflowTemplate, WorkflowTemplate.id == EmployeeWorkflow.workflow_template_id)
+        .join(EmployeeProfile, EmployeeProfile.id == EmployeeWorkflow.employee_id)
+        .join(User, User.id == EmployeeProfile.user_id)
+        .where(EmployeeWorkflow.status.in_(OPEN_WORKFLOW_STATUSES), EmployeeWorkflow.due_date < at_risk_until)
+    )
+    db.exec(delete(WorkflowSlaItem))
+    db.exec(insert(WorkflowSlaItem).from_select(
+        ["employee_workflow_id", "employee_id", "employee_name", "employee_email", "workflow_template_id",
+         "workflow_name", "workflow_type", "workflow_status", "due_date", "sla_status", "mandatory_steps_open",
+         "scanned_at"],
+        rows,
+    ))
+
+
+def get_workflow_sla_items(db: Session, sla_status: Optional[WorkflowSlaStatus] = None,
+                           workflow_type: Optional[WorkflowType] = None,
+                           after: Optional[tuple[datetime, int]] = None, limit: int = 50) -> List[WorkflowSlaItem]:
+    """One page in (due_date, employee_workflow_id) order; after is the key of the previous page's last item."""
+    statement = select(WorkflowSlaItem)
+    if sla_status:
+        statement = statement.where(WorkflowSlaItem.sla_status == sla_status)
+    if workflow_type:
+        statement = statement.where(WorkflowSlaItem.workflow_type == workflow_type)
+    if after:
+        statement = statement.where(
+            tuple_(WorkflowSlaItem.due_date, WorkflowSlaItem.employee_workflow_id) > tuple_(*after)
+        )
+    statement = statement.order_by(WorkflowSlaItem.due_date, WorkflowSlaItem.employee_workflow_id).limit(limit)
+    return db.exec(statement).all()
+
+
+def get_workflow_sla_counts(db: Session) -> List[tuple]:
+    """(workflow_type, sla_status, count, last scan time) per group."""
+    return db.exec(
+        select(WorkflowSlaItem.workflow_type, WorkflowSlaItem.sla_status, func.count(), func.max(WorkflowSlaItem.scanned_at))
+        .group_by(WorkflowSlaItem.workflow_type, WorkflowSlaItem.sla_status)
+    ).all()
@@ -2,6 +2,13 @@ from fastapi import FastAPI
 from app.api.v1.api import api_router
 from app.core.db import create_db_and_tables, engine # Import engine
 from app.core.config import settings # For app title, version etc. (optional)
+from app.crud import crud_org
+from app.services.search_service import employee_search_index
+from app.services.document_pipeline import document_pipeline
+from app.services.workflow_trigger_service import workflow_auto_assigner  # Also subscribes it to status changes
+from app.services.workflow_sla_service import workflow_sla_scheduler
+from app.services.reporting_tables import report_refresh_scheduler
+from sqlmodel import Session
 # from sqlmodel import SQLModel # Only if you were creating tables here
 
 # Create database tables on startup
@@ -30,8 +37,19 @@ origins = [
 async def lifespan(app: FastAPI):
     print("Application startup: Creating database and tables...")
     create_db_and_tables() # Call the function here
+    with Session(engine) as db:
+        crud_org.ensure_hierarchy_built(db)  # Backfill the reporting-line closure table for existing data
+        employee_search_index.rebuild(db)  # Warm the employee search index so the first search is fast
+        document_pipeline.resume_pending(db)  # Documents uploaded while the previous process was stopping
+        workflow_auto_assigner.resume_pending(db)  # Status changes whose queued assignment was lost
+    workflow_sla_scheduler.start()  # Refreshes the overdue / at-risk workflow table for dashboards
+    report_refresh_scheduler.start()  # Keeps the reporting summary tables current
     yield
     print("Application shutdown.")
+    workflow_sla_scheduler.stop()
+    report_refresh_scheduler.stop()
+    document_pipeline.shutdown(wait=False)
+    workflow_auto_assigner.shutdown()  # Assigns what is still queued
 
 app = FastAPI(
     title="HR Management Software API",
@@ -1,10 +1,11 @@
 # hr_software/app/models/employee.py
-from sqlmodel import Field, SQLModel, Relationship, Column, TEXT
+from sqlmodel import Field, SQLModel, Relationship, Column, TEXT, Index, func, literal_column
+import sqlalchemy.dialects.postgresql  # noqa: F401  Registers to_tsvector() before the index below is built
 from typing import Optional, List, TYPE_CHECKING
 from datetime import date, datetime
 
 # Import Enums from the new centralized file
-from .enums import DocumentType, EmploymentStatus
+from .enums import DocumentType, EmploymentStatus, EmploymentEvent, DocumentProcessingStatus, StorageTier
 
 if TYPE_CHECKING:
     from .user import User
@@ -34,9 +35,36 @@ class EmployeeDocumentBase(SQLModel):
 
 class EmployeeDocument(EmployeeDocumentBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Set for files in the content-addressed blob store; file_path then points at the shared blob
+    content_hash: Optional[str] = Field(default=None, index=True, max_length=64)  # SHA-256 hex digest
+    file_size: Optional[int] = Field(default=None)
+    content_type: Optional[str] = Field(default=None)
+    # Filled in by the background document pipeline (app/services/document_pipeline.py)
+    processing_status: DocumentProcessingStatus = Field(default=DocumentProcessingStatus.PENDING, index=True)
+    scan_result: Optional[str] = Field(default=None)  # "clean", or the scanner's finding
+    page_count: Optional[int] = Field(default=None)
+    thumbnail_count: int = Field(default=0)  # Pages 1..n have a PNG preview in the blob store
+    processing_error: Optional[str] = Field(default=None, sa_column=Column(TEXT))
+    processed_at: Optional[datetime] = Field(default=None)
+    # COLD once the blob was moved into a pack archive; the same for every document sharing the blob
+    storage_tier: StorageTier = Field(default=StorageTier.HOT, index=True)
     employee: "EmployeeProfile" = Relationship(back_populates="documents")
 
 
+class EmployeeDocumentText(SQLModel, table=True):
+    # Text extracted from a document, kept apart so listing documents never loads it.
+    # On PostgreSQL a GIN index over its tsvector backs the document search endpoint.
+    __table_args__ = (
+        Index(
+            "ix_employeedocumenttext_content_tsv",
+            func.to_tsvector(literal_column("'english'"), literal_column("content")),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+    document_id: int = Field(foreign_key="employeedocument.id", primary_key=True)
+    content: str = Field(sa_column=Column(TEXT, nullable=False))
+
+
 # --- Employee Profile Model ---
 class EmployeeProfileBase(SQLModel):
     job_title: Optional[str] = Field(default=None)
@@ -72,6 +100,74 @@ class EmployeeProfile(EmployeeProfileBase, table=True):
     direct_reports: List["EmployeeProfile"] = Relationship(back_populates="manager")
 
 
+# --- Employee Hierarchy (closure table over EmployeeProfile.manager_id) ---
+class EmployeeHierarchy(SQLModel, table=True):
+    # One row per (ancestor, descendant) pair, including each employee with itself at depth 0.
+    # Maintained by crud_org whenever a profile is created, deleted or changes manager.
+    ancestor_id: int = Field(foreign_key="employeeprofile.id", primary_key=True)
+    descendant_id: int = Field(foreign_key="employeeprofile.id", primary_key=True, index=True)
+    depth: int = Field(index=True)
+
+
+# --- Employment History ---
+class EmploymentHistory(SQLModel, table=True):
+    # Append-only: one row per change of an employee's status, department, manager, job title or hire date,
+    # holding the state in force from effective_date on. Written by crud_employee and the employee import
+    # in the same transaction as the change (see app/services/workforce_history.py). employee_id has no
+    # foreign key so the history outlives a deleted profile.
+    __table_args__ = (Index("ix_employmenthistory_employee_effective", "employee_id", "effective_date", "id"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    employee_id: int
+    effective_date: date = Field(index=True)
+    event: EmploymentEvent
+    employment_status: EmploymentStatus
+    department_id: Optional[int] = Field(default=None)
+    manager_id: Optional[int] = Field(default=None)
+    job_title: Optional[str] = Field(default=None)
+    hire_date: Optional[date] = Field(default=None)
+    recorded_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class HeadcountSnapshot(SQLModel, table=True):
+    # Workforce at the end of each day per department and hire-year cohort, materialised from
+    # EmploymentHistory; headcount trend, attrition and retention reports are range reads over it.
+    snapshot_date: date = Field(primary_key=True)
+    department_id: int = Field(primary_key=True)  # 0 = no department
+    hire_year: int = Field(primary_key=True)  # 0 = no hire date
+    headcount: int = Field(default=0)
+    hires: int = Field(default=0)  # Hired or rehired that day
+    separations: int = Field(default=0)  # Resigned or terminated that day
+    built_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# --- Cold Document Storage ---
+class ArchivedBlob(SQLModel, table=True):
+    # Offset index of the cold tier: where a blob's compressed bytes sit inside a pack archive.
+    # Written by DocumentTieringService; the pack's own member headers hold the same information.
+    content_hash: str = Field(primary_key=True, max_length=64)
+    pack_name: str = Field(index=True)
+    offset: int  # Start of the (compressed) data in the pack
+    stored_size: int  # Bytes taken in the pack
+    size: int  # Original size
+    compression: str  # "zlib", or "none" when compressing did not make it smaller
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# --- Resumable Document Upload ---
+class DocumentUploadSession(SQLModel, table=True):
+    # A chunked upload in progress; the bytes received so far live in a partial file named after the id.
+    id: str = Field(primary_key=True, max_length=32)  # uuid4 hex
+    employee_id: int = Field(foreign_key="employeeprofile.id", index=True)
+    created_by_user_id: int = Field(foreign_key="user.id")
+    document_type: DocumentType
+    description: Optional[str] = Field(default=None, sa_column=Column(TEXT))
+    file_name: str
+    content_type: Optional[str] = Field(default=None)
+    total_size: int
+    received_bytes: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
 # --- Model Rebuild Section ---
 # At the VERY END of the file.
 from .user import User  # For resolving "User"
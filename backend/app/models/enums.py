@@ -15,6 +15,14 @@ class EmploymentStatus(str, PythonBaseEnum):
     ON_NOTICE = "on_notice"
     ONBOARDING = "onboarding"
 
+class EmploymentEvent(str, PythonBaseEnum):
+    HIRED = "hired" # Later HIRED rows of an employee set or correct the hire date
+    REHIRED = "rehired" # Back from RESIGNED / TERMINATED
+    SEPARATED = "separated" # Resigned or terminated
+    TRANSFERRED = "transferred" # Moved to another department
+    CHANGED = "changed" # Status, manager, job title or hire date
+    REMOVED = "removed" # Profile deleted; leaves the headcount without counting as a separation
+
 class DocumentType(str, PythonBaseEnum):
     ID_PROOF = "id_proof"
     OFFER_LETTER = "offer_letter"
@@ -22,6 +30,17 @@ class DocumentType(str, PythonBaseEnum):
     POLICY_ACKNOWLEDGEMENT = "policy_acknowledgement"
     OTHER = "other"
 
+class DocumentProcessingStatus(str, PythonBaseEnum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    QUARANTINED = "quarantined" # Rejected by the virus scanner; downloads are blocked
+
+class StorageTier(str, PythonBaseEnum):
+    HOT = "hot"   # Plain file in the blob store
+    COLD = "cold" # Compressed inside a pack archive (see ArchivedBlob)
+
 # --- Workflow Enums ---
 class WorkflowType(str, PythonBaseEnum):
     ONBOARDING = "onboarding"
@@ -39,6 +58,10 @@ class EmployeeWorkflowStepStatus(str, PythonBaseEnum):
     COMPLETED = "completed"
     SKIPPED = "skipped"
 
+class WorkflowSlaStatus(str, PythonBaseEnum):
+    OVERDUE = "overdue" # Open and past its due date
+    AT_RISK = "at_risk" # Open and due within WORKFLOW_SLA_AT_RISK_DAYS
+
 # --- Leave Enums ---
 class LeaveTypeName(str, PythonBaseEnum):
     ANNUAL = "annual"
@@ -85,4 +108,11 @@ class AppraisalCycleStatus(str, PythonBaseEnum):
     FEEDBACK_COLLECTION = "feedback_collection"
     REVIEW_MEETING = "review_meeting"
     CLOSED = "closed"
-    ARCHIVED = "archived"
\ No newline at end of file
+    ARCHIVED = "archived"
+
+class ReviewStatus(str, PythonBaseEnum):
+    PENDING_SELF_EVALUATION = "pending_self_evaluation"
+    PENDING_MANAGER_FEEDBACK = "pending_manager_feedback"
+    PENDING_DISCUSSION = "pending_discussion"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
\ No newline at end of file
@@ -53,7 +53,7 @@ class LeaveBalance(LeaveBalanceBase, table=True):
 class LeaveRequestBase(SQLModel):
     employee_id: int = Field(foreign_key="employeeprofile.id")
     leave_type_id: int = Field(foreign_key="leavetype.id")
-    start_date: date
+    start_date: date = Field(index=True)
     end_date: date
     reason: Optional[str] = Field(default=None)
     status: LeaveRequestStatus = Field(
@@ -62,10 +62,10 @@ class LeaveRequestBase(SQLModel):
             SQLAlchemyEnum(LeaveRequestStatus, name="leave_request_status_enum_db", create_constraint=True))
     )
     number_of_days: float  # This is correct here, on the LeaveRequest
-    applied_on: datetime = Field(default_factory=datetime.utcnow)
+    applied_on: datetime = Field(default_factory=datetime.utcnow, index=True)
     manager_remarks: Optional[str] = Field(default=None)
     approved_or_rejected_by_id: Optional[int] = Field(default=None, foreign_key="user.id", nullable=True)
-    approved_or_rejected_on: Optional[datetime] = Field(default=None, nullable=True)
+    approved_or_rejected_on: Optional[datetime] = Field(default=None, nullable=True, index=True)
 
 
 class LeaveRequest(LeaveRequestBase, table=True):
@@ -54,7 +54,7 @@ class PayrollRun(PayrollRunBase, table=True):
 
 class PayslipBase(SQLModel):
     employee_id: int = Field(foreign_key="employeeprofile.id")
-    payroll_run_id: int = Field(foreign_key="payrollrun.id")
+    payroll_run_id: int = Field(foreign_key="payrollrun.id", index=True)
     gross_earnings: float = Field(default=0.0)
     total_deductions: float = Field(default=0.0)
     net_salary: float = Field(default=0.0)
@@ -64,7 +64,7 @@ class PayslipBase(SQLModel):
     paid_leave_days: float = Field(default=0.0)
     unpaid_leave_days: float = Field(default=0.0)
     loss_of_pay_deduction: float = Field(default=0.0)
-    generated_at: datetime = Field(default_factory=datetime.utcnow)
+    generated_at: datetime = Field(default_factory=datetime.utcnow, index=True)  # Change marker of the salary summary
 
 class Payslip(PayslipBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
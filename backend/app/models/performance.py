@@ -1,11 +1,12 @@
 # hr_software/app/models/performance.py
 from sqlmodel import Field, SQLModel, Relationship, Column, TEXT
+from sqlalchemy import UniqueConstraint, Index
 from sqlalchemy import Enum as SQLAlchemyEnum # Added
 from typing import Optional, List, TYPE_CHECKING
 from datetime import date, datetime
 
 # Import Enums from the new centralized file
-from .enums import GoalStatus, AppraisalCycleStatus
+from .enums import GoalStatus, AppraisalCycleStatus, ReviewStatus
 
 if TYPE_CHECKING:
     from .employee import EmployeeProfile
@@ -13,7 +14,7 @@ if TYPE_CHECKING:
 
 class GoalBase(SQLModel):
     employee_id: int = Field(foreign_key="employeeprofile.id")
-    appraisal_cycle_id: Optional[int] = Field(default=None, foreign_key="appraisalcycle.id", nullable=True)
+    appraisal_cycle_id: Optional[int] = Field(default=None, foreign_key="appraisalcycle.id", nullable=True, index=True)
     title: str
     description: Optional[str] = Field(sa_column=Column(TEXT), default=None)
     key_performance_indicator: Optional[str] = Field(default=None)
@@ -58,14 +59,35 @@ class PerformanceReviewBase(SQLModel):
     manager_feedback_text: Optional[str] = Field(sa_column=Column(TEXT), default=None)
     manager_rating: Optional[float] = Field(default=None, ge=1, le=5)
     manager_feedback_submitted_on: Optional[datetime] = Field(default=None)
-    review_status: str = Field(default="pending_self_evaluation") # Consider making this an Enum too
+    review_status: ReviewStatus = Field( # Transitions are checked by crud_performance.transition_reviews
+        default=ReviewStatus.PENDING_SELF_EVALUATION,
+        sa_column=Column(SQLAlchemyEnum(ReviewStatus, name="review_status_enum", create_constraint=True), nullable=False)
+    )
 
 class PerformanceReview(PerformanceReviewBase, table=True):
+    # One review per employee and cycle; bulk initiation relies on it for ON CONFLICT DO NOTHING
+    __table_args__ = (
+        UniqueConstraint("appraisal_cycle_id", "employee_id", name="uq_performancereview_cycle_employee"),
+        # Bulk transitions and status filters select the reviews of one cycle in a given status
+        Index("ix_performancereview_cycle_status", "appraisal_cycle_id", "review_status"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     appraisal_cycle: AppraisalCycle = Relationship(back_populates="performance_reviews") # Direct type
     employee: "EmployeeProfile" = Relationship(sa_relationship_kwargs=dict(foreign_keys="PerformanceReview.employee_id"))
     manager: "EmployeeProfile" = Relationship(sa_relationship_kwargs=dict(foreign_keys="PerformanceReview.manager_id"))
 
+class GoalScoreRollup(SQLModel, table=True):
+    # Goal totals per employee and cycle, changed by crud_performance in the same transaction as every goal
+    # (see app/services/goal_scores.py); team scorecards sum them over the EmployeeHierarchy closure table.
+    # Goals outside any appraisal cycle are not rolled up.
+    employee_id: int = Field(foreign_key="employeeprofile.id", primary_key=True)
+    appraisal_cycle_id: int = Field(foreign_key="appraisalcycle.id", primary_key=True, index=True)
+    goals: int = Field(default=0)
+    goals_completed: int = Field(default=0)
+    goals_cancelled: int = Field(default=0)
+    weight_total: float = Field(default=0.0)  # Weightage of the goals that are not cancelled
+    weight_completed: float = Field(default=0.0)
+
 # --- Model Rebuild Section ---
 from .employee import EmployeeProfile
 
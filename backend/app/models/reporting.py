@@ -0,0 +1,37 @@
+# hr_software/app/models/reporting.py
+# Summary and fact tables behind the /reports endpoints, kept current by app/services/reporting_tables.py
+# and app/services/leave_analytics.py, so a report reads a few summary rows whatever the history size.
+from sqlmodel import Field, SQLModel, Index
+from datetime import date, datetime
+
+
+class LeaveMonthFact(SQLModel, table=True):
+    # The working days of an approved leave request that fall in one month; written when the request is
+    # approved, removed when it no longer is. A request spanning months has one row per month.
+    __table_args__ = (
+        # Trend aggregates by month, department and type read this index alone on PostgreSQL
+        Index("ix_leavemonthfact_month_department_type", "month", "department_id", "leave_type_id",
+              postgresql_include=["days", "leave_request_id"]),
+    )
+    leave_request_id: int = Field(foreign_key="leaverequest.id", primary_key=True)
+    month: date = Field(primary_key=True)  # First day of the month
+    employee_id: int = Field(foreign_key="employeeprofile.id", index=True)
+    department_id: int = Field(default=0)  # Department of the employee at approval time; 0 = no department
+    leave_type_id: int = Field(foreign_key="leavetype.id")
+    days: float = Field(default=0.0)
+
+
+class SalaryExpenseSummary(SQLModel, table=True):
+    # Payslip totals per payroll run and (current) department of the employee; run status is read at query time
+    payroll_run_id: int = Field(foreign_key="payrollrun.id", primary_key=True)
+    department_id: int = Field(primary_key=True)  # 0 = no department
+    payslips: int = Field(default=0)
+    gross_earnings: float = Field(default=0.0)
+    total_deductions: float = Field(default=0.0)
+    net_salary: float = Field(default=0.0)
+
+
+class ReportRefreshState(SQLModel, table=True):
+    # When each summary table was last refreshed; rows changed after it are picked up by the next refresh
+    name: str = Field(primary_key=True)
+    refreshed_at: datetime
@@ -1,4 +1,5 @@
 # hr_software/app/models/user.py
+from sqlalchemy import Index, func
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional, List, TYPE_CHECKING
 
@@ -21,6 +22,9 @@ class User(UserBase, table=True):
     # Relationship: A user can be an employee
     employee_profile: Optional["EmployeeProfile"] = Relationship(back_populates="user")
 
+# Case-insensitive email lookups (the employee import's check against existing users)
+Index("ix_user_email_lower", func.lower(User.__table__.c.email))
+
 # --- Model Rebuild Section ---
 # This needs to be at the VERY END of the file.
 from .employee import EmployeeProfile # Import for resolving the string forward reference
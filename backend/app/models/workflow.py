@@ -1,11 +1,11 @@
 # hr_software/app/models/workflow.py
-from sqlmodel import Field, SQLModel, Relationship, Column, TEXT
-from sqlalchemy import Enum as SQLAlchemyEnum
+from sqlmodel import Field, SQLModel, Relationship, Column, TEXT, Index
+from sqlalchemy import Enum as SQLAlchemyEnum, text
 from typing import Optional, List, TYPE_CHECKING
-from datetime import datetime
+from datetime import date, datetime
 
 # Import Enums from the new centralized file
-from .enums import WorkflowType, EmploymentStatus, EmployeeWorkflowStatus, EmployeeWorkflowStepStatus
+from .enums import WorkflowType, EmploymentStatus, EmployeeWorkflowStatus, EmployeeWorkflowStepStatus, WorkflowSlaStatus
 
 if TYPE_CHECKING:
     from .employee import EmployeeProfile
@@ -21,6 +21,7 @@ class WorkflowTemplateBase(SQLModel):
         # nullable=True, # <--- REMOVE THIS from Field() arguments
         sa_column=Column(SQLAlchemyEnum(EmploymentStatus, name="employment_status_enum_wf_trigger", create_constraint=True), nullable=True) # Nullability defined here
     )
+    due_in_days: Optional[int] = Field(default=None) # Sets EmployeeWorkflow.due_date on assignment
 
 class WorkflowTemplate(WorkflowTemplateBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -51,8 +52,21 @@ class EmployeeWorkflowBase(SQLModel):
         sa_column=Column(SQLAlchemyEnum(EmployeeWorkflowStatus, name="emp_workflow_status_enum", create_constraint=True))
     )
 
+# Enum columns store member names. Only open workflows with a due date are indexed, so the SLA
+# scan stays a short range scan however many completed workflows accumulate.
+OPEN_WORKFLOW_WITH_DUE_DATE = text("status IN ('PENDING', 'IN_PROGRESS') AND due_date IS NOT NULL")
+
 class EmployeeWorkflow(EmployeeWorkflowBase, table=True):
+    __table_args__ = (
+        Index("ix_employeeworkflow_open_due_date", "due_date",
+              postgresql_where=OPEN_WORKFLOW_WITH_DUE_DATE, sqlite_where=OPEN_WORKFLOW_WITH_DUE_DATE),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Progress counters, kept up to date by crud_workflow in the same transaction as every step change
+    mandatory_steps_total: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    mandatory_steps_completed: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    steps_started: int = Field(default=0, sa_column_kwargs={"server_default": "0"})  # Steps no longer PENDING
+    last_step_completed_at: Optional[datetime] = Field(default=None)  # Start of the next step's cycle time
     employee: "EmployeeProfile" = Relationship(back_populates="assigned_workflows")
     template: WorkflowTemplate = Relationship(back_populates="assigned_workflows")
     steps: List["EmployeeWorkflowStep"] = Relationship(back_populates="employee_workflow")
@@ -72,7 +86,39 @@ class EmployeeWorkflowStep(EmployeeWorkflowStepBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     employee_workflow: EmployeeWorkflow = Relationship(back_populates="steps")
     step_template: WorkflowStepTemplate = Relationship(back_populates="assigned_step_instances")
-    # completed_by: Optional["User"] = Relationship()
+    completed_by: Optional["User"] = Relationship()  # Read-only convenience for responses
+
+class WorkflowSlaItem(SQLModel, table=True):
+    # Overdue / at-risk open workflows as of the last SLA scan (see WorkflowSlaScanner); the whole
+    # table is replaced by each scan, so dashboards read it without touching EmployeeWorkflow.
+    __table_args__ = (
+        Index("ix_workflowslaitem_due_date_id", "due_date", "employee_workflow_id"), # Keyset pagination
+    )
+    employee_workflow_id: int = Field(foreign_key="employeeworkflow.id", primary_key=True)
+    employee_id: int = Field(foreign_key="employeeprofile.id")
+    employee_name: str
+    employee_email: str
+    workflow_template_id: int = Field(foreign_key="workflowtemplate.id")
+    workflow_name: str
+    workflow_type: WorkflowType
+    workflow_status: EmployeeWorkflowStatus = Field(
+        sa_column=Column(SQLAlchemyEnum(EmployeeWorkflowStatus, name="emp_workflow_status_enum", create_constraint=True),
+                         nullable=False) # Same database type as EmployeeWorkflow.status, for INSERT ... SELECT
+    )
+    due_date: datetime
+    sla_status: WorkflowSlaStatus
+    mandatory_steps_open: int
+    scanned_at: datetime
+
+class WorkflowCycleTimeBucket(SQLModel, table=True):
+    # Log-scale histogram of cycle times per template, step and month, maintained as steps complete
+    # (see app/services/workflow_analytics.py); percentiles are read from ~100 buckets, not from history.
+    workflow_template_id: int = Field(foreign_key="workflowtemplate.id", primary_key=True)
+    step_template_id: int = Field(primary_key=True)  # 0 = the whole workflow, assignment to completion
+    period: date = Field(primary_key=True)  # First day of the month the step / workflow completed in
+    bucket: int = Field(primary_key=True)
+    count: int = Field(default=0)
+    total_seconds: float = Field(default=0.0)
 
 # --- Model Rebuild Section ---
 from .employee import EmployeeProfile
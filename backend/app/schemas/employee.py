@@ -6,6 +6,7 @@ from datetime import date, datetime
 
 # Make sure these enums are accessible or defined here/imported
 from app.models.employee import DocumentType, EmploymentStatus, DepartmentBase # Assuming these are in models
+from app.models.enums import WorkflowType, EmployeeWorkflowStatus, DocumentProcessingStatus, StorageTier
 
 # --- Department Schemas (Ensure these are present) ---
 class DepartmentCreate(DepartmentBase): # Assuming DepartmentBase is a SQLModel or Pydantic model
@@ -32,8 +33,39 @@ class EmployeeDocumentRead(BaseModel): # This is for response, should match mode
     upload_date: datetime
     description: Optional[str] = None
     employee_id: int
+    content_hash: Optional[str] = None
+    file_size: Optional[int] = None
+    content_type: Optional[str] = None
+    processing_status: DocumentProcessingStatus = DocumentProcessingStatus.PENDING
+    scan_result: Optional[str] = None
+    page_count: Optional[int] = None
+    thumbnail_count: int = 0 # GET /employees/documents/{id}/thumbnails/{1..n}
+    processed_at: Optional[datetime] = None
+    storage_tier: StorageTier = StorageTier.HOT
     # Add any other fields from your EmployeeDocument model you want to return
 
+class DocumentUploadSessionCreate(EmployeeDocumentCreate): # Starts a resumable (chunked) upload
+    file_name: str
+    total_size: int
+    content_type: Optional[str] = None
+
+class DocumentUploadSessionRead(BaseModel):
+    id: str
+    employee_id: int
+    document_type: DocumentType
+    file_name: str
+    total_size: int
+    received_bytes: int # Offset the next chunk must start at
+    created_at: datetime
+
+class EmployeeDocumentSearchResult(BaseModel):
+    document: EmployeeDocumentRead
+    snippet: Optional[str] = None # Matching passage of the extracted text
+
+class DocumentSignedUrl(BaseModel): # Short-lived link that works without an Authorization header
+    url: str
+    expires_at: datetime
+
 
 # --- EmployeeProfile Schemas (Ensure these are present and updated) ---
 # Assuming EmployeeProfileBase is a SQLModel or Pydantic model
@@ -59,12 +91,34 @@ class EmployeeProfileRead(EmployeeProfileBase): # For reading individual or list
     department: Optional[DepartmentRead] = None
     documents: List[EmployeeDocumentRead] = []
 
+class EmployeeWorkflowSummary(BaseModel): # Lightweight workflow info for directory listings
+    id: int
+    workflow_template_id: int
+    workflow_template_name: str
+    workflow_type: WorkflowType
+    assigned_on: datetime
+    due_date: Optional[datetime] = None
+    status: EmployeeWorkflowStatus
+
 class EmployeeProfileReadWithUser(EmployeeProfileRead): # Often useful
     user_email: str
     user_first_name: str
     user_last_name: str
     user_role: str # from UserRole enum
     manager_email: Optional[str] = None
+    workflows: Optional[List[EmployeeWorkflowSummary]] = None # Only populated when explicitly requested
+
+class EmployeeSearchResult(BaseModel): # Served straight from the in-process search index
+    id: int
+    user_id: int
+    user_email: str
+    user_first_name: str
+    user_last_name: str
+    job_title: Optional[str] = None
+    department_id: Optional[int] = None
+    department_name: Optional[str] = None
+    employment_status: EmploymentStatus
+    score: float
 
 class EmployeeProfileUpdate(BaseModel): # Or SQLModel for partial updates
     job_title: Optional[str] = None
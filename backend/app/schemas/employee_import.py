@@ -0,0 +1,35 @@
+# hr_software/app/schemas/employee_import.py
+
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List
+from datetime import date
+
+from app.models.enums import UserRole, EmploymentStatus
+
+
+class EmployeeImportRow(BaseModel): # One CSV/XLSX row; headers are matched case-insensitively
+    email: EmailStr
+    first_name: str = Field(min_length=1)
+    last_name: str = Field(min_length=1)
+    password: Optional[str] = None # Falls back to the import's default password
+    role: UserRole = UserRole.EMPLOYEE
+    job_title: Optional[str] = None
+    phone_number: Optional[str] = None
+    hire_date: Optional[date] = None
+    department: Optional[str] = None # Department name, must already exist
+    manager_email: Optional[EmailStr] = None # Existing employee or another row of the same file
+    employment_status: EmploymentStatus = EmploymentStatus.ONBOARDING
+
+class EmployeeImportRowIssue(BaseModel):
+    row_number: int # 1-based data row number (the header row is not counted)
+    email: Optional[str] = None
+    messages: List[str]
+
+class EmployeeImportResult(BaseModel):
+    dry_run: bool
+    total_rows: int
+    imported: int
+    failed: int
+    workflows_assigned: int
+    errors: List[EmployeeImportRowIssue] = [] # Rows that were skipped
+    warnings: List[EmployeeImportRowIssue] = [] # Rows that were imported with a caveat (e.g. no manager set)
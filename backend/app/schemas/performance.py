@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field as PydanticField, validator
-from typing import Optional, List
+from pydantic import BaseModel, Field as PydanticField, validator, model_validator
+from typing import Optional, List, Dict
 from datetime import date, datetime
 from app.models.performance import GoalStatus, GoalBase, AppraisalCycleStatus, AppraisalCycleBase, PerformanceReviewBase
+from app.models.enums import ReviewStatus
 
 # --- Goal Schemas ---
 class GoalCreate(GoalBase):
@@ -43,8 +44,24 @@ class AppraisalCycleUpdate(BaseModel):
 
 
 # --- PerformanceReview Schemas ---
-class PerformanceReviewCreatePayload(BaseModel): # For initiating reviews in a cycle
-    employee_ids: List[int] # List of employees to include in this review cycle
+class PerformanceReviewCreatePayload(BaseModel): # Employees matching all given filters get a review in the cycle
+    employee_ids: Optional[List[int]] = PydanticField(default=None, max_length=50000)
+    department_id: Optional[int] = None
+    manager_id: Optional[int] = None # Everyone reporting, directly or indirectly, to this employee
+    all_active: bool = False # Every active employee of the organisation
+
+    @model_validator(mode="after")
+    def check_has_scope(self):
+        if self.employee_ids is None and self.department_id is None and self.manager_id is None and not self.all_active:
+            raise ValueError("Give employee_ids, department_id, manager_id or all_active to choose the employees.")
+        return self
+
+class PerformanceReviewInitiationResult(BaseModel):
+    appraisal_cycle_id: int
+    matched: int # Employees selected by the request
+    created: int
+    skipped: Dict[str, int] # Per reason: not_found, excluded, not_active, no_manager, already_exists
+    message: str
 
 class PerformanceReviewRead(PerformanceReviewBase):
     id: int
@@ -52,10 +69,66 @@ class PerformanceReviewRead(PerformanceReviewBase):
     manager_name: str
     appraisal_cycle_name: str
 
+class PerformanceReviewPage(BaseModel):
+    items: List[PerformanceReviewRead]
+    next_cursor: Optional[int] = None # Pass back as after_employee_id for the next page; None on the last page
+
+class ReviewStatusUpdate(BaseModel):
+    review_status: ReviewStatus
+
+class ReviewBulkTransitionRequest(BaseModel): # Reviews of the cycle matching all given filters
+    to_status: ReviewStatus
+    from_statuses: Optional[List[ReviewStatus]] = None # Only move reviews in these statuses; default every allowed one
+    employee_ids: Optional[List[int]] = PydanticField(default=None, max_length=50000)
+    department_id: Optional[int] = None
+
+class ReviewBulkTransitionResult(BaseModel):
+    appraisal_cycle_id: int
+    to_status: ReviewStatus
+    moved: int
+    by_status: Dict[str, int] # Matching reviews per status after the transition
+
 class SelfEvaluationSubmit(BaseModel):
     self_evaluation_text: Optional[str] = None
     self_evaluation_rating: Optional[float] = PydanticField(default=None, ge=1, le=5)
 
 class ManagerFeedbackSubmit(BaseModel):
     manager_feedback_text: Optional[str] = None
-    manager_rating: Optional[float] = PydanticField(default=None, ge=1, le=5)
\ No newline at end of file
+    manager_rating: Optional[float] = PydanticField(default=None, ge=1, le=5)
+
+
+# --- Goal Scorecard Schemas ---
+class GoalScoreRead(BaseModel):
+    goals: int
+    goals_completed: int
+    goals_cancelled: int
+    weight_total: float # Weightage of the goals that are not cancelled
+    weight_completed: float
+    score: Optional[float] = None # Completed percentage, by weightage when goals are weighted
+
+class EmployeeGoalScorecard(BaseModel):
+    employee_id: int
+    appraisal_cycle_id: int
+    own: GoalScoreRead
+    team: GoalScoreRead # Everyone reporting to the employee, directly or indirectly
+
+class TeamMemberGoalScore(BaseModel):
+    employee_id: int
+    employee_name: str
+    own: GoalScoreRead
+    team: GoalScoreRead
+
+class TeamGoalScorecard(BaseModel):
+    manager_id: int
+    appraisal_cycle_id: int
+    team: GoalScoreRead # The manager's whole reporting line
+    members: List[TeamMemberGoalScore] # Direct reports
+
+class DepartmentGoalScore(GoalScoreRead):
+    department_id: Optional[int] = None
+    department_name: str
+
+class CycleGoalScorecard(BaseModel):
+    appraisal_cycle_id: int
+    overall: GoalScoreRead
+    by_department: List[DepartmentGoalScore]
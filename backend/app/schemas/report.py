@@ -0,0 +1,45 @@
+# app/schemas/report.py
+from pydantic import BaseModel, Field as PydanticField, model_validator
+from typing import Optional, List, Any, Literal
+
+FilterOperator = Literal["eq", "ne", "lt", "lte", "gt", "gte", "in", "not_in", "between", "is_null", "not_null",
+                         "contains"]
+
+
+# --- Custom Report Builder Schemas ---
+class ReportFilter(BaseModel):
+    field: str
+    op: FilterOperator = "eq"
+    value: Any = None  # A list for in / not_in, [low, high] for between, unused for is_null / not_null
+
+
+class ReportSort(BaseModel):
+    field: str  # A dimension or measure of the spec
+    descending: bool = False
+
+
+class ReportSpec(BaseModel):
+    entity: str  # employees, leave, payslips or goals
+    dimensions: List[str] = []  # Grouped by when measures are given, listed as columns otherwise
+    measures: List[str] = []
+    filters: List[ReportFilter] = []
+    sort: List[ReportSort] = []
+    limit: Optional[int] = PydanticField(default=None, ge=1, le=1_000_000)
+
+    @model_validator(mode="after")
+    def check_columns(self):
+        if not self.dimensions and not self.measures:
+            raise ValueError("Pick at least one dimension or measure.")
+        return self
+
+
+class ReportFieldInfo(BaseModel):
+    name: str
+    type: str  # string, integer, number, date, datetime, boolean, or enum
+    values: Optional[List[str]] = None  # Allowed values of an enum field
+
+
+class ReportEntityInfo(BaseModel):
+    entity: str
+    dimensions: List[ReportFieldInfo]
+    measures: List[str]
@@ -1,9 +1,10 @@
 # app/schemas/workflow.py
-from pydantic import BaseModel, Field as PydanticField
+from pydantic import BaseModel, Field as PydanticField, model_validator
 from typing import Optional, List
 from datetime import datetime, date # Added date
 
 from app.models.workflow import WorkflowType, EmployeeWorkflowStatus, EmployeeWorkflowStepStatus # Import enums
+from app.models.enums import WorkflowSlaStatus
 from app.models.employee import EmploymentStatus # For auto_assign_on_status
 
 
@@ -32,6 +33,7 @@ class WorkflowTemplateCreate(BaseModel):
     workflow_type: WorkflowType
     is_active: bool = True
     auto_assign_on_status: Optional[EmploymentStatus] = None # Which status change triggers this
+    due_in_days: Optional[int] = PydanticField(default=None, ge=0) # Assigned workflows are due this many days later
     steps: List[WorkflowStepTemplateCreate] = [] # Allow creating steps along with template
 
 class WorkflowTemplateRead(WorkflowTemplateCreate):
@@ -46,6 +48,7 @@ class WorkflowTemplateUpdate(BaseModel):
     workflow_type: Optional[WorkflowType] = None
     is_active: Optional[bool] = None
     auto_assign_on_status: Optional[EmploymentStatus] = None
+    due_in_days: Optional[int] = PydanticField(default=None, ge=0) # Only affects workflows assigned afterwards
     # Updating steps here is complex: usually handled by separate step endpoints or a more complex payload.
     # For simplicity, we might not allow direct step updates via this schema.
 
@@ -73,10 +76,59 @@ class EmployeeWorkflowRead(BaseModel): # Read-only for employee/manager view
     assigned_on: datetime
     due_date: Optional[datetime] = None
     status: EmployeeWorkflowStatus
+    mandatory_steps_total: int = 0
+    mandatory_steps_completed: int = 0
     steps: List[EmployeeWorkflowStepRead]
 
 
 # --- Schemas for Actions ---
 class EmployeeWorkflowStepUpdatePayload(BaseModel): # For employee/manager to update a step
     status: EmployeeWorkflowStepStatus # e.g., COMPLETED, SKIPPED
-    notes: Optional[str] = None
\ No newline at end of file
+    notes: Optional[str] = None
+
+
+class WorkflowBulkAssignRequest(BaseModel): # Employees matching all given filters get the template
+    employee_ids: Optional[List[int]] = PydanticField(default=None, max_length=50000)
+    department_id: Optional[int] = None
+    employment_status: Optional[EmploymentStatus] = None
+
+    @model_validator(mode="after")
+    def check_has_filter(self):
+        if self.employee_ids is None and self.department_id is None and self.employment_status is None:
+            raise ValueError("Give employee_ids, department_id or employment_status to choose the employees.")
+        return self
+
+class WorkflowBulkAssignResult(BaseModel):
+    workflow_template_id: int
+    matched: int # Employees selected by the request
+    assigned: int
+    already_assigned: int # Skipped: they have a pending or in-progress instance of this template
+    not_found_employee_ids: List[int] = []
+    employee_workflow_ids: List[int] = []
+
+
+# --- Workflow SLA Schemas ---
+class WorkflowSlaItemRead(BaseModel):
+    employee_workflow_id: int
+    employee_id: int
+    employee_name: str
+    employee_email: str
+    workflow_template_id: int
+    workflow_name: str
+    workflow_type: WorkflowType
+    workflow_status: EmployeeWorkflowStatus
+    due_date: datetime
+    sla_status: WorkflowSlaStatus
+    mandatory_steps_open: int
+    scanned_at: datetime
+
+class WorkflowSlaPage(BaseModel):
+    items: List[WorkflowSlaItemRead]
+    next_cursor: Optional[str] = None # Pass as ?cursor= to get the next page; None on the last page
+
+class WorkflowSlaSummary(BaseModel):
+    overdue: int
+    at_risk: int
+    by_workflow_type: dict # {"onboarding": {"overdue": 3, "at_risk": 1}, ...}
+    scanned_at: Optional[datetime] = None # None when the last scan found nothing (or none ran yet)
+
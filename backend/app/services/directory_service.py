@@ -0,0 +1,150 @@
+# hr_software/app/services/directory_service.py
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.models.employee import EmployeeProfile, EmployeeDocument, Department, EmployeeHierarchy
+from app.models.user import User
+from app.models.workflow import EmployeeWorkflow, WorkflowTemplate
+from app.schemas.employee import (
+    EmployeeProfileReadWithUser, EmployeeDocumentRead, DepartmentRead, EmployeeWorkflowSummary
+)
+
+
+class EmployeeDirectoryService:
+    """
+    Builds EmployeeProfileReadWithUser pages from one joined projection
+    (profile + user + department + manager's user via a self-join) instead of
+    lazy-loading relationships row by row. Documents and workflows are
+    batch-loaded for the whole page, so the number of queries per page is
+    constant regardless of page size.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _projection_statement(self):
+        manager_profile = aliased(EmployeeProfile, name="manager_profile")
+        manager_user = aliased(User, name="manager_user")
+        return (
+            select(
+                *EmployeeProfile.__table__.columns,
+                User.email.label("user_email"),
+                User.first_name.label("user_first_name"),
+                User.last_name.label("user_last_name"),
+                User.role.label("user_role"),
+                Department.name.label("department_name"),
+                Department.description.label("department_description"),
+                manager_user.email.label("manager_email"),
+            )
+            .join(User, EmployeeProfile.user_id == User.id)
+            .outerjoin(Department, EmployeeProfile.department_id == Department.id)
+            .outerjoin(manager_profile, EmployeeProfile.manager_id == manager_profile.id)
+            .outerjoin(manager_user, manager_profile.user_id == manager_user.id)
+        )
+
+    def _load_documents(self, employee_ids: List[int]) -> Dict[int, List[EmployeeDocumentRead]]:
+        documents_by_employee: Dict[int, List[EmployeeDocumentRead]] = defaultdict(list)
+        if not employee_ids:
+            return documents_by_employee
+        statement = (
+            select(*EmployeeDocument.__table__.columns)
+            .where(EmployeeDocument.employee_id.in_(employee_ids))
+            .order_by(EmployeeDocument.employee_id, EmployeeDocument.upload_date)
+        )
+        for row in self.db.exec(statement).all():
+            documents_by_employee[row.employee_id].append(EmployeeDocumentRead.model_validate(dict(row._mapping)))
+        return documents_by_employee
+
+    def _load_workflows(self, employee_ids: List[int]) -> Dict[int, List[EmployeeWorkflowSummary]]:
+        workflows_by_employee: Dict[int, List[EmployeeWorkflowSummary]] = defaultdict(list)
+        if not employee_ids:
+            return workflows_by_employee
+        statement = (
+            select(
+                EmployeeWorkflow.id,
+                EmployeeWorkflow.employee_id,
+                EmployeeWorkflow.workflow_template_id,
+                WorkflowTemplate.name.label("workflow_template_name"),
+                WorkflowTemplate.workflow_type,
+                EmployeeWorkflow.assigned_on,
+                EmployeeWorkflow.due_date,
+                EmployeeWorkflow.status,
+            )
+            .join(WorkflowTemplate, EmployeeWorkflow.workflow_template_id == WorkflowTemplate.id)
+            .where(EmployeeWorkflow.employee_id.in_(employee_ids))
+            .order_by(EmployeeWorkflow.employee_id, EmployeeWorkflow.assigned_on.desc())
+        )
+        for row in self.db.exec(statement).all():
+            workflows_by_employee[row.employee_id].append(EmployeeWorkflowSummary.model_validate(dict(row._mapping)))
+        return workflows_by_employee
+
+    def _build_page(self, rows, include_documents: bool, include_workflows: bool) -> List[EmployeeProfileReadWithUser]:
+        employee_ids = [row.id for row in rows]
+        documents_by_employee = self._load_documents(employee_ids) if include_documents else {}
+        workflows_by_employee = self._load_workflows(employee_ids) if include_workflows else {}
+
+        page: List[EmployeeProfileReadWithUser] = []
+        for row in rows:
+            row_data = dict(row._mapping)
+            row_data["user_role"] = row.user_role.value
+            department = None
+            if row.department_id is not None and row.department_name is not None:
+                department = DepartmentRead(
+                    id=row.department_id, name=row.department_name, description=row.department_description
+                )
+            page.append(EmployeeProfileReadWithUser(
+                **row_data,
+                department=department,
+                documents=documents_by_employee.get(row.id, []),
+                workflows=workflows_by_employee.get(row.id, []) if include_workflows else None,
+            ))
+        return page
+
+    def get_profiles_page(
+            self,
+            skip: int = 0,
+            limit: int = 100,
+            manager_id: Optional[int] = None,
+            include_indirect_reports: bool = False,
+            include_documents: bool = True,
+            include_workflows: bool = False
+    ) -> List[EmployeeProfileReadWithUser]:
+        statement = self._projection_statement()
+        if manager_id and include_indirect_reports:
+            statement = statement.join(EmployeeHierarchy, EmployeeHierarchy.descendant_id == EmployeeProfile.id).where(
+                EmployeeHierarchy.ancestor_id == manager_id, EmployeeHierarchy.depth > 0
+            )
+        elif manager_id:
+            statement = statement.where(EmployeeProfile.manager_id == manager_id)
+        statement = statement.order_by(EmployeeProfile.id).offset(skip).limit(limit)
+        rows = self.db.exec(statement).all()
+        return self._build_page(rows, include_documents, include_workflows)
+
+    def get_profiles(
+            self,
+            employee_ids: List[int],
+            include_documents: bool = True,
+            include_workflows: bool = False
+    ) -> List[EmployeeProfileReadWithUser]:
+        """Profiles for the given ids, returned in the same order as employee_ids."""
+        if not employee_ids:
+            return []
+        statement = self._projection_statement().where(EmployeeProfile.id.in_(employee_ids))
+        rows = self.db.exec(statement).all()
+        by_id = {profile.id: profile for profile in self._build_page(rows, include_documents, include_workflows)}
+        return [by_id[employee_id] for employee_id in employee_ids if employee_id in by_id]
+
+    def get_profile(
+            self,
+            employee_id: int,
+            include_documents: bool = True,
+            include_workflows: bool = False
+    ) -> EmployeeProfileReadWithUser | None:
+        statement = self._projection_statement().where(EmployeeProfile.id == employee_id)
+        rows = self.db.exec(statement).all()
+        page = self._build_page(rows, include_documents, include_workflows)
+        return page[0] if page else None
@@ -0,0 +1,265 @@
+# hr_software/app/services/document_pipeline.py
+
+import importlib
+import multiprocessing
+import os
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Optional, Set
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.crud import crud_employee
+from app.models.employee import EmployeeDocument
+from app.models.enums import DocumentProcessingStatus
+from app.services.document_storage import DocumentBlobStore, document_store
+
+try:
+    import fitz  # Optional: PyMuPDF renders PDF page thumbnails and extracts PDF text
+except ImportError:
+    fitz = None
+
+try:
+    import pypdf  # Optional: PDF text extraction when PyMuPDF is not installed
+except ImportError:
+    pypdf = None
+
+try:
+    from PIL import Image  # Optional: thumbnails of uploaded images
+except ImportError:
+    Image = None
+
+MAX_THUMBNAIL_PAGES = 5
+THUMBNAIL_WIDTH = 320  # Pixels
+MAX_EXTRACTED_TEXT_CHARS = 1_000_000  # Longer documents are indexed by their beginning only
+TEXT_EXTENSIONS = (".txt", ".csv", ".md")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".tif", ".tiff", ".bmp")
+
+
+# --- Virus scanning hook ---
+@dataclass
+class ScanResult:
+    clean: bool
+    detail: str = "clean"  # Stored as EmployeeDocument.scan_result
+
+
+Scanner = Callable[[str], ScanResult]  # Called with the path of the stored file
+
+
+def accept_all_scanner(path: str) -> ScanResult:
+    """Used when no DOCUMENT_SCANNER is configured."""
+    return ScanResult(clean=True, detail="not scanned")
+
+
+def load_scanner(spec: Optional[str]) -> Scanner:
+    """Resolves a "package.module:function" reference, e.g. a ClamAV client wrapper."""
+    if not spec:
+        return accept_all_scanner
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+# --- Extraction (runs in worker processes, so it only uses its arguments) ---
+@dataclass
+class ExtractedContent:
+    text: str
+    page_count: Optional[int]
+    thumbnail_count: int
+
+
+def _document_kind(content_type: Optional[str], file_name: str) -> Optional[str]:
+    content_type = (content_type or "").lower()
+    extension = os.path.splitext(file_name.lower())[1]
+    if content_type == "application/pdf" or extension == ".pdf":
+        return "pdf"
+    if content_type.startswith("image/") or extension in IMAGE_EXTENSIONS:
+        return "image"
+    if content_type.startswith("text/") or extension in TEXT_EXTENSIONS:
+        return "text"
+    return None
+
+
+def _extract_pdf(path: str, thumbnail_dir: Optional[str]) -> ExtractedContent:
+    if fitz is not None:
+        with fitz.open(path) as pdf:
+            texts, thumbnails = [], 0
+            for page_number, page in enumerate(pdf, start=1):
+                texts.append(page.get_text())
+                if thumbnail_dir and page_number <= MAX_THUMBNAIL_PAGES:
+                    zoom = THUMBNAIL_WIDTH / max(page.rect.width, 1)
+                    page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).save(
+                        os.path.join(thumbnail_dir, f"page-{page_number}.png")
+                    )
+                    thumbnails = page_number
+            return ExtractedContent(text="\n".join(texts), page_count=pdf.page_count, thumbnail_count=thumbnails)
+    if pypdf is not None:
+        reader = pypdf.PdfReader(path)
+        text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        return ExtractedContent(text=text, page_count=len(reader.pages), thumbnail_count=0)
+    return ExtractedContent(text="", page_count=None, thumbnail_count=0)
+
+
+def _extract_image(path: str, thumbnail_dir: Optional[str]) -> ExtractedContent:
+    if Image is None or not thumbnail_dir:
+        return ExtractedContent(text="", page_count=1, thumbnail_count=0)
+    with Image.open(path) as image:
+        image.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * 2))
+        image.convert("RGB").save(os.path.join(thumbnail_dir, "page-1.png"), format="PNG")
+    return ExtractedContent(text="", page_count=1, thumbnail_count=1)
+
+
+def _extract_text_file(path: str) -> ExtractedContent:
+    with open(path, "rb") as handle:
+        raw = handle.read(MAX_EXTRACTED_TEXT_CHARS * 4)
+    return ExtractedContent(text=raw.decode("utf-8", errors="replace"), page_count=None, thumbnail_count=0)
+
+
+def extract_document_content(path: str, content_type: Optional[str], file_name: str,
+                             thumbnail_dir: Optional[str]) -> ExtractedContent:
+    """Extracts the text of a stored file and writes page-<n>.png previews into thumbnail_dir, if given."""
+    if thumbnail_dir:
+        os.makedirs(thumbnail_dir, exist_ok=True)
+    kind = _document_kind(content_type, file_name)
+    if kind == "pdf":
+        content = _extract_pdf(path, thumbnail_dir)
+    elif kind == "image":
+        content = _extract_image(path, thumbnail_dir)
+    elif kind == "text":
+        content = _extract_text_file(path)
+    else:
+        content = ExtractedContent(text="", page_count=None, thumbnail_count=0)
+    # PostgreSQL TEXT cannot hold NUL characters
+    content.text = content.text[:MAX_EXTRACTED_TEXT_CHARS].replace("\x00", "").strip()
+    return content
+
+
+# --- Pipeline ---
+class DocumentPipeline:
+    """
+    Processes uploaded documents in the background so uploads return as soon as the file is stored.
+    Each document is scanned, then its text and page thumbnails are extracted in a worker process
+    and the results are written to the document row (and EmployeeDocumentText). Documents that
+    share a blob reuse the results of the first one processed. Anything still pending when the
+    API stops is picked up again by resume_pending() on the next start.
+    """
+
+    def __init__(self, workers: Optional[int] = None, use_processes: Optional[bool] = None,
+                 scanner: Optional[Scanner] = None, store: DocumentBlobStore = document_store):
+        self.workers = max(1, workers or settings.DOCUMENT_PIPELINE_WORKERS)
+        self.use_processes = settings.DOCUMENT_PIPELINE_USE_PROCESSES if use_processes is None else use_processes
+        self.scanner = scanner or load_scanner(settings.DOCUMENT_SCANNER)
+        self.store = store
+        self._jobs: Optional[ThreadPoolExecutor] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queued: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def enqueue(self, document_id: int, reuse_results: bool = True) -> None:
+        """
+        Schedules a committed document for processing; repeated calls before it starts are ignored.
+        reuse_results=False scans and extracts again even if a document with the same content was done.
+        """
+        with self._lock:
+            if document_id in self._queued:
+                return
+            self._queued.add(document_id)
+            if self._jobs is None:
+                self._jobs = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="document-pipeline")
+            self._jobs.submit(self._run, document_id, reuse_results)
+
+    def enqueue_many(self, document_ids: Iterable[int]) -> None:
+        for document_id in document_ids:
+            self.enqueue(document_id)
+
+    def resume_pending(self, db: Session) -> int:
+        document_ids = crud_employee.get_documents_pending_processing(db)
+        self.enqueue_many(document_ids)
+        return len(document_ids)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            jobs, self._jobs = self._jobs, None
+            executor, self._executor = self._executor, None
+        if jobs is not None:
+            jobs.shutdown(wait=wait, cancel_futures=not wait)
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _run(self, document_id: int, reuse_results: bool) -> None:
+        with self._lock:
+            self._queued.discard(document_id)
+        try:
+            with Session(engine) as db:
+                self.process(db, document_id, reuse_results=reuse_results)
+        except Exception as e:
+            print(f"Document pipeline: processing document {document_id} failed: {e}")
+
+    def _extract(self, document: EmployeeDocument, path: str) -> ExtractedContent:
+        # Previews are kept with the blob; files from before the blob store only get their text indexed
+        thumbnail_dir = self.store.derived_path(document.content_hash) if document.content_hash else None
+        args = (path, document.content_type, document.file_name, thumbnail_dir)
+        if not self.use_processes:
+            return extract_document_content(*args)
+        with self._lock:
+            if self._executor is None:
+                # 'spawn' keeps the worker processes independent of this process' threads and DB connections
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            executor = self._executor
+        return executor.submit(extract_document_content, *args).result()
+
+    def _local_file(self, db: Session, document: EmployeeDocument):
+        if not document.content_hash:
+            return nullcontext(document.file_path)
+        archived = crud_employee.get_archived_blob(db, document.content_hash)  # Cold-tier blobs are unpacked for the job
+        return self.store.local_file(document.content_hash, archived)
+
+    def process(self, db: Session, document_id: int, reuse_results: bool = True) -> Optional[EmployeeDocument]:
+        """Processes one document synchronously and commits the outcome."""
+        document = db.get(EmployeeDocument, document_id)
+        if not document:
+            return None  # Deleted before its turn came
+        document.processing_status = DocumentProcessingStatus.PROCESSING
+        db.add(document)
+        db.commit()
+
+        try:
+            done = reuse_results and document.content_hash and crud_employee.get_processed_document_with_hash(
+                db, document.content_hash, exclude_document_id=document.id
+            )
+            if done:
+                document.processing_status = done.processing_status
+                document.scan_result, document.page_count = done.scan_result, done.page_count
+                document.thumbnail_count = done.thumbnail_count
+                crud_employee.set_document_text(db, document.id, crud_employee.get_document_text(db, done.id))
+            else:
+                with self._local_file(db, document) as path:
+                    scan = self.scanner(path)
+                    document.scan_result = scan.detail[:255]
+                    if not scan.clean:
+                        document.processing_status = DocumentProcessingStatus.QUARANTINED
+                        print(f"Document pipeline: document {document.id} quarantined ({scan.detail})")
+                    else:
+                        content = self._extract(document, path)
+                        document.page_count, document.thumbnail_count = content.page_count, content.thumbnail_count
+                        crud_employee.set_document_text(db, document.id, content.text)
+                        document.processing_status = DocumentProcessingStatus.COMPLETED
+            document.processing_error = None
+        except Exception as e:
+            db.rollback()
+            document.processing_status = DocumentProcessingStatus.FAILED
+            document.processing_error = str(e)[:1000]
+            print(f"Document pipeline: document {document.id} failed: {e}")
+        document.processed_at = datetime.utcnow()
+        db.add(document)
+        db.commit()
+        db.refresh(document)
+        return document
+
+
+document_pipeline = DocumentPipeline()
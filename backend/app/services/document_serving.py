@@ -0,0 +1,114 @@
+# hr_software/app/services/document_serving.py
+
+import hashlib
+import hmac
+import os
+import time
+from datetime import timezone
+from email.utils import formatdate
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+
+from app.core.config import settings
+from app.models.employee import EmployeeDocument
+from app.models.enums import DocumentProcessingStatus
+from app.services.document_storage import ArchiveLocation, document_store
+
+# Browsers may keep a copy, but must revalidate it with If-None-Match before reusing it
+DOCUMENT_CACHE_CONTROL = "private, no-cache"
+
+
+# --- Cache validators ---
+def document_etag(document: EmployeeDocument) -> Optional[str]:
+    """Strong ETag from the stored SHA-256; documents from before the blob store have none."""
+    return f'"{document.content_hash}"' if document.content_hash else None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+# --- Signed URLs ---
+def _document_signature(document_id: int, expires: int) -> str:
+    message = f"document:{document_id}:{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign_document_url(document_id: int, ttl_seconds: Optional[int] = None) -> Tuple[str, int]:
+    """Returns (query string, expiry as a unix timestamp) for GET /employees/documents/signed/{id}."""
+    expires = int(time.time()) + (ttl_seconds or settings.DOCUMENT_SIGNED_URL_TTL_SECONDS)
+    return f"expires={expires}&signature={_document_signature(document_id, expires)}", expires
+
+
+def verify_document_signature(document_id: int, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_document_signature(document_id, expires), signature)
+
+
+# --- Responses ---
+def _accel_redirect_location(file_path: str) -> Optional[str]:
+    """Internal nginx location of a stored file, when the app sits behind nginx (see DOCUMENT_ACCEL_REDIRECT_PREFIX)."""
+    prefix = settings.DOCUMENT_ACCEL_REDIRECT_PREFIX
+    if not prefix:
+        return None
+    relative_path = os.path.relpath(os.path.abspath(file_path), os.path.abspath(document_store.root))
+    if relative_path.startswith(os.pardir):
+        return None  # Legacy files outside the store are streamed by the app
+    return prefix.rstrip("/") + "/" + quote(relative_path.replace(os.sep, "/"))
+
+
+def _content_disposition(file_name: str) -> str:
+    quoted = quote(file_name)
+    if quoted != file_name:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{file_name}"'
+
+
+def build_document_response(request: Request, document: EmployeeDocument,
+                            archived: Optional[ArchiveLocation] = None) -> Response:
+    """
+    Serves a document the caller is already allowed to see. Answers If-None-Match with 304
+    from the content hash without touching the disk; otherwise hands the file to nginx via
+    X-Accel-Redirect (sendfile, zero-copy) when configured, or to FileResponse, which
+    streams it and handles Range / If-Range (206, 416).
+    Cold-tier documents (archived is their pack location) are decompressed on the fly and
+    always sent whole.
+    """
+    if document.processing_status == DocumentProcessingStatus.QUARANTINED:
+        return JSONResponse(status_code=status.HTTP_409_CONFLICT,
+                            content={"detail": "Document was quarantined by the virus scanner."})
+    etag = document_etag(document)
+    headers = {"Cache-Control": DOCUMENT_CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+        headers["Last-Modified"] = formatdate(document.upload_date.replace(tzinfo=timezone.utc).timestamp(), usegmt=True)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if archived is not None and not os.path.isfile(document.file_path):
+        headers.update({"Content-Length": str(archived.size),
+                        "Content-Disposition": _content_disposition(document.file_name)})
+        return StreamingResponse(document_store.iter_archived(archived), headers=headers,
+                                 media_type=document.content_type or "application/octet-stream")
+
+    if not os.path.isfile(document.file_path):
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "File not found on server."})
+    media_type = document.content_type or "application/octet-stream"
+
+    location = _accel_redirect_location(document.file_path)
+    if location:
+        # nginx replaces the empty body with the file and applies Range itself
+        headers.update({"X-Accel-Redirect": location, "Content-Disposition": _content_disposition(document.file_name)})
+        return Response(status_code=status.HTTP_200_OK, headers=headers, media_type=media_type)
+    return FileResponse(path=document.file_path, filename=document.file_name, media_type=media_type,
+                        headers=headers)
@@ -0,0 +1,347 @@
+# hr_software/app/services/document_storage.py
+
+import hashlib
+import os
+import shutil
+import struct
+import uuid
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, BinaryIO, Iterable, Iterator, List, Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+UPLOAD_DIRECTORY = os.path.join("uploads", "employee_documents")
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read from the client and written to disk per step
+
+# Pack archives (cold tier): a magic line, then per blob a fixed header followed by its bytes
+PACK_MAGIC = b"HRPACK1\n"
+PACK_MEMBER_HEADER = struct.Struct(">4s64sQQB")  # b"BLOB", SHA-256 hex, size, stored size, compressed flag
+ARCHIVE_COMPRESSION_LEVEL = 6
+
+
+class DocumentTooLargeError(ValueError):
+    pass
+
+
+@dataclass
+class StagedBlob:
+    """Hashed content waiting in a temp file; promote() moves it into the store."""
+    content_hash: str  # SHA-256 hex digest
+    size: int
+    tmp_path: str
+
+
+@dataclass
+class StoredBlob:
+    content_hash: str  # SHA-256 hex digest
+    size: int
+    path: str
+    deduplicated: bool  # True if identical content was already stored
+
+
+@dataclass
+class ArchiveLocation:  # Same fields as the ArchivedBlob model, so either can be passed to the read methods
+    content_hash: str
+    pack_name: str
+    offset: int
+    stored_size: int
+    size: int
+    compression: str  # "zlib" or "none"
+
+
+class DocumentBlobStore:
+    """
+    Content-addressed store for employee documents: every distinct file is kept once at
+    blobs/<hash[:2]>/<hash[2:4]>/<sha256>, however many EmployeeDocument rows point to it.
+    Uploads are written to a temp file in a worker thread while the SHA-256 is computed, and
+    promote() later moves it into place (or drops it if the blob already exists).
+    Resumable uploads accumulate in partial/<upload_id> until they are completed.
+    Previews made by the document pipeline live in derived/<hash[:2]>/<sha256>/ and go with the blob.
+    Blobs moved to the cold tier are appended, zlib-compressed, to pack files in archive/; a pack is
+    read at the blob's offset only, so any blob can be streamed without unpacking the rest.
+    Deciding when a blob is no longer referenced is up to crud_employee, which also runs promote()
+    under the same per-hash lock as the deletion, so a deduplicated upload cannot lose its blob.
+    """
+
+    def __init__(self, root: str = UPLOAD_DIRECTORY):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.partial_dir = os.path.join(root, "partial")
+        self.derived_dir = os.path.join(root, "derived")
+        self.archive_dir = os.path.join(root, "archive")
+        for directory in (self.blob_dir, self.tmp_dir, self.partial_dir, self.derived_dir, self.archive_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blob_dir, content_hash[:2], content_hash[2:4], content_hash)
+
+    def partial_path(self, upload_id: str) -> str:
+        return os.path.join(self.partial_dir, upload_id)
+
+    def derived_path(self, content_hash: str) -> str:
+        return os.path.join(self.derived_dir, content_hash[:2], content_hash)
+
+    def thumbnail_path(self, content_hash: str, page: int) -> str:
+        return os.path.join(self.derived_path(content_hash), f"page-{page}.png")
+
+    def pack_path(self, pack_name: str) -> str:
+        return os.path.join(self.archive_dir, pack_name)
+
+    # --- Streaming writes ---
+    @staticmethod
+    async def iter_upload(upload: UploadFile) -> AsyncIterator[bytes]:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    @staticmethod
+    def _write_chunk(handle: BinaryIO, digest, chunk: bytes) -> None:
+        digest.update(chunk)  # hashlib releases the GIL for large buffers, so this also runs off the event loop
+        handle.write(chunk)
+
+    @staticmethod
+    def _discard(handle: BinaryIO, path: str) -> None:
+        handle.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+    async def save_stream(self, chunks: AsyncIterator[bytes], max_bytes: int) -> StagedBlob:
+        """Writes the stream to a temp file, hashing as it goes. Raises DocumentTooLargeError past max_bytes."""
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        handle = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise DocumentTooLargeError(f"File exceeds the maximum upload size of {max_bytes} bytes.")
+                await run_in_threadpool(self._write_chunk, handle, digest, chunk)
+            await run_in_threadpool(handle.close)
+        except BaseException:
+            await run_in_threadpool(self._discard, handle, tmp_path)
+            raise
+        return StagedBlob(content_hash=digest.hexdigest(), size=size, tmp_path=tmp_path)
+
+    def promote(self, staged: StagedBlob) -> StoredBlob:
+        return self._promote(staged.tmp_path, staged.content_hash, staged.size)
+
+    def discard(self, staged: StagedBlob) -> None:
+        if os.path.exists(staged.tmp_path):
+            os.remove(staged.tmp_path)
+
+    def _promote(self, tmp_path: str, content_hash: str, size: int) -> StoredBlob:
+        path = self.blob_path(content_hash)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            return StoredBlob(content_hash=content_hash, size=size, path=path, deduplicated=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)  # Atomic, so readers never see a half-written blob
+        return StoredBlob(content_hash=content_hash, size=size, path=path, deduplicated=False)
+
+    def import_file(self, source_path: str) -> StagedBlob:
+        """Copies a file from outside the store (e.g. a document saved before it existed), ready to promote."""
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        with open(source_path, "rb") as source, open(tmp_path, "wb") as target:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                target.write(chunk)
+                size += len(chunk)
+        return StagedBlob(content_hash=digest.hexdigest(), size=size, tmp_path=tmp_path)
+
+    # --- Resumable uploads ---
+    @staticmethod
+    def _open_partial(path: str, offset: int) -> BinaryIO:
+        handle = open(path, "r+b" if os.path.exists(path) else "w+b")
+        # A chunk interrupted half-way may have left extra bytes; the client resends from the recorded offset
+        handle.seek(offset)
+        handle.truncate()
+        return handle
+
+    async def append_partial(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes], max_bytes: int) -> int:
+        """Writes a chunk at offset into the partial file and returns the new size."""
+        handle = await run_in_threadpool(self._open_partial, self.partial_path(upload_id), offset)
+        size = offset
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise DocumentTooLargeError(f"Chunk goes past the declared size of {max_bytes} bytes.")
+                await run_in_threadpool(handle.write, chunk)
+            if size > offset:
+                await run_in_threadpool(handle.flush)
+        except DocumentTooLargeError:
+            await run_in_threadpool(handle.truncate, offset)
+            raise
+        finally:
+            await run_in_threadpool(handle.close)
+        return size
+
+    def _hash_partial(self, upload_id: str) -> StagedBlob:
+        path = self.partial_path(upload_id)
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as handle:
+            while chunk := handle.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+        return StagedBlob(content_hash=digest.hexdigest(), size=size, tmp_path=path)
+
+    async def complete_partial(self, upload_id: str) -> StagedBlob:
+        return await run_in_threadpool(self._hash_partial, upload_id)
+
+    def discard_partial(self, upload_id: str) -> None:
+        path = self.partial_path(upload_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    # --- Cold tier (pack archives) ---
+    def write_packs(self, content_hashes: Iterable[str], max_pack_bytes: int) -> List[ArchiveLocation]:
+        """
+        Appends hot blobs to new pack files, starting another pack past max_pack_bytes. The hot files
+        are left in place: the caller records the locations, commits, then calls delete_hot_blob.
+        A pack left behind by a failed run is not referenced by any ArchivedBlob and is removed by compaction.
+        """
+        locations: List[ArchiveLocation] = []
+        pack: Optional[BinaryIO] = None
+        pack_name = ""
+        try:
+            for content_hash in content_hashes:
+                if pack is None or pack.tell() >= max_pack_bytes:
+                    if pack is not None:
+                        self._close_pack(pack)
+                    pack_name = f"pack-{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}.pack"
+                    pack = open(self.pack_path(pack_name), "wb")
+                    pack.write(PACK_MAGIC)
+                locations.append(self._append_member(pack, pack_name, content_hash))
+            if pack is not None:
+                self._close_pack(pack)
+        except BaseException:
+            if pack is not None:
+                pack.close()
+            raise
+        return locations
+
+    @staticmethod
+    def _close_pack(pack: BinaryIO) -> None:
+        pack.flush()
+        os.fsync(pack.fileno())  # The hot copies are deleted right after, so the pack must be on disk
+        pack.close()
+
+    def _append_member(self, pack: BinaryIO, pack_name: str, content_hash: str) -> ArchiveLocation:
+        header_offset = pack.tell()
+        pack.write(PACK_MEMBER_HEADER.pack(b"BLOB", content_hash.encode(), 0, 0, 0))  # Filled in below
+        offset = pack.tell()
+        compressor = zlib.compressobj(ARCHIVE_COMPRESSION_LEVEL)
+        size = 0
+        with open(self.blob_path(content_hash), "rb") as blob:
+            while chunk := blob.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                pack.write(compressor.compress(chunk))
+            pack.write(compressor.flush())
+            stored_size = pack.tell() - offset
+            compressed = stored_size < size
+            if not compressed:
+                # Most PDFs and images are compressed already; keep those as they are
+                pack.seek(offset)
+                pack.truncate()
+                blob.seek(0)
+                shutil.copyfileobj(blob, pack, UPLOAD_CHUNK_SIZE)
+                stored_size = size
+        end = pack.tell()
+        pack.seek(header_offset)
+        pack.write(PACK_MEMBER_HEADER.pack(b"BLOB", content_hash.encode(), size, stored_size, int(compressed)))
+        pack.seek(end)
+        return ArchiveLocation(content_hash=content_hash, pack_name=pack_name, offset=offset,
+                               stored_size=stored_size, size=size, compression="zlib" if compressed else "none")
+
+    def iter_archived(self, location: ArchiveLocation, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yields the original bytes of an archived blob, reading only its part of the pack."""
+        decompressor = zlib.decompressobj() if location.compression == "zlib" else None
+        with open(self.pack_path(location.pack_name), "rb") as pack:
+            pack.seek(location.offset)
+            remaining = location.stored_size
+            while remaining > 0:
+                data = pack.read(min(chunk_size, remaining))
+                if not data:
+                    raise OSError(f"Pack {location.pack_name} is truncated at blob {location.content_hash}")
+                remaining -= len(data)
+                if decompressor is None:
+                    yield data
+                    continue
+                while data:  # Bounded output, so highly compressible blobs do not expand into one huge chunk
+                    output = decompressor.decompress(data, chunk_size)
+                    if output:
+                        yield output
+                    data = decompressor.unconsumed_tail
+            if decompressor is not None and (tail := decompressor.flush()):
+                yield tail
+
+    def restore_blob(self, location: ArchiveLocation) -> StoredBlob:
+        """Writes an archived blob back to the hot tier, checking it against its hash."""
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        with open(tmp_path, "wb") as target:
+            for chunk in self.iter_archived(location):
+                digest.update(chunk)
+                target.write(chunk)
+                size += len(chunk)
+        if digest.hexdigest() != location.content_hash:
+            os.remove(tmp_path)
+            raise OSError(f"Archived blob {location.content_hash} in {location.pack_name} is corrupt")
+        return self._promote(tmp_path, location.content_hash, size)
+
+    @contextmanager
+    def local_file(self, content_hash: str, location: Optional[ArchiveLocation] = None) -> Iterator[str]:
+        """Path of a blob on disk; an archived blob is unpacked into a temp file for the duration."""
+        path = self.blob_path(content_hash)
+        if os.path.exists(path) or location is None:
+            yield path
+            return
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        try:
+            with open(tmp_path, "wb") as target:
+                for chunk in self.iter_archived(location):
+                    target.write(chunk)
+            yield tmp_path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def list_packs(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.archive_dir) if name.endswith(".pack"))
+
+    def delete_pack(self, pack_name: str) -> None:
+        try:
+            os.remove(self.pack_path(pack_name))
+        except OSError as e:
+            print(f"Error deleting pack {pack_name}: {e}")
+
+    # --- Removal ---
+    def delete_hot_blob(self, content_hash: str) -> None:
+        """Removes only the hot copy, e.g. once the blob is archived; previews stay."""
+        path = self.blob_path(content_hash)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"Error deleting blob {path}: {e}")
+
+    def delete_blob(self, content_hash: str) -> None:
+        path = self.blob_path(content_hash)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+            shutil.rmtree(self.derived_path(content_hash), ignore_errors=True)
+        except OSError as e:
+            print(f"Error deleting blob {path}: {e}")
+
+
+document_store = DocumentBlobStore()
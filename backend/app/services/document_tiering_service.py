@@ -0,0 +1,139 @@
+# hr_software/app/services/document_tiering_service.py
+
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.crud import crud_employee
+from app.services.document_storage import DocumentBlobStore, document_store
+
+ARCHIVE_BATCH_SIZE = 1000  # Blobs per pack-writing round; each round is committed before the hot files go
+COMPACT_MIN_LIVE_RATIO = 0.5  # Packs with less live data than this are rewritten
+PACK_GRACE_SECONDS = 3600  # Unreferenced packs younger than this may belong to an archive run in progress
+
+
+@dataclass
+class DocumentArchiveResult:
+    dry_run: bool
+    blobs_archived: int = 0
+    documents_archived: int = 0
+    bytes_archived: int = 0  # Original size of the archived blobs
+    bytes_stored: int = 0  # What they take inside the packs
+    legacy_files_imported: int = 0
+    packs_written: int = 0
+
+
+class DocumentTieringService:
+    """
+    Moves documents between the hot tier (one file per blob) and the cold tier (compressed pack
+    archives). Blobs used only by employees who resigned or were terminated more than
+    DOCUMENT_COLD_TIER_AFTER_DAYS ago are archived; downloads of cold documents are streamed
+    straight from their pack via the ArchivedBlob offset index, so nothing else changes for callers.
+    Run periodically via scripts/archive_documents.py.
+    """
+
+    def __init__(self, db: Session, store: DocumentBlobStore = document_store):
+        self.db = db
+        self.store = store
+
+    # --- Archiving ---
+    def archive_separated_documents(self, older_than_days: Optional[int] = None,
+                                    dry_run: bool = False) -> DocumentArchiveResult:
+        days = settings.DOCUMENT_COLD_TIER_AFTER_DAYS if older_than_days is None else older_than_days
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        result = DocumentArchiveResult(dry_run=dry_run)
+
+        legacy_documents = crud_employee.get_unstored_documents_of_separated(self.db, cutoff)
+        if dry_run:
+            result.legacy_files_imported = len(legacy_documents)
+            result.blobs_archived = len(crud_employee.get_archivable_blob_hashes(self.db, cutoff))
+            return result
+        result.legacy_files_imported = self._import_legacy_files(legacy_documents)
+
+        hashes = [content_hash for content_hash in crud_employee.get_archivable_blob_hashes(self.db, cutoff)
+                  if os.path.exists(self.store.blob_path(content_hash))]
+        for start in range(0, len(hashes), ARCHIVE_BATCH_SIZE):
+            batch = hashes[start:start + ARCHIVE_BATCH_SIZE]
+            locations = self.store.write_packs(batch, settings.DOCUMENT_ARCHIVE_PACK_MAX_BYTES)
+            result.documents_archived += crud_employee.mark_blobs_archived(self.db, locations)
+            self.db.commit()
+            for location in locations:
+                self.store.delete_hot_blob(location.content_hash)
+            result.blobs_archived += len(locations)
+            result.bytes_archived += sum(location.size for location in locations)
+            result.bytes_stored += sum(location.stored_size for location in locations)
+            result.packs_written += len({location.pack_name for location in locations})
+        return result
+
+    def _import_legacy_files(self, documents) -> int:
+        """Moves loose pre-blob-store files into the blob store so they can be archived like the rest."""
+        imported = 0
+        for document in documents:
+            if not os.path.isfile(document.file_path):
+                print(f"Document {document.id}: file {document.file_path} is missing, not archived.")
+                continue
+            old_path = document.file_path
+            blob = crud_employee.store_blob(self.db, self.store.import_file(old_path))
+            document.content_hash, document.file_path, document.file_size = blob.content_hash, blob.path, blob.size
+            self.db.add(document)
+            self.db.commit()
+            os.remove(old_path)
+            imported += 1
+        return imported
+
+    # --- Restoring ---
+    def restore_blobs(self, content_hashes: List[str]) -> int:
+        """Brings archived blobs back to the hot tier (e.g. for a rehired employee). Returns blobs restored."""
+        restored = []
+        for content_hash in content_hashes:
+            location = crud_employee.get_archived_blob(self.db, content_hash)
+            if location:
+                self.store.restore_blob(location)
+                restored.append(content_hash)
+        crud_employee.mark_blobs_hot(self.db, restored)
+        self.db.commit()
+        return len(restored)
+
+    def restore_employee_documents(self, employee_id: int) -> int:
+        return self.restore_blobs(crud_employee.get_cold_blob_hashes_of_employee(self.db, employee_id))
+
+    # --- Compaction ---
+    def compact_packs(self, min_live_ratio: float = COMPACT_MIN_LIVE_RATIO) -> int:
+        """
+        Reclaims space left by deleted or restored blobs: packs nothing refers to are removed and
+        packs below min_live_ratio have their remaining blobs rewritten into a new pack.
+        Returns the number of packs removed.
+        """
+        live_bytes = crud_employee.get_pack_live_bytes(self.db)
+        removed = 0
+        for pack_name in self.store.list_packs():
+            path = self.store.pack_path(pack_name)
+            pack_size = os.path.getsize(path)
+            live = live_bytes.get(pack_name, 0)
+            if live == 0:
+                if time.time() - os.path.getmtime(path) > PACK_GRACE_SECONDS:
+                    self.store.delete_pack(pack_name)
+                    removed += 1
+                continue
+            if live / pack_size >= min_live_ratio:
+                continue
+            self._rewrite_pack(pack_name)
+            removed += 1
+        return removed
+
+    def _rewrite_pack(self, pack_name: str) -> None:
+        entries = crud_employee.get_archived_blobs_in_pack(self.db, pack_name)
+        hashes = [entry.content_hash for entry in entries]
+        for entry in entries:
+            self.store.restore_blob(entry)
+        locations = self.store.write_packs(hashes, settings.DOCUMENT_ARCHIVE_PACK_MAX_BYTES)
+        crud_employee.mark_blobs_archived(self.db, locations)
+        self.db.commit()
+        for content_hash in hashes:
+            self.store.delete_hot_blob(content_hash)
+        self.store.delete_pack(pack_name)
@@ -0,0 +1,346 @@
+# hr_software/app/services/employee_import_service.py
+
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlmodel import Session, select, insert, update, func
+
+from app.core.security import get_password_hash, get_password_hashes
+from app.crud import crud_org, crud_workflow
+from app.models.employee import Department, EmployeeProfile
+from app.models.enums import UserRole
+from app.models.user import User
+from app.schemas.employee_import import EmployeeImportRow, EmployeeImportRowIssue, EmployeeImportResult
+from app.services.search_service import employee_search_index
+from app.services.workforce_history import record_new_employees
+from app.services.workflow_trigger_service import workflow_trigger_cache
+
+try:
+    import openpyxl  # Optional: only needed for .xlsx imports
+except ImportError:
+    openpyxl = None
+
+IMPORT_CHUNK_SIZE = 1000
+# Below this many per-row passwords in a chunk, starting worker processes costs more than it saves
+PARALLEL_HASH_MIN_PASSWORDS = 32
+
+RawRow = Tuple[int, Dict[str, Optional[str]]]
+
+
+# --- Reading ---
+def _normalise_header(header) -> str:
+    return str(header or "").strip().lower().replace(" ", "_")
+
+
+def _cell_to_str(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Excel stores phone numbers etc. as floats
+    return str(value)
+
+
+def _read_csv_rows(stream: BinaryIO) -> Iterator[RawRow]:
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    header = next(reader, None)
+    if not header:
+        return
+    columns = [_normalise_header(column) for column in header]
+    for row_number, values in enumerate(reader, start=1):
+        if any(value.strip() for value in values):
+            yield row_number, dict(zip(columns, values))
+
+
+def _read_xlsx_rows(stream: BinaryIO) -> Iterator[RawRow]:
+    if openpyxl is None:
+        raise ValueError("XLSX imports need the optional 'openpyxl' package; upload a CSV file instead.")
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        columns = [_normalise_header(column) for column in header]
+        for row_number, values in enumerate(rows, start=1):
+            cells = [_cell_to_str(value) for value in values]
+            if any(cell and cell.strip() for cell in cells):
+                yield row_number, dict(zip(columns, cells))
+    finally:
+        workbook.close()
+
+
+def read_import_rows(stream: BinaryIO, filename: str) -> Iterator[RawRow]:
+    """Streams (row_number, {column: value}) from a CSV or XLSX file with a header row."""
+    if filename.lower().endswith(".xlsx"):
+        return _read_xlsx_rows(stream)
+    return _read_csv_rows(stream)
+
+
+# --- Import ---
+@dataclass
+class _ImportedEmployee:
+    row_number: int
+    row: EmployeeImportRow
+    profile_id: Optional[int] = None
+
+
+class EmployeeImportService:
+    """
+    Bulk-creates users and employee profiles from an import file.
+
+    Rows are validated in chunks (one lookup of existing emails per chunk), passwords are hashed
+    in a process pool, and each chunk is written with one multi-row INSERT ... RETURNING for users
+    and one for profiles. After the last chunk, manager links (which may point forward in the
+    file), the reporting-line closure rows and the auto-assigned workflows are all written
+    set-based. The whole import is one transaction; invalid rows are skipped and reported.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def import_rows(
+            self,
+            rows: Iterable[RawRow],
+            default_password: Optional[str] = None,
+            dry_run: bool = False
+    ) -> EmployeeImportResult:
+        self._result = EmployeeImportResult(dry_run=dry_run, total_rows=0, imported=0, failed=0, workflows_assigned=0)
+        self._departments = {name.lower(): department_id
+                             for department_id, name in self.db.exec(select(Department.id, Department.name)).all()}
+        self._seen_emails: Dict[str, int] = {}  # lower-cased email -> row number
+        self._imported: List[_ImportedEmployee] = []
+        self._default_password = default_password
+        self._default_password_hash: Optional[str] = None
+        self._dry_run = dry_run
+
+        try:
+            chunk: List[RawRow] = []
+            for raw_row in rows:
+                chunk.append(raw_row)
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk)
+            self._finish()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+        self._result.warnings.sort(key=lambda issue: issue.row_number)
+        self._result.failed = len(self._result.errors)
+        self._result.imported = len(self._imported)
+        return self._result
+
+    def _error(self, row_number: int, email: Optional[str], *messages: str) -> None:
+        self._result.errors.append(EmployeeImportRowIssue(row_number=row_number, email=email, messages=list(messages)))
+
+    def _warning(self, row_number: int, email: Optional[str], *messages: str) -> None:
+        self._result.warnings.append(EmployeeImportRowIssue(row_number=row_number, email=email, messages=list(messages)))
+
+    def _validate_chunk(self, chunk: List[RawRow]) -> List[_ImportedEmployee]:
+        candidates: List[_ImportedEmployee] = []
+        for row_number, raw in chunk:
+            self._result.total_rows += 1
+            cleaned = {key: value.strip() for key, value in raw.items() if key and value is not None and value.strip()}
+            try:
+                row = EmployeeImportRow.model_validate(cleaned)
+            except ValidationError as e:
+                messages = [f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+                            for error in e.errors()]
+                self._error(row_number, cleaned.get("email"), *messages)
+                continue
+
+            email_key = row.email.lower()
+            if email_key in self._seen_emails:
+                self._error(row_number, row.email, f"Duplicate email; first used on row {self._seen_emails[email_key]}.")
+                continue
+            self._seen_emails[email_key] = row_number
+
+            messages = []
+            if not row.password and not self._default_password:
+                messages.append("No password given and no default password set for the import.")
+            if row.department and row.department.lower() not in self._departments:
+                messages.append(f"Unknown department '{row.department}'.")
+            if messages:
+                self._error(row_number, row.email, *messages)
+                continue
+            candidates.append(_ImportedEmployee(row_number=row_number, row=row))
+
+        if candidates:
+            # Case-insensitive, like the duplicate check within the file
+            existing = set(self.db.exec(
+                select(func.lower(User.email))
+                .where(func.lower(User.email).in_([candidate.row.email.lower() for candidate in candidates]))
+            ).all())
+            for candidate in candidates:
+                if candidate.row.email.lower() in existing:
+                    self._error(candidate.row_number, candidate.row.email, "A user with this email already exists.")
+            candidates = [candidate for candidate in candidates if candidate.row.email.lower() not in existing]
+        return candidates
+
+    def _hash_passwords(self, valid: List[_ImportedEmployee]) -> List[str]:
+        own_passwords = [employee.row.password for employee in valid if employee.row.password]
+        if len(own_passwords) >= PARALLEL_HASH_MIN_PASSWORDS and self._executor is None and (os.cpu_count() or 1) > 1:
+            # 'spawn' keeps the worker processes independent of this process' threads and DB connections
+            self._executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        own_hashes = iter(get_password_hashes(own_passwords, executor=self._executor))
+
+        hashes = []
+        for employee in valid:
+            if employee.row.password:
+                hashes.append(next(own_hashes))
+            else:
+                # Everyone without a password gets the same temporary one, so it is hashed once per import
+                if self._default_password_hash is None:
+                    self._default_password_hash = get_password_hash(self._default_password)
+                hashes.append(self._default_password_hash)
+        return hashes
+
+    def _import_chunk(self, chunk: List[RawRow]) -> None:
+        valid = self._validate_chunk(chunk)
+        if not valid:
+            return
+        self._imported.extend(valid)
+        if self._dry_run:
+            return
+
+        hashes = self._hash_passwords(valid)
+        user_rows = self.db.exec(
+            insert(User).returning(User.id, User.email),
+            params=[
+                {"email": employee.row.email, "first_name": employee.row.first_name,
+                 "last_name": employee.row.last_name, "role": employee.row.role,
+                 "is_active": True, "hashed_password": hashed_password}
+                for employee, hashed_password in zip(valid, hashes)
+            ],
+        ).all()
+        user_ids = {email: user_id for user_id, email in user_rows}
+
+        # Like POST /users/, only employees and managers get a profile
+        with_profile = [employee for employee in valid if employee.row.role in (UserRole.EMPLOYEE, UserRole.MANAGER)]
+        if not with_profile:
+            return
+        profile_rows = self.db.exec(
+            insert(EmployeeProfile).returning(EmployeeProfile.id, EmployeeProfile.user_id),
+            params=[
+                {"user_id": user_ids[employee.row.email], "job_title": employee.row.job_title,
+                 "phone_number": employee.row.phone_number, "hire_date": employee.row.hire_date,
+                 "employment_status": employee.row.employment_status,
+                 "department_id": self._departments[employee.row.department.lower()] if employee.row.department else None}
+                for employee in with_profile
+            ],
+        ).all()
+        profile_ids = {user_id: profile_id for profile_id, user_id in profile_rows}
+        for employee in with_profile:
+            employee.profile_id = profile_ids[user_ids[employee.row.email]]
+
+    def _resolve_managers(self) -> Dict[str, Optional[int]]:
+        """Maps each imported employee's email to its manager's profile id (None = no manager)."""
+        with_profile = {employee.row.email.lower(): employee for employee in self._imported
+                        if employee.row.role in (UserRole.EMPLOYEE, UserRole.MANAGER)}
+        for employee in self._imported:
+            if employee.row.manager_email and employee.row.email.lower() not in with_profile:
+                self._warning(employee.row_number, employee.row.email,
+                              "Admins have no employee profile; manager_email was ignored.")
+
+        external_emails = {employee.row.manager_email.lower() for employee in with_profile.values()
+                           if employee.row.manager_email and employee.row.manager_email.lower() not in with_profile}
+        existing_managers: Dict[str, int] = {}
+        if external_emails:
+            rows = self.db.exec(
+                select(User.email, EmployeeProfile.id)
+                .join(EmployeeProfile, EmployeeProfile.user_id == User.id)
+                .where(func.lower(User.email).in_(external_emails))
+            ).all()
+            existing_managers = {email.lower(): profile_id for email, profile_id in rows}
+
+        in_file_links: Dict[str, str] = {}
+        managers: Dict[str, Optional[int]] = {}
+        for key, employee in with_profile.items():
+            managers[key] = None
+            manager_email = employee.row.manager_email
+            if not manager_email:
+                continue
+            manager_key = manager_email.lower()
+            if manager_key == key:
+                self._warning(employee.row_number, employee.row.email, "Imported without a manager: an employee cannot manage themselves.")
+            elif manager_key in with_profile:
+                in_file_links[key] = manager_key
+            elif manager_key in existing_managers:
+                managers[key] = existing_managers[manager_key]
+            else:
+                self._warning(employee.row_number, employee.row.email,
+                              f"Imported without a manager: no employee with email '{manager_email}'.")
+
+        # Managers inside the file can only form a cycle among themselves; drop one link per cycle
+        state: Dict[str, str] = {}
+        for key in list(in_file_links):
+            path = []
+            current = key
+            while current in in_file_links and current not in state:
+                state[current] = "visiting"
+                path.append(current)
+                current = in_file_links[current]
+            if state.get(current) == "visiting":
+                breaker = with_profile[path[-1]]
+                del in_file_links[path[-1]]
+                self._warning(breaker.row_number, breaker.row.email,
+                              "Imported without a manager: the manager_email values in the file form a cycle.")
+            for node in path:
+                state[node] = "done"
+
+        for key, manager_key in in_file_links.items():
+            managers[key] = with_profile[manager_key].profile_id
+        return managers
+
+    def _finish(self) -> None:
+        managers = self._resolve_managers()
+        if self._dry_run or not self._imported:
+            return
+
+        profiles = {employee.row.email.lower(): employee for employee in self._imported if employee.profile_id}
+        manager_updates = [{"id": profiles[key].profile_id, "manager_id": manager_id}
+                           for key, manager_id in managers.items() if manager_id is not None]
+        if manager_updates:
+            self.db.exec(update(EmployeeProfile), params=manager_updates)
+        crud_org.add_employee_nodes(self.db, {employee.profile_id: managers[key] for key, employee in profiles.items()})
+        record_new_employees(self.db, [
+            (employee.profile_id, {"employment_status": employee.row.employment_status,
+                                   "department_id": self._departments[employee.row.department.lower()] if employee.row.department else None,
+                                   "manager_id": managers[key], "job_title": employee.row.job_title,
+                                   "hire_date": employee.row.hire_date})
+            for key, employee in profiles.items()
+        ])
+
+        # Same auto-assignment as POST /users/, one set-based insert per employment status
+        ids_by_status: Dict = {}
+        for employee in profiles.values():
+            ids_by_status.setdefault(employee.row.employment_status, []).append(employee.profile_id)
+        for employment_status, employee_ids in ids_by_status.items():
+            template = workflow_trigger_cache.template_for(self.db, employment_status)
+            if template:
+                workflow_ids = crud_workflow.assign_workflow_to_employees(self.db, employee_ids, template[0])
+                self._result.workflows_assigned += len(workflow_ids)
+
+        self.db.commit()
+        employee_search_index.refresh_employees(self.db, [employee.profile_id for employee in profiles.values()])
+        print(f"Employee import: {len(self._imported)} users created, {len(profiles)} profiles, "
+              f"{self._result.workflows_assigned} workflows assigned.")
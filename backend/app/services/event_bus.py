@@ -0,0 +1,108 @@
+# hr_software/app/services/event_bus.py
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Type
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.models.enums import EmploymentStatus
+
+
+# --- Events ---
+@dataclass(frozen=True)
+class EmploymentStatusChanged:
+    """Published by crud_employee after the change is committed; old_status is None for new profiles."""
+    employee_id: int
+    old_status: Optional[EmploymentStatus]
+    new_status: EmploymentStatus
+
+
+@dataclass(frozen=True)
+class WorkflowTemplatesChanged:
+    """Published by crud_workflow after a workflow template was created or updated."""
+    template_id: int
+
+
+@dataclass(frozen=True)
+class PerformanceReviewsChanged:
+    """Published after reviews of an appraisal cycle were created, submitted or changed status."""
+    appraisal_cycle_id: int
+
+
+@dataclass(frozen=True)
+class GoalsChanged:
+    """Published by crud_performance after a goal was created, updated or deleted."""
+    appraisal_cycle_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class TablesChanged:
+    """Published by the session hooks below after a transaction that wrote to these tables committed."""
+    tables: FrozenSet[str]
+
+
+# --- Bus ---
+class DomainEventBus:
+    """
+    In-process publish/subscribe for domain events. Handlers are called synchronously in the
+    publishing thread, so they must be cheap (update a cache, put the event on a queue); slow
+    work belongs in a consumer such as the WorkflowAutoAssigner. A failing handler is logged
+    and does not affect the publisher or the other handlers.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[Type, List[Callable]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type: Type, handler: Callable) -> None:
+        with self._lock:
+            self._handlers.setdefault(event_type, []).append(handler)
+
+    def publish(self, event) -> None:
+        for handler in list(self._handlers.get(type(event), ())):
+            try:
+                handler(event)
+            except Exception as e:
+                print(f"Event bus: handler {getattr(handler, '__qualname__', handler)} failed for {event}: {e}")
+
+
+domain_events = DomainEventBus()
+
+
+# --- Committed writes: collect the tables a transaction writes, publish them once it commits ---
+WRITTEN_TABLES_KEY = "written_tables"  # Session.info entry
+
+
+def _note_written(session, tables) -> None:
+    session.info.setdefault(WRITTEN_TABLES_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session, flush_context) -> None:
+    _note_written(session, {
+        instance.__table__.name for instance in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(instance, "__table__")
+    })
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement_tables(orm_execute_state) -> None:
+    # Bulk INSERT / UPDATE / DELETE statements run through db.exec bypass the unit of work
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and hasattr(table, "name"):
+            _note_written(orm_execute_state.session, {table.name})
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_tables(session) -> None:
+    tables = session.info.pop(WRITTEN_TABLES_KEY, None)
+    if tables:
+        domain_events.publish(TablesChanged(tables=frozenset(tables)))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_tables(session) -> None:
+    session.info.pop(WRITTEN_TABLES_KEY, None)
@@ -0,0 +1,173 @@
+# hr_software/app/services/goal_scores.py
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select, delete, insert, func, case
+
+from app.core.upsert import upsert_adding
+
+from app.models.employee import EmployeeProfile, EmployeeHierarchy, Department
+from app.models.enums import GoalStatus
+from app.models.performance import Goal, GoalScoreRollup
+from app.models.user import User
+
+ROLLUP_FIELDS = ("goals", "goals_completed", "goals_cancelled", "weight_total", "weight_completed")
+
+# (appraisal_cycle_id, status, weightage) of a goal before or after a change
+GoalState = Tuple[Optional[int], GoalStatus, Optional[float]]
+
+
+# --- Scores ---
+@dataclass
+class GoalScore:
+    goals: int = 0
+    goals_completed: int = 0
+    goals_cancelled: int = 0
+    weight_total: float = 0.0
+    weight_completed: float = 0.0
+
+    def add(self, *values) -> None:
+        self.goals += int(values[0] or 0)
+        self.goals_completed += int(values[1] or 0)
+        self.goals_cancelled += int(values[2] or 0)
+        self.weight_total += float(values[3] or 0.0)
+        self.weight_completed += float(values[4] or 0.0)
+
+    @property
+    def score(self) -> Optional[float]:
+        """Completed share of the goals that count, in percent: by weightage, or by number when no goal is weighted."""
+        if self.weight_total > 0:
+            return round(100.0 * self.weight_completed / self.weight_total, 2)
+        counted = self.goals - self.goals_cancelled
+        return round(100.0 * self.goals_completed / counted, 2) if counted else None
+
+    def report(self) -> dict:
+        return {**self.__dict__, "score": self.score}
+
+
+def _contribution(status: GoalStatus, weightage: Optional[float]) -> Tuple[int, int, int, float, float]:
+    cancelled = status == GoalStatus.CANCELLED
+    completed = status == GoalStatus.COMPLETED
+    weight = 0.0 if cancelled else float(weightage or 0.0)
+    return 1, int(completed), int(cancelled), weight, weight if completed else 0.0
+
+
+# --- Recording ---
+def record_goal_change(db: Session, employee_id: int, old: Optional[GoalState], new: Optional[GoalState]) -> None:
+    """
+    Moves one goal's contribution from its old state to its new one (None for a created / deleted goal)
+    with a single upsert that adds the difference to the stored totals in place, so concurrent goal
+    changes of the same employee never overwrite each other. Caller commits.
+    """
+    deltas: Dict[int, List[float]] = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None or state[0] is None:
+            continue
+        delta = deltas.setdefault(state[0], [0, 0, 0, 0.0, 0.0])
+        for index, value in enumerate(_contribution(state[1], state[2])):
+            delta[index] += sign * value
+    rows = [
+        {"employee_id": employee_id, "appraisal_cycle_id": cycle_id, **dict(zip(ROLLUP_FIELDS, delta))}
+        for cycle_id, delta in deltas.items() if any(delta)
+    ]
+    upsert_adding(db, GoalScoreRollup, rows, key_columns=("employee_id", "appraisal_cycle_id"),
+                  added_columns=ROLLUP_FIELDS)
+
+
+def rebuild_goal_score_rollups(db: Session) -> int:
+    """Recomputes every rollup from the goals (backfill, or after data fixes). Caller commits. Returns the rows written."""
+    cancelled = Goal.status == GoalStatus.CANCELLED
+    completed = Goal.status == GoalStatus.COMPLETED
+    weight = case((cancelled, 0.0), else_=func.coalesce(Goal.weightage, 0.0))
+    db.exec(delete(GoalScoreRollup))
+    result = db.exec(insert(GoalScoreRollup).from_select(
+        ["employee_id", "appraisal_cycle_id", *ROLLUP_FIELDS],
+        select(Goal.employee_id, Goal.appraisal_cycle_id, func.count(),
+               func.sum(case((completed, 1), else_=0)), func.sum(case((cancelled, 1), else_=0)),
+               func.sum(weight), func.sum(case((completed, weight), else_=0.0)))
+        .where(Goal.appraisal_cycle_id.is_not(None))
+        .group_by(Goal.employee_id, Goal.appraisal_cycle_id)
+    ))
+    return result.rowcount
+
+
+# --- Scorecards ---
+class GoalScorecardService:
+    """
+    Weighted goal scores read from GoalScoreRollup: an employee's own score, the score of everyone
+    below them (one grouped join with the EmployeeHierarchy closure table) and per-department cycle
+    totals. Every scorecard is a single aggregate over rollup rows, never a scan of the goals.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _sums():
+        return [func.sum(getattr(GoalScoreRollup, name)) for name in ROLLUP_FIELDS]
+
+    @staticmethod
+    def _own_and_below_sums():
+        """Sums over an ancestor's closure rows: its own rollup (depth 0), then everyone below it."""
+        return [
+            func.sum(case((condition, getattr(GoalScoreRollup, name)), else_=0))
+            for condition in (EmployeeHierarchy.depth == 0, EmployeeHierarchy.depth > 0) for name in ROLLUP_FIELDS
+        ]
+
+    def _own_and_below(self, employee_ids: List[int], cycle_id: int) -> Dict[int, Tuple[GoalScore, GoalScore]]:
+        rows = self.db.exec(
+            select(EmployeeHierarchy.ancestor_id, *self._own_and_below_sums())
+            .join(GoalScoreRollup, GoalScoreRollup.employee_id == EmployeeHierarchy.descendant_id)
+            .where(EmployeeHierarchy.ancestor_id.in_(employee_ids), GoalScoreRollup.appraisal_cycle_id == cycle_id)
+            .group_by(EmployeeHierarchy.ancestor_id)
+        ).all()
+        scores = {}
+        for employee_id, *values in rows:
+            own, below = GoalScore(), GoalScore()
+            own.add(*values[:5])
+            below.add(*values[5:])
+            scores[employee_id] = (own, below)
+        return scores
+
+    def employee_scorecard(self, employee_id: int, cycle_id: int) -> dict:
+        own, below = self._own_and_below([employee_id], cycle_id).get(employee_id, (GoalScore(), GoalScore()))
+        return {"employee_id": employee_id, "appraisal_cycle_id": cycle_id, "own": own.report(), "team": below.report()}
+
+    def team_scorecard(self, manager_id: int, cycle_id: int) -> dict:
+        """The manager's whole reporting line, with each direct report's own score and that of their team."""
+        members = self.db.exec(
+            select(EmployeeProfile.id, User.first_name, User.last_name)
+            .join(User, User.id == EmployeeProfile.user_id)
+            .where(EmployeeProfile.manager_id == manager_id)
+            .order_by(User.first_name, User.last_name, EmployeeProfile.id)
+        ).all()
+        scores = self._own_and_below([member_id for member_id, _, _ in members], cycle_id) if members else {}
+
+        team, reports = GoalScore(), []
+        for member_id, first_name, last_name in members:
+            own, below = scores.get(member_id, (GoalScore(), GoalScore()))
+            # Direct reports' subtrees are disjoint and together cover the manager's whole reporting line
+            team.add(*own.__dict__.values())
+            team.add(*below.__dict__.values())
+            reports.append({"employee_id": member_id, "employee_name": f"{first_name} {last_name}",
+                            "own": own.report(), "team": below.report()})
+        return {"manager_id": manager_id, "appraisal_cycle_id": cycle_id, "team": team.report(), "members": reports}
+
+    def cycle_scorecard(self, cycle_id: int) -> dict:
+        overall, departments = GoalScore(), []
+        rows = self.db.exec(
+            select(EmployeeProfile.department_id, Department.name, *self._sums())
+            .join(EmployeeProfile, EmployeeProfile.id == GoalScoreRollup.employee_id)
+            .outerjoin(Department, Department.id == EmployeeProfile.department_id)
+            .where(GoalScoreRollup.appraisal_cycle_id == cycle_id)
+            .group_by(EmployeeProfile.department_id, Department.name)
+        ).all()
+        for department_id, department_name, *values in rows:
+            score = GoalScore()
+            score.add(*values)
+            overall.add(*values)
+            departments.append({"department_id": department_id, "department_name": department_name or "Unassigned",
+                                **score.report()})
+        departments.sort(key=lambda report: (report["department_id"] is None, report["department_name"]))
+        return {"appraisal_cycle_id": cycle_id, "overall": overall.report(), "by_department": departments}
@@ -0,0 +1,196 @@
+# hr_software/app/services/headcount_service.py
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select, func, and_, or_, extract
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.employee import EmployeeProfile, EmployeeHierarchy, Department, EmploymentHistory, HeadcountSnapshot
+from app.models.enums import EmploymentStatus
+from app.models.user import User
+from app.services.event_bus import domain_events, EmploymentStatusChanged, TablesChanged
+from app.services.workforce_history import WorkforceReportService, NO_DEPARTMENT, NO_HIRE_DATE
+
+HEADCOUNT_DIMENSIONS = ("department", "status", "job_title", "manager", "hire_cohort")
+
+
+class HeadcountCache(TTLCache[dict]):
+    """
+    Process-wide map of report parameters -> headcount report, kept for HEADCOUNT_CACHE_TTL_SECONDS so
+    dashboards polling the same breakdown share one query. Dropped on every employment status change
+    and whenever a write to one of the tables it reads is committed in this process.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        super().__init__(settings.HEADCOUNT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds)
+
+
+headcount_cache = HeadcountCache()
+
+# EmploymentHistory: the point-in-time department and hire cohort breakdowns read the snapshots derived from it
+HEADCOUNT_TABLES = frozenset(model.__tablename__ for model in
+                             (EmployeeProfile, EmployeeHierarchy, Department, User, EmploymentHistory))
+
+domain_events.subscribe(EmploymentStatusChanged, lambda event: headcount_cache.invalidate())
+domain_events.subscribe(TablesChanged,
+                        lambda event: headcount_cache.invalidate() if event.tables & HEADCOUNT_TABLES else None)
+
+
+class HeadcountService:
+    """
+    Headcount broken down by department, employment status, job title, manager subtree or hire
+    cohort (year), in one grouped query. On PostgreSQL the total comes from the same statement's
+    GROUP BY ROLLUP row; other databases sum the groups in memory.
+    Without as_of the headcount is today's ACTIVE employees. With as_of (up to today) the department
+    and hire cohort breakdowns come from the daily HeadcountSnapshot, like the trend and attrition
+    reports, so they count each employee in the department they were in that day. The other
+    breakdowns, and any breakdown limited to a manager's reports, have no history of their own:
+    they count everyone hired on or before as_of and not separated by then (same precedence as
+    workforce_history.separation_date), grouped by today's values. The status breakdown is only
+    available for today.
+    """
+
+    def __init__(self, db: Session, cache: HeadcountCache = headcount_cache):
+        self.db = db
+        self.cache = cache
+
+    @staticmethod
+    def _counted(as_of: Optional[date]) -> list:
+        if as_of is None:
+            return [EmployeeProfile.employment_status == EmploymentStatus.ACTIVE]
+        # SQL form of workforce_history.separation_date: last working day, then termination, then resignation
+        separated_on = func.coalesce(EmployeeProfile.last_working_day, EmployeeProfile.termination_date,
+                                     EmployeeProfile.resignation_date)
+        return [EmployeeProfile.hire_date <= as_of, or_(separated_on.is_(None), separated_on > as_of)]
+
+    def report(self, group_by: str = "department", as_of: Optional[date] = None,
+               department_id: Optional[int] = None, manager_id: Optional[int] = None) -> dict:
+        """
+        manager_id limits the report to the people reporting to that manager; for the manager
+        breakdown it is the root whose direct reports' subtrees are counted (top of the org if None).
+        """
+        if group_by not in HEADCOUNT_DIMENSIONS:
+            raise ValueError(f"Unknown headcount breakdown '{group_by}'.")
+        if group_by == "status" and as_of is not None:
+            raise ValueError("Employment status is only known for today; omit as_of for the status breakdown.")
+        key = (group_by, as_of, department_id, manager_id)
+        report = self.cache.get(key)
+        if report is None:
+            report = self._compute(group_by, as_of, department_id, manager_id)
+            self.cache.put(key, report)
+        return report
+
+    def _compute(self, group_by: str, as_of: Optional[date], department_id: Optional[int],
+                 manager_id: Optional[int]) -> dict:
+        if (as_of is not None and as_of <= date.today() and manager_id is None
+                and group_by in ("department", "hire_cohort")):
+            return self._compute_from_snapshots(group_by, as_of, department_id)
+        counted = self._counted(as_of)
+        if department_id is not None:
+            counted.append(EmployeeProfile.department_id == department_id)
+        if manager_id is not None and group_by != "manager":
+            counted.append(EmployeeProfile.id.in_(
+                select(EmployeeHierarchy.descendant_id)
+                .where(EmployeeHierarchy.ancestor_id == manager_id, EmployeeHierarchy.depth > 0)
+            ))
+
+        rollup = self.db.get_bind().dialect.name == "postgresql"
+
+        def grouped(group_key, label=None):
+            columns = [group_key, func.count(EmployeeProfile.id)]
+            if rollup:
+                columns.append(func.grouping(group_key))
+            return select(*columns, *([label] if label is not None else [])), label
+
+        if group_by == "department":
+            # Full join so departments without anyone counted are still listed, with 0
+            group_key = Department.id
+            statement, label = grouped(group_key, func.max(Department.name))
+            statement = statement.select_from(Department).join(EmployeeProfile, and_(
+                EmployeeProfile.department_id == Department.id, *counted), full=True)
+            if department_id is not None:
+                statement = statement.where(Department.id == department_id)
+            else:  # Keeps the counted employees without a department, drops the unmatched uncounted ones
+                statement = statement.where(or_(Department.id.is_not(None), and_(*counted)))
+        elif group_by == "manager":
+            # Each direct report of the root stands for their whole subtree, themselves included
+            head, head_user = aliased(EmployeeProfile), aliased(User)
+            group_key = EmployeeHierarchy.ancestor_id
+            statement, label = grouped(group_key, func.max(head_user.first_name + " " + head_user.last_name))
+            statement = (
+                statement.select_from(EmployeeProfile)
+                .join(EmployeeHierarchy, EmployeeHierarchy.descendant_id == EmployeeProfile.id)
+                .join(head, head.id == EmployeeHierarchy.ancestor_id)
+                .join(head_user, head_user.id == head.user_id)
+                .where(head.manager_id == manager_id if manager_id is not None else head.manager_id.is_(None),
+                       *counted)
+            )
+        else:
+            group_key = {"status": EmployeeProfile.employment_status, "job_title": EmployeeProfile.job_title,
+                         "hire_cohort": extract("year", EmployeeProfile.hire_date)}[group_by]
+            statement, label = grouped(group_key)
+            statement = statement.select_from(EmployeeProfile).where(*counted)
+        statement = statement.group_by(func.rollup(group_key) if rollup else group_key)
+
+        total, groups = 0, []
+        for row in self.db.exec(statement).all():
+            key, headcount = row[0], int(row[1])
+            is_total = rollup and bool(row[2])
+            name = row[-1] if label is not None else None
+            if is_total:
+                total = headcount
+                continue
+            if not rollup:
+                total += headcount
+            groups.append({"key": self._key(group_by, key), "label": self._label(group_by, key, name),
+                           "headcount": headcount})
+        groups.sort(key=lambda group: (group["key"] is None, -group["headcount"], group["label"]))
+        return {"group_by": group_by, "as_of": as_of or date.today(), "total": total, "groups": groups}
+
+    def _compute_from_snapshots(self, group_by: str, as_of: date, department_id: Optional[int]) -> dict:
+        """The department or hire cohort breakdown at the end of as_of, read from that day's snapshot rows."""
+        WorkforceReportService(self.db).refresh(as_of)
+        group_key = HeadcountSnapshot.department_id if group_by == "department" else HeadcountSnapshot.hire_year
+        statement = (
+            select(group_key, func.sum(HeadcountSnapshot.headcount))
+            .where(HeadcountSnapshot.snapshot_date == as_of)
+            .group_by(group_key)
+        )
+        if department_id is not None:
+            statement = statement.where(HeadcountSnapshot.department_id == department_id)
+        unknown = NO_DEPARTMENT if group_by == "department" else NO_HIRE_DATE
+        counts = {None if key == unknown else key: int(headcount)
+                  for key, headcount in self.db.exec(statement).all() if headcount}
+        names = {}
+        if group_by == "department":
+            # Departments without anyone counted are still listed, with 0
+            departments = select(Department.id, Department.name)
+            if department_id is not None:
+                departments = departments.where(Department.id == department_id)
+            names = dict(self.db.exec(departments).all())
+            counts = {**dict.fromkeys(names, 0), **counts}
+        groups = [{"key": self._key(group_by, key), "label": self._label(group_by, key, names.get(key)),
+                   "headcount": headcount} for key, headcount in counts.items()]
+        groups.sort(key=lambda group: (group["key"] is None, -group["headcount"], group["label"]))
+        return {"group_by": group_by, "as_of": as_of, "total": sum(counts.values()), "groups": groups}
+
+    @staticmethod
+    def _key(group_by: str, key):
+        if key is None:
+            return None
+        if group_by == "status":
+            return key.value
+        return int(key) if group_by == "hire_cohort" else key
+
+    @staticmethod
+    def _label(group_by: str, key, name: Optional[str]) -> str:
+        if group_by in ("department", "manager"):
+            return name or ("Unassigned" if key is None else "N/A")
+        if key is None:
+            return {"job_title": "Unspecified", "hire_cohort": "Unknown hire date"}.get(group_by, "Unknown")
+        if group_by == "status":
+            return key.value.replace("_", " ").title()
+        return str(int(key)) if group_by == "hire_cohort" else key
@@ -0,0 +1,120 @@
+# hr_software/app/services/leave_analytics.py
+
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlmodel import Session, select, delete, insert, and_, or_
+
+from app.models.employee import EmployeeProfile
+from app.models.enums import LeaveRequestStatus
+from app.models.leave import LeaveRequest, Holiday
+from app.models.reporting import LeaveMonthFact
+
+HOLIDAY_COUNTRY = "IN"  # The calendar LeaveCalculationService counts leave days against
+NO_DEPARTMENT = 0
+REBUILD_BATCH_SIZE = 5000
+
+
+def _month(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def holidays_between(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> Set[date]:
+    statement = select(Holiday.date).where(Holiday.country_code == HOLIDAY_COUNTRY)
+    if start is not None:
+        statement = statement.where(Holiday.date >= start)
+    if end is not None:
+        statement = statement.where(Holiday.date <= end)
+    return set(db.exec(statement).all())
+
+
+def month_portions(start: date, end: date, days: float, holidays: Set[date]) -> Dict[date, float]:
+    """
+    Splits the days of a leave from start to end over the months it touches, in proportion to each
+    month's working days (not a weekend, not a holiday), so the portions add up to the days the request
+    was approved for, half days included. A leave without any working day is spread over its calendar days.
+    """
+    working: Dict[date, int] = defaultdict(int)
+    calendar: Dict[date, int] = defaultdict(int)
+    day = start
+    while day <= end:
+        calendar[_month(day)] += 1
+        if day.weekday() < 5 and day not in holidays:
+            working[_month(day)] += 1
+        day += timedelta(days=1)
+    weights = working if working else calendar
+    total = sum(weights.values())
+    if not total:
+        return {}
+    return {month: days * count / total for month, count in weights.items()}
+
+
+def _fact_rows(leave_request: LeaveRequest, department_id: Optional[int], holidays: Set[date]) -> List[dict]:
+    return [
+        {"leave_request_id": leave_request.id, "month": month, "employee_id": leave_request.employee_id,
+         "department_id": department_id or NO_DEPARTMENT, "leave_type_id": leave_request.leave_type_id,
+         "days": portion}
+        for month, portion in month_portions(leave_request.start_date, leave_request.end_date,
+                                             leave_request.number_of_days, holidays).items()
+    ]
+
+
+# --- Maintenance ---
+def record_leave_request(db: Session, leave_request: LeaveRequest) -> int:
+    """
+    Replaces the month facts of one leave request after its status changed: split again if it is
+    approved, removed otherwise. The request must have an id (flushed). Caller commits. Returns rows written.
+    """
+    db.exec(delete(LeaveMonthFact).where(LeaveMonthFact.leave_request_id == leave_request.id))
+    if leave_request.status != LeaveRequestStatus.APPROVED:
+        return 0
+    profile = db.get(EmployeeProfile, leave_request.employee_id)
+    rows = _fact_rows(leave_request, profile.department_id if profile else None,
+                      holidays_between(db, leave_request.start_date, leave_request.end_date))
+    if rows:
+        db.exec(insert(LeaveMonthFact), params=rows)
+    return len(rows)
+
+
+def rebuild_leave_facts(db: Session, days: Optional[Iterable[date]] = None) -> int:
+    """
+    Re-splits every approved leave request, or only those covering one of the given days (the dates
+    of holidays that were added, moved or removed). A request keeps the department its facts were
+    recorded with (the employee's department when the leave was approved, see record_leave_request);
+    only requests without facts yet take the employee's current one. Caller commits. Returns rows written.
+    """
+    approved = LeaveRequest.status == LeaveRequestStatus.APPROVED
+    statement = (
+        select(LeaveRequest, EmployeeProfile.department_id)
+        .outerjoin(EmployeeProfile, EmployeeProfile.id == LeaveRequest.employee_id)
+        .where(approved)
+        .order_by(LeaveRequest.id)
+    )
+    if days is None:
+        # Facts of requests no longer approved; the others are replaced below
+        db.exec(delete(LeaveMonthFact).where(
+            LeaveMonthFact.leave_request_id.not_in(select(LeaveRequest.id).where(approved))))
+    else:
+        days = set(days)
+        if not days:
+            return 0
+        statement = statement.where(or_(*[
+            and_(LeaveRequest.start_date <= day, LeaveRequest.end_date >= day) for day in days
+        ]))
+    holidays = holidays_between(db)
+
+    written = 0
+    for partition in db.exec(statement.execution_options(yield_per=REBUILD_BATCH_SIZE)).partitions():
+        request_ids = [leave_request.id for leave_request, _ in partition]
+        recorded = dict(db.exec(
+            select(LeaveMonthFact.leave_request_id, LeaveMonthFact.department_id).distinct()
+            .where(LeaveMonthFact.leave_request_id.in_(request_ids))
+        ).all())
+        db.exec(delete(LeaveMonthFact).where(LeaveMonthFact.leave_request_id.in_(request_ids)))
+        rows = [row for leave_request, department_id in partition
+                for row in _fact_rows(leave_request, recorded.get(leave_request.id, department_id), holidays)]
+        if rows:
+            db.exec(insert(LeaveMonthFact), params=rows)
+        written += len(rows)
+    return written
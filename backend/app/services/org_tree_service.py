@@ -0,0 +1,19 @@
+# hr_software/app/services/org_tree_service.py
+
+from typing import Optional
+
+from sqlmodel import Session
+
+from app.crud import crud_org
+from app.models.employee import EmployeeProfile
+
+
+def is_in_reporting_line(db: Session, manager_profile: Optional[EmployeeProfile], employee_id: int) -> bool:
+    """
+    True if employee_id reports to manager_profile directly or indirectly (used for authorization).
+    Always asks the database: one primary-key EXISTS on the EmployeeHierarchy closure table, which is
+    updated in the same transaction as the manager change, so every worker sees a move at once.
+    """
+    if not manager_profile or isinstance(manager_profile, list) or not manager_profile.id:
+        return False
+    return crud_org.is_ancestor(db, manager_profile.id, employee_id)
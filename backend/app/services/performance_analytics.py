@@ -0,0 +1,264 @@
+# hr_software/app/services/performance_analytics.py
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, select, func, case, and_
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.employee import EmployeeProfile, Department
+from app.models.enums import AppraisalCycleStatus, GoalStatus
+from app.models.performance import AppraisalCycle, Goal, PerformanceReview
+from app.models.user import User
+from app.services.event_bus import domain_events, PerformanceReviewsChanged, GoalsChanged, TablesChanged
+
+CLOSED_CYCLE_STATUSES = (AppraisalCycleStatus.CLOSED, AppraisalCycleStatus.ARCHIVED)
+RATINGS, GOALS = "ratings", "goals"
+# Read by both sections of every cycle (groups and names); reviews and goals invalidate per cycle
+SHARED_TABLES = frozenset(model.__tablename__ for model in (EmployeeProfile, Department, User))
+GROUP_BY_DEPARTMENT, GROUP_BY_MANAGER = "department", "manager"
+
+
+# --- Aggregates ---
+@dataclass
+class RatingStats:
+    reviews: int = 0
+    by_status: Dict[str, int] = field(default_factory=dict)
+    histogram: Dict[float, int] = field(default_factory=dict)  # Manager rating rounded to the nearest half point
+    manager_rated: int = 0
+    manager_rating_total: float = 0.0
+    self_rated: int = 0
+    self_rating_total: float = 0.0
+    compared: int = 0  # Reviews with both ratings
+    delta_total: float = 0.0  # Sum of manager - self rating
+    abs_delta_total: float = 0.0
+
+    def add(self, other: "RatingStats") -> None:
+        self.reviews += other.reviews
+        for status, count in other.by_status.items():
+            self.by_status[status] = self.by_status.get(status, 0) + count
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+        self.manager_rated += other.manager_rated
+        self.manager_rating_total += other.manager_rating_total
+        self.self_rated += other.self_rated
+        self.self_rating_total += other.self_rating_total
+        self.compared += other.compared
+        self.delta_total += other.delta_total
+        self.abs_delta_total += other.abs_delta_total
+
+    def report(self) -> dict:
+        def mean(total: float, count: int) -> Optional[float]:
+            return round(total / count, 2) if count else None
+        return {
+            "reviews": self.reviews,
+            "by_status": dict(sorted(self.by_status.items())),
+            "rating_histogram": [{"rating": bucket, "count": self.histogram[bucket]} for bucket in sorted(self.histogram)],
+            "manager_rated": self.manager_rated,
+            "mean_manager_rating": mean(self.manager_rating_total, self.manager_rated),
+            "self_rated": self.self_rated,
+            "mean_self_rating": mean(self.self_rating_total, self.self_rated),
+            "compared": self.compared,
+            "mean_rating_delta": mean(self.delta_total, self.compared),
+            "mean_abs_rating_delta": mean(self.abs_delta_total, self.compared),
+        }
+
+
+@dataclass
+class GoalStats:
+    goals: int = 0
+    by_status: Dict[str, int] = field(default_factory=dict)
+    weight_total: float = 0.0  # Weightage of the goals that were not cancelled
+    weight_completed: float = 0.0
+
+    def add(self, other: "GoalStats") -> None:
+        self.goals += other.goals
+        for status, count in other.by_status.items():
+            self.by_status[status] = self.by_status.get(status, 0) + count
+        self.weight_total += other.weight_total
+        self.weight_completed += other.weight_completed
+
+    def report(self) -> dict:
+        counted = self.goals - self.by_status.get(GoalStatus.CANCELLED.value, 0)
+        completed = self.by_status.get(GoalStatus.COMPLETED.value, 0)
+        return {
+            "goals": self.goals,
+            "by_status": dict(sorted(self.by_status.items())),
+            "completion_rate": round(completed / counted, 4) if counted else None,
+            "weighted_completion_rate": round(self.weight_completed / self.weight_total, 4) if self.weight_total else None,
+        }
+
+
+@dataclass
+class CycleAggregates:
+    """One section (ratings or goals) of a cycle, summed per department and per manager."""
+    computed_at: datetime
+    overall: object
+    by_department: Dict[Optional[int], object]
+    by_manager: Dict[Optional[int], object]
+    department_names: Dict[int, str]
+    manager_names: Dict[int, str]
+
+
+# --- Cache ---
+class PerformanceAnalyticsCache(TTLCache[CycleAggregates]):
+    """
+    Process-wide (cycle id, section) -> CycleAggregates. Review changes drop only the ratings section,
+    goal changes only the goals one, so an active cycle recomputes just the part that moved; a write
+    this process commits to an employee, department or user (a department or manager move) drops
+    every entry. Writes made by other API workers and scripts never reach this process, so every
+    entry also expires: after PERFORMANCE_ANALYTICS_ACTIVE_CYCLE_TTL_SECONDS in a running cycle,
+    PERFORMANCE_ANALYTICS_CLOSED_CYCLE_TTL_SECONDS in a closed or archived one.
+    """
+
+    def __init__(self):
+        super().__init__(settings.PERFORMANCE_ANALYTICS_ACTIVE_CYCLE_TTL_SECONDS)  # Keys are (cycle id, section)
+
+    def invalidate_section(self, cycle_id: int, section: str) -> None:
+        self.invalidate(lambda key: key == (cycle_id, section))
+
+
+performance_analytics_cache = PerformanceAnalyticsCache()
+
+
+def _on_goals_changed(event: GoalsChanged) -> None:
+    if event.appraisal_cycle_id is not None:  # Goals outside any cycle are in no report
+        performance_analytics_cache.invalidate_section(event.appraisal_cycle_id, GOALS)
+
+
+domain_events.subscribe(PerformanceReviewsChanged,
+                        lambda event: performance_analytics_cache.invalidate_section(event.appraisal_cycle_id, RATINGS))
+domain_events.subscribe(GoalsChanged, _on_goals_changed)
+domain_events.subscribe(TablesChanged,
+                        lambda event: performance_analytics_cache.invalidate() if event.tables & SHARED_TABLES else None)
+
+
+# --- Service ---
+class PerformanceAnalyticsService:
+    """
+    Calibration aggregates of an appraisal cycle: manager rating histograms, self vs manager rating
+    deltas and goal completion rates, overall, per department and per manager. Each section is one
+    grouped SELECT over the cycle's reviews (or goals) whose result has at most
+    departments x managers x statuses x 9 rating buckets rows; per-department and per-manager figures
+    are summed from it in memory.
+    """
+
+    def __init__(self, db: Session, cache: PerformanceAnalyticsCache = performance_analytics_cache):
+        self.db = db
+        self.cache = cache
+
+    def _aggregates(self, cycle: AppraisalCycle, section: str) -> CycleAggregates:
+        ttl = (settings.PERFORMANCE_ANALYTICS_CLOSED_CYCLE_TTL_SECONDS if cycle.status in CLOSED_CYCLE_STATUSES
+               else settings.PERFORMANCE_ANALYTICS_ACTIVE_CYCLE_TTL_SECONDS)
+        compute = self._compute_ratings if section == RATINGS else self._compute_goals
+        return self.cache.get_or_load((cycle.id, section), lambda: compute(cycle.id), ttl)
+
+    # --- Computation ---
+    def _compute_ratings(self, cycle_id: int) -> CycleAggregates:
+        manager_rating = PerformanceReview.manager_rating
+        self_rating = PerformanceReview.self_evaluation_rating
+        both = and_(manager_rating.is_not(None), self_rating.is_not(None))
+        # Bucketed in a subquery so the rounding expression is grouped by its name
+        reviews = (
+            select(EmployeeProfile.department_id, PerformanceReview.manager_id, PerformanceReview.review_status,
+                   (func.round(manager_rating * 2) / 2).label("bucket"),
+                   manager_rating.label("manager_rating"), self_rating.label("self_rating"),
+                   case((both, 1), else_=0).label("compared"),
+                   case((both, manager_rating - self_rating), else_=0.0).label("delta"))
+            .join(EmployeeProfile, EmployeeProfile.id == PerformanceReview.employee_id)
+            .where(PerformanceReview.appraisal_cycle_id == cycle_id)
+            .subquery()
+        )
+        rows = self.db.exec(
+            select(reviews.c.department_id, reviews.c.manager_id, reviews.c.review_status, reviews.c.bucket,
+                   func.count(), func.count(reviews.c.manager_rating), func.sum(reviews.c.manager_rating),
+                   func.count(reviews.c.self_rating), func.sum(reviews.c.self_rating),
+                   func.sum(reviews.c.compared), func.sum(reviews.c.delta), func.sum(func.abs(reviews.c.delta)))
+            .group_by(reviews.c.department_id, reviews.c.manager_id, reviews.c.review_status, reviews.c.bucket)
+        ).all()
+
+        groups = []
+        for (department_id, manager_id, review_status, bucket, count, manager_rated, manager_total,
+             self_rated, self_total, compared, delta_total, abs_delta_total) in rows:
+            groups.append((department_id, manager_id, RatingStats(
+                reviews=count, by_status={review_status.value: count},
+                histogram={float(bucket): count} if bucket is not None else {},
+                manager_rated=manager_rated, manager_rating_total=float(manager_total or 0.0),
+                self_rated=self_rated, self_rating_total=float(self_total or 0.0), compared=int(compared or 0),
+                delta_total=float(delta_total or 0.0), abs_delta_total=float(abs_delta_total or 0.0),
+            )))
+        return self._group(groups, RatingStats)
+
+    def _compute_goals(self, cycle_id: int) -> CycleAggregates:
+        counted_weight = case((Goal.status != GoalStatus.CANCELLED, func.coalesce(Goal.weightage, 0.0)), else_=0.0)
+        rows = self.db.exec(
+            select(EmployeeProfile.department_id, EmployeeProfile.manager_id, Goal.status, func.count(),
+                   func.sum(counted_weight))
+            .join(EmployeeProfile, EmployeeProfile.id == Goal.employee_id)
+            .where(Goal.appraisal_cycle_id == cycle_id)
+            .group_by(EmployeeProfile.department_id, EmployeeProfile.manager_id, Goal.status)
+        ).all()
+
+        groups = []
+        for department_id, manager_id, status, count, weight in rows:
+            weight = float(weight or 0.0)
+            groups.append((department_id, manager_id, GoalStats(
+                goals=count, by_status={status.value: count}, weight_total=weight,
+                weight_completed=weight if status == GoalStatus.COMPLETED else 0.0,
+            )))
+        return self._group(groups, GoalStats)
+
+    def _group(self, groups, stats_type) -> CycleAggregates:
+        overall, by_department, by_manager = stats_type(), {}, {}
+        for department_id, manager_id, stats in groups:
+            overall.add(stats)
+            by_department.setdefault(department_id, stats_type()).add(stats)
+            by_manager.setdefault(manager_id, stats_type()).add(stats)
+
+        department_ids = [key for key in by_department if key is not None]
+        manager_ids = [key for key in by_manager if key is not None]
+        department_names = dict(self.db.exec(
+            select(Department.id, Department.name).where(Department.id.in_(department_ids))
+        ).all()) if department_ids else {}
+        manager_names = {
+            manager_id: f"{first_name} {last_name}"
+            for manager_id, first_name, last_name in self.db.exec(
+                select(EmployeeProfile.id, User.first_name, User.last_name)
+                .join(User, User.id == EmployeeProfile.user_id)
+                .where(EmployeeProfile.id.in_(manager_ids))
+            ).all()
+        } if manager_ids else {}
+        return CycleAggregates(computed_at=datetime.utcnow(), overall=overall, by_department=by_department,
+                               by_manager=by_manager, department_names=department_names, manager_names=manager_names)
+
+    # --- Reports ---
+    @staticmethod
+    def _group_reports(aggregates: CycleAggregates, group_by: str) -> List[dict]:
+        if group_by == GROUP_BY_MANAGER:
+            groups, names, unassigned = aggregates.by_manager, aggregates.manager_names, "No manager"
+        else:
+            groups, names, unassigned = aggregates.by_department, aggregates.department_names, "Unassigned"
+        reports = [
+            {"group_id": group_id, "group_name": names.get(group_id, "N/A") if group_id is not None else unassigned,
+             **stats.report()}
+            for group_id, stats in groups.items()
+        ]
+        return sorted(reports, key=lambda report: (report["group_id"] is None, report["group_name"]))
+
+    def cycle_report(self, cycle: AppraisalCycle) -> dict:
+        ratings, goals = self._aggregates(cycle, RATINGS), self._aggregates(cycle, GOALS)
+        return {
+            "appraisal_cycle_id": cycle.id, "appraisal_cycle_name": cycle.name, "status": cycle.status,
+            "computed_at": min(ratings.computed_at, goals.computed_at),
+            "ratings": ratings.overall.report(), "goals": goals.overall.report(),
+            "ratings_by_department": self._group_reports(ratings, GROUP_BY_DEPARTMENT),
+            "goals_by_department": self._group_reports(goals, GROUP_BY_DEPARTMENT),
+        }
+
+    def rating_groups(self, cycle: AppraisalCycle, group_by: str) -> List[dict]:
+        return self._group_reports(self._aggregates(cycle, RATINGS), group_by)
+
+    def goal_groups(self, cycle: AppraisalCycle, group_by: str) -> List[dict]:
+        return self._group_reports(self._aggregates(cycle, GOALS), group_by)
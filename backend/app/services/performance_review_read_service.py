@@ -0,0 +1,90 @@
+# hr_software/app/services/performance_review_read_service.py
+
+from typing import List, Optional
+
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.models.employee import EmployeeProfile
+from app.models.enums import ReviewStatus
+from app.models.performance import AppraisalCycle, PerformanceReview
+from app.models.user import User
+from app.schemas.performance import PerformanceReviewRead
+
+
+class PerformanceReviewReadService:
+    """
+    Read-only query path for review responses. Every listing is one projection SELECT that joins the
+    cycle and both EmployeeProfile -> User chains (employee and manager, through aliases), and the
+    PerformanceReviewRead models are built straight from the rows, so no relationship is ever
+    lazy-loaded. Cycle-wide listings use keyset pagination on employee_id, which walks the
+    (appraisal_cycle_id, employee_id) unique index one page at a time.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _projection():
+        employee, employee_user = aliased(EmployeeProfile), aliased(User)
+        manager, manager_user = aliased(EmployeeProfile), aliased(User)
+        return (
+            select(PerformanceReview, AppraisalCycle.name, employee_user.first_name, employee_user.last_name,
+                   manager_user.first_name, manager_user.last_name)
+            .outerjoin(AppraisalCycle, AppraisalCycle.id == PerformanceReview.appraisal_cycle_id)
+            .outerjoin(employee, employee.id == PerformanceReview.employee_id)
+            .outerjoin(employee_user, employee_user.id == employee.user_id)
+            .outerjoin(manager, manager.id == PerformanceReview.manager_id)
+            .outerjoin(manager_user, manager_user.id == manager.user_id)
+        ), employee
+
+    @staticmethod
+    def build_review_read(row) -> PerformanceReviewRead:
+        review, cycle_name, employee_first, employee_last, manager_first, manager_last = row
+        return PerformanceReviewRead(
+            **review.model_dump(),
+            employee_name=f"{employee_first} {employee_last}" if employee_first is not None else "N/A",
+            manager_name=f"{manager_first} {manager_last}" if manager_first is not None else "N/A",
+            appraisal_cycle_name=cycle_name if cycle_name is not None else "N/A",
+        )
+
+    def _one(self, statement) -> Optional[PerformanceReviewRead]:
+        row = self.db.exec(statement.execution_options(populate_existing=True)).first()
+        return self.build_review_read(row) if row else None
+
+    # --- Single reviews ---
+    def get_review(self, review_id: int) -> Optional[PerformanceReviewRead]:
+        statement, _ = self._projection()
+        return self._one(statement.where(PerformanceReview.id == review_id))
+
+    def get_review_for_employee_cycle(self, employee_id: int, cycle_id: int) -> Optional[PerformanceReviewRead]:
+        statement, _ = self._projection()
+        return self._one(statement.where(PerformanceReview.employee_id == employee_id,
+                                         PerformanceReview.appraisal_cycle_id == cycle_id))
+
+    # --- Listings ---
+    def list_manager_reviews(self, manager_id: int, cycle_id: int, after_employee_id: Optional[int] = None,
+                             limit: int = 100) -> List[PerformanceReviewRead]:
+        """One page in employee_id order; after_employee_id is the employee_id of the previous page's last item."""
+        statement, _ = self._projection()
+        statement = statement.where(PerformanceReview.manager_id == manager_id,
+                                    PerformanceReview.appraisal_cycle_id == cycle_id)
+        if after_employee_id is not None:
+            statement = statement.where(PerformanceReview.employee_id > after_employee_id)
+        statement = statement.order_by(PerformanceReview.employee_id).limit(limit)
+        return [self.build_review_read(row) for row in self.db.exec(statement).all()]
+
+    def list_cycle_reviews(self, cycle_id: int, review_status: Optional[ReviewStatus] = None,
+                           department_id: Optional[int] = None, after_employee_id: Optional[int] = None,
+                           limit: int = 100) -> List[PerformanceReviewRead]:
+        """One page in employee_id order; after_employee_id is the employee_id of the previous page's last item."""
+        statement, employee = self._projection()
+        statement = statement.where(PerformanceReview.appraisal_cycle_id == cycle_id)
+        if review_status:
+            statement = statement.where(PerformanceReview.review_status == review_status)
+        if department_id is not None:
+            statement = statement.where(employee.department_id == department_id)
+        if after_employee_id is not None:
+            statement = statement.where(PerformanceReview.employee_id > after_employee_id)
+        statement = statement.order_by(PerformanceReview.employee_id).limit(limit)
+        return [self.build_review_read(row) for row in self.db.exec(statement).all()]
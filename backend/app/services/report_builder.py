@@ -0,0 +1,386 @@
+# hr_software/app/services/report_builder.py
+
+import csv
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import select, bindparam, cast, extract, func, Integer
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.employee import EmployeeProfile, Department
+from app.models.enums import EmploymentStatus, LeaveRequestStatus, LeaveTypeName, PayrollRunStatus, GoalStatus
+from app.models.leave import LeaveRequest, LeaveType
+from app.models.payroll import Payslip, PayrollRun
+from app.models.performance import Goal, AppraisalCycle
+from app.models.user import User
+from app.schemas.report import ReportSpec, ReportEntityInfo, ReportFieldInfo
+
+REPORT_FORMATS = ("jsonl", "csv")
+REPORT_STREAM_ERROR = "Report failed before all rows were sent; the output is incomplete."
+ORDERED_OPERATORS = ("lt", "lte", "gt", "gte", "between")
+TYPE_NAMES = {str: "string", int: "integer", float: "number", date: "date", datetime: "datetime", bool: "boolean"}
+
+
+# --- Catalog ---
+@dataclass(frozen=True)
+class ReportField:
+    column: Any  # Column expression; must not carry bound values, since it may be rendered in GROUP BY
+    python_type: type
+    joins: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class ReportMeasure:
+    expression: Any
+    joins: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class ReportEntity:
+    base: Any
+    joins: Dict[str, tuple]  # name -> (target, on clause), in the order they must be joined; all outer joins
+    fields: Dict[str, ReportField]
+    measures: Dict[str, ReportMeasure]
+
+
+def _date_part(part: str, column):
+    return cast(extract(part, column), Integer)  # PostgreSQL's EXTRACT returns numeric
+
+
+def _employee_fields(employee_id, joins: Tuple[str, ...] = ()) -> Dict[str, ReportField]:
+    """The employee, name and department columns every entity reaches through its employee join."""
+    return {
+        "employee_id": ReportField(employee_id, int),
+        "employee_first_name": ReportField(User.first_name, str, joins + ("user",)),
+        "employee_last_name": ReportField(User.last_name, str, joins + ("user",)),
+        "employee_email": ReportField(User.email, str, joins + ("user",)),
+        "department_id": ReportField(EmployeeProfile.department_id, int, joins),
+        "department": ReportField(Department.name, str, joins + ("department",)),
+        "job_title": ReportField(EmployeeProfile.job_title, str, joins),
+        "employment_status": ReportField(EmployeeProfile.employment_status, EmploymentStatus, joins),
+    }
+
+
+def _employee_joins(employee_onclause=None) -> Dict[str, tuple]:
+    joins = {"employee": (EmployeeProfile, employee_onclause)} if employee_onclause is not None else {}
+    joins["user"] = (User, User.id == EmployeeProfile.user_id)
+    joins["department"] = (Department, Department.id == EmployeeProfile.department_id)
+    return joins
+
+
+ENTITIES: Dict[str, ReportEntity] = {
+    "employees": ReportEntity(
+        base=EmployeeProfile,
+        joins=_employee_joins(),
+        fields={
+            **_employee_fields(EmployeeProfile.id),
+            "manager_id": ReportField(EmployeeProfile.manager_id, int),
+            "hire_date": ReportField(EmployeeProfile.hire_date, date),
+            "hire_year": ReportField(_date_part("year", EmployeeProfile.hire_date), int),
+            "resignation_date": ReportField(EmployeeProfile.resignation_date, date),
+            "termination_date": ReportField(EmployeeProfile.termination_date, date),
+        },
+        measures={"count": ReportMeasure(func.count(EmployeeProfile.id))},
+    ),
+    "leave": ReportEntity(
+        base=LeaveRequest,
+        joins={**_employee_joins(EmployeeProfile.id == LeaveRequest.employee_id),
+               "leave_type": (LeaveType, LeaveType.id == LeaveRequest.leave_type_id)},
+        fields={
+            **_employee_fields(LeaveRequest.employee_id, ("employee",)),
+            "leave_type": ReportField(LeaveType.name, LeaveTypeName, ("leave_type",)),
+            "status": ReportField(LeaveRequest.status, LeaveRequestStatus),
+            "start_date": ReportField(LeaveRequest.start_date, date),
+            "end_date": ReportField(LeaveRequest.end_date, date),
+            "start_year": ReportField(_date_part("year", LeaveRequest.start_date), int),
+            "start_month": ReportField(_date_part("month", LeaveRequest.start_date), int),
+            "number_of_days": ReportField(LeaveRequest.number_of_days, float),
+            "applied_on": ReportField(LeaveRequest.applied_on, datetime),
+        },
+        measures={
+            "count": ReportMeasure(func.count(LeaveRequest.id)),
+            "total_days": ReportMeasure(func.sum(LeaveRequest.number_of_days)),
+            "average_days": ReportMeasure(func.avg(LeaveRequest.number_of_days)),
+        },
+    ),
+    "payslips": ReportEntity(
+        base=Payslip,
+        joins={**_employee_joins(EmployeeProfile.id == Payslip.employee_id),
+               "payroll_run": (PayrollRun, PayrollRun.id == Payslip.payroll_run_id)},
+        fields={
+            **_employee_fields(Payslip.employee_id, ("employee",)),
+            "payroll_run_id": ReportField(Payslip.payroll_run_id, int),
+            "year": ReportField(PayrollRun.year, int, ("payroll_run",)),
+            "month": ReportField(PayrollRun.month, int, ("payroll_run",)),
+            "run_status": ReportField(PayrollRun.status, PayrollRunStatus, ("payroll_run",)),
+            "gross_earnings": ReportField(Payslip.gross_earnings, float),
+            "net_salary": ReportField(Payslip.net_salary, float),
+            "generated_at": ReportField(Payslip.generated_at, datetime),
+        },
+        measures={
+            "count": ReportMeasure(func.count(Payslip.id)),
+            "total_gross": ReportMeasure(func.sum(Payslip.gross_earnings)),
+            "total_deductions": ReportMeasure(func.sum(Payslip.total_deductions)),
+            "total_net": ReportMeasure(func.sum(Payslip.net_salary)),
+            "average_net": ReportMeasure(func.avg(Payslip.net_salary)),
+            "total_loss_of_pay": ReportMeasure(func.sum(Payslip.loss_of_pay_deduction)),
+        },
+    ),
+    "goals": ReportEntity(
+        base=Goal,
+        joins={**_employee_joins(EmployeeProfile.id == Goal.employee_id),
+               "appraisal_cycle": (AppraisalCycle, AppraisalCycle.id == Goal.appraisal_cycle_id)},
+        fields={
+            **_employee_fields(Goal.employee_id, ("employee",)),
+            "appraisal_cycle_id": ReportField(Goal.appraisal_cycle_id, int),
+            "appraisal_cycle": ReportField(AppraisalCycle.name, str, ("appraisal_cycle",)),
+            "status": ReportField(Goal.status, GoalStatus),
+            "due_date": ReportField(Goal.due_date, date),
+            "weightage": ReportField(Goal.weightage, float),
+        },
+        measures={
+            "count": ReportMeasure(func.count(Goal.id)),
+            "total_weightage": ReportMeasure(func.sum(Goal.weightage)),
+            "average_weightage": ReportMeasure(func.avg(Goal.weightage)),
+        },
+    ),
+}
+
+
+def report_catalog() -> List[ReportEntityInfo]:
+    def describe(name: str, field: ReportField) -> ReportFieldInfo:
+        if issubclass(field.python_type, Enum):
+            return ReportFieldInfo(name=name, type="enum", values=[member.value for member in field.python_type])
+        return ReportFieldInfo(name=name, type=TYPE_NAMES[field.python_type])
+
+    return [
+        ReportEntityInfo(entity=entity_name, dimensions=[describe(name, field) for name, field in entity.fields.items()],
+                         measures=list(entity.measures))
+        for entity_name, entity in ENTITIES.items()
+    ]
+
+
+# --- Plans ---
+@dataclass(frozen=True)
+class ReportPlan:
+    key: str  # Hash of the spec without its filter values
+    statement: Any
+    columns: List[str]
+
+
+class ReportPlanCache:
+    """
+    LRU map of spec hash -> compiled plan. Filter values are bound parameters, so every run of the same
+    report shape reuses one statement object (and with it SQLAlchemy's compiled SQL) whatever the values.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = settings.REPORT_BUILDER_PLAN_CACHE_SIZE if max_size is None else max_size
+        self._plans: "OrderedDict[str, ReportPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: str, build: Callable[[], ReportPlan]) -> ReportPlan:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+        plan = build()
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+        return plan
+
+
+report_plan_cache = ReportPlanCache()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _format_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if value is not None and not isinstance(value, (str, int, float, bool)):
+        return float(value)  # Decimal sums and averages
+    return value
+
+
+def _rows_out(plan: "ReportPlan", rows, report_format: str) -> list:
+    if report_format == "csv":
+        return [[_format_value(value) for value in row] for row in rows]
+    return [dict(zip(plan.columns, (_format_value(value) for value in row))) for row in rows]
+
+
+def _format_rows(records: list, report_format: str) -> str:
+    """CSV lines of value lists, or JSON lines of objects."""
+    if report_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(records)
+        return buffer.getvalue()
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def _error_record(report_format: str):
+    # A trailing CSV row / JSON object no report column can be confused with
+    return ["#error", REPORT_STREAM_ERROR] if report_format == "csv" else {"_error": REPORT_STREAM_ERROR}
+
+
+class ReportBuilder:
+    """
+    Compiles a declarative ReportSpec (base entity, dimensions, measures, filters) into a single
+    parameterised SELECT. Every name is checked against the ENTITIES whitelist, only the joins the
+    spec needs are added, and dimensions become the GROUP BY when measures are asked for. Results
+    are streamed from a server-side cursor in batches, as JSON lines or CSV, so exports of any size
+    use constant memory.
+    """
+
+    def __init__(self, plan_cache: ReportPlanCache = report_plan_cache):
+        self.plan_cache = plan_cache
+
+    def compile(self, spec: ReportSpec) -> Tuple[ReportPlan, Dict[str, Any]]:
+        """Raises ValueError listing every problem of the spec."""
+        entity = ENTITIES.get(spec.entity)
+        if entity is None:
+            raise ValueError(f"Unknown entity '{spec.entity}'; choose one of {', '.join(ENTITIES)}.")
+        errors = []
+        for name in spec.dimensions:
+            if name not in entity.fields:
+                errors.append(f"Unknown dimension '{name}'.")
+        for name in spec.measures:
+            if name not in entity.measures:
+                errors.append(f"Unknown measure '{name}'.")
+        columns = spec.dimensions + spec.measures
+        if len(set(columns)) != len(columns):
+            errors.append("Dimensions and measures must not repeat.")
+        for sort in spec.sort:
+            if sort.field not in columns:
+                errors.append(f"Cannot sort by '{sort.field}': it is not a dimension or measure of the report.")
+
+        params: Dict[str, Any] = {}
+        for index, report_filter in enumerate(spec.filters):
+            field = entity.fields.get(report_filter.field)
+            if field is None:
+                errors.append(f"Unknown filter field '{report_filter.field}'.")
+                continue
+            try:
+                params.update(self._filter_params(index, report_filter, field))
+            except ValueError as e:
+                errors.append(f"Filter on '{report_filter.field}': {e}")
+        if errors:
+            raise ValueError(" ".join(errors))
+
+        shape = spec.model_dump(mode="json")
+        for report_filter in shape["filters"]:
+            report_filter.pop("value")
+        key = hashlib.sha256(json.dumps(shape, sort_keys=True).encode()).hexdigest()
+        return self.plan_cache.get_or_build(key, lambda: self._build(key, entity, spec)), params
+
+    @staticmethod
+    def _filter_params(index: int, report_filter, field: ReportField) -> Dict[str, Any]:
+        op, value, name = report_filter.op, report_filter.value, f"f{index}"
+        is_enum = issubclass(field.python_type, Enum)
+        if op in ORDERED_OPERATORS and (is_enum or field.python_type is bool):
+            raise ValueError(f"'{op}' needs an ordered field.")
+        if op == "contains" and field.python_type is not str:
+            raise ValueError("'contains' needs a text field.")
+        if op in ("is_null", "not_null"):
+            return {}
+        try:
+            if op in ("in", "not_in"):
+                if not isinstance(value, list) or not value:
+                    raise ValueError(f"'{op}' needs a non-empty list.")
+                return {name: TypeAdapter(List[field.python_type]).validate_python(value)}
+            if op == "between":
+                if not isinstance(value, list) or len(value) != 2:
+                    raise ValueError("'between' needs [low, high].")
+                low, high = TypeAdapter(List[field.python_type]).validate_python(value)
+                return {f"{name}_low": low, f"{name}_high": high}
+            if value is None:
+                raise ValueError(f"'{op}' needs a value; use is_null / not_null for missing values.")
+            coerced = TypeAdapter(field.python_type).validate_python(value)
+        except ValidationError as e:
+            raise ValueError("; ".join(error["msg"] for error in e.errors()))
+        return {name: _escape_like(coerced) if op == "contains" else coerced}
+
+    @staticmethod
+    def _build(key: str, entity: ReportEntity, spec: ReportSpec) -> ReportPlan:
+        labelled = {name: entity.fields[name].column.label(name) for name in spec.dimensions}
+        labelled.update({name: entity.measures[name].expression.label(name) for name in spec.measures})
+        needed = {join for name in spec.dimensions for join in entity.fields[name].joins}
+        needed.update(join for name in spec.measures for join in entity.measures[name].joins)
+        needed.update(join for report_filter in spec.filters for join in entity.fields[report_filter.field].joins)
+
+        statement = select(*labelled.values()).select_from(entity.base)
+        for join_name, (target, onclause) in entity.joins.items():
+            if join_name in needed:
+                statement = statement.outerjoin(target, onclause)
+
+        for index, report_filter in enumerate(spec.filters):
+            column, name = entity.fields[report_filter.field].column, f"f{index}"
+            condition = {
+                "eq": lambda: column == bindparam(name),
+                "ne": lambda: column != bindparam(name),
+                "lt": lambda: column < bindparam(name),
+                "lte": lambda: column <= bindparam(name),
+                "gt": lambda: column > bindparam(name),
+                "gte": lambda: column >= bindparam(name),
+                "in": lambda: column.in_(bindparam(name, expanding=True)),
+                "not_in": lambda: column.not_in(bindparam(name, expanding=True)),
+                "between": lambda: column.between(bindparam(f"{name}_low"), bindparam(f"{name}_high")),
+                "is_null": lambda: column.is_(None),
+                "not_null": lambda: column.is_not(None),
+                "contains": lambda: column.icontains(bindparam(name), escape="\\"),
+            }[report_filter.op]()
+            statement = statement.where(condition)
+
+        if spec.measures and spec.dimensions:
+            statement = statement.group_by(*(entity.fields[name].column for name in spec.dimensions))
+        order = [labelled[sort.field].desc() if sort.descending else labelled[sort.field] for sort in spec.sort]
+        order += [labelled[name] for name in spec.dimensions if name not in {sort.field for sort in spec.sort}]
+        if order:
+            statement = statement.order_by(*order)
+        if spec.limit:
+            statement = statement.limit(spec.limit)
+        return ReportPlan(key=key, statement=statement, columns=list(labelled))
+
+    # --- Streaming ---
+    def stream(self, plan: ReportPlan, params: Dict[str, Any], report_format: str = "jsonl") -> Iterator[str]:
+        """
+        Yields the report one batch of rows at a time, the CSV header with the first batch. The
+        query runs when the first chunk is taken, so callers take it before sending a response and
+        a failing report becomes an error response. A failure after that ends the body with an
+        error record (REPORT_STREAM_ERROR), never a truncated file that looks complete. Opens its
+        own session: the rest of the body is produced after the request's session has been closed.
+        """
+        with Session(engine) as db:
+            result = db.exec(
+                plan.statement.execution_options(yield_per=settings.REPORT_BUILDER_STREAM_BATCH_ROWS),
+                params=params,
+            )
+            batches = result.partitions()
+            first = next(batches, [])
+            header = _format_rows([plan.columns], "csv") if report_format == "csv" else ""
+            yield header + _format_rows(_rows_out(plan, first, report_format), report_format)
+            sent = len(first)
+            try:
+                for rows in batches:
+                    yield _format_rows(_rows_out(plan, rows, report_format), report_format)
+                    sent += len(rows)
+            except Exception as e:  # The 200 status is already sent; say so in the body
+                print(f"Custom report {plan.key[:16]} failed after {sent} rows: {e}")
+                yield _format_rows([_error_record(report_format)], report_format)
@@ -0,0 +1,183 @@
+# hr_software/app/services/report_cache.py
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.services.event_bus import domain_events, TablesChanged
+
+try:
+    import redis  # Optional: only needed when REPORT_CACHE_REDIS_URL is set
+except ImportError:
+    redis = None
+
+
+@dataclass
+class CachedReport:
+    body: bytes  # Serialised JSON response
+    etag: str
+    headers: Dict[str, str]
+
+
+# --- Backends ---
+class InProcessReportCacheBackend:
+    """LRU of serialised reports plus a version counter per table, both local to this process."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, tags: Iterable[str]) -> List[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisReportCacheBackend:
+    """
+    Same interface on a Redis-compatible server, shared by every API worker: entries expire through
+    Redis TTLs (evicted by the server's maxmemory policy) and table versions are INCR counters, so a
+    write committed in one worker invalidates the reports cached by all of them.
+    """
+
+    def __init__(self, url: str, prefix: str = "report-cache:"):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + "entry:" + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self.client.set(self.prefix + "entry:" + key, value, ex=ttl_seconds)
+
+    def versions(self, tags: Iterable[str]) -> List[int]:
+        tags = list(tags)
+        if not tags:
+            return []
+        return [int(version or 0) for version in self.client.mget([self.prefix + "tag:" + tag for tag in tags])]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for tag in tags:
+            pipeline.incr(self.prefix + "tag:" + tag)
+        pipeline.execute()
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+def _default_backend():
+    if settings.REPORT_CACHE_REDIS_URL:
+        if redis is not None:
+            return RedisReportCacheBackend(settings.REPORT_CACHE_REDIS_URL)
+        print("Report cache: REPORT_CACHE_REDIS_URL is set but the redis package is not installed; "
+              "caching in process instead.")
+    return InProcessReportCacheBackend(settings.REPORT_CACHE_MAX_ENTRIES)
+
+
+# --- Cache ---
+class ReportCache:
+    """
+    Serialised report responses keyed by endpoint and parameters, each tagged with the tables it
+    reads. Every table has a version that is bumped when a session commits a write to it (the
+    TablesChanged event); an entry remembers the versions it was computed under and is ignored as
+    soon as one of them moved. Entries also expire after REPORT_CACHE_TTL_SECONDS, which bounds
+    how long reports that depend on today's date can lag. In process (no REPORT_CACHE_REDIS_URL) a
+    version is only bumped by writes this process commits, so entries expire after the much shorter
+    REPORT_CACHE_IN_PROCESS_TTL_SECONDS instead. The ETag is a hash of the body, so it is the same in
+    every worker and clients can revalidate with If-None-Match.
+    """
+
+    def __init__(self, backend=None, ttl_seconds: Optional[int] = None):
+        self.backend = backend if backend is not None else _default_backend()
+        if ttl_seconds is None:
+            ttl_seconds = (settings.REPORT_CACHE_IN_PROCESS_TTL_SECONDS
+                           if isinstance(self.backend, InProcessReportCacheBackend) else settings.REPORT_CACHE_TTL_SECONDS)
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def key(endpoint: str, params: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps([endpoint, params], sort_keys=True, default=str).encode()).hexdigest()
+
+    def get_or_compute(self, endpoint: str, params: Dict[str, Any], tags: Tuple[str, ...], response_model,
+                       compute: Callable[[], Any], headers: Optional[Callable[[], Dict[str, str]]] = None) -> CachedReport:
+        """
+        compute() returns the report as anything response_model validates; headers() the extra response
+        headers cached with it, called first. Both only run on a miss.
+        """
+        key = self.key(endpoint, params)
+        try:
+            versions = self.backend.versions(tags)  # Read before computing, so writes committed meanwhile invalidate it
+            raw = self.backend.get(key)
+        except Exception as e:  # A cache outage must not take the reports down
+            print(f"Report cache: read failed, computing {endpoint}: {e}")
+            versions, raw = None, None
+        if raw is not None:
+            entry = json.loads(raw)
+            if entry["versions"] == versions:
+                return CachedReport(body=entry["body"].encode(), etag=entry["etag"], headers=entry["headers"])
+
+        extra_headers = headers() if headers else {}
+        adapter = TypeAdapter(response_model)
+        body = adapter.dump_json(adapter.validate_python(compute()))
+        report = CachedReport(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"', headers=extra_headers)
+        if versions is None:  # Unknown versions: an entry stored now could never be invalidated reliably
+            return report
+        try:
+            self.backend.set(key, json.dumps({"versions": versions, "body": body.decode(), "etag": report.etag,
+                                              "headers": report.headers}), self.ttl_seconds)
+        except Exception as e:
+            print(f"Report cache: write failed for {endpoint}: {e}")
+        return report
+
+    def invalidate_tables(self, tables: Iterable[str]) -> None:
+        tables = sorted(set(tables))
+        if not tables:
+            return
+        try:
+            self.backend.bump(tables)
+        except Exception as e:
+            print(f"Report cache: could not invalidate {tables}: {e}")
+
+
+report_cache = ReportCache()
+
+
+domain_events.subscribe(TablesChanged, lambda event: report_cache.invalidate_tables(event.tables))
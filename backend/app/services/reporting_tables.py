@@ -0,0 +1,145 @@
+# hr_software/app/services/reporting_tables.py
+
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlmodel import Session, select, delete, insert, func
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.locks import REFRESH_LOCK_KEY
+from app.models.employee import EmployeeProfile
+from app.models.payroll import Payslip
+from app.models.reporting import SalaryExpenseSummary, ReportRefreshState
+from app.services.leave_analytics import rebuild_leave_facts
+from app.services.workforce_history import refresh_headcount_snapshots, CHANGE_MARKER_OVERLAP, NO_DEPARTMENT
+
+LEAVE_FACTS = "leave_month_facts"  # Kept current when leave is approved; only (re)built by the first and full refreshes
+SALARY_SUMMARY = "salary_expense_by_run"
+HEADCOUNT_SUMMARY = "headcount_by_day"
+SUMMARY_TABLES = (LEAVE_FACTS, SALARY_SUMMARY, HEADCOUNT_SUMMARY)
+
+
+# --- Salary expense by run and department ---
+def refresh_salary_summary(db: Session, since: Optional[datetime] = None) -> int:
+    """
+    Rebuilds the payroll runs with a payslip generated since the given time; every run if since is
+    None. Caller commits. Returns runs rebuilt.
+    """
+    statement = (
+        select(Payslip.payroll_run_id, func.coalesce(EmployeeProfile.department_id, NO_DEPARTMENT),
+               func.count(Payslip.id), func.sum(Payslip.gross_earnings), func.sum(Payslip.total_deductions),
+               func.sum(Payslip.net_salary))
+        .outerjoin(EmployeeProfile, EmployeeProfile.id == Payslip.employee_id)
+        .group_by(Payslip.payroll_run_id, EmployeeProfile.department_id)
+    )
+    if since is None:
+        db.exec(delete(SalaryExpenseSummary))
+    else:
+        run_ids = db.exec(select(Payslip.payroll_run_id).distinct().where(Payslip.generated_at >= since)).all()
+        if not run_ids:
+            return 0
+        db.exec(delete(SalaryExpenseSummary).where(SalaryExpenseSummary.payroll_run_id.in_(run_ids)))
+        statement = statement.where(Payslip.payroll_run_id.in_(run_ids))
+
+    rows = db.exec(statement).all()
+    if rows:
+        db.exec(insert(SalaryExpenseSummary), params=[
+            {"payroll_run_id": run_id, "department_id": department_id, "payslips": payslips,
+             "gross_earnings": float(gross or 0.0), "total_deductions": float(deductions or 0.0),
+             "net_salary": float(net or 0.0)}
+            for run_id, department_id, payslips, gross, deductions, net in rows
+        ])
+    return len({row[0] for row in rows})
+
+
+# --- Refresh ---
+@dataclass
+class ReportRefreshResult:
+    refreshed_at: datetime
+    rebuilt: Dict[str, int] = field(default_factory=dict)  # Fact rows / runs / snapshot rows per table
+    skipped: bool = False  # Another process was refreshing at the same moment
+
+
+class ReportingTables:
+    """
+    Keeps the reporting summary tables current: salary expense by run and department
+    (SalaryExpenseSummary) and headcount by day (HeadcountSnapshot). Each refresh only rebuilds the
+    runs / days whose source rows carry a change marker (generated_at, EmploymentHistory.recorded_at)
+    newer than the previous refresh. The leave month facts (LeaveMonthFact) are written when leave is
+    approved; a refresh only builds them for leave approved before the table existed, and again on
+    full. Runs every REPORT_REFRESH_INTERVAL_SECONDS in the API process (ReportRefreshScheduler) or
+    from cron via scripts/refresh_reports.py.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refreshed_at(self, name: str) -> Optional[datetime]:
+        state = self.db.get(ReportRefreshState, name)
+        return state.refreshed_at if state else None
+
+    def ensure_refreshed(self, name: str) -> datetime:
+        """The time the table was last refreshed, refreshing everything first if it never was."""
+        refreshed_at = self.refreshed_at(name)
+        if refreshed_at is None:
+            self.refresh()
+            refreshed_at = self.refreshed_at(name) or datetime.utcnow()
+        return refreshed_at
+
+    def refresh(self, full: bool = False) -> ReportRefreshResult:
+        result = ReportRefreshResult(refreshed_at=datetime.utcnow())
+        if self.db.get_bind().dialect.name == "postgresql":
+            if not self.db.exec(select(func.pg_try_advisory_xact_lock(REFRESH_LOCK_KEY))).one():
+                result.skipped = True
+                return result
+        if full or self.refreshed_at(LEAVE_FACTS) is None:
+            result.rebuilt[LEAVE_FACTS] = rebuild_leave_facts(self.db)
+            self.db.merge(ReportRefreshState(name=LEAVE_FACTS, refreshed_at=result.refreshed_at))
+        previous = None if full else self.refreshed_at(SALARY_SUMMARY)
+        result.rebuilt[SALARY_SUMMARY] = refresh_salary_summary(
+            self.db, previous - CHANGE_MARKER_OVERLAP if previous else None)
+        self.db.merge(ReportRefreshState(name=SALARY_SUMMARY, refreshed_at=result.refreshed_at))
+        result.rebuilt[HEADCOUNT_SUMMARY] = refresh_headcount_snapshots(self.db)
+        self.db.merge(ReportRefreshState(name=HEADCOUNT_SUMMARY, refreshed_at=result.refreshed_at))
+        self.db.commit()
+        return result
+
+
+class ReportRefreshScheduler:
+    """Refreshes the summary tables periodically on a daemon thread; started and stopped by the app lifespan."""
+
+    def __init__(self, interval_seconds: Optional[int] = None):
+        self.interval_seconds = (settings.REPORT_REFRESH_INTERVAL_SECONDS
+                                 if interval_seconds is None else interval_seconds)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return  # Disabled: refreshes come from cron instead
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="report-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with Session(engine) as db:
+                    result = ReportingTables(db).refresh()
+                if not result.skipped and any(result.rebuilt.values()):
+                    print(f"Report refresh: {result.rebuilt}")
+            except Exception as e:
+                print(f"Report refresh failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+
+report_refresh_scheduler = ReportRefreshScheduler()
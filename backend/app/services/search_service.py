@@ -0,0 +1,300 @@
+# hr_software/app/services/search_service.py
+
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from app.models.employee import EmployeeProfile, Department
+from app.models.enums import EmploymentStatus
+from app.models.user import User
+
+# Other API workers only see each other's edits after a full reload, so keep this moderate.
+SEARCH_INDEX_REFRESH_SECONDS = 300
+
+# Per-term scores: an exact token beats a prefix, which beats a typo-tolerant match.
+EXACT_MATCH_SCORE = 3.0
+PREFIX_MATCH_SCORE = 2.0
+FUZZY_MATCH_SCORE = 1.0
+MIN_FUZZY_TERM_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[a-z]+|[0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased word and number tokens; 'john.smith2@acme.com' -> ['john', 'smith', '2', 'acme', 'com']."""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _max_typos(term: str) -> int:
+    return 1 if len(term) < 8 else 2
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, returning limit + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+@dataclass
+class IndexedEmployee:
+    id: int
+    user_id: int
+    user_email: str
+    user_first_name: str
+    user_last_name: str
+    job_title: Optional[str]
+    department_id: Optional[int]
+    department_name: Optional[str]
+    employment_status: EmploymentStatus
+    tokens: Tuple[str, ...] = ()
+
+
+class EmployeeSearchIndex:
+    """
+    In-process inverted index over employee name, email, job title and department.
+
+    token -> employee ids gives exact matches, a sorted token list gives prefix matches
+    with bisect, and a trigram -> token map narrows down candidates for typo-tolerant
+    matching. The whole index is loaded with one query; crud_employee / crud_user keep it
+    current with per-employee refreshes, and it is reloaded every SEARCH_INDEX_REFRESH_SECONDS
+    to pick up changes made by other workers.
+    """
+
+    def __init__(self, refresh_seconds: int = SEARCH_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._employees: Dict[int, IndexedEmployee] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._sorted_tokens: List[str] = []
+        self._token_trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._status_ids: Dict[EmploymentStatus, Set[int]] = defaultdict(set)
+        self._sort_keys: Dict[int, Tuple[str, str, int]] = {}
+        self._ids_by_name: Optional[List[int]] = None  # Rebuilt lazily after changes
+
+    # --- Loading ---
+    @staticmethod
+    def _statement():
+        return (
+            select(
+                EmployeeProfile.id, EmployeeProfile.user_id, EmployeeProfile.job_title,
+                EmployeeProfile.department_id, EmployeeProfile.employment_status,
+                User.email, User.first_name, User.last_name, Department.name,
+            )
+            .join(User, EmployeeProfile.user_id == User.id)
+            .outerjoin(Department, EmployeeProfile.department_id == Department.id)
+        )
+
+    @staticmethod
+    def _to_indexed(row) -> IndexedEmployee:
+        (employee_id, user_id, job_title, department_id, employment_status,
+         email, first_name, last_name, department_name) = row
+        return IndexedEmployee(
+            id=employee_id, user_id=user_id, user_email=email, user_first_name=first_name,
+            user_last_name=last_name, job_title=job_title, department_id=department_id,
+            department_name=department_name, employment_status=employment_status,
+        )
+
+    def rebuild(self, db: Session) -> int:
+        rows = db.exec(self._statement()).all()
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(self._to_indexed(row), keep_sorted=False)
+            self._sorted_tokens = sorted(self._postings)
+            self._loaded_at = time.monotonic()
+            return len(self._employees)
+
+    def ensure_loaded(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_seconds:
+            self.rebuild(db)
+
+    # --- Incremental updates (called by CRUD after commit) ---
+    def refresh_employees(self, db: Session, employee_ids: Iterable[int]) -> None:
+        employee_ids = list(employee_ids)
+        if self._loaded_at is None or not employee_ids:
+            return  # Not loaded yet in this process; the first search loads everything
+        rows = db.exec(self._statement().where(EmployeeProfile.id.in_(employee_ids))).all()
+        with self._lock:
+            for employee_id in employee_ids:
+                self._remove(employee_id)
+            for row in rows:
+                self._add(self._to_indexed(row))
+
+    def refresh_user(self, db: Session, user_id: int) -> None:
+        if self._loaded_at is None:
+            return
+        employee_id = db.exec(select(EmployeeProfile.id).where(EmployeeProfile.user_id == user_id)).first()
+        if employee_id is not None:
+            self.refresh_employees(db, [employee_id])
+
+    def refresh_department(self, db: Session, department_id: int) -> None:
+        if self._loaded_at is None:
+            return
+        employee_ids = db.exec(select(EmployeeProfile.id).where(EmployeeProfile.department_id == department_id)).all()
+        self.refresh_employees(db, employee_ids)
+
+    def remove_employee(self, employee_id: int) -> None:
+        with self._lock:
+            self._remove(employee_id)
+
+    def _add(self, employee: IndexedEmployee, keep_sorted: bool = True) -> None:
+        tokens = set()
+        for text in (employee.user_first_name, employee.user_last_name, employee.user_email,
+                     employee.job_title, employee.department_name):
+            tokens.update(tokenize(text))
+        employee.tokens = tuple(sorted(tokens))
+        self._employees[employee.id] = employee
+        self._status_ids[employee.employment_status].add(employee.id)
+        self._sort_keys[employee.id] = (employee.user_last_name.lower(), employee.user_first_name.lower(), employee.id)
+        self._ids_by_name = None
+        for token in employee.tokens:
+            posting = self._postings[token]
+            if not posting:
+                if keep_sorted:
+                    bisect.insort(self._sorted_tokens, token)
+                for trigram in _trigrams(token):
+                    self._token_trigrams[trigram].add(token)
+            posting.add(employee.id)
+
+    def _remove(self, employee_id: int) -> None:
+        employee = self._employees.pop(employee_id, None)
+        if not employee:
+            return
+        self._status_ids[employee.employment_status].discard(employee_id)
+        del self._sort_keys[employee_id]
+        self._ids_by_name = None
+        for token in employee.tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(employee_id)
+            if not posting:
+                del self._postings[token]
+                position = bisect.bisect_left(self._sorted_tokens, token)
+                if position < len(self._sorted_tokens) and self._sorted_tokens[position] == token:
+                    del self._sorted_tokens[position]
+                for trigram in _trigrams(token):
+                    self._token_trigrams[trigram].discard(token)
+
+    # --- Queries ---
+    def _prefix_tokens(self, term: str) -> List[str]:
+        start = bisect.bisect_left(self._sorted_tokens, term)
+        end = bisect.bisect_left(self._sorted_tokens, term + "\uffff")
+        return self._sorted_tokens[start:end]
+
+    def _fuzzy_tokens(self, term: str) -> List[str]:
+        term_trigrams = _trigrams(term)
+        limit = _max_typos(term)
+        # Each edit destroys at most 3 trigrams, so true matches must share the rest
+        min_shared = max(1, len(term_trigrams) - 3 * limit)
+        shared: Counter = Counter()
+        for trigram in term_trigrams:
+            shared.update(self._token_trigrams.get(trigram, ()))
+        matches = []
+        for token, count in shared.items():
+            if count < min_shared:
+                continue
+            # Compare against the whole token and against its prefix, so typos in a partly typed word still match
+            if (_edit_distance(term, token, limit) <= limit or
+                    _edit_distance(term, token[:len(term)], limit) <= limit):
+                matches.append(token)
+        return matches
+
+    def _match_term(self, term: str) -> Tuple[Set[int], Set[int], float]:
+        """(ids matching the term, ids containing it as a whole token, base score) for one query term."""
+        prefix_tokens = self._prefix_tokens(term)
+        if prefix_tokens:
+            matched = set().union(*(self._postings[token] for token in prefix_tokens))
+            return matched, self._postings.get(term, set()), PREFIX_MATCH_SCORE
+        # Typo tolerance is a fallback for terms that match nothing as typed
+        if len(term) < MIN_FUZZY_TERM_LENGTH:
+            return set(), set(), FUZZY_MATCH_SCORE
+        matched = set().union(*(self._postings[token] for token in self._fuzzy_tokens(term)))
+        return matched, set(), FUZZY_MATCH_SCORE
+
+    def _first_by_name(self, employee_ids: Set[int], count: int) -> List[int]:
+        if count <= 0 or not employee_ids:
+            return []
+        if len(employee_ids) * 8 < len(self._sort_keys):
+            return heapq.nsmallest(count, employee_ids, key=self._sort_keys.__getitem__)
+        # Dense result (e.g. a one-letter prefix): walk the directory in name order and stop once the page is full
+        if self._ids_by_name is None:
+            self._ids_by_name = sorted(self._sort_keys, key=self._sort_keys.__getitem__)
+        return list(islice((employee_id for employee_id in self._ids_by_name if employee_id in employee_ids), count))
+
+    def search(
+            self,
+            query: str,
+            limit: int = 20,
+            employment_status: Optional[EmploymentStatus] = None,
+            visible_ids: Optional[Set[int]] = None
+    ) -> List[Tuple[IndexedEmployee, float]]:
+        """
+        Employees matching every term of the query (exactly, by prefix or with a typo), best score
+        first and then by name. Candidate selection is done with set operations, and only the
+        returned page is ranked in Python, so short prefixes that match most of the directory stay cheap.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            matches = sorted((self._match_term(term) for term in terms), key=lambda match: len(match[0]))
+            candidates = matches[0][0].intersection(*(match[0] for match in matches[1:]))
+            if employment_status is not None:
+                candidates &= self._status_ids.get(employment_status, set())
+            if visible_ids is not None:
+                candidates &= visible_ids
+            if not candidates:
+                return []
+
+            base_score = sum(match[2] for match in matches)
+            exact_sets = [match[1] for match in matches if match[1]]
+            exact_bonus = EXACT_MATCH_SCORE - PREFIX_MATCH_SCORE
+            boosted = candidates.intersection(set().union(*exact_sets))
+            if len(exact_sets) == 1:
+                page = [(employee_id, base_score + exact_bonus) for employee_id in self._first_by_name(boosted, limit)]
+            else:
+                sort_key = self._sort_keys.__getitem__
+                scored = ((employee_id, base_score + exact_bonus * sum(employee_id in exact for exact in exact_sets))
+                          for employee_id in boosted)
+                page = heapq.nsmallest(limit, scored, key=lambda item: (-item[1], sort_key(item[0])))
+            if len(page) < limit:
+                page.extend((employee_id, base_score) for employee_id in
+                            self._first_by_name(candidates - boosted, limit - len(page)))
+            return [(self._employees[employee_id], score) for employee_id, score in page]
+
+
+employee_search_index = EmployeeSearchIndex()
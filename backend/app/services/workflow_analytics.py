@@ -0,0 +1,258 @@
+# hr_software/app/services/workflow_analytics.py
+
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import Session, select, delete, func, insert, update
+
+from app.core.upsert import upsert_adding
+
+from app.models.enums import EmployeeWorkflowStatus, EmployeeWorkflowStepStatus
+from app.models.workflow import (
+    WorkflowTemplate, WorkflowStepTemplate, EmployeeWorkflow, EmployeeWorkflowStep, WorkflowCycleTimeBucket
+)
+
+# Bucket 0 holds cycle times up to a minute; bucket b > 0 holds (60 * 2^((b-1)/4), 60 * 2^(b/4)] seconds,
+# i.e. four buckets per doubling, so a percentile read from the buckets is within ~19% of the true value.
+BASE_SECONDS = 60.0
+BUCKETS_PER_DOUBLING = 4
+MAX_BUCKET = 100  # ~60 years
+WHOLE_WORKFLOW = 0  # step_template_id of the assignment-to-completion histogram
+
+
+# --- Buckets ---
+def cycle_time_bucket(seconds: float) -> int:
+    if seconds <= BASE_SECONDS:
+        return 0
+    return min(MAX_BUCKET, math.ceil(BUCKETS_PER_DOUBLING * math.log2(seconds / BASE_SECONDS)))
+
+
+def bucket_bounds(bucket: int) -> Tuple[float, float]:
+    if bucket == 0:
+        return 0.0, BASE_SECONDS
+    return (BASE_SECONDS * 2 ** ((bucket - 1) / BUCKETS_PER_DOUBLING),
+            BASE_SECONDS * 2 ** (bucket / BUCKETS_PER_DOUBLING))
+
+
+@dataclass
+class CycleTimeHistogram:
+    counts: Dict[int, int] = field(default_factory=dict)
+    total_seconds: float = 0.0
+
+    def add(self, bucket: int, count: int, total_seconds: float) -> None:
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total_seconds += total_seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def mean_seconds(self) -> Optional[float]:
+        return self.total_seconds / self.count if self.count else None
+
+    def percentile_seconds(self, fraction: float) -> Optional[float]:
+        """Walks the (at most MAX_BUCKET + 1) buckets; interpolates geometrically inside the bucket."""
+        total = self.count
+        if not total:
+            return None
+        rank = fraction * total
+        seen = 0
+        for bucket in sorted(self.counts):
+            count = self.counts[bucket]
+            if seen + count >= rank:
+                low, high = bucket_bounds(bucket)
+                position = (rank - seen) / count
+                if bucket == 0:
+                    return low + (high - low) * position
+                return low * (high / low) ** position
+            seen += count
+        return bucket_bounds(max(self.counts))[1]
+
+
+def _month(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+# --- Recording ---
+def record_cycle_times(db: Session, workflow_template_id: int, samples: Iterable[Tuple[int, float]],
+                       completed_at: datetime, removed: bool = False) -> None:
+    """
+    Adds (step_template_id, seconds) samples to the histograms, or takes them out again when removed
+    (a completed step was reopened), with one upsert that moves the bucket counters in place, so
+    concurrent completions never overwrite each other. Caller commits.
+    """
+    sign = -1 if removed else 1
+    rows = [
+        {"workflow_template_id": workflow_template_id, "step_template_id": step_template_id,
+         "period": _month(completed_at), "bucket": cycle_time_bucket(seconds), "count": sign,
+         "total_seconds": sign * seconds}
+        for step_template_id, seconds in samples
+    ]
+    upsert_adding(db, WorkflowCycleTimeBucket, rows,
+                  key_columns=("workflow_template_id", "step_template_id", "period", "bucket"),
+                  added_columns=("count", "total_seconds"))
+
+
+def record_step_reopened(db: Session, workflow_template_id: int, step: EmployeeWorkflowStep,
+                         assigned_on: datetime) -> None:
+    """
+    Takes the sample of a completed step that is being reopened out of the histograms. The next
+    completion in its workflow was timed from this one, so its sample moves to the earlier start, and
+    the workflow's last_step_completed_at falls back to its latest other completion. Call before the
+    step's completed_on is cleared. Caller commits.
+    """
+    completed_siblings = [
+        EmployeeWorkflowStep.employee_workflow_id == step.employee_workflow_id,
+        EmployeeWorkflowStep.id != step.id,
+        EmployeeWorkflowStep.status == EmployeeWorkflowStepStatus.COMPLETED,
+    ]
+    previous = db.exec(select(func.max(EmployeeWorkflowStep.completed_on))
+                       .where(*completed_siblings, EmployeeWorkflowStep.completed_on <= step.completed_on)).one()
+    started_at = max(previous, assigned_on) if previous else assigned_on
+    record_cycle_times(db, workflow_template_id,
+                       [(step.step_template_id, max(0.0, (step.completed_on - started_at).total_seconds()))],
+                       step.completed_on, removed=True)
+
+    following = db.exec(
+        select(EmployeeWorkflowStep.step_template_id, EmployeeWorkflowStep.completed_on)
+        .where(*completed_siblings, EmployeeWorkflowStep.completed_on > step.completed_on)
+        .order_by(EmployeeWorkflowStep.completed_on).limit(1)
+    ).first()
+    if following:
+        step_template_id, completed_on = following
+        record_cycle_times(db, workflow_template_id,
+                           [(step_template_id, max(0.0, (completed_on - step.completed_on).total_seconds()))],
+                           completed_on, removed=True)
+        record_cycle_times(db, workflow_template_id,
+                           [(step_template_id, max(0.0, (completed_on - started_at).total_seconds()))], completed_on)
+
+    db.exec(update(EmployeeWorkflow).where(EmployeeWorkflow.id == step.employee_workflow_id).values(
+        last_step_completed_at=select(func.max(EmployeeWorkflowStep.completed_on)).where(*completed_siblings)
+        .scalar_subquery()
+    ).execution_options(synchronize_session=False))
+
+
+def rebuild_cycle_time_histograms(db: Session) -> int:
+    """
+    Recomputes every histogram, and EmployeeWorkflow.last_step_completed_at, from the completed
+    steps (backfill, or after data fixes). Streams the steps once, ordered by workflow and
+    completion time. Caller commits. Returns the number of samples recorded.
+    """
+    db.exec(update(EmployeeWorkflow).values(last_step_completed_at=(
+        select(func.max(EmployeeWorkflowStep.completed_on))
+        .where(EmployeeWorkflowStep.employee_workflow_id == EmployeeWorkflow.id,
+               EmployeeWorkflowStep.status == EmployeeWorkflowStepStatus.COMPLETED)
+        .scalar_subquery()
+    )).execution_options(synchronize_session=False))
+
+    histograms: Dict[Tuple[int, int, date, int], List[float]] = {}
+
+    def add(template_id: int, step_template_id: int, completed_at: datetime, seconds: float) -> None:
+        key = (template_id, step_template_id, _month(completed_at), cycle_time_bucket(seconds))
+        entry = histograms.setdefault(key, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    rows = db.exec(
+        select(EmployeeWorkflow.id, EmployeeWorkflow.workflow_template_id, EmployeeWorkflow.assigned_on,
+               EmployeeWorkflow.status, EmployeeWorkflowStep.step_template_id, EmployeeWorkflowStep.completed_on)
+        .join(EmployeeWorkflowStep, EmployeeWorkflowStep.employee_workflow_id == EmployeeWorkflow.id)
+        .where(EmployeeWorkflowStep.status == EmployeeWorkflowStepStatus.COMPLETED,
+               EmployeeWorkflowStep.completed_on.is_not(None))
+        .order_by(EmployeeWorkflow.id, EmployeeWorkflowStep.completed_on)
+        .execution_options(yield_per=5000)
+    )
+    current_id, previous_at, last = None, None, None
+    for workflow_id, template_id, assigned_on, status, step_template_id, completed_on in rows:
+        if workflow_id != current_id:
+            if last and last[3] == EmployeeWorkflowStatus.COMPLETED:
+                add(last[1], WHOLE_WORKFLOW, previous_at, (previous_at - last[2]).total_seconds())
+            current_id, previous_at = workflow_id, assigned_on
+        add(template_id, step_template_id, completed_on, max(0.0, (completed_on - previous_at).total_seconds()))
+        previous_at, last = max(previous_at, completed_on), (workflow_id, template_id, assigned_on, status)
+    if last and last[3] == EmployeeWorkflowStatus.COMPLETED:
+        add(last[1], WHOLE_WORKFLOW, previous_at, (previous_at - last[2]).total_seconds())
+
+    db.exec(delete(WorkflowCycleTimeBucket))
+    if histograms:
+        db.exec(insert(WorkflowCycleTimeBucket), params=[
+            {"workflow_template_id": template_id, "step_template_id": step_template_id, "period": period,
+             "bucket": bucket, "count": count, "total_seconds": total}
+            for (template_id, step_template_id, period, bucket), (count, total) in histograms.items()
+        ])
+    return sum(count for count, _ in histograms.values())
+
+
+# --- Reports ---
+@dataclass
+class CycleTimeStats:
+    completed: int
+    p50_hours: Optional[float]
+    p90_hours: Optional[float]
+    mean_hours: Optional[float]
+
+    @classmethod
+    def from_histogram(cls, histogram: CycleTimeHistogram) -> "CycleTimeStats":
+        def hours(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds / 3600, 2) if seconds is not None else None
+        return cls(completed=histogram.count, p50_hours=hours(histogram.percentile_seconds(0.5)),
+                   p90_hours=hours(histogram.percentile_seconds(0.9)), mean_hours=hours(histogram.mean_seconds))
+
+
+class WorkflowAnalyticsService:
+    """
+    Cycle-time percentiles per workflow template and per step, read from the pre-aggregated
+    WorkflowCycleTimeBucket histograms: one grouped SELECT over at most
+    (templates x steps x months x buckets) small rows, whatever the number of historic workflows.
+    A step's cycle time runs from the previous step completion in its workflow (or the assignment)
+    to its own completion, so the slowest steps are the bottlenecks.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def histograms(self, since: date, template_id: Optional[int] = None) -> Dict[Tuple[int, int], CycleTimeHistogram]:
+        statement = (
+            select(WorkflowCycleTimeBucket.workflow_template_id, WorkflowCycleTimeBucket.step_template_id,
+                   WorkflowCycleTimeBucket.bucket, func.sum(WorkflowCycleTimeBucket.count),
+                   func.sum(WorkflowCycleTimeBucket.total_seconds))
+            .where(WorkflowCycleTimeBucket.period >= date(since.year, since.month, 1))
+            .group_by(WorkflowCycleTimeBucket.workflow_template_id, WorkflowCycleTimeBucket.step_template_id,
+                      WorkflowCycleTimeBucket.bucket)
+        )
+        if template_id is not None:
+            statement = statement.where(WorkflowCycleTimeBucket.workflow_template_id == template_id)
+        histograms: Dict[Tuple[int, int], CycleTimeHistogram] = {}
+        for workflow_template_id, step_template_id, bucket, count, total in self.db.exec(statement).all():
+            histograms.setdefault((workflow_template_id, step_template_id), CycleTimeHistogram()).add(
+                bucket, int(count), float(total or 0.0)
+            )
+        return histograms
+
+    def template_reports(self, since: date, template_id: Optional[int] = None) -> List[dict]:
+        histograms = self.histograms(since, template_id)
+        template_ids = {key[0] for key in histograms}
+        if not template_ids:
+            return []
+        templates = self.db.exec(select(WorkflowTemplate).where(WorkflowTemplate.id.in_(template_ids))).all()
+        steps = self.db.exec(
+            select(WorkflowStepTemplate).where(WorkflowStepTemplate.workflow_template_id.in_(template_ids))
+        ).all()
+
+        reports = []
+        for template in sorted(templates, key=lambda t: t.name):
+            step_reports = [
+                {"step_template_id": step.id, "step_name": step.name, "step_order": step.order,
+                 **CycleTimeStats.from_histogram(histograms.get((template.id, step.id), CycleTimeHistogram())).__dict__}
+                for step in sorted(steps, key=lambda s: (s.order, s.id)) if step.workflow_template_id == template.id
+            ]
+            reports.append({
+                "workflow_template_id": template.id, "workflow_template_name": template.name,
+                "workflow_type": template.workflow_type,
+                **CycleTimeStats.from_histogram(histograms.get((template.id, WHOLE_WORKFLOW), CycleTimeHistogram())).__dict__,
+                "steps": step_reports,
+            })
+        return reports
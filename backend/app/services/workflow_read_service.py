@@ -0,0 +1,124 @@
+# hr_software/app/services/workflow_read_service.py
+
+from typing import List, Optional
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from app.models.enums import EmployeeWorkflowStatus, WorkflowType
+from app.models.workflow import WorkflowTemplate, EmployeeWorkflow, EmployeeWorkflowStep
+from app.schemas.workflow import (
+    WorkflowTemplateRead, WorkflowStepTemplateRead, EmployeeWorkflowRead, EmployeeWorkflowStepRead
+)
+
+
+class WorkflowReadService:
+    """
+    Read-only query path for workflow responses. Workflows, their steps, step templates and the
+    users who completed steps are loaded with selectinload (one SELECT per relationship level,
+    no row locks), and the response models are assembled in memory, so a request costs the
+    same number of queries however many workflows and steps it returns.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # --- Employee workflows ---
+    @staticmethod
+    def _employee_workflow_options():
+        steps = selectinload(EmployeeWorkflow.steps)
+        return (
+            selectinload(EmployeeWorkflow.template),
+            steps.selectinload(EmployeeWorkflowStep.step_template),
+            steps.selectinload(EmployeeWorkflowStep.completed_by),
+        )
+
+    def list_employee_workflows(self, employee_id: int,
+                                status: Optional[EmployeeWorkflowStatus] = None) -> List[EmployeeWorkflowRead]:
+        statement = select(EmployeeWorkflow).where(EmployeeWorkflow.employee_id == employee_id)
+        if status:
+            statement = statement.where(EmployeeWorkflow.status == status)
+        statement = statement.options(*self._employee_workflow_options()).order_by(EmployeeWorkflow.assigned_on.desc())
+        return [self.build_employee_workflow_read(workflow) for workflow in self.db.exec(statement).all()]
+
+    def get_employee_workflow(self, employee_workflow_id: int) -> Optional[EmployeeWorkflowRead]:
+        statement = (
+            select(EmployeeWorkflow)
+            .where(EmployeeWorkflow.id == employee_workflow_id)
+            .options(*self._employee_workflow_options())
+            .execution_options(populate_existing=True)  # The instance may already be in the session, without its steps
+        )
+        workflow = self.db.exec(statement).first()
+        return self.build_employee_workflow_read(workflow) if workflow else None
+
+    @staticmethod
+    def build_employee_step_read(step: EmployeeWorkflowStep) -> EmployeeWorkflowStepRead:
+        template_step = step.step_template
+        return EmployeeWorkflowStepRead(
+            id=step.id,
+            step_template_id=template_step.id if template_step else 0,
+            step_name=template_step.name if template_step else "Unknown Step",
+            step_description=template_step.description if template_step else None,
+            step_order=template_step.order if template_step else 999,
+            is_mandatory=template_step.is_mandatory if template_step else True,
+            status=step.status,
+            completed_on=step.completed_on,
+            completed_by_user_email=step.completed_by.email if step.completed_by else None,
+            notes=step.notes,
+        )
+
+    @classmethod
+    def build_employee_workflow_read(cls, workflow: EmployeeWorkflow) -> EmployeeWorkflowRead:
+        steps = sorted((cls.build_employee_step_read(step) for step in workflow.steps),
+                       key=lambda step: (step.step_order, step.id))
+        template = workflow.template
+        return EmployeeWorkflowRead(
+            id=workflow.id,
+            employee_id=workflow.employee_id,
+            workflow_template_id=workflow.workflow_template_id,
+            workflow_template_name=template.name if template else "Unknown Template",
+            workflow_type=template.workflow_type if template else WorkflowType.OTHER,
+            assigned_on=workflow.assigned_on,
+            due_date=workflow.due_date,
+            status=workflow.status,
+            mandatory_steps_total=workflow.mandatory_steps_total,
+            mandatory_steps_completed=workflow.mandatory_steps_completed,
+            steps=steps,
+        )
+
+    # --- Templates ---
+    def list_templates(self, workflow_type: Optional[WorkflowType] = None, is_active: Optional[bool] = None,
+                       skip: int = 0, limit: int = 100) -> List[WorkflowTemplateRead]:
+        statement = select(WorkflowTemplate).options(selectinload(WorkflowTemplate.steps))
+        if workflow_type:
+            statement = statement.where(WorkflowTemplate.workflow_type == workflow_type)
+        if is_active is not None:
+            statement = statement.where(WorkflowTemplate.is_active == is_active)
+        statement = statement.order_by(WorkflowTemplate.name).offset(skip).limit(limit)
+        return [self.build_template_read(template) for template in self.db.exec(statement).all()]
+
+    def get_template(self, template_id: int) -> Optional[WorkflowTemplateRead]:
+        statement = (
+            select(WorkflowTemplate)
+            .where(WorkflowTemplate.id == template_id)
+            .options(selectinload(WorkflowTemplate.steps))
+            .execution_options(populate_existing=True)
+        )
+        template = self.db.exec(statement).first()
+        return self.build_template_read(template) if template else None
+
+    @staticmethod
+    def build_template_read(template: WorkflowTemplate) -> WorkflowTemplateRead:
+        steps = sorted(template.steps, key=lambda step: (step.order, step.id))
+        return WorkflowTemplateRead(
+            id=template.id,
+            name=template.name,
+            description=template.description,
+            workflow_type=template.workflow_type,
+            is_active=template.is_active,
+            auto_assign_on_status=template.auto_assign_on_status,
+            due_in_days=template.due_in_days,
+            created_at=template.created_at,
+            updated_at=template.updated_at,
+            steps=[WorkflowStepTemplateRead.model_validate(step.model_dump()) for step in steps],
+        )
@@ -0,0 +1,90 @@
+# hr_software/app/services/workflow_sla_service.py
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.locks import SLA_SCAN_LOCK_KEY
+from app.crud import crud_workflow
+from app.models.enums import WorkflowSlaStatus
+
+
+@dataclass
+class WorkflowSlaScanResult:
+    scanned_at: datetime
+    overdue: int = 0
+    at_risk: int = 0
+    skipped: bool = False  # Another process was scanning at the same moment
+
+
+class WorkflowSlaScanner:
+    """
+    Finds open workflows that are past their due date (overdue) or due within
+    WORKFLOW_SLA_AT_RISK_DAYS (at risk) and stores them in WorkflowSlaItem, replacing the previous
+    scan in one transaction. Dashboards and GET /workflows/overdue read only that table.
+    Runs every WORKFLOW_SLA_SCAN_INTERVAL_SECONDS in the API process (WorkflowSlaScheduler) or
+    from cron via scripts/scan_workflow_sla.py.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def scan(self, now: Optional[datetime] = None, at_risk_days: Optional[int] = None) -> WorkflowSlaScanResult:
+        now = now or datetime.utcnow()
+        days = settings.WORKFLOW_SLA_AT_RISK_DAYS if at_risk_days is None else at_risk_days
+        result = WorkflowSlaScanResult(scanned_at=now)
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Two API workers scanning at once would insert the same rows; the later one just skips
+            if not self.db.exec(select(func.pg_try_advisory_xact_lock(SLA_SCAN_LOCK_KEY))).one():
+                result.skipped = True
+                return result
+        crud_workflow.replace_workflow_sla_items(self.db, now, now + timedelta(days=days))
+        self.db.commit()
+        for _, sla_status, count, _ in crud_workflow.get_workflow_sla_counts(self.db):
+            if sla_status == WorkflowSlaStatus.OVERDUE:
+                result.overdue += count
+            else:
+                result.at_risk += count
+        return result
+
+
+class WorkflowSlaScheduler:
+    """Runs the scanner periodically on a daemon thread; started and stopped by the app lifespan."""
+
+    def __init__(self, interval_seconds: Optional[int] = None):
+        self.interval_seconds = (settings.WORKFLOW_SLA_SCAN_INTERVAL_SECONDS
+                                 if interval_seconds is None else interval_seconds)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return  # Disabled: scans come from cron instead
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="workflow-sla-scan", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with Session(engine) as db:
+                    result = WorkflowSlaScanner(db).scan()
+                if not result.skipped:
+                    print(f"Workflow SLA scan: {result.overdue} overdue, {result.at_risk} at risk.")
+            except Exception as e:
+                print(f"Workflow SLA scan failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+
+workflow_sla_scheduler = WorkflowSlaScheduler()
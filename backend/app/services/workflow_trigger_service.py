@@ -0,0 +1,194 @@
+# hr_software/app/services/workflow_trigger_service.py
+
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select, func, and_
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.locks import RESUME_LOCK_KEY
+from app.core.ttl_cache import TTLCache
+from app.crud import crud_workflow
+from app.models.employee import EmployeeProfile, EmploymentHistory
+from app.models.enums import EmploymentStatus
+from app.models.workflow import WorkflowTemplate, EmployeeWorkflow
+from app.services.event_bus import domain_events, EmploymentStatusChanged, WorkflowTemplatesChanged
+
+# Other API workers only see a template change once their copy expires, so keep this short.
+WORKFLOW_TRIGGER_CACHE_TTL_SECONDS = 60
+
+
+class WorkflowTriggerCache(TTLCache[Dict[EmploymentStatus, Tuple[int, str]]]):
+    """
+    Process-wide employment status -> (template id, name) map of the active auto-assign templates.
+    Loaded with one query and dropped whenever a WorkflowTemplatesChanged event is published.
+    """
+
+    def __init__(self, ttl_seconds: int = WORKFLOW_TRIGGER_CACHE_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+
+    @staticmethod
+    def _load(db: Session) -> Dict[EmploymentStatus, Tuple[int, str]]:
+        rows = db.exec(
+            select(WorkflowTemplate.auto_assign_on_status, WorkflowTemplate.id, WorkflowTemplate.name)
+            .where(WorkflowTemplate.auto_assign_on_status.is_not(None), WorkflowTemplate.is_active == True)
+            .order_by(WorkflowTemplate.id.desc())
+        ).all()
+        # Lowest id wins if several share a status (saved before the endpoints rejected that), as in
+        # get_workflow_template_by_trigger_status
+        return {status: (template_id, name) for status, template_id, name in rows}
+
+    def template_for(self, db: Session, status: EmploymentStatus) -> Optional[Tuple[int, str]]:
+        return self.get_or_load("templates", lambda: self._load(db)).get(status)
+
+
+class WorkflowAutoAssigner:
+    """
+    Assigns the auto-assign template of an employee's new employment status. Consumes
+    EmploymentStatusChanged events on a background thread, so requests that change a status
+    do not wait for workflow creation: events arriving within WORKFLOW_AUTO_ASSIGN_BATCH_WAIT_SECONDS
+    are grouped by status and assigned with one set-based insert per template.
+    Events still queued at shutdown are assigned before the process exits; those lost to a crash are
+    found again in EmploymentHistory by resume_pending() on the next start.
+    """
+
+    def __init__(self, trigger_cache: WorkflowTriggerCache, in_background: Optional[bool] = None):
+        self.trigger_cache = trigger_cache
+        self.in_background = (settings.WORKFLOW_AUTO_ASSIGN_IN_BACKGROUND
+                              if in_background is None else in_background)
+        self._queue: "queue.Queue[Optional[EmploymentStatusChanged]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def handle(self, event: EmploymentStatusChanged) -> None:
+        if not self.in_background:
+            self.assign([event])
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="workflow-auto-assign", daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+        self._queue.put(event)
+
+    def wait_idle(self) -> None:
+        """Blocks until every queued event has been processed."""
+        self._queue.join()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            event = self._queue.get()
+            if event is None:
+                self._queue.task_done()
+                break
+            batch = [event]
+            deadline = time.monotonic() + settings.WORKFLOW_AUTO_ASSIGN_BATCH_WAIT_SECONDS
+            while len(batch) < settings.WORKFLOW_AUTO_ASSIGN_BATCH_SIZE:
+                try:
+                    event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if event is None:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(event)
+            try:
+                self.assign(batch)
+            except Exception as e:
+                print(f"Workflow auto-assign: batch of {len(batch)} status changes failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def resume_pending(self, db: Session) -> int:
+        """
+        Assigns the templates of status changes recorded in the last WORKFLOW_AUTO_ASSIGN_RESUME_HOURS
+        that never got their workflow: the employee is still in the new status and has no instance of
+        the template assigned since the change. EmploymentHistory is written in the same transaction
+        as the change, so it holds every change whose queued event died with a crashed process.
+        Returns the workflows created.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            db.exec(select(func.pg_advisory_xact_lock(RESUME_LOCK_KEY))).one()
+        since = datetime.utcnow() - timedelta(hours=settings.WORKFLOW_AUTO_ASSIGN_RESUME_HOURS)
+        recent = select(EmploymentHistory.employee_id).where(EmploymentHistory.recorded_at >= since)
+        history = (
+            select(EmploymentHistory.employee_id, EmploymentHistory.employment_status, EmploymentHistory.recorded_at,
+                   func.lag(EmploymentHistory.employment_status).over(
+                       partition_by=EmploymentHistory.employee_id, order_by=EmploymentHistory.id
+                   ).label("previous_status"))
+            .where(EmploymentHistory.employee_id.in_(recent))
+            .subquery()
+        )
+        changes = db.exec(
+            select(history.c.employee_id, history.c.employment_status, history.c.recorded_at)
+            .join(EmployeeProfile, and_(EmployeeProfile.id == history.c.employee_id,
+                                        EmployeeProfile.employment_status == history.c.employment_status))
+            .where(history.c.recorded_at >= since,
+                   history.c.previous_status.is_(None) | (history.c.previous_status != history.c.employment_status))
+        ).all()
+        changed_at: Dict[EmploymentStatus, Dict[int, datetime]] = {}
+        for employee_id, status, recorded_at in changes:  # The latest change per employee is the current status
+            by_employee = changed_at.setdefault(status, {})
+            by_employee[employee_id] = max(recorded_at, by_employee.get(employee_id, recorded_at))
+
+        assigned = 0
+        for status, by_employee in changed_at.items():
+            template = self.trigger_cache.template_for(db, status)
+            if not template:
+                continue
+            last_assigned = dict(db.exec(
+                select(EmployeeWorkflow.employee_id, func.max(EmployeeWorkflow.assigned_on))
+                .where(EmployeeWorkflow.workflow_template_id == template[0],
+                       EmployeeWorkflow.employee_id.in_(list(by_employee)))
+                .group_by(EmployeeWorkflow.employee_id)
+            ).all())
+            missed = [employee_id for employee_id, recorded_at in by_employee.items()
+                      if employee_id not in last_assigned or last_assigned[employee_id] < recorded_at]
+            assigned += len(crud_workflow.assign_workflow_to_employees(db, sorted(missed), template[0]))
+        db.commit()
+        if assigned:
+            print(f"Workflow auto-assign: {assigned} workflows assigned for status changes missed before startup.")
+        return assigned
+
+    def assign(self, events: List[EmploymentStatusChanged]) -> int:
+        """Assigns the templates triggered by a batch of status changes. Returns the workflows created."""
+        employees_by_status: Dict[EmploymentStatus, Set[int]] = {}
+        for event in events:
+            if event.new_status is not None and event.new_status != event.old_status:
+                employees_by_status.setdefault(event.new_status, set()).add(event.employee_id)
+
+        assigned = 0
+        with Session(engine) as db:
+            for status, employee_ids in employees_by_status.items():
+                template = self.trigger_cache.template_for(db, status)
+                if not template:
+                    continue
+                template_id, template_name = template
+                workflow_ids = crud_workflow.assign_workflow_to_employees(db, sorted(employee_ids), template_id)
+                db.commit()
+                assigned += len(workflow_ids)
+                print(f"Auto-assigned workflow '{template_name}' to {len(workflow_ids)} employees "
+                      f"for status {status.value} ({len(employee_ids) - len(workflow_ids)} already had it).")
+        return assigned
+
+
+workflow_trigger_cache = WorkflowTriggerCache()
+workflow_auto_assigner = WorkflowAutoAssigner(workflow_trigger_cache)
+
+domain_events.subscribe(WorkflowTemplatesChanged, lambda event: workflow_trigger_cache.invalidate())
+domain_events.subscribe(EmploymentStatusChanged, workflow_auto_assigner.handle)
@@ -0,0 +1,401 @@
+# hr_software/app/services/workforce_history.py
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import groupby, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, Integer, column, literal, literal_column, values
+from sqlmodel import Session, select, delete, insert, func, exists, case, cast
+
+from app.core.locks import SNAPSHOT_LOCK_KEY
+from app.models.employee import EmployeeProfile, EmploymentHistory, HeadcountSnapshot
+from app.models.enums import EmploymentEvent, EmploymentStatus
+
+TRACKED_FIELDS = ("employment_status", "department_id", "manager_id", "job_title", "hire_date")
+SEPARATED_STATUSES = (EmploymentStatus.RESIGNED, EmploymentStatus.TERMINATED)
+NO_DEPARTMENT = 0  # HeadcountSnapshot.department_id of employees without a department
+NO_HIRE_DATE = 0  # HeadcountSnapshot.hire_year of employees without a hire date
+SNAPSHOT_INSERT_CHUNK = 5000
+# Rows are looked up from a little before the last refresh, so a transaction that set its change marker
+# before the refresh started but committed after it is still picked up; rebuilding twice is harmless
+CHANGE_MARKER_OVERLAP = timedelta(minutes=5)
+
+
+# --- Recording ---
+def employment_state(profile) -> dict:
+    return {name: getattr(profile, name) for name in TRACKED_FIELDS}
+
+
+def separation_date(profile) -> Optional[date]:
+    """Same precedence as the document tiering: last working day, then termination, then resignation date."""
+    return profile.last_working_day or profile.termination_date or profile.resignation_date
+
+
+def _row(employee_id: int, effective_date: date, event: EmploymentEvent, state: dict) -> dict:
+    return {"employee_id": employee_id, "effective_date": effective_date, "event": event,
+            **state, "recorded_at": datetime.utcnow()}
+
+
+def history_rows(employee_id: int, old: Optional[dict], new: dict, separated_on: Optional[date] = None,
+                 today: Optional[date] = None) -> List[dict]:
+    """
+    The EmploymentHistory rows for one change of an employee from state old (None for a new profile)
+    to state new. Hires take effect on the hire date, separations on separated_on, everything else on
+    the day it is recorded. A new hire date on an employee who is not separated moves the hire.
+    """
+    today = today or date.today()
+    if old is None:
+        hired_on = new["hire_date"] or today
+        if new["employment_status"] not in SEPARATED_STATUSES:
+            return [_row(employee_id, hired_on, EmploymentEvent.HIRED, new)]
+        # Created already separated (imported leavers, backfill): part of the workforce from hire to separation
+        return [_row(employee_id, hired_on, EmploymentEvent.HIRED, {**new, "employment_status": EmploymentStatus.ACTIVE}),
+                _row(employee_id, max(hired_on, separated_on or hired_on), EmploymentEvent.SEPARATED, new)]
+    if old == new:
+        return []
+    was_separated = old["employment_status"] in SEPARATED_STATUSES
+    is_separated = new["employment_status"] in SEPARATED_STATUSES
+    if is_separated and not was_separated:
+        return [_row(employee_id, separated_on or today, EmploymentEvent.SEPARATED, new)]
+    if was_separated and not is_separated:
+        rehired_on = new["hire_date"] if new["hire_date"] and new["hire_date"] != old["hire_date"] else today
+        return [_row(employee_id, rehired_on, EmploymentEvent.REHIRED, new)]
+    rows = []
+    if not is_separated and new["hire_date"] and new["hire_date"] != old["hire_date"]:
+        # Hire date set or corrected: a HIRED row at the new date, which the snapshot build folds into
+        # the start of the current employment (see _apply_hire_corrections)
+        rows.append(_row(employee_id, new["hire_date"], EmploymentEvent.HIRED, new))
+        if {**old, "hire_date": new["hire_date"]} == new:
+            return rows
+    if old["department_id"] != new["department_id"]:
+        return rows + [_row(employee_id, today, EmploymentEvent.TRANSFERRED, new)]
+    return rows + [_row(employee_id, today, EmploymentEvent.CHANGED, new)]
+
+
+def record_employment_change(db: Session, profile: EmployeeProfile, old: Optional[dict]) -> None:
+    """Appends the history of a created (old=None) or updated profile. Caller commits."""
+    rows = history_rows(profile.id, old, employment_state(profile), separation_date(profile))
+    if rows:
+        db.exec(insert(EmploymentHistory), params=rows)
+
+
+def record_new_employees(db: Session, states: Iterable[Tuple[int, dict]]) -> int:
+    """Bulk version of record_employment_change for (employee_id, state) pairs of new profiles. Caller commits."""
+    rows = [row for employee_id, state in states for row in history_rows(employee_id, None, state)]
+    if rows:
+        db.exec(insert(EmploymentHistory), params=rows)
+    return len(rows)
+
+
+def record_employee_removed(db: Session, profile: EmployeeProfile) -> None:
+    """A deleted profile leaves the workforce from today on without counting as a separation. Caller commits."""
+    db.exec(insert(EmploymentHistory), params=[
+        _row(profile.id, date.today(), EmploymentEvent.REMOVED, employment_state(profile))
+    ])
+
+
+def backfill_employment_history(db: Session) -> int:
+    """Writes the hire (and separation) rows of every profile that has no history yet. Caller commits."""
+    profiles = db.exec(
+        select(EmployeeProfile)
+        .where(~exists().where(EmploymentHistory.employee_id == EmployeeProfile.id))
+        .order_by(EmployeeProfile.id)
+    ).all()
+    rows = [row for profile in profiles
+            for row in history_rows(profile.id, None, employment_state(profile), separation_date(profile))]
+    if rows:
+        db.exec(insert(EmploymentHistory), params=rows)
+    return len(rows)
+
+
+# --- Snapshots ---
+def _counted(status: EmploymentStatus, event: EmploymentEvent) -> bool:
+    return event != EmploymentEvent.REMOVED and status not in SEPARATED_STATUSES
+
+
+def _apply_hire_corrections(rows: List[list]) -> List[list]:
+    """
+    One employee's [id, effective_date, event, status, department_id, hire_date] rows with every HIRED
+    row after the first (a hire date set or corrected later) folded into the start of the employment
+    it was recorded in: the start moves to the new date, and the employment's earlier rows take the
+    new hire date and start no earlier than it. Returned in (effective_date, id) order.
+    """
+    corrected, spell_start = [], None
+    for row in sorted(rows, key=lambda row: row[0]):
+        event = row[2]
+        if event == EmploymentEvent.HIRED and spell_start is not None:
+            corrected[spell_start][1] = row[1]
+            for earlier in corrected[spell_start:]:
+                earlier[1], earlier[5] = max(earlier[1], row[1]), row[5]
+            continue
+        if event in (EmploymentEvent.HIRED, EmploymentEvent.REHIRED):
+            spell_start = len(corrected)
+        corrected.append(row)
+    return sorted(corrected, key=lambda row: (row[1], row[0]))
+
+
+def build_headcount_snapshots(db: Session, start: date, end: date) -> int:
+    """
+    Replaces the snapshots of start..end (inclusive) with ones computed from the history: a single
+    ordered pass over the rows effective up to end turns each employee's history into intervals,
+    which become +1 / -1 marks per (department, hire year), summed into runs of days with the same
+    headcount. PostgreSQL expands the runs into days itself (generate_series); other databases get
+    the day rows in chunks. Caller commits. Returns the snapshot rows written.
+    """
+    built_at = datetime.utcnow()
+    marks: Dict[Tuple[int, int], Dict[date, int]] = defaultdict(lambda: defaultdict(int))
+    movements: Dict[Tuple[int, int], Dict[date, List[int]]] = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    after_end = end + timedelta(days=1)
+
+    def close(interval: Optional[tuple], until: date) -> None:
+        if interval is None:
+            return
+        since, key = interval
+        since, until = max(since, start), min(until, after_end)
+        if since < until:
+            marks[key][since] += 1
+            if until <= end:
+                marks[key][until] -= 1
+
+    rows = db.exec(
+        select(EmploymentHistory.employee_id, EmploymentHistory.id, EmploymentHistory.effective_date,
+               EmploymentHistory.event, EmploymentHistory.employment_status, EmploymentHistory.department_id,
+               EmploymentHistory.hire_date)
+        # Hire corrections dated after end can still move an earlier hire
+        .where((EmploymentHistory.effective_date <= end) | (EmploymentHistory.event == EmploymentEvent.HIRED))
+        .order_by(EmploymentHistory.employee_id, EmploymentHistory.effective_date, EmploymentHistory.id)
+        .execution_options(yield_per=5000)
+    )
+    for _, employee_rows in groupby(rows, key=lambda row: row[0]):
+        interval = None
+        for _, effective_date, event, status, department_id, hire_date in _apply_hire_corrections(
+                [list(row[1:]) for row in employee_rows]):
+            if effective_date > end:
+                break
+            key = (department_id or NO_DEPARTMENT, hire_date.year if hire_date else NO_HIRE_DATE)
+            if start <= effective_date:
+                if event in (EmploymentEvent.HIRED, EmploymentEvent.REHIRED):
+                    movements[key][effective_date][0] += 1
+                elif event == EmploymentEvent.SEPARATED:
+                    movements[key][effective_date][1] += 1
+            close(interval, effective_date)
+            interval = (effective_date, key) if _counted(status, event) else None
+        close(interval, after_end)
+
+    db.exec(delete(HeadcountSnapshot).where(HeadcountSnapshot.snapshot_date >= start,
+                                            HeadcountSnapshot.snapshot_date <= end))
+    runs = _snapshot_runs(marks, movements, end)
+    written = 0
+    while True:
+        chunk = list(islice(runs, SNAPSHOT_INSERT_CHUNK))
+        if not chunk:
+            return written
+        if db.get_bind().dialect.name == "postgresql":
+            written += db.exec(_insert_expanded_runs(chunk, built_at)).rowcount
+        else:
+            rows = [row for run in chunk for row in _run_days(run, built_at)]
+            for offset in range(0, len(rows), SNAPSHOT_INSERT_CHUNK):
+                db.exec(insert(HeadcountSnapshot), params=rows[offset:offset + SNAPSHOT_INSERT_CHUNK])
+            written += len(rows)
+
+
+def _snapshot_runs(marks, movements, end: date) -> Iterator[tuple]:
+    """
+    (first day, last day, department, hire year, headcount, hires, separations) for every run of days
+    with the same headcount and no movement after its first day; days without anyone are left out.
+    """
+    for key in set(marks) | set(movements):
+        key_marks, key_movements = marks.get(key, {}), movements.get(key, {})
+        days = sorted(set(key_marks) | set(key_movements))
+        headcount = 0
+        for index, day in enumerate(days):
+            headcount += key_marks.get(day, 0)
+            joined, left = key_movements.get(day, (0, 0))
+            if headcount:
+                last = days[index + 1] - timedelta(days=1) if index + 1 < len(days) else end
+                yield (day, last, *key, headcount, joined, left)
+            elif joined or left:
+                yield (day, day, *key, 0, joined, left)
+
+
+def _run_days(run: tuple, built_at: datetime) -> Iterator[dict]:
+    first, last, department_id, hire_year, headcount, joined, left = run
+    day = first
+    while day <= last:
+        yield {"snapshot_date": day, "department_id": department_id, "hire_year": hire_year,
+               "headcount": headcount, "hires": joined if day == first else 0,
+               "separations": left if day == first else 0, "built_at": built_at}
+        day += timedelta(days=1)
+
+
+def _insert_expanded_runs(runs: List[tuple], built_at: datetime):
+    """INSERT ... SELECT of one snapshot row per day of each run, the days generated by PostgreSQL."""
+    run = values(
+        column("first_day", Date), column("last_day", Date), column("department_id", Integer),
+        column("hire_year", Integer), column("headcount", Integer), column("hires", Integer),
+        column("separations", Integer), name="run",
+    ).data(runs)
+    days = select(
+        cast(func.generate_series(run.c.first_day, run.c.last_day, literal_column("interval '1 day'")), Date)
+        .label("snapshot_date"), run,
+    ).subquery()
+    first_day = days.c.snapshot_date == days.c.first_day
+    return insert(HeadcountSnapshot).from_select(
+        ["snapshot_date", "department_id", "hire_year", "headcount", "hires", "separations", "built_at"],
+        select(days.c.snapshot_date, days.c.department_id, days.c.hire_year, days.c.headcount,
+               case((first_day, days.c.hires), else_=0), case((first_day, days.c.separations), else_=0),
+               literal(built_at, DateTime)),
+    )
+
+
+def refresh_headcount_snapshots(db: Session, through: Optional[date] = None) -> int:
+    """
+    Brings the snapshots up to date through the given day (today by default): builds the days after
+    the last snapshot, and rebuilds from the earliest effective date of history recorded since the
+    last build, less CHANGE_MARKER_OVERLAP (backdated separations, corrections), or from the first
+    history of an employee whose hire moved. A no-op costing three small queries when nothing changed. Caller commits. Returns the snapshot rows written.
+    """
+    through = min(through or date.today(), date.today())
+    if db.get_bind().dialect.name == "postgresql":
+        # Concurrent refreshes would insert the same rows; the later one waits, then finds little to do
+        db.exec(select(func.pg_advisory_xact_lock(SNAPSHOT_LOCK_KEY))).one()
+    last_date, last_built = db.exec(
+        select(func.max(HeadcountSnapshot.snapshot_date), func.max(HeadcountSnapshot.built_at))
+    ).one()
+    if last_date is None:
+        start = db.exec(select(func.min(EmploymentHistory.effective_date))).one()
+        if start is None:
+            return 0
+    else:
+        start = last_date + timedelta(days=1)
+        changed_since = last_built - CHANGE_MARKER_OVERLAP
+        backdated = db.exec(
+            select(func.min(EmploymentHistory.effective_date)).where(EmploymentHistory.recorded_at >= changed_since)
+        ).one()
+        # A hire moved to a later date also changes the days since the old one: rebuild from the
+        # earliest row of every employee with a hire recorded since the last build
+        hire_moved_from = db.exec(
+            select(func.min(EmploymentHistory.effective_date)).where(EmploymentHistory.employee_id.in_(
+                select(EmploymentHistory.employee_id).where(EmploymentHistory.recorded_at >= changed_since,
+                                                            EmploymentHistory.event == EmploymentEvent.HIRED)
+            ))
+        ).one()
+        backdated = min((day for day in (backdated, hire_moved_from) if day is not None), default=None)
+        if backdated is not None and backdated < start:
+            start = backdated
+    if start > through:
+        return 0
+    return build_headcount_snapshots(db, start, through)
+
+
+# --- Reports ---
+INTERVALS = ("day", "week", "month")
+
+
+def period_end(day: date, interval: str) -> date:
+    if interval == "week":
+        return day + timedelta(days=6 - day.weekday())  # Sunday
+    if interval == "month":
+        following = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        return following - timedelta(days=1)
+    return day
+
+
+class WorkforceReportService:
+    """
+    Headcount trend, attrition and hire-cohort retention read from HeadcountSnapshot, brought up to
+    date first. Every figure is a grouped read of a date range (or a few dates) of the snapshot
+    primary key, however many employees and changes there are.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, through: date) -> None:
+        if refresh_headcount_snapshots(self.db, through):
+            print(f"Headcount snapshots refreshed through {min(through, date.today())}.")
+        self.db.commit()
+
+    def _headcounts(self, days: List[date], department_id: Optional[int], group_by=None) -> Dict:
+        """Headcount at the end of each day (and per group_by value) in one grouped query."""
+        statement = select(HeadcountSnapshot.snapshot_date, *([group_by] if group_by is not None else []),
+                           func.sum(HeadcountSnapshot.headcount)).where(HeadcountSnapshot.snapshot_date.in_(days))
+        if department_id is not None:
+            statement = statement.where(HeadcountSnapshot.department_id == department_id)
+        statement = statement.group_by(HeadcountSnapshot.snapshot_date, *([group_by] if group_by is not None else []))
+        return {tuple(row[:-1]) if group_by is not None else row[0]: int(row[-1])
+                for row in self.db.exec(statement).all()}
+
+    def _movements(self, start: date, end: date, department_id: Optional[int]) -> List[tuple]:
+        """(day, hires, separations) for the days in start..end that had any."""
+        statement = (
+            select(HeadcountSnapshot.snapshot_date, func.sum(HeadcountSnapshot.hires),
+                   func.sum(HeadcountSnapshot.separations))
+            .where(HeadcountSnapshot.snapshot_date >= start, HeadcountSnapshot.snapshot_date <= end,
+                   (HeadcountSnapshot.hires > 0) | (HeadcountSnapshot.separations > 0))
+            .group_by(HeadcountSnapshot.snapshot_date)
+        )
+        if department_id is not None:
+            statement = statement.where(HeadcountSnapshot.department_id == department_id)
+        return [(day, int(joined), int(left)) for day, joined, left in self.db.exec(statement).all()]
+
+    def attrition(self, start: date, end: date, department_id: Optional[int] = None) -> dict:
+        """Headcount at the end of the day before start and at the end of end, and the movements in between."""
+        self.refresh(end)
+        before = start - timedelta(days=1)
+        today = date.today()
+        headcounts = self._headcounts([min(before, today), min(end, today)], department_id)
+        movements = self._movements(start, end, department_id)
+        starting, ending = headcounts.get(min(before, today), 0), headcounts.get(min(end, today), 0)
+        separations = sum(left for _, _, left in movements)
+        average = (starting + ending) / 2.0
+        return {
+            "period_start": start, "period_end": end, "starting_headcount": starting, "ending_headcount": ending,
+            "hires": sum(joined for _, joined, _ in movements), "separations": separations,
+            "attrition_rate_percentage": round(100.0 * separations / average, 2) if average > 0 else 0.0,
+        }
+
+    def trend(self, start: date, end: date, interval: str = "month", department_id: Optional[int] = None) -> dict:
+        """Headcount at the end of every day / week / month of start..end, with the hires and separations in it."""
+        if interval not in INTERVALS:
+            raise ValueError(f"Unknown interval '{interval}'.")
+        self.refresh(end)
+        end = min(end, date.today())
+        periods, day = [], start
+        while day <= end:
+            periods.append(min(period_end(day, interval), end))
+            day = periods[-1] + timedelta(days=1)
+        headcounts = self._headcounts(periods, department_id) if periods else {}
+        joined, left = defaultdict(int), defaultdict(int)
+        for day, day_hires, day_separations in self._movements(start, end, department_id):
+            joined[min(period_end(day, interval), end)] += day_hires
+            left[min(period_end(day, interval), end)] += day_separations
+        return {"interval": interval, "points": [
+            {"period_end": period, "headcount": headcounts.get(period, 0), "hires": joined[period],
+             "separations": left[period]}
+            for period in periods
+        ]}
+
+    def retention(self, from_year: int, to_year: int, as_of: Optional[date] = None,
+                  department_id: Optional[int] = None) -> dict:
+        """For each hire-year cohort: how many joined, and how many of them are still employed as of the date."""
+        as_of = min(as_of or date.today(), date.today())
+        self.refresh(as_of)
+        hired_statement = (
+            select(HeadcountSnapshot.hire_year, func.sum(HeadcountSnapshot.hires))
+            .where(HeadcountSnapshot.hire_year >= from_year, HeadcountSnapshot.hire_year <= to_year,
+                   HeadcountSnapshot.snapshot_date <= as_of, HeadcountSnapshot.hires > 0)
+            .group_by(HeadcountSnapshot.hire_year)
+        )
+        if department_id is not None:
+            hired_statement = hired_statement.where(HeadcountSnapshot.department_id == department_id)
+        hired = {year: int(count) for year, count in self.db.exec(hired_statement).all()}
+        retained = {year: count for (_, year), count in
+                    self._headcounts([as_of], department_id, group_by=HeadcountSnapshot.hire_year).items()}
+        cohorts = []
+        for year in range(from_year, to_year + 1):
+            joined, still = hired.get(year, 0), retained.get(year, 0)
+            cohorts.append({"hire_year": year, "hired": joined, "retained": still,
+                            "retention_rate_percentage": round(100.0 * still / joined, 2) if joined else None})
+        return {"as_of": as_of, "cohorts": cohorts}
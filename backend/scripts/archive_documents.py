@@ -0,0 +1,46 @@
+# hr_software/scripts/archive_documents.py
+# Moves documents of employees separated more than DOCUMENT_COLD_TIER_AFTER_DAYS ago into compressed
+# pack archives (cold tier) and compacts packs; meant for a nightly cron job.
+#   python -m scripts.archive_documents [--older-than-days N] [--dry-run] [--compact]
+#   python -m scripts.archive_documents --restore-employee EMPLOYEE_ID
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.document_tiering_service import DocumentTieringService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive documents of former employees into the cold tier.")
+    parser.add_argument("--older-than-days", type=int, help="Override DOCUMENT_COLD_TIER_AFTER_DAYS")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived")
+    parser.add_argument("--compact", action="store_true", help="Also rewrite packs that are mostly deleted data")
+    parser.add_argument("--restore-employee", type=int, metavar="EMPLOYEE_ID",
+                        help="Move one employee's archived documents back to the hot tier instead")
+    args = parser.parse_args()
+
+    with Session(engine) as db:
+        service = DocumentTieringService(db)
+        if args.restore_employee is not None:
+            restored = service.restore_employee_documents(args.restore_employee)
+            print(f"Restored {restored} blobs of employee {args.restore_employee} to the hot tier.")
+            return 0
+
+        result = service.archive_separated_documents(older_than_days=args.older_than_days, dry_run=args.dry_run)
+        if result.dry_run:
+            print(f"Dry run: would archive {result.blobs_archived} blobs "
+                  f"and import {result.legacy_files_imported} loose legacy files first.")
+            return 0
+        ratio = result.bytes_stored / result.bytes_archived if result.bytes_archived else 1.0
+        print(f"Archived {result.blobs_archived} blobs ({result.documents_archived} documents) into "
+              f"{result.packs_written} packs: {result.bytes_archived} -> {result.bytes_stored} bytes ({ratio:.0%}); "
+              f"{result.legacy_files_imported} legacy files imported.")
+        if args.compact:
+            print(f"Compaction removed {service.compact_packs()} packs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# hr_software/scripts/bench_utils.py
+# Shared helpers for the query-count benchmarks in this folder.
+# Run benchmarks from the backend/ directory, e.g.:
+#   python -m scripts.benchmark_employee_directory
+# They use BENCHMARK_DATABASE_URL (default: in-memory SQLite) so they never touch the real database.
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # Settings require it; the app engine is never used here
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret")
+
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+
+def make_benchmark_engine():
+    url = os.getenv("BENCHMARK_DATABASE_URL", "sqlite://")
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(url)
+
+    # Import every model module so all tables are registered on the metadata
+    import app.models.user, app.models.employee, app.models.workflow  # noqa: F401,E401
+    import app.models.leave, app.models.payroll, app.models.performance  # noqa: F401,E401
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class QueryCounter:
+    """Context manager that records every SQL statement sent through an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.locking_statements = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        # Row locks are read off the statement object: SQLite leaves FOR UPDATE out of the SQL it sends
+        compiled = getattr(context, "compiled", None)
+        if getattr(getattr(compiled, "statement", None), "_for_update_arg", None) is not None \
+                or "FOR UPDATE" in statement.upper():
+            self.locking_statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def locking_count(self) -> int:
+        return len(self.locking_statements)
@@ -0,0 +1,98 @@
+# hr_software/scripts/benchmark_employee_directory.py
+# Compares the number of SQL statements needed to build one page of EmployeeProfileReadWithUser
+# with the old per-profile helper vs. the EmployeeDirectoryService projection.
+#   python -m scripts.benchmark_employee_directory
+from scripts.bench_utils import make_benchmark_engine, QueryCounter
+
+from datetime import date
+from sqlmodel import Session
+
+from app.crud import crud_employee
+from app.models.enums import UserRole, EmploymentStatus, DocumentType, WorkflowType, EmployeeWorkflowStatus
+from app.models.employee import Department, EmployeeProfile, EmployeeDocument
+from app.models.user import User
+from app.models.workflow import WorkflowTemplate, EmployeeWorkflow
+from app.schemas.employee import EmployeeProfileReadWithUser, EmployeeDocumentRead
+from app.services.directory_service import EmployeeDirectoryService
+
+PAGE_SIZES = [10, 50, 200]
+
+
+def seed(db: Session, total_employees: int):
+    department = Department(name="Engineering")
+    template = WorkflowTemplate(name="Onboarding", workflow_type=WorkflowType.ONBOARDING)
+    db.add_all([department, template])
+    db.commit()
+
+    manager_user = User(email="manager@bench.local", first_name="Bench", last_name="Manager",
+                        hashed_password="x", role=UserRole.MANAGER)
+    db.add(manager_user)
+    db.commit()
+    manager = EmployeeProfile(user_id=manager_user.id, department_id=department.id,
+                              employment_status=EmploymentStatus.ACTIVE, hire_date=date(2020, 1, 1))
+    db.add(manager)
+    db.commit()
+
+    for i in range(total_employees):
+        user = User(email=f"employee{i}@bench.local", first_name="Bench", last_name=f"Employee{i}",
+                    hashed_password="x", role=UserRole.EMPLOYEE)
+        db.add(user)
+        db.flush()
+        profile = EmployeeProfile(user_id=user.id, department_id=department.id, manager_id=manager.id,
+                                  employment_status=EmploymentStatus.ACTIVE, job_title="Engineer")
+        db.add(profile)
+        db.flush()
+        db.add(EmployeeDocument(employee_id=profile.id, document_type=DocumentType.CONTRACT,
+                                file_name="contract.pdf", file_path=f"uploads/contract_{i}.pdf"))
+        db.add(EmployeeWorkflow(employee_id=profile.id, workflow_template_id=template.id,
+                                status=EmployeeWorkflowStatus.PENDING))
+    db.commit()
+
+
+def legacy_page(db: Session, limit: int):
+    """The per-profile pattern previously used by read_employee_profiles_api."""
+    page = []
+    for profile in crud_employee.get_employee_profiles(db, skip=0, limit=limit):
+        user = profile.user
+        manager_email = None
+        if profile.manager_id:
+            manager = crud_employee.get_employee_profile(db, profile.manager_id)
+            if manager and manager.user:
+                manager_email = manager.user.email
+        documents = [EmployeeDocumentRead.model_validate(d.model_dump()) for d in profile.documents]
+        page.append(EmployeeProfileReadWithUser(
+            **profile.model_dump(), user_email=user.email, user_first_name=user.first_name,
+            user_last_name=user.last_name, user_role=user.role.value, manager_email=manager_email,
+            documents=documents,
+        ))
+    return page
+
+
+def main():
+    engine = make_benchmark_engine()
+    with Session(engine) as db:
+        seed(db, max(PAGE_SIZES))
+
+    print(f"{'page size':>10} {'legacy':>8} {'directory':>10} {'no docs':>8} {'+workflows':>11}")
+    directory_counts = set()
+    for page_size in PAGE_SIZES:
+        counts = []
+        for run in (
+                lambda db: legacy_page(db, page_size),
+                lambda db: EmployeeDirectoryService(db).get_profiles_page(limit=page_size),
+                lambda db: EmployeeDirectoryService(db).get_profiles_page(limit=page_size, include_documents=False),
+                lambda db: EmployeeDirectoryService(db).get_profiles_page(limit=page_size, include_workflows=True),
+        ):
+            with Session(engine) as db, QueryCounter(engine) as counter:
+                result = run(db)
+                assert len(result) == page_size
+            counts.append(counter.count)
+        directory_counts.add(tuple(counts[1:]))
+        print(f"{page_size:>10} {counts[0]:>8} {counts[1]:>10} {counts[2]:>8} {counts[3]:>11}")
+
+    assert len(directory_counts) == 1, "Directory query count must not grow with page size"
+    print("OK: directory query count is independent of page size.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# hr_software/scripts/benchmark_employee_import.py
+# Times EmployeeImportService on a generated CSV (default 10k rows, managers referenced forward and
+# backward in the file, onboarding workflow auto-assigned) and counts the SQL statements it needs.
+#   python -m scripts.benchmark_employee_import [row_count]
+# Rows use the import's default password; per-row passwords cost one bcrypt hash each (~0.3 s per core).
+import io
+import sys
+import time
+
+from scripts.bench_utils import make_benchmark_engine, QueryCounter
+
+from sqlmodel import Session, select, func
+
+from app.models.enums import WorkflowType, EmploymentStatus
+from app.models.employee import Department, EmployeeProfile, EmployeeHierarchy
+from app.models.workflow import WorkflowTemplate, WorkflowStepTemplate, EmployeeWorkflowStep
+from app.services.employee_import_service import EmployeeImportService, read_import_rows
+
+DEFAULT_ROWS = 10_000
+TIME_BUDGET_SECONDS = 60.0
+TEAM_SIZE = 10
+
+
+def seed(db: Session):
+    db.add_all([Department(name="Engineering"), Department(name="Sales")])
+    template = WorkflowTemplate(name="Onboarding", workflow_type=WorkflowType.ONBOARDING,
+                                auto_assign_on_status=EmploymentStatus.ONBOARDING)
+    db.add(template)
+    db.flush()
+    db.add_all([WorkflowStepTemplate(workflow_template_id=template.id, name=f"Step {i}", order=i) for i in range(5)])
+    db.commit()
+
+
+def make_csv(row_count: int) -> bytes:
+    lines = ["Email,First Name,Last Name,Job Title,Department,Manager Email,Hire Date"]
+    for i in range(row_count - 1):
+        # Employees report to their team lead (listed earlier); leads report to the director, the last row
+        if i % TEAM_SIZE == 0:
+            email, manager = f"lead{i}@example.com", "director@example.com"
+        else:
+            email, manager = f"employee{i}@example.com", f"lead{(i // TEAM_SIZE) * TEAM_SIZE}@example.com"
+        department = "Engineering" if i % 2 else "Sales"
+        lines.append(f"{email},First{i},Last{i},Engineer,{department},{manager},2024-01-15")
+    lines.append("director@example.com,Dana,Director,Director,Engineering,,2020-01-01")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    engine = make_benchmark_engine()
+    with Session(engine) as db:
+        seed(db)
+        payload = make_csv(row_count)
+        started = time.perf_counter()
+        with QueryCounter(engine) as counter:
+            result = EmployeeImportService(db).import_rows(
+                read_import_rows(io.BytesIO(payload), "employees.csv"), default_password="Welcome123!"
+            )
+        elapsed = time.perf_counter() - started
+
+        profiles = db.exec(select(func.count()).select_from(EmployeeProfile)).one()
+        closure_rows = db.exec(select(func.count()).select_from(EmployeeHierarchy)).one()
+        steps = db.exec(select(func.count()).select_from(EmployeeWorkflowStep)).one()
+
+    print(f"{'rows':>7} {'imported':>9} {'failed':>7} {'queries':>8} {'seconds':>8}")
+    print(f"{row_count:>7} {result.imported:>9} {result.failed:>7} {counter.count:>8} {elapsed:>8.1f}")
+    print(f"profiles={profiles} closure_rows={closure_rows} workflows={result.workflows_assigned} steps={steps}")
+    assert result.imported == row_count and profiles == row_count
+    assert result.workflows_assigned == row_count and steps == row_count * 5
+    assert elapsed < TIME_BUDGET_SECONDS, f"import took {elapsed:.1f} s, budget is {TIME_BUDGET_SECONDS:.0f} s"
+    print(f"OK: {row_count} employees imported in under {TIME_BUDGET_SECONDS:.0f} s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# hr_software/scripts/benchmark_employee_search.py
+# Measures EmployeeSearchIndex latency (prefix, exact and typo queries) over a synthetic directory.
+#   python -m scripts.benchmark_employee_search [employee_count]
+import random
+import sys
+import time
+
+from scripts.bench_utils import make_benchmark_engine
+
+from sqlmodel import Session, insert
+
+from app.models.enums import UserRole, EmploymentStatus
+from app.models.employee import Department, EmployeeProfile
+from app.models.user import User
+from app.services.search_service import EmployeeSearchIndex
+
+DEFAULT_EMPLOYEES = 50_000
+P99_BUDGET_MS = 20.0
+
+FIRST_NAMES = ["james", "mary", "robert", "patricia", "john", "jennifer", "michael", "linda", "david",
+               "elizabeth", "william", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah",
+               "priya", "rahul", "ananya", "arjun", "fatima", "mohammed", "wei", "mei", "hiroshi", "yuki"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez",
+              "martinez", "hernandez", "lopez", "gonzalez", "wilson", "anderson", "taylor", "moore",
+              "sharma", "patel", "gupta", "khan", "chen", "wang", "tanaka", "suzuki", "nakamura"]
+JOB_TITLES = ["Software Engineer", "Senior Software Engineer", "Product Manager", "Designer", "Accountant",
+              "HR Generalist", "Recruiter", "Data Analyst", "Sales Executive", "Support Specialist"]
+DEPARTMENTS = ["Engineering", "Product", "Design", "Finance", "People", "Sales", "Support", "Marketing"]
+
+
+def seed(db: Session, total_employees: int, rng: random.Random):
+    db.execute(insert(Department), [{"name": name} for name in DEPARTMENTS])
+    db.execute(insert(User), [
+        {"email": f"{rng.choice(FIRST_NAMES)}.{rng.choice(LAST_NAMES)}{i}@bench.local",
+         "first_name": rng.choice(FIRST_NAMES).title(), "last_name": f"{rng.choice(LAST_NAMES).title()}{i % 97}",
+         "hashed_password": "x", "role": UserRole.EMPLOYEE, "is_active": True}
+        for i in range(total_employees)
+    ])
+    db.execute(insert(EmployeeProfile), [
+        {"user_id": i + 1, "department_id": rng.randint(1, len(DEPARTMENTS)),
+         "job_title": rng.choice(JOB_TITLES), "employment_status": EmploymentStatus.ACTIVE}
+        for i in range(total_employees)
+    ])
+    db.commit()
+
+
+def make_queries(rng: random.Random, count: int):
+    queries = []
+    for _ in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        kind = rng.randrange(4)
+        if kind == 0:
+            queries.append(first[:rng.randint(1, len(first))])  # prefix while typing
+        elif kind == 1:
+            queries.append(f"{first} {last}")  # exact full name
+        elif kind == 2:
+            position = rng.randrange(len(last) - 1)  # transposed letters
+            queries.append(last[:position] + last[position + 1] + last[position] + last[position + 2:])
+        else:
+            queries.append(f"{rng.choice(JOB_TITLES).split()[0].lower()[:4]} {first[:3]}")
+    return queries
+
+
+def main():
+    total_employees = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EMPLOYEES
+    rng = random.Random(42)
+    engine = make_benchmark_engine()
+    with Session(engine) as db:
+        seed(db, total_employees, rng)
+        index = EmployeeSearchIndex()
+        started = time.perf_counter()
+        index.rebuild(db)
+        print(f"Indexed {total_employees} employees in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    timings = []
+    for query in make_queries(rng, 2000):
+        started = time.perf_counter()
+        index.search(query, limit=20)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{'queries':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    print(f"{len(timings):>8} {p50:>8.2f} {p99:>8.2f} {timings[-1]:>8.2f}")
+    assert p99 < P99_BUDGET_MS, f"p99 search latency {p99:.1f} ms exceeds {P99_BUDGET_MS} ms"
+    print(f"OK: p99 search latency is under {P99_BUDGET_MS:.0f} ms.")
+
+
+if __name__ == "__main__":
+    main()
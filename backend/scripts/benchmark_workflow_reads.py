@@ -0,0 +1,144 @@
+# hr_software/scripts/benchmark_workflow_reads.py
+# Compares the SQL statements (and row locks) needed to build the workflow responses of
+# GET /workflows/employee/{id} and GET /workflows/templates/ with the old refresh-based
+# helpers vs. the WorkflowReadService. Fails if the new path locks rows or its query count
+# grows with the number of workflows / steps.
+#   python -m scripts.benchmark_workflow_reads
+# Row locks are counted from the statements themselves, so the check also holds on SQLite,
+# which drops FOR UPDATE from the SQL it sends.
+from scripts.bench_utils import make_benchmark_engine, QueryCounter
+
+from datetime import datetime
+from sqlmodel import Session, select
+
+from app.crud import crud_user
+from app.models.enums import UserRole, WorkflowType, EmployeeWorkflowStatus, EmployeeWorkflowStepStatus
+from app.models.employee import EmployeeProfile
+from app.models.user import User
+from app.models.workflow import WorkflowTemplate, WorkflowStepTemplate, EmployeeWorkflow, EmployeeWorkflowStep
+from app.schemas.workflow import WorkflowStepTemplateRead, WorkflowTemplateRead, EmployeeWorkflowStepRead
+from app.services.workflow_read_service import WorkflowReadService
+
+WORKFLOW_COUNTS = [1, 10, 50]  # Workflows assigned to the measured employee
+STEPS_PER_TEMPLATE = 8
+
+
+def seed(db: Session):
+    completer = User(email="hr@bench.local", first_name="Bench", last_name="HR", hashed_password="x",
+                     role=UserRole.ADMIN)
+    db.add(completer)
+    db.commit()
+
+    templates = []
+    for i in range(max(WORKFLOW_COUNTS)):
+        template = WorkflowTemplate(name=f"Template {i:03d}", workflow_type=WorkflowType.ONBOARDING)
+        db.add(template)
+        db.flush()
+        for order in range(1, STEPS_PER_TEMPLATE + 1):
+            db.add(WorkflowStepTemplate(workflow_template_id=template.id, name=f"Step {order}", order=order))
+        templates.append(template)
+    db.commit()
+
+    employee_ids = {}
+    for workflow_count in WORKFLOW_COUNTS:
+        user = User(email=f"employee{workflow_count}@bench.local", first_name="Bench",
+                    last_name=f"Employee{workflow_count}", hashed_password="x", role=UserRole.EMPLOYEE)
+        db.add(user)
+        db.flush()
+        profile = EmployeeProfile(user_id=user.id)
+        db.add(profile)
+        db.flush()
+        for template in templates[:workflow_count]:
+            workflow = EmployeeWorkflow(employee_id=profile.id, workflow_template_id=template.id,
+                                        status=EmployeeWorkflowStatus.IN_PROGRESS)
+            db.add(workflow)
+            db.flush()
+            for step_template in template.steps:
+                done = step_template.order % 2 == 0
+                db.add(EmployeeWorkflowStep(
+                    employee_workflow_id=workflow.id, step_template_id=step_template.id,
+                    status=EmployeeWorkflowStepStatus.COMPLETED if done else EmployeeWorkflowStepStatus.PENDING,
+                    completed_on=datetime.utcnow() if done else None,
+                    completed_by_user_id=completer.id if done else None,
+                ))
+        employee_ids[workflow_count] = profile.id
+    db.commit()
+    return employee_ids
+
+
+def legacy_employee_workflows(db: Session, employee_id: int):
+    """The refresh-per-row pattern previously used by get_employee_workflows_api."""
+    workflows = db.exec(select(EmployeeWorkflow).where(EmployeeWorkflow.employee_id == employee_id)).all()
+    result = []
+    for workflow in workflows:
+        db.refresh(workflow, with_for_update=True)
+        for step in workflow.steps:
+            db.refresh(step, with_for_update=True)
+        steps = []
+        for step in workflow.steps:
+            template_step = step.step_template
+            completed_by = crud_user.get_user(db, step.completed_by_user_id) if step.completed_by_user_id else None
+            steps.append(EmployeeWorkflowStepRead(
+                id=step.id, step_template_id=template_step.id, step_name=template_step.name,
+                step_description=template_step.description, step_order=template_step.order,
+                is_mandatory=template_step.is_mandatory, status=step.status, completed_on=step.completed_on,
+                completed_by_user_email=completed_by.email if completed_by else None, notes=step.notes,
+            ))
+        result.append((workflow.template.name, steps))
+    return result
+
+
+def legacy_templates(db: Session, limit: int):
+    """The refresh-per-row pattern previously used by read_workflow_templates_api."""
+    templates = db.exec(select(WorkflowTemplate).limit(limit)).all()
+    result = []
+    for template in templates:
+        db.refresh(template)
+        for step in template.steps:
+            db.refresh(step, with_for_update=True)
+        result.append(WorkflowTemplateRead(
+            **template.model_dump(),
+            steps=[WorkflowStepTemplateRead.model_validate(step.model_dump()) for step in template.steps],
+        ))
+    return result
+
+
+def measure(engine, run):
+    with Session(engine) as db, QueryCounter(engine) as counter:
+        result = run(db)
+    return result, counter
+
+
+def main():
+    engine = make_benchmark_engine()
+    with Session(engine) as db:
+        employee_ids = seed(db)
+
+    print(f"{'workflows':>10} {'legacy':>8} {'locks':>6} {'service':>8} {'locks':>6} "
+          f"{'tmpl legacy':>12} {'tmpl service':>13}")
+    service_counts = set()
+    for workflow_count in WORKFLOW_COUNTS:
+        employee_id = employee_ids[workflow_count]
+        legacy, legacy_counter = measure(engine, lambda db: legacy_employee_workflows(db, employee_id))
+        current, counter = measure(engine, lambda db: WorkflowReadService(db).list_employee_workflows(employee_id))
+        assert len(current) == len(legacy) == workflow_count
+        assert all(len(workflow.steps) == STEPS_PER_TEMPLATE for workflow in current)
+        assert sum(step.completed_by_user_email is not None for workflow in current for step in workflow.steps) \
+            == sum(step.completed_by_user_email is not None for _, steps in legacy for step in steps)
+
+        _, legacy_template_counter = measure(engine, lambda db: legacy_templates(db, workflow_count))
+        templates, template_counter = measure(engine, lambda db: WorkflowReadService(db).list_templates(limit=workflow_count))
+        assert len(templates) == workflow_count
+
+        assert counter.locking_count == 0 and template_counter.locking_count == 0, "Read path must not lock rows"
+        service_counts.add((counter.count, template_counter.count))
+        print(f"{workflow_count:>10} {legacy_counter.count:>8} {legacy_counter.locking_count:>6} "
+              f"{counter.count:>8} {counter.locking_count:>6} "
+              f"{legacy_template_counter.count:>12} {template_counter.count:>13}")
+
+    assert len(service_counts) == 1, "Workflow read query count must not grow with the number of workflows"
+    print("OK: workflow reads take no row locks and a constant number of queries.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# hr_software/scripts/build_headcount_snapshots.py
+# Brings the daily HeadcountSnapshot table up to date from the EmploymentHistory rows; for a nightly cron
+# (the reports also refresh it on demand). --backfill first writes the hire / separation history of
+# profiles created before EmploymentHistory existed; --rebuild recomputes every snapshot.
+#   python -m scripts.build_headcount_snapshots [--backfill] [--rebuild]
+import argparse
+import sys
+from datetime import date
+
+from sqlmodel import Session, select, func
+
+from app.core.db import engine
+from app.models.employee import EmploymentHistory
+from app.services.report_cache import report_cache  # noqa: F401 - invalidates a shared (Redis) report cache
+from app.services.workforce_history import (
+    backfill_employment_history, build_headcount_snapshots, refresh_headcount_snapshots
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the daily headcount snapshots.")
+    parser.add_argument("--backfill", action="store_true", help="Write history rows for profiles without any")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every snapshot from the first history row")
+    args = parser.parse_args()
+
+    with Session(engine) as db:
+        if args.backfill:
+            print(f"Backfilled {backfill_employment_history(db)} employment history rows.")
+            db.commit()
+        if args.rebuild:
+            first = db.exec(select(func.min(EmploymentHistory.effective_date))).one()
+            written = build_headcount_snapshots(db, first, date.today()) if first else 0
+        else:
+            written = refresh_headcount_snapshots(db)
+        db.commit()
+    print(f"Wrote {written} headcount snapshot rows.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
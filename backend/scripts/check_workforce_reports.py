@@ -0,0 +1,103 @@
+# hr_software/scripts/check_workforce_reports.py
+# Regression check for the snapshot-based workforce reports: employees created without a hire date
+# (POST /users/) whose hire date is set afterwards (PUT) must count as hired on that date, in that
+# date's cohort, and a later correction of the hire date must move the hire. Fails if any cohort
+# retains more employees than it hired, or if the point-in-time headcount disagrees with the trend.
+#   python -m scripts.check_workforce_reports
+from scripts.bench_utils import make_benchmark_engine
+
+from datetime import date, timedelta
+from sqlmodel import Session
+
+from app.crud import crud_employee
+from app.models.employee import Department, EmploymentHistory
+from app.models.enums import UserRole, EmploymentStatus
+from app.models.user import User
+from app.schemas.employee import EmployeeProfileCreate, EmployeeProfileUpdate
+from app.services.headcount_service import HeadcountService
+from app.services.workforce_history import WorkforceReportService, build_headcount_snapshots
+
+EMPLOYEES = 6
+HIRED_ON = date(2023, 3, 1)
+MOVED_TO = date(2024, 6, 1)  # The last employee's hire date is corrected to this after a first report
+
+
+def check_retention(report: dict) -> None:
+    for cohort in report["cohorts"]:
+        assert cohort["retained"] <= cohort["hired"], f"cohort retains more than it hired: {cohort}"
+
+
+def check_point_in_time_headcount(db: Session, profiles) -> None:
+    """
+    A leaver whose last working day is after their resignation date, and a transfer made today,
+    must be counted the same way by /reports/headcount?as_of= and /reports/headcount/trend.
+    """
+    engineering, operations = Department(name="Engineering"), Department(name="Operations")
+    db.add_all([engineering, operations])
+    db.commit()
+    today = date.today()
+    as_of, resigned_on, last_day = today - timedelta(days=7), today - timedelta(days=10), today - timedelta(days=3)
+    for profile in profiles:
+        crud_employee.update_employee_profile(db, profile, EmployeeProfileUpdate(department_id=engineering.id))
+    leaver, mover = profiles[0], profiles[1]
+    crud_employee.update_employee_profile(db, leaver, EmployeeProfileUpdate(
+        employment_status=EmploymentStatus.RESIGNED, resignation_date=resigned_on, last_working_day=last_day))
+    # The department assignments above are effective today; rebuild as if they had been made before as_of
+    db.exec(EmploymentHistory.__table__.update().where(EmploymentHistory.effective_date == today)
+            .values(effective_date=as_of - timedelta(days=1)))
+    db.commit()
+    build_headcount_snapshots(db, HIRED_ON, today)
+    db.commit()
+    crud_employee.update_employee_profile(db, mover, EmployeeProfileUpdate(department_id=operations.id))
+
+    trend = WorkforceReportService(db).trend(as_of, as_of, "day")["points"][0]["headcount"]
+    report = HeadcountService(db).report("department", as_of)
+    by_department = {group["label"]: group["headcount"] for group in report["groups"]}
+    print(report)
+    assert report["total"] == trend == EMPLOYEES, (report, trend)
+    assert by_department == {"Engineering": EMPLOYEES, "Operations": 0}, by_department
+    cohorts = HeadcountService(db).report("hire_cohort", as_of)
+    assert cohorts["total"] == EMPLOYEES, cohorts
+
+
+def main():
+    engine = make_benchmark_engine()
+    with Session(engine) as db:
+        profiles = []
+        for i in range(EMPLOYEES):
+            user = User(email=f"u{i}@check.local", first_name="Check", last_name=f"Employee{i}",
+                        hashed_password="x", role=UserRole.EMPLOYEE)
+            db.add(user)
+            db.commit()
+            profiles.append(crud_employee.create_employee_profile(db, EmployeeProfileCreate(user_id=user.id)))
+        for profile in profiles:
+            crud_employee.update_employee_profile(db, profile, EmployeeProfileUpdate(
+                hire_date=HIRED_ON, employment_status=EmploymentStatus.ACTIVE))
+
+        service = WorkforceReportService(db)
+        attrition = service.attrition(date(2023, 1, 1), date(2024, 12, 31))
+        retention = service.retention(2023, 2024)
+        print(attrition)
+        print(retention)
+        assert (attrition["starting_headcount"], attrition["ending_headcount"], attrition["hires"]) \
+            == (0, EMPLOYEES, EMPLOYEES), attrition
+        check_retention(retention)
+        assert retention["cohorts"][0]["hired"] == retention["cohorts"][0]["retained"] == EMPLOYEES, retention
+
+        # Moving a hire later must also take the employee out of the days before the new date
+        crud_employee.update_employee_profile(db, profiles[-1], EmployeeProfileUpdate(hire_date=MOVED_TO))
+        attrition = service.attrition(date(2023, 1, 1), date(2023, 12, 31))
+        retention = service.retention(2023, 2024)
+        print(attrition)
+        print(retention)
+        assert (attrition["ending_headcount"], attrition["hires"]) == (EMPLOYEES - 1, EMPLOYEES - 1), attrition
+        check_retention(retention)
+        assert [(cohort["hired"], cohort["retained"]) for cohort in retention["cohorts"]] \
+            == [(EMPLOYEES - 1, EMPLOYEES - 1), (1, 1)], retention
+        check_point_in_time_headcount(db, profiles)
+    print("OK: hire dates set or corrected after creation move the hire; no cohort retains more than it hired;\n"
+          "the point-in-time headcount matches the trend.")
+
+
+if __name__ == "__main__":
+    main()
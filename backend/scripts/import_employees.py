@@ -0,0 +1,36 @@
+# hr_software/scripts/import_employees.py
+# Imports users and employee profiles from a CSV or XLSX file, same as POST /api/v1/users/import.
+#   python -m scripts.import_employees employees.csv --default-password 'Welcome123!' [--dry-run]
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.employee_import_service import EmployeeImportService, read_import_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import employees from a CSV or XLSX file.")
+    parser.add_argument("path", help="CSV or XLSX file with a header row")
+    parser.add_argument("--default-password", help="Temporary password for rows without a password column value")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and report without writing anything")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as stream, Session(engine) as db:
+        result = EmployeeImportService(db).import_rows(
+            read_import_rows(stream, args.path), default_password=args.default_password, dry_run=args.dry_run
+        )
+
+    for issue in result.errors:
+        print(f"Row {issue.row_number} ({issue.email or '-'}) skipped: {'; '.join(issue.messages)}")
+    for issue in result.warnings:
+        print(f"Row {issue.row_number} ({issue.email or '-'}): {'; '.join(issue.messages)}")
+    prefix = "Dry run: would import" if result.dry_run else "Imported"
+    print(f"{prefix} {result.imported} of {result.total_rows} rows; {result.failed} failed, "
+          f"{result.workflows_assigned} workflows assigned.")
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ from sqlmodel import Session, SQLModel, create_engine, select # <--- IMPORT sele
 from app.core.config import settings
 from app.core.db import engine as main_engine
 from app.core.security import get_password_hash
+from app.crud import crud_org
 
 # Import necessary models
 from app.models.user import User, UserRole
@@ -65,6 +66,8 @@ def create_user_with_profile_if_not_exists(
                 manager_id=manager_profile_id
             )
             db.add(profile)
+            db.flush()
+            crud_org.add_employee_node(db, profile.id, profile.manager_id)
             db.commit()
             db.refresh(profile)
             print(f"Employee profile for '{email}' created.")
@@ -0,0 +1,22 @@
+# hr_software/scripts/rebuild_goal_scores.py
+# Recomputes the GoalScoreRollup table (per employee and cycle goal totals) from the goals.
+# Run once after adding the table to an existing database, or after fixing goal data by hand.
+#   python -m scripts.rebuild_goal_scores
+import sys
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.goal_scores import rebuild_goal_score_rollups
+
+
+def main():
+    with Session(engine) as db:
+        written = rebuild_goal_score_rollups(db)
+        db.commit()
+    print(f"Rebuilt {written} goal score rollups.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
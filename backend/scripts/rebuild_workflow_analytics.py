@@ -0,0 +1,22 @@
+# hr_software/scripts/rebuild_workflow_analytics.py
+# Rebuilds the workflow cycle-time histograms behind GET /reports/workflows from the step history.
+# Run once after adding the WorkflowCycleTimeBucket table; afterwards step completions keep them current.
+#   python -m scripts.rebuild_workflow_analytics
+import sys
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.workflow_analytics import rebuild_cycle_time_histograms
+
+
+def main():
+    with Session(engine) as db:
+        samples = rebuild_cycle_time_histograms(db)
+        db.commit()
+    print(f"Rebuilt workflow cycle-time histograms from {samples} samples.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+# hr_software/scripts/recount_workflow_progress.py
+# Recomputes the EmployeeWorkflow progress counters (mandatory_steps_total, mandatory_steps_completed,
+# steps_started) from the step rows. Run once after adding the columns to an existing database.
+#   python -m scripts.recount_workflow_progress
+import sys
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.crud import crud_workflow
+
+
+def main():
+    with Session(engine) as db:
+        recounted = crud_workflow.recount_workflow_progress(db)
+        db.commit()
+    print(f"Recounted progress of {recounted} employee workflows.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
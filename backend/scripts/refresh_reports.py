@@ -0,0 +1,31 @@
+# hr_software/scripts/refresh_reports.py
+# Refreshes the reporting summary tables (leave by month, salary expense by run, headcount by day); for cron
+# when REPORT_REFRESH_INTERVAL_SECONDS=0 turns off the refresh inside the API process.
+# Run with --full once after adding the tables, or after fixing leave / payslip data by hand.
+#   python -m scripts.refresh_reports [--full]
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.report_cache import report_cache  # noqa: F401 - invalidates a shared (Redis) report cache
+from app.services.reporting_tables import ReportingTables
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the reporting summary tables.")
+    parser.add_argument("--full", action="store_true", help="Rebuild every month and payroll run")
+    args = parser.parse_args()
+
+    with Session(engine) as db:
+        result = ReportingTables(db).refresh(full=args.full)
+    if result.skipped:
+        print("Another process is refreshing right now; nothing done.")
+        return 0
+    print(f"Report refresh: {result.rebuilt}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
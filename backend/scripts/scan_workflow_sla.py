@@ -0,0 +1,29 @@
+# hr_software/scripts/scan_workflow_sla.py
+# Refreshes the overdue / at-risk workflow table read by GET /workflows/overdue; for cron when
+# WORKFLOW_SLA_SCAN_INTERVAL_SECONDS=0 turns off the scan inside the API process.
+#   python -m scripts.scan_workflow_sla [--at-risk-days N]
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.workflow_sla_service import WorkflowSlaScanner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find overdue and at-risk employee workflows.")
+    parser.add_argument("--at-risk-days", type=int, help="Override WORKFLOW_SLA_AT_RISK_DAYS")
+    args = parser.parse_args()
+
+    with Session(engine) as db:
+        result = WorkflowSlaScanner(db).scan(at_risk_days=args.at_risk_days)
+    if result.skipped:
+        print("Another process is scanning right now; nothing done.")
+        return 0
+    print(f"Workflow SLA scan: {result.overdue} overdue, {result.at_risk} at risk.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())